@@ -0,0 +1,205 @@
+import asyncio
+import logging
+from decimal import Decimal
+from typing import Dict, List, Optional
+from analysis.batch_strategy import BatchStrategyEvaluator
+from analysis.technical_analyzer import TechnicalAnalyzer
+from analysis.strategy import TradingStrategy
+from data.async_data_handler import AsyncDataHandler
+from data.kline_store import KlineStore
+from models import OCHLVData, TradeSignal
+from trading.async_trader import AsyncTrader
+from trading.portfolio_risk import PortfolioLimits, PortfolioRiskManager
+from trading.risk_manager import RiskManager
+from trading.symbol_info_manager import SymbolInfoManager, split_symbol
+
+logger = logging.getLogger(__name__)
+
+class _SymbolState:
+    def __init__(self, base_asset: str, quote_asset: str):
+        self.base_asset = base_asset
+        self.quote_asset = quote_asset
+        self.technical_analyzer = TechnicalAnalyzer()
+        self.strategy = TradingStrategy(self.technical_analyzer)
+        self.in_position = False
+        # Serialises order handling per symbol when several order workers run
+        self.lock = asyncio.Lock()
+
+class AsyncTradingAgent:
+    """Runs the feed, strategy evaluation and order placement on one event loop.
+
+    Closed klines flow from ``AsyncDataHandler`` through a bounded kline queue
+    to the strategy task, and signals flow through a bounded order queue to
+    the order workers. REST latency therefore never stalls the feed, and a
+    slow consumer applies backpressure upstream instead of growing memory.
+
+    With ``batch_evaluation`` the strategy task drains every bar waiting in
+    the kline queue and evaluates them with one ``BatchStrategyEvaluator``
+    pass instead of one ``TradingStrategy`` call per symbol.
+
+    With ``portfolio_limits`` entries are sized by a ``PortfolioRiskManager``
+    that tracks every open position and caps each entry at what the gross,
+    net, concentration and volatility limits still allow.
+    """
+
+    def __init__(self, symbols: List[str], interval: str, initial_balance: Decimal,
+                 trader: Optional[AsyncTrader] = None, kline_queue_size: int = 1000,
+                 order_queue_size: int = 100, order_workers: int = 4, kline_store: Optional[KlineStore] = None,
+                 symbol_info_manager: Optional[SymbolInfoManager] = None, batch_evaluation: bool = False,
+                 portfolio_limits: Optional[PortfolioLimits] = None):
+        self.symbols = [symbol.upper() for symbol in symbols]
+        self.interval = interval
+        if symbol_info_manager is not None:
+            # Fetches only the symbols the cache does not already hold
+            symbol_info_manager.ensure_symbols(self.symbols)
+            assets = {symbol: symbol_info_manager.base_quote(symbol) for symbol in self.symbols}
+        else:
+            assets = {symbol: split_symbol(symbol) for symbol in self.symbols}
+        self.states: Dict[str, _SymbolState] = {symbol: _SymbolState(*assets[symbol]) for symbol in self.symbols}
+        self.kline_store = kline_store # Closed bars are persisted here when set
+        self.batch_evaluator = BatchStrategyEvaluator(self.symbols) if batch_evaluation else None
+        if kline_store is not None:
+            # Warm indicators from stored bars so a restart does not trade blind
+            if self.batch_evaluator is not None:
+                self.batch_evaluator.warm_up({
+                    symbol: kline_store.recent(symbol, interval, last=self.batch_evaluator.window)['close']
+                    for symbol in self.symbols
+                })
+            else:
+                for symbol, state in self.states.items():
+                    state.technical_analyzer.warm_up(
+                        kline_store.recent(symbol, interval, last=state.technical_analyzer.buffer.capacity))
+        # Portfolio-wide exposure tracking when limits are given; per-trade sizing only otherwise
+        self.portfolio: Optional[PortfolioRiskManager] = None
+        if portfolio_limits is not None:
+            self.portfolio = PortfolioRiskManager(initial_balance, self.symbols, portfolio_limits, assets=assets)
+        self.risk_manager = self.portfolio or RiskManager(account_balance=initial_balance)
+        self.trader = trader
+        self.kline_queue: asyncio.Queue = asyncio.Queue(maxsize=kline_queue_size)
+        self.order_queue: asyncio.Queue = asyncio.Queue(maxsize=order_queue_size)
+        self.order_workers = order_workers
+        self.data_handler = AsyncDataHandler(self.symbols, interval, self.kline_queue)
+
+    async def _evaluate_klines(self):
+        if self.batch_evaluator is not None:
+            await self._evaluate_kline_batches()
+            return
+        while True:
+            symbol, ochlv_data = await self.kline_queue.get()
+            try:
+                await self._process_ochlv_data(symbol, ochlv_data)
+            except Exception as e:
+                logger.error(f"Error evaluating kline for {symbol}: {e}")
+            finally:
+                self.kline_queue.task_done()
+
+    async def _process_ochlv_data(self, symbol: str, ochlv_data: OCHLVData):
+        logger.info(f"Received OCHLV data for {symbol}: {ochlv_data.close}")
+        if self.kline_store is not None:
+            self.kline_store.append(symbol, self.interval, ochlv_data)
+        if self.portfolio is not None:
+            self.portfolio.update_prices({symbol: ochlv_data.close}, ochlv_data.timestamp)
+        signal = self.states[symbol].strategy.generate_signal(ochlv_data)
+        if signal:
+            logger.info(f"Generated signal for {symbol}: {signal.action}")
+            await self.order_queue.put((symbol, signal, ochlv_data.close))
+
+    async def _evaluate_kline_batches(self):
+        while True:
+            # Bars of one interval arrive together; take everything already queued
+            pending = [await self.kline_queue.get()]
+            while not self.kline_queue.empty():
+                pending.append(self.kline_queue.get_nowait())
+            try:
+                batch: Dict[str, OCHLVData] = {}
+                for symbol, ochlv_data in pending:
+                    if symbol in batch:
+                        # A second bar for a symbol belongs to the next interval
+                        await self._process_batch(batch)
+                        batch = {}
+                    batch[symbol] = ochlv_data
+                await self._process_batch(batch)
+            except Exception as e:
+                logger.error(f"Error evaluating kline batch: {e}")
+            finally:
+                for _ in pending:
+                    self.kline_queue.task_done()
+
+    async def _process_batch(self, batch: Dict[str, OCHLVData]):
+        if self.kline_store is not None:
+            for symbol, ochlv_data in batch.items():
+                self.kline_store.append(symbol, self.interval, ochlv_data)
+        if self.portfolio is not None:
+            self.portfolio.update_prices({symbol: bar.close for symbol, bar in batch.items()},
+                                         max(bar.timestamp for bar in batch.values()))
+        signals = self.batch_evaluator.evaluate(batch)
+        for symbol, signal in signals.items():
+            logger.info(f"Generated signal for {symbol}: {signal.action}")
+            await self.order_queue.put((symbol, signal, batch[symbol].close))
+
+    async def _execute_orders(self):
+        while True:
+            symbol, signal, close = await self.order_queue.get()
+            try:
+                await self._execute_signal(symbol, signal, close)
+            except Exception as e:
+                logger.error(f"Error executing {signal.action} order for {symbol}: {e}")
+            finally:
+                self.order_queue.task_done()
+
+    async def _execute_signal(self, symbol: str, signal: TradeSignal, close: Decimal):
+        state = self.states[symbol]
+        async with state.lock:
+            if signal.action == 'enter' and not state.in_position:
+                if signal.stop_loss is None:
+                    logger.error("Error calculating position size: Stop loss price is required for position size calculation.")
+                    return
+                quote_balance = (await self.trader.get_account_balance(state.quote_asset)).free
+                try:
+                    if self.portfolio is not None:
+                        position_size = self.portfolio.calculate_position_size(close, signal.stop_loss, symbol=symbol)
+                    else:
+                        position_size = self.risk_manager.calculate_position_size(
+                            entry_price=close,
+                            stop_loss_price=signal.stop_loss
+                        )
+                except ValueError as e:
+                    logger.error(f"Error calculating position size: {e}")
+                    return
+                if position_size * close > quote_balance:
+                    position_size = quote_balance / close
+                if position_size > 0:
+                    order = await self.trader.place_market_order(symbol=symbol, side='BUY', quantity=position_size)
+                    logger.info(f"Placed BUY order: {order}")
+                    state.in_position = True
+                    if self.portfolio is not None:
+                        self.portfolio.on_fill(symbol, 'BUY', Decimal(order.get('executedQty', position_size)), close)
+
+            elif signal.action == 'exit' and state.in_position:
+                base_balance = (await self.trader.get_account_balance(state.base_asset)).free
+                if base_balance > 0:
+                    order = await self.trader.place_market_order(symbol=symbol, side='SELL', quantity=base_balance)
+                    logger.info(f"Placed SELL order: {order}")
+                    state.in_position = False
+                    if self.portfolio is not None:
+                        # The whole base balance was sold, which may be more than this agent bought
+                        self.portfolio.set_position(symbol, Decimal('0'), close)
+
+    async def run(self):
+        logger.info(f"Starting async Trading Agent for {len(self.symbols)} symbols @{self.interval}")
+        owns_trader = self.trader is None
+        if owns_trader:
+            self.trader = await AsyncTrader.create()
+        tasks = [
+            asyncio.create_task(self.data_handler.run()),
+            asyncio.create_task(self._evaluate_klines()),
+        ] + [asyncio.create_task(self._execute_orders()) for _ in range(self.order_workers)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            await self.data_handler.stop()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if owns_trader:
+                await self.trader.close()
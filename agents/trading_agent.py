@@ -1,93 +1,256 @@
+from data.bar_aggregator import MultiTimeframeAggregator
 from data.data_handler import DataHandler
+from data.frame_recorder import FrameRecorder
+from data.kline_backfill import KlineBackfiller, bars_to_records
+from data.kline_store import KLINE_RECORD_DTYPE, KlineStore, interval_milliseconds
 from analysis.technical_analyzer import TechnicalAnalyzer
 from analysis.strategy import TradingStrategy
+from analysis.strategy_registry import Strategy, StrategyGroup
+from trading.order_executor import OrderEvent, OrderExecutor, OrderRequest
+from trading.order_tracker import Bracket
 from trading.risk_manager import RiskManager
+from trading.symbol_info_manager import split_symbol
 from trading.trader import Trader
 from models import OCHLVData
+from monitoring.latency import LatencyRecorder
 from decimal import Decimal
+import numpy as np
+import requests
+import threading
 import time
 import logging
 
 logger = logging.getLogger(__name__)
 
+# The stop leg's limit sits this fraction below its trigger, so a fast move through the stop still fills
+BRACKET_STOP_LIMIT_OFFSET = Decimal('0.002')
+
 class TradingAgent:
-    def __init__(self, symbol: str, interval: str, initial_balance: Decimal):
+    def __init__(self, symbol: str, interval: str, initial_balance: Decimal, trader: Trader | None = None,
+                 kline_store: KlineStore | None = None, backfiller: KlineBackfiller | None = None,
+                 higher_timeframes: list[str] | None = None, latency: LatencyRecorder | None = None,
+                 recorder: FrameRecorder | None = None, use_brackets: bool = False,
+                 strategies: list[Strategy] | None = None):
         self.symbol = symbol
         self.interval = interval
         self.technical_analyzer = TechnicalAnalyzer()
+        self.kline_store = kline_store
+        self.backfiller = backfiller
         self.strategy = TradingStrategy(self.technical_analyzer)
+        # Registered strategy plugins sharing the analyzer replace the default strategy when given
+        self.strategy_group = StrategyGroup(self.technical_analyzer, strategies) if strategies else None
+        # 5m/15m/1h... bars resampled from this stream, each with its own analyzer
+        self.timeframes = MultiTimeframeAggregator(interval, higher_timeframes) if higher_timeframes else None
         self.risk_manager = RiskManager(account_balance=initial_balance)
-        self.trader = Trader()
-        self.data_handler = DataHandler(symbol, interval, self._process_ochlv_data)
+        self.trader = trader or Trader()
+        # Orders are placed on worker threads so REST latency never blocks the feed
+        self.latency = latency # Times every stage from kline receipt to order acknowledgment when set
+        self.order_executor = OrderExecutor(self.trader, self._on_order_event, latency=latency)
+        # Raw frames are captured to `recorder` for replays (see backtest/replay.py) when set
+        self.data_handler = DataHandler(symbol, interval, self._process_ochlv_data, store=kline_store, backfiller=backfiller,
+                                        latency=latency, recorder=recorder)
         self.in_position = False # To track if the bot is currently in a trade
+        self.order_pending = False # An order was submitted and its result has not come back yet
+        self._position_lock = threading.Lock()
+        # Stop-loss and take-profit rest on the exchange as an OCO bracket once an entry fills
+        self.use_brackets = use_brackets
+        self.bracket: Bracket | None = None
+        self._entry_levels: tuple[Decimal | None, Decimal | None] = (None, None)
+        if use_brackets:
+            self.trader.order_tracker.add_bracket_listener(self._on_bracket_closed)
+
+    def warm_up(self):
+        """Fills the analyzer window from stored bars, then from REST up to the last closed bar."""
+        capacity = self.technical_analyzer.buffer.capacity
+        history = np.empty(0, dtype=KLINE_RECORD_DTYPE)
+        if self.kline_store is not None:
+            history = self.kline_store.recent(self.symbol, self.interval, last=capacity)
+        if self.backfiller is not None:
+            end = self.backfiller.current_open_time(self.interval)
+            step = interval_milliseconds(self.interval)
+            start = int(history['timestamp'][-1]) + step if len(history) else end - capacity * step
+            try:
+                fetched = bars_to_records(self.backfiller.fetch(self.symbol, self.interval, start, end))
+            except requests.RequestException as e:
+                logger.warning(f"Kline prefill failed for {self.symbol}@{self.interval}: {e}")
+            else:
+                if self.kline_store is not None:
+                    self.kline_store.append_records(self.symbol, self.interval, fetched)
+                history = np.concatenate([history, fetched])
+        self.technical_analyzer.warm_up(history)
+        if self.timeframes is not None:
+            self.timeframes.warm_up(history)
+        if len(history):
+            # Later gaps are measured from the newest bar the analyzer has seen
+            self.data_handler.last_timestamp = int(history['timestamp'][-1])
+        logger.info(f"Warmed analyzer for {self.symbol}@{self.interval} with {len(history)} bars")
 
     def _process_ochlv_data(self, ochlv_data: OCHLVData):
         logger.info(f"Received OCHLV data for {self.symbol}: {ochlv_data.close}")
-        signal = self.strategy.generate_signal(ochlv_data)
+        if self.timeframes is not None:
+            # Higher timeframes first, so they are current when the strategy runs
+            self.timeframes.on_bar(ochlv_data)
+        latency = self.latency
+        if latency is not None:
+            strategy_started = time.perf_counter_ns()
+        if self.strategy_group is not None:
+            # Read without the lock: the position is re-checked below before anything is submitted
+            signal = self.strategy_group.generate_signal(ochlv_data, self.in_position)
+        else:
+            signal = self.strategy.generate_signal(ochlv_data)
+        if latency is not None:
+            latency.record_since('strategy', strategy_started)
 
         if signal:
             logger.info(f"Generated signal: {signal.action}")
-            if signal.action == 'enter' and not self.in_position:
-                # Assuming we are buying the base asset (e.g., BTC in BTCUSDT)
-                # Need to get current balance of quote asset (e.g., USDT)
-                usdt_balance = self.trader.get_account_balance('USDT').free
-                logger.info(f"Current USDT balance: {usdt_balance}")
-
-                # Calculate position size
-                try:
-                    if signal.stop_loss is None: # Add this check
-                        raise ValueError("Stop loss price is required for position size calculation.")
-
-                    position_size = self.risk_manager.calculate_position_size(
-                        entry_price=ochlv_data.close,
-                        stop_loss_price=signal.stop_loss # Now guaranteed not to be None
-                    )
-                    # Ensure position size is not greater than available balance
-                    # This is a simplification, real calculation needs to consider min notional, step size etc.
-                    if position_size * ochlv_data.close > usdt_balance:
-                        position_size = usdt_balance / ochlv_data.close
-                    
-                    logger.info(f"Calculated position size: {position_size}")
-
-                    if position_size > 0:
-                        # Place a market buy order
-                        order = self.trader.place_market_order(
-                            symbol=self.symbol,
-                            side='BUY',
-                            quantity=position_size
-                        )
-                        logger.info(f"Placed BUY order: {order}")
-                        self.in_position = True
-                        # In a real system, you would also place stop-loss and take-profit orders here
-                        # For simplicity, we'll assume these are handled by the exchange or a more advanced order management system
-                        # self.trader.place_stop_loss_limit_order(...)
-                        # self.trader.place_limit_order(...)
-                except ValueError as e:
-                    logger.error(f"Error calculating position size: {e}")
-
-            elif signal.action == 'exit' and self.in_position:
-                # Assuming we are selling the base asset (e.g., BTC in BTCUSDT)
-                # Need to get current balance of base asset
-                base_asset = self.symbol.replace('USDT', '') # e.g., BTC from BTCUSDT
-                base_balance = self.trader.get_account_balance(base_asset).free
-                logger.info(f"Current {base_asset} balance: {base_balance}")
-
-                if base_balance > 0:
-                    # Place a market sell order
-                    order = self.trader.place_market_order(
-                        symbol=self.symbol,
-                        side='SELL',
-                        quantity=base_balance
-                    )
-                    logger.info(f"Placed SELL order: {order}")
-                    self.in_position = False
+            with self._position_lock:
+                if self.order_pending:
+                    return
+                if signal.action == 'enter' and not self.in_position:
+                    entry_price = ochlv_data.close
+                    stop_loss = signal.stop_loss
+                    self._entry_levels = (stop_loss, signal.take_profit)
+                    request = OrderRequest(self.symbol, 'BUY', size_order=lambda: self._size_entry(entry_price, stop_loss),
+                                           reference_price=entry_price)
+                elif signal.action == 'exit' and self.in_position:
+                    request = OrderRequest(self.symbol, 'SELL', size_order=self._size_exit, reference_price=ochlv_data.close)
+                else:
+                    return
+                if latency is not None:
+                    request.received_ns = self.data_handler.received_ns
+                self.order_pending = self.order_executor.submit(request)
+
+    def _base_quote(self) -> tuple[str, str]:
+        # Base and quote assets come from exchange info when the trader has it
+        symbol_info_manager = self.trader.symbol_info_manager
+        if symbol_info_manager is None:
+            return split_symbol(self.symbol)
+        return symbol_info_manager.base_quote(self.symbol)
+
+    def _size_entry(self, entry_price: Decimal, stop_loss: Decimal | None) -> Decimal:
+        # Runs on an order worker thread
+        # Buying the base asset (e.g., BTC in BTCUSDT) with the quote asset (e.g., USDT)
+        quote_asset = self._base_quote()[1]
+        quote_balance = self.trader.get_account_balance(quote_asset).free
+        logger.info(f"Current {quote_asset} balance: {quote_balance}")
+
+        if stop_loss is None:
+            raise ValueError("Stop loss price is required for position size calculation.")
+
+        position_size = self.risk_manager.calculate_position_size(
+            entry_price=entry_price,
+            stop_loss_price=stop_loss
+        )
+        # Ensure position size is not greater than available balance
+        # Step size and min notional are applied by the Trader when the order is placed
+        if position_size * entry_price > quote_balance:
+            position_size = quote_balance / entry_price
+
+        logger.info(f"Calculated position size: {position_size}")
+        return position_size
+
+    def _size_exit(self) -> Decimal:
+        # Runs on an order worker thread
+        bracket = self.bracket
+        if bracket is not None:
+            # The bracket holds the position; free it and sell whatever neither leg filled
+            try:
+                result = self.trader.cancel_bracket(bracket)
+            except Exception as e:
+                logger.warning(f"Could not cancel bracket {bracket.order_list_id} for {self.symbol}: {e}")
+            else:
+                filled = sum((Decimal(report['executedQty']) for report in result.get('orderReports', [])), Decimal('0'))
+                return bracket.quantity - filled
+        # Selling the base asset (e.g., BTC in BTCUSDT, USDT in USDTTRY)
+        base_asset = self._base_quote()[0]
+        base_balance = self.trader.get_account_balance(base_asset).free
+        logger.info(f"Current {base_asset} balance: {base_balance}")
+        return base_balance
+
+    def _place_bracket(self, order: dict) -> Bracket | None:
+        # Runs on an order worker thread, while the entry still counts as pending so no exit can race it
+        stop_loss, take_profit = self._entry_levels
+        if stop_loss is None or take_profit is None:
+            logger.warning(f"Entry signal for {self.symbol} lacks stop-loss or take-profit, no bracket placed")
+            return None
+        # A commission charged in the base asset leaves less to protect than was bought
+        base_asset = self._base_quote()[0]
+        quantity = Decimal(order['executedQty']) - sum(
+            (Decimal(fill['commission']) for fill in order.get('fills', []) if fill.get('commissionAsset') == base_asset),
+            Decimal('0'))
+        try:
+            bracket = self.trader.place_oco_bracket(self.symbol, quantity, take_profit, stop_loss,
+                                                    stop_loss * (1 - BRACKET_STOP_LIMIT_OFFSET))
+        except Exception as e:
+            logger.error(f"Error placing OCO bracket for {self.symbol}, exits are left to signals: {e}")
+            return None
+        logger.info(f"Placed OCO bracket {bracket.order_list_id} for {self.symbol}: stop {stop_loss}, target {take_profit}")
+        return bracket
+
+    def _on_bracket_closed(self, bracket: Bracket):
+        # Runs on the user-data stream thread, or on an order worker for cancel and placement responses
+        with self._position_lock:
+            if bracket is not self.bracket:
+                return
+            self.bracket = None
+            if bracket.exit_reason is not None:
+                logger.info(f"{self.symbol} bracket closed by {bracket.exit_reason} at {bracket.exit_price}")
+                self.in_position = False
+
+    def _on_order_event(self, event: OrderEvent):
+        request = event.request
+        logger.info(
+            f"{request.side} order for {request.symbol} {event.status} "
+            f"(queued {event.queue_seconds * 1000:.1f} ms, placed in {event.placement_seconds * 1000:.1f} ms)"
+        )
+        if event.error is not None:
+            logger.error(f"Error placing {request.side} order: {event.error}")
+        try:
+            bracket = None
+            if self.use_brackets and event.is_filled and request.side == 'BUY':
+                bracket = self._place_bracket(event.order)
+            with self._position_lock:
+                if event.is_filled:
+                    logger.info(f"Placed {request.side} order: {event.order}")
+                    if request.side == 'BUY':
+                        # Reason: a bracket that already closed has taken the position with it
+                        self.in_position = bracket is None or bracket.is_active
+                    else:
+                        # An exit that expired part-filled leaves the rest held for the next exit signal
+                        self.in_position = event.is_partially_filled
+                        if self.in_position:
+                            logger.warning(f"{self.symbol} exit filled {event.filled_quantity} of {event.order.get('origQty')}")
+                    self.bracket = bracket if self.in_position else None
+        finally:
+            # Reason: a malformed response must not leave the agent waiting on this order forever
+            with self._position_lock:
+                self.order_pending = False
 
     def start(self):
         logger.info(f"Starting Trading Agent for {self.symbol}@{self.interval}")
+        try:
+            # Serve balances for sizing from the user-data stream instead of REST
+            self.trader.start_balance_tracking()
+        except Exception as e:
+            logger.warning(f"Balance tracking unavailable, using REST balances: {e}")
+            if self.use_brackets:
+                logger.warning("Bracket exits are only seen through the user-data stream until the next exit signal")
+            self.trader.stop_balance_tracking()
+        symbol_info_manager = self.trader.symbol_info_manager
+        if symbol_info_manager is not None:
+            # A cold cache only needs this symbol's filters, not the whole exchange
+            symbol_info_manager.ensure_symbols([self.symbol])
+            symbol_info_manager.start_auto_refresh()
+        self.warm_up()
+        self.order_executor.start()
         self.data_handler.start()
         try:
             while True:
                 time.sleep(1) # Keep the main thread alive
         except KeyboardInterrupt:
             logger.info("Stopping Trading Agent...")
-            self.data_handler.stop()
\ No newline at end of file
+            self.data_handler.stop()
+            self.order_executor.stop()
+            self.trader.stop_balance_tracking()
+            if symbol_info_manager is not None:
+                symbol_info_manager.stop_auto_refresh()
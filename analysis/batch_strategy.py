@@ -0,0 +1,188 @@
+"""Evaluates the RSI/MACD strategy for many symbols in one NumPy pass.
+
+``TradingStrategy`` holds one analyzer per symbol, so a universe of N symbols
+costs N Python-level indicator updates and signal checks every interval.
+``BatchStrategyEvaluator`` keeps the same state as arrays with one slot per
+symbol: a symbols x window matrix of closes plus vectorized versions of the
+streaming EMA/RSI/MACD recurrences. All bars that closed in an interval are
+applied with a handful of array operations, and the entry/exit rules are
+evaluated as boolean masks. The values match ``analysis.indicators`` exactly,
+so a symbol sees the same signals as it would through ``TradingStrategy``.
+"""
+from decimal import Decimal
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+import numpy as np
+from analysis.strategy import StrategyParameters
+from models import OCHLVData, TradeSignal
+
+class BatchEMA:
+    """``StreamingEMA`` for a vector of series; NaN until a slot's SMA seed is complete."""
+
+    def __init__(self, size: int, length: int):
+        self.length = length
+        self.alpha = 2.0 / (length + 1)
+        self.value = np.full(size, np.nan)
+        self._seed_count = np.zeros(size, dtype=np.int64)
+        self._seed_sum = np.zeros(size)
+
+    def update(self, index: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Feeds ``values`` to the slots in ``index``; returns their EMA values."""
+        current = self.value[index]
+        seeding = np.isnan(current)
+        seed_index = index[seeding]
+        self._seed_count[seed_index] += 1
+        self._seed_sum[seed_index] += values[seeding]
+        seeded = seed_index[self._seed_count[seed_index] == self.length]
+        self.value[seeded] = self._seed_sum[seeded] / self.length
+        running = ~seeding
+        self.value[index[running]] = current[running] + self.alpha * (values[running] - current[running])
+        return self.value[index]
+
+class BatchRSI:
+    """``StreamingRSI`` (Wilder smoothing) for a vector of series."""
+
+    def __init__(self, size: int, length: int):
+        self.length = length
+        self.value = np.full(size, np.nan)
+        self._decay = 1.0 - 1.0 / length
+        self._prev_close = np.full(size, np.nan)
+        self._gain = np.zeros(size)
+        self._loss = np.zeros(size)
+        self._count = np.zeros(size, dtype=np.int64)
+
+    def update(self, index: np.ndarray, values: np.ndarray):
+        previous = self._prev_close[index]
+        self._prev_close[index] = values
+        started = ~np.isnan(previous)
+        index = index[started]
+        change = values[started] - previous[started]
+        self._gain[index] = self._gain[index] * self._decay + np.maximum(change, 0.0)
+        self._loss[index] = self._loss[index] * self._decay + np.maximum(-change, 0.0)
+        self._count[index] += 1
+        ready = index[self._count[index] >= self.length]
+        total = self._gain[ready] + self._loss[ready]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.value[ready] = np.where(total > 0, 100.0 * self._gain[ready] / total, np.nan)
+
+class BatchMACD:
+    """``StreamingMACD`` for a vector of series."""
+
+    def __init__(self, size: int, fast: int, slow: int, signal: int):
+        self.macd = np.full(size, np.nan)
+        self.histogram = np.full(size, np.nan)
+        self.signal_line = np.full(size, np.nan)
+        self._fast_ema = BatchEMA(size, fast)
+        self._slow_ema = BatchEMA(size, slow)
+        self._signal_ema = BatchEMA(size, signal)
+
+    def update(self, index: np.ndarray, values: np.ndarray):
+        macd = self._fast_ema.update(index, values) - self._slow_ema.update(index, values)
+        defined = ~np.isnan(macd)
+        index = index[defined]
+        self.macd[index] = macd[defined]
+        # The signal EMA only starts once the MACD line exists, as in StreamingMACD
+        signal_line = self._signal_ema.update(index, macd[defined])
+        self.signal_line[index] = signal_line
+        self.histogram[index] = macd[defined] - signal_line
+
+class BatchStrategyEvaluator:
+    """``TradingStrategy`` for a fixed universe of symbols, evaluated per interval.
+
+    Args:
+        symbols: The universe; each symbol owns one row of the close matrix.
+        parameters: Strategy thresholds shared by every symbol.
+        window: Closes retained per symbol, as in ``TechnicalAnalyzer``.
+    """
+
+    def __init__(self, symbols: Iterable[str], parameters: Optional[StrategyParameters] = None, window: int = 200):
+        self.symbols: List[str] = [symbol.upper() for symbol in symbols]
+        self.rows: Dict[str, int] = {symbol: row for row, symbol in enumerate(self.symbols)}
+        self.parameters = parameters or StrategyParameters()
+        if self.parameters.stop_mode != 'fixed':
+            # Only closes are kept per symbol; ATR-based levels need highs and lows
+            raise ValueError("Batch evaluation supports the 'fixed' stop mode only.")
+        self.window = window
+        size = len(self.symbols)
+        # Ring buffer per row; _counts[row] bars seen, the newest at (_counts[row] - 1) % window
+        self.closes = np.full((size, window), np.nan)
+        self._counts = np.zeros(size, dtype=np.int64)
+        params = self.parameters
+        self.rsi = BatchRSI(size, params.rsi_length)
+        self.macd = BatchMACD(size, params.macd_fast, params.macd_slow, params.macd_signal)
+
+    def _update(self, index: np.ndarray, values: np.ndarray):
+        self.closes[index, self._counts[index] % self.window] = values
+        self._counts[index] += 1
+        self.rsi.update(index, values)
+        self.macd.update(index, values)
+
+    def window_closes(self, symbol: str) -> np.ndarray:
+        """Retained closes of ``symbol``, oldest first."""
+        row = self.rows[symbol.upper()]
+        count = int(self._counts[row])
+        if count <= self.window:
+            return self.closes[row, :count].copy()
+        return np.roll(self.closes[row], -(count % self.window))
+
+    def warm_up(self, histories: Mapping[str, np.ndarray]):
+        """Seeds rows from close histories (oldest first), e.g. ``KlineStore`` records' ``close``.
+
+        Histories are right-aligned so every symbol's newest close lands in
+        the same step, and each step updates all symbols with one pass.
+        """
+        histories = {symbol.upper(): np.asarray(closes, dtype=np.float64)[-self.window:]
+                     for symbol, closes in histories.items() if len(closes)}
+        if not histories:
+            return
+        longest = max(len(closes) for closes in histories.values())
+        rows = np.array([self.rows[symbol] for symbol in histories], dtype=np.int64)
+        # Left-padded with NaN, which marks "no bar for this row at this step"
+        matrix = np.full((len(rows), longest), np.nan)
+        for position, closes in enumerate(histories.values()):
+            matrix[position, longest - len(closes):] = closes
+        for step in range(longest):
+            column = matrix[:, step]
+            present = ~np.isnan(column)
+            self._update(rows[present], column[present])
+
+    def update_closes(self, closes: Mapping[str, float]):
+        """Applies one closed bar per symbol without evaluating signals."""
+        index = np.array([self.rows[symbol.upper()] for symbol in closes], dtype=np.int64)
+        self._update(index, np.fromiter(closes.values(), dtype=np.float64, count=len(closes)))
+
+    def signal_masks(self, index: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(enter, exit) masks over ``index`` (all rows by default) for the latest bars."""
+        params = self.parameters
+        rows = slice(None) if index is None else index
+        rsi = self.rsi.value[rows]
+        histogram = self.macd.histogram[rows]
+        signal_line = self.macd.signal_line[rows]
+        # NaN compares False, so rows with undefined indicators never signal
+        enter = (rsi < params.rsi_oversold) & (histogram > 0) & (histogram > signal_line)
+        exit_ = (rsi > params.rsi_overbought) & (histogram < 0) & (histogram < signal_line)
+        return enter, exit_
+
+    def evaluate(self, bars: Mapping[str, OCHLVData]) -> Dict[str, TradeSignal]:
+        """Applies the bars that closed in one interval and returns the signals they produce.
+
+        ``bars`` holds at most one bar per symbol. Symbols without a bar keep
+        their state unchanged and never appear in the result.
+        """
+        if not bars:
+            return {}
+        symbols = list(bars)
+        index = np.array([self.rows[symbol.upper()] for symbol in symbols], dtype=np.int64)
+        values = np.fromiter((float(bars[symbol].close) for symbol in symbols), dtype=np.float64, count=len(symbols))
+        self._update(index, values)
+        enter, exit_ = self.signal_masks(index)
+
+        params = self.parameters
+        signals: Dict[str, TradeSignal] = {}
+        for position in np.flatnonzero(enter):
+            symbol = symbols[position]
+            latest_close: Decimal = bars[symbol].close
+            signals[symbol] = TradeSignal(action='enter', stop_loss=latest_close * params.stop_loss_multiplier,
+                                          take_profit=latest_close * params.take_profit_multiplier)
+        for position in np.flatnonzero(exit_):
+            signals[symbols[position]] = TradeSignal(action='exit')
+        return signals
@@ -0,0 +1,250 @@
+"""Streaming technical indicators.
+
+Each indicator keeps its own running state and is updated with one value per
+closed bar in constant time, instead of recomputing the whole series from a
+DataFrame on every kline. The formulas follow the pandas_ta definitions so the
+latest value matches ``pandas_ta`` within floating point tolerance.
+"""
+import math
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+
+class StreamingSMA:
+    """Simple moving average over the last ``length`` values."""
+
+    __slots__ = ("length", "value", "_window", "_sum", "_updates")
+
+    def __init__(self, length: int = 20):
+        if length < 1:
+            raise ValueError("SMA length must be at least 1.")
+        self.length = length
+        self.value: Optional[float] = None
+        self._window: Deque[float] = deque(maxlen=length)
+        self._sum = 0.0
+        self._updates = 0
+
+    def update(self, value: float) -> Optional[float]:
+        if len(self._window) == self.length:
+            self._sum -= self._window[0]
+        self._window.append(value)
+        self._sum += value
+        self._updates += 1
+        # Reason: re-summing once per full window keeps the rolling sum from
+        # accumulating float drift while staying O(1) amortised.
+        if self._updates % self.length == 0:
+            self._sum = math.fsum(self._window)
+        if len(self._window) == self.length:
+            self.value = self._sum / self.length
+        return self.value
+
+
+class StreamingEMA:
+    """Exponential moving average seeded with the SMA of the first ``length`` values.
+
+    Matches ``pandas_ta.ema`` with its default ``presma=True`` and ``adjust=False``.
+    """
+
+    __slots__ = ("length", "alpha", "value", "_seed_count", "_seed_sum")
+
+    def __init__(self, length: int = 20):
+        if length < 1:
+            raise ValueError("EMA length must be at least 1.")
+        self.length = length
+        self.alpha = 2.0 / (length + 1)
+        self.value: Optional[float] = None
+        self._seed_count = 0
+        self._seed_sum = 0.0
+
+    def update(self, value: float) -> Optional[float]:
+        if self.value is None:
+            self._seed_count += 1
+            self._seed_sum += value
+            if self._seed_count == self.length:
+                self.value = self._seed_sum / self.length
+            return self.value
+        self.value += self.alpha * (value - self.value)
+        return self.value
+
+
+class StreamingRSI:
+    """Relative Strength Index using Wilder smoothing (``alpha = 1 / length``)."""
+
+    __slots__ = ("length", "value", "_decay", "_prev_close", "_gain", "_loss", "_count")
+
+    def __init__(self, length: int = 14):
+        if length < 1:
+            raise ValueError("RSI length must be at least 1.")
+        self.length = length
+        self.value: Optional[float] = None
+        self._decay = 1.0 - 1.0 / length
+        self._prev_close: Optional[float] = None
+        self._gain = 0.0
+        self._loss = 0.0
+        self._count = 0
+
+    def update(self, value: float) -> Optional[float]:
+        if self._prev_close is None:
+            self._prev_close = value
+            return None
+        change = value - self._prev_close
+        self._prev_close = value
+        # Reason: pandas_ta divides two rma averages that share the same
+        # normalisation, so the decayed sums alone give an identical ratio.
+        self._gain = self._gain * self._decay + (change if change > 0 else 0.0)
+        self._loss = self._loss * self._decay + (-change if change < 0 else 0.0)
+        self._count += 1
+        if self._count < self.length:
+            return None
+        total = self._gain + self._loss
+        self.value = 100.0 * self._gain / total if total > 0 else None
+        return self.value
+
+
+class StreamingMACD:
+    """MACD line, histogram and signal line built from three streaming EMAs."""
+
+    __slots__ = ("fast", "slow", "signal", "macd", "histogram", "signal_line",
+                 "_fast_ema", "_slow_ema", "_signal_ema")
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        if fast >= slow:
+            raise ValueError("MACD fast length must be shorter than the slow length.")
+        self.fast = fast
+        self.slow = slow
+        self.signal = signal
+        self.macd: Optional[float] = None
+        self.histogram: Optional[float] = None
+        self.signal_line: Optional[float] = None
+        self._fast_ema = StreamingEMA(fast)
+        self._slow_ema = StreamingEMA(slow)
+        self._signal_ema = StreamingEMA(signal)
+
+    @property
+    def value(self) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        return self.macd, self.histogram, self.signal_line
+
+    def update(self, value: float) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        fast_value = self._fast_ema.update(value)
+        slow_value = self._slow_ema.update(value)
+        if fast_value is None or slow_value is None:
+            return self.value
+        self.macd = fast_value - slow_value
+        # The signal EMA only starts once the MACD line exists, as in pandas_ta.
+        self.signal_line = self._signal_ema.update(self.macd)
+        if self.signal_line is not None:
+            self.histogram = self.macd - self.signal_line
+        return self.value
+
+
+class StreamingATR:
+    """Average True Range with Wilder smoothing, seeded with the mean of the first ``length`` true ranges.
+
+    Matches TA-Lib's ``ATR``: the first bar has no previous close and only
+    seeds it, so the first value appears on bar ``length + 1``.
+    """
+
+    __slots__ = ("length", "value", "true_range", "_prev_close", "_seed_count", "_seed_sum")
+
+    def __init__(self, length: int = 14):
+        if length < 1:
+            raise ValueError("ATR length must be at least 1.")
+        self.length = length
+        self.value: Optional[float] = None
+        self.true_range: Optional[float] = None
+        self._prev_close: Optional[float] = None
+        self._seed_count = 0
+        self._seed_sum = 0.0
+
+    def update(self, high: float, low: float, close: float) -> Optional[float]:
+        prev_close = self._prev_close
+        self._prev_close = close
+        if prev_close is None:
+            return None
+        true_range = (high if high > prev_close else prev_close) - (low if low < prev_close else prev_close)
+        self.true_range = true_range
+        if self.value is None:
+            self._seed_count += 1
+            self._seed_sum += true_range
+            if self._seed_count == self.length:
+                self.value = self._seed_sum / self.length
+            return self.value
+        self.value += (true_range - self.value) / self.length
+        return self.value
+
+
+class StreamingBollingerBands:
+    """Bollinger Bands: SMA of the close plus/minus ``std`` population standard deviations.
+
+    The window mean and sum of squared deviations are updated in O(1) per
+    bar with the add/remove form of Welford's method, which avoids the
+    cancellation of a plain sum-of-squares at large price levels.
+    """
+
+    __slots__ = ("length", "std", "lower", "middle", "upper", "_window", "_mean", "_m2", "_updates")
+
+    def __init__(self, length: int = 20, std: float = 2.0):
+        if length < 2:
+            raise ValueError("Bollinger Band length must be at least 2.")
+        self.length = length
+        self.std = std
+        self.lower: Optional[float] = None
+        self.middle: Optional[float] = None
+        self.upper: Optional[float] = None
+        self._window: Deque[float] = deque(maxlen=length)
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._updates = 0
+
+    @property
+    def value(self) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        return self.lower, self.middle, self.upper
+
+    def update(self, value: float) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        window = self._window
+        if len(window) == self.length:
+            removed = window[0]
+            window.append(value)
+            mean = self._mean + (value - removed) / self.length
+            self._m2 += (value - removed) * (value - mean + removed - self._mean)
+            self._mean = mean
+        else:
+            window.append(value)
+            delta = value - self._mean
+            self._mean += delta / len(window)
+            self._m2 += delta * (value - self._mean)
+        self._updates += 1
+        # Reason: as in StreamingSMA, recompute exactly once per full window to shed drift
+        if self._updates % self.length == 0:
+            self._mean = math.fsum(window) / len(window)
+            self._m2 = math.fsum((item - self._mean) ** 2 for item in window)
+        if len(window) == self.length:
+            deviation = self.std * math.sqrt(max(self._m2, 0.0) / self.length)
+            self.lower, self.middle, self.upper = self._mean - deviation, self._mean, self._mean + deviation
+        return self.value
+
+
+class StreamingKeltnerChannels:
+    """Keltner Channels: EMA of the close plus/minus ``scalar`` times the ATR."""
+
+    __slots__ = ("length", "scalar", "lower", "middle", "upper", "_ema", "_atr")
+
+    def __init__(self, length: int = 20, scalar: float = 2.0, atr_length: int = 10):
+        self.length = length
+        self.scalar = scalar
+        self.lower: Optional[float] = None
+        self.middle: Optional[float] = None
+        self.upper: Optional[float] = None
+        self._ema = StreamingEMA(length)
+        self._atr = StreamingATR(atr_length)
+
+    @property
+    def value(self) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        return self.lower, self.middle, self.upper
+
+    def update(self, high: float, low: float, close: float) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        middle = self._ema.update(close)
+        atr = self._atr.update(high, low, close)
+        if middle is not None and atr is not None:
+            self.lower, self.middle, self.upper = middle - self.scalar * atr, middle, middle + self.scalar * atr
+        return self.value
@@ -0,0 +1,96 @@
+"""Fixed-capacity columnar OHLCV store backed by preallocated NumPy arrays."""
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+
+class OHLCVRingBuffer:
+    """Ring buffer holding the last ``capacity`` OHLCV bars column by column.
+
+    Every value is written twice, at ``position`` and ``position + capacity``,
+    so the retained window is always one contiguous slice of the backing
+    arrays. Column accessors therefore return zero-copy views in chronological
+    order and appends never allocate or shift data, whatever the capacity.
+
+    The views alias the backing storage: they are only valid until the next
+    ``append`` and must not be written to.
+    """
+
+    def __init__(self, capacity: int = 200):
+        if capacity < 1:
+            raise ValueError("Buffer capacity must be at least 1.")
+        self.capacity = capacity
+        self._prices = np.zeros((len(PRICE_COLUMNS), 2 * capacity), dtype=np.float64)
+        self._timestamps = np.zeros(2 * capacity, dtype=np.int64)
+        self._next = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, timestamp: int, open_: float, high: float, low: float, close: float, volume: float) -> None:
+        position = self._next
+        mirror = position + self.capacity
+        prices = self._prices
+        prices[0, position] = prices[0, mirror] = open_
+        prices[1, position] = prices[1, mirror] = high
+        prices[2, position] = prices[2, mirror] = low
+        prices[3, position] = prices[3, mirror] = close
+        prices[4, position] = prices[4, mirror] = volume
+        self._timestamps[position] = self._timestamps[mirror] = timestamp
+        self._next = position + 1 if position + 1 < self.capacity else 0
+        if self._size < self.capacity:
+            self._size += 1
+
+    def _window(self) -> slice:
+        start = (self._next - self._size) % self.capacity
+        return slice(start, start + self._size)
+
+    def column(self, name: str) -> np.ndarray:
+        """Returns a zero-copy, oldest-first view of one column."""
+        if name == 'timestamp':
+            return self._timestamps[self._window()]
+        return self._prices[PRICE_COLUMNS.index(name), self._window()]
+
+    @property
+    def open(self) -> np.ndarray:
+        return self._prices[0, self._window()]
+
+    @property
+    def high(self) -> np.ndarray:
+        return self._prices[1, self._window()]
+
+    @property
+    def low(self) -> np.ndarray:
+        return self._prices[2, self._window()]
+
+    @property
+    def close(self) -> np.ndarray:
+        return self._prices[3, self._window()]
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self._prices[4, self._window()]
+
+    @property
+    def timestamp(self) -> np.ndarray:
+        return self._timestamps[self._window()]
+
+    def latest(self) -> Optional[dict]:
+        """Returns the most recent bar as a dict of floats, or None if empty."""
+        if self._size == 0:
+            return None
+        position = self._next - 1 if self._next > 0 else self.capacity - 1
+        row = {name: float(self._prices[index, position]) for index, name in enumerate(PRICE_COLUMNS)}
+        row['timestamp'] = int(self._timestamps[position])
+        return row
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Copies the window into a DataFrame indexed by timestamp."""
+        window = self._window()
+        frame = pd.DataFrame(self._prices[:, window].T.copy(), columns=list(PRICE_COLUMNS),
+                             index=self._timestamps[window].copy())
+        frame.index.name = 'timestamp'
+        return frame
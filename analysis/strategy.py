@@ -1,35 +1,117 @@
 from analysis.technical_analyzer import TechnicalAnalyzer
 from models import OCHLVData, TradeSignal
+from dataclasses import dataclass
 from decimal import Decimal
+from typing import Optional, Tuple
+
+# How entries derive their stop-loss and take-profit levels
+STOP_MODES = ('fixed', 'atr', 'keltner')
+
+@dataclass(frozen=True)
+class StrategyParameters:
+    """Tunable thresholds of the RSI/MACD strategy, shared with the backtester and optimizer."""
+    rsi_length: int = 14
+    rsi_oversold: float = 30
+    rsi_overbought: float = 70
+    macd_fast: int = 12
+    macd_slow: int = 26
+    macd_signal: int = 9
+    stop_loss_multiplier: Decimal = Decimal('0.99') # 1% below entry
+    take_profit_multiplier: Decimal = Decimal('1.02') # 2% above entry
+    # 'fixed' uses the multipliers above. 'atr' places the stop and target the
+    # given ATR multiples below and above the close; 'keltner' places them on
+    # an EMA-centred channel of those ATR widths (falling back to 'atr' levels
+    # when the close is outside it). Volatile markets then get wider stops and,
+    # since RiskManager sizes by the distance to the stop, smaller positions.
+    stop_mode: str = 'fixed'
+    atr_length: int = 14
+    atr_stop_multiple: Decimal = Decimal('2')
+    atr_target_multiple: Decimal = Decimal('3')
+    keltner_length: int = 20
+
+    def __post_init__(self):
+        # Accept float multipliers from search ranges; the live path multiplies Decimals
+        for name in ('stop_loss_multiplier', 'take_profit_multiplier', 'atr_stop_multiple', 'atr_target_multiple'):
+            object.__setattr__(self, name, Decimal(str(getattr(self, name))))
+        if self.stop_mode not in STOP_MODES:
+            raise ValueError(f"Unknown stop mode {self.stop_mode!r}; expected one of {STOP_MODES}.")
+        if self.atr_stop_multiple <= 0 or self.atr_target_multiple <= 0:
+            raise ValueError("ATR stop and target multiples must be positive.")
+        if self.rsi_oversold >= self.rsi_overbought:
+            raise ValueError("RSI oversold threshold must be below the overbought threshold.")
+        if self.macd_fast >= self.macd_slow:
+            raise ValueError("MACD fast length must be shorter than the slow length.")
+        if not self.stop_loss_multiplier < 1 < self.take_profit_multiplier:
+            raise ValueError("Stop loss must be below and take profit above the entry price.")
 
 class TradingStrategy:
-    def __init__(self, technical_analyzer: TechnicalAnalyzer):
+    def __init__(self, technical_analyzer: TechnicalAnalyzer, parameters: StrategyParameters | None = None):
         self.technical_analyzer = technical_analyzer
+        self.parameters = parameters or StrategyParameters()
 
     def generate_signal(self, ochlv_data: OCHLVData) -> TradeSignal | None:
         self.technical_analyzer.add_ohlcv_data(ochlv_data)
 
         # Simple strategy: Buy if RSI is below 30 (oversold) and MACD crosses up
         # Sell if RSI is above 70 (overbought) and MACD crosses down
+        params = self.parameters
 
-        rsi = self.technical_analyzer.calculate_rsi()
-        macd, macdh, macds = self.technical_analyzer.calculate_macd()
-        latest_close = ochlv_data.close
+        rsi = self.technical_analyzer.calculate_rsi(params.rsi_length)
+        macd_value = self.technical_analyzer.calculate_macd(params.macd_fast, params.macd_slow, params.macd_signal)
+        atr = channel_middle = None
+        if params.stop_mode != 'fixed':
+            # Streaming indicators: one O(1) update per bar once first requested
+            atr = self.technical_analyzer.calculate_atr(params.atr_length)
+            if params.stop_mode == 'keltner':
+                channel_middle = self.technical_analyzer.calculate_ema(params.keltner_length)
+        return rsi_macd_signal(params, rsi, macd_value, ochlv_data.close, atr, channel_middle)
 
-        if rsi is None or macd is None or macdh is None or macds is None:
+def entry_levels(params: StrategyParameters, latest_close: Decimal, atr: Optional[float] = None,
+                 channel_middle: Optional[float] = None) -> Optional[Tuple[Decimal, Decimal]]:
+    """(stop_loss, take_profit) for an entry at ``latest_close``; None when a needed indicator is not ready."""
+    if params.stop_mode == 'fixed':
+        return latest_close * params.stop_loss_multiplier, latest_close * params.take_profit_multiplier
+    if atr is None or atr <= 0:
+        return None
+    atr_value = Decimal(repr(atr))
+    stop_loss = latest_close - params.atr_stop_multiple * atr_value
+    take_profit = latest_close + params.atr_target_multiple * atr_value
+    if params.stop_mode == 'keltner':
+        if channel_middle is None:
             return None
+        middle = Decimal(repr(channel_middle))
+        channel_stop = middle - params.atr_stop_multiple * atr_value
+        channel_target = middle + params.atr_target_multiple * atr_value
+        if channel_stop < latest_close < channel_target:
+            # Reason: near the lower band the channel stop sits just under the close and the
+            # stop-distance sizing would balloon, so the stop is never closer than the ATR stop
+            stop_loss, take_profit = min(channel_stop, stop_loss), channel_target
+    return stop_loss, take_profit
 
-        # Entry condition (Buy)
-        if rsi < 30 and macdh > 0 and macdh > macds: # MACD Histogram positive and MACD line crosses above signal line
-            # For simplicity, setting stop loss and take profit as fixed percentages
-            # In a real scenario, these would be dynamically calculated based on ATR, support/resistance, etc.
-            stop_loss = latest_close * Decimal('0.99') # 1% below
-            take_profit = latest_close * Decimal('1.02') # 2% above
-            return TradeSignal(action='enter', stop_loss=stop_loss, take_profit=take_profit)
+def rsi_macd_signal(params: StrategyParameters, rsi: Optional[float],
+                    macd_value: Tuple[Optional[float], Optional[float], Optional[float]],
+                    latest_close: Decimal, atr: Optional[float] = None,
+                    channel_middle: Optional[float] = None) -> TradeSignal | None:
+    """The RSI/MACD entry and exit rules applied to already computed indicator values.
+
+    ``atr`` and ``channel_middle`` (the EMA of ``keltner_length`` closes) are
+    only needed by the 'atr' and 'keltner' stop modes.
+    """
+    macd, macdh, macds = macd_value
+    if rsi is None or macd is None or macdh is None or macds is None:
+        return None
+
+    # Entry condition (Buy)
+    if rsi < params.rsi_oversold and macdh > 0 and macdh > macds: # MACD Histogram positive and MACD line crosses above signal line
+        levels = entry_levels(params, latest_close, atr, channel_middle)
+        if levels is None:
+            return None
+        stop_loss, take_profit = levels
+        return TradeSignal(action='enter', stop_loss=stop_loss, take_profit=take_profit)
 
-        # Exit condition (Sell) - This strategy assumes we are already in a trade
-        # A more robust strategy would manage open positions
-        if rsi > 70 and macdh < 0 and macdh < macds: # MACD Histogram negative and MACD line crosses below signal line
-            return TradeSignal(action='exit')
+    # Exit condition (Sell) - This strategy assumes we are already in a trade
+    # A more robust strategy would manage open positions
+    if rsi > params.rsi_overbought and macdh < 0 and macdh < macds: # MACD Histogram negative and MACD line crosses below signal line
+        return TradeSignal(action='exit')
 
-        return None
\ No newline at end of file
+    return None
\ No newline at end of file
@@ -0,0 +1,182 @@
+"""Strategy plugins that declare their indicators and share them per symbol.
+
+A strategy lists the indicators it reads as ``IndicatorSpec`` values
+(``rsi(14)``, ``macd(12, 26, 9)``, ``ema(50)``, ``atr(14)``) and decides on a signal from
+their current values. ``StrategyGroup`` runs several strategies on one
+``TechnicalAnalyzer``: it merges their declarations into one set of unique
+indicators, lets the analyzer update each of them once per bar, and hands the
+same computed values to every strategy. A dozen strategies that all need
+``rsi(14)`` therefore cost one RSI update per bar, not twelve.
+
+New strategies subclass ``Strategy`` and are made available by name with
+``@register_strategy("name")``. ``TradingAgent(strategies=...)`` (``main.py
+trade --strategies``) trades a group on one symbol.
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Type
+from analysis.strategy import StrategyParameters, rsi_macd_signal
+from analysis.technical_analyzer import TechnicalAnalyzer
+from models import OCHLVData, TradeSignal
+import logging
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class IndicatorSpec:
+    """One indicator with its parameters, e.g. ``IndicatorSpec("rsi", (14,))``."""
+    name: str
+    params: Tuple[Any, ...] = ()
+
+    def compute(self, analyzer: TechnicalAnalyzer) -> Any:
+        # The analyzer keys its streaming indicators by name and parameters,
+        # so equal specs always read the same indicator instance
+        return getattr(analyzer, f"calculate_{self.name}")(*self.params)
+
+    def __str__(self) -> str:
+        return f"{self.name}({', '.join(map(str, self.params))})"
+
+def rsi(length: int = 14) -> IndicatorSpec:
+    return IndicatorSpec("rsi", (length,))
+
+def macd(fast: int = 12, slow: int = 26, signal: int = 9) -> IndicatorSpec:
+    return IndicatorSpec("macd", (fast, slow, signal))
+
+def ema(length: int = 20) -> IndicatorSpec:
+    return IndicatorSpec("ema", (length,))
+
+def sma(length: int = 20) -> IndicatorSpec:
+    return IndicatorSpec("sma", (length,))
+
+def atr(length: int = 14) -> IndicatorSpec:
+    return IndicatorSpec("atr", (length,))
+
+def bollinger_bands(length: int = 20, std: float = 2.0) -> IndicatorSpec:
+    return IndicatorSpec("bollinger_bands", (length, std))
+
+def keltner_channels(length: int = 20, scalar: float = 2.0, atr_length: int = 10) -> IndicatorSpec:
+    return IndicatorSpec("keltner_channels", (length, scalar, atr_length))
+
+class Strategy(ABC):
+    """Base class of strategy plugins.
+
+    Subclasses set ``indicators`` (usually in ``__init__`` from their
+    parameters) and implement ``evaluate``. Instances may keep state between
+    bars, so each symbol gets its own instances.
+    """
+    name = "strategy"  # Set by register_strategy
+
+    def __init__(self, label: Optional[str] = None):
+        self.label = label or self.name  # Distinguishes two instances of one strategy in a group
+        self.indicators: Tuple[IndicatorSpec, ...] = ()
+
+    @abstractmethod
+    def evaluate(self, ochlv_data: OCHLVData, values: Mapping[IndicatorSpec, Any]) -> TradeSignal | None:
+        """The signal for a closed bar, given the current value of every declared indicator."""
+
+_STRATEGIES: Dict[str, Type[Strategy]] = {}
+
+def register_strategy(name: str) -> Callable[[Type[Strategy]], Type[Strategy]]:
+    def register(cls: Type[Strategy]) -> Type[Strategy]:
+        if name in _STRATEGIES:
+            raise ValueError(f"Strategy {name} is already registered.")
+        cls.name = name
+        _STRATEGIES[name] = cls
+        return cls
+    return register
+
+def available_strategies() -> List[str]:
+    return sorted(_STRATEGIES)
+
+def create_strategy(name: str, **params) -> Strategy:
+    try:
+        strategy_class = _STRATEGIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown strategy {name}; available: {', '.join(available_strategies())}") from None
+    return strategy_class(**params)
+
+@register_strategy("rsi_macd")
+class RsiMacdStrategy(Strategy):
+    """The RSI/MACD rules of ``TradingStrategy`` as a plugin."""
+
+    def __init__(self, parameters: Optional[StrategyParameters] = None, label: Optional[str] = None):
+        super().__init__(label)
+        self.parameters = parameters or StrategyParameters()
+        params = self.parameters
+        self.rsi = rsi(params.rsi_length)
+        self.macd = macd(params.macd_fast, params.macd_slow, params.macd_signal)
+        self.indicators = (self.rsi, self.macd)
+        # Only the stop modes that need them add the ATR and channel EMA
+        self.atr = atr(params.atr_length) if params.stop_mode != 'fixed' else None
+        self.channel_middle = ema(params.keltner_length) if params.stop_mode == 'keltner' else None
+        self.indicators += tuple(spec for spec in (self.atr, self.channel_middle) if spec is not None)
+
+    def evaluate(self, ochlv_data: OCHLVData, values: Mapping[IndicatorSpec, Any]) -> TradeSignal | None:
+        return rsi_macd_signal(self.parameters, values[self.rsi], values[self.macd], ochlv_data.close,
+                               values.get(self.atr), values.get(self.channel_middle))
+
+@register_strategy("ema_cross")
+class EmaCrossStrategy(Strategy):
+    """Enters when the fast EMA crosses above the slow EMA and exits on the cross back below."""
+
+    def __init__(self, fast: int = 20, slow: int = 50, stop_loss_multiplier: Decimal = Decimal('0.99'),
+                 take_profit_multiplier: Decimal = Decimal('1.02'), label: Optional[str] = None):
+        super().__init__(label)
+        if fast >= slow:
+            raise ValueError("Fast EMA length must be shorter than the slow length.")
+        self.fast = ema(fast)
+        self.slow = ema(slow)
+        self.indicators = (self.fast, self.slow)
+        self.stop_loss_multiplier = Decimal(str(stop_loss_multiplier))
+        self.take_profit_multiplier = Decimal(str(take_profit_multiplier))
+        self._fast_above: Optional[bool] = None  # Side of the previous bar, None until both EMAs exist
+
+    def evaluate(self, ochlv_data: OCHLVData, values: Mapping[IndicatorSpec, Any]) -> TradeSignal | None:
+        fast_value, slow_value = values[self.fast], values[self.slow]
+        if fast_value is None or slow_value is None:
+            return None
+        was_above, self._fast_above = self._fast_above, fast_value > slow_value
+        if was_above is None or was_above == self._fast_above:
+            return None
+        if self._fast_above:
+            return TradeSignal(action='enter', stop_loss=ochlv_data.close * self.stop_loss_multiplier,
+                               take_profit=ochlv_data.close * self.take_profit_multiplier)
+        return TradeSignal(action='exit')
+
+class StrategyGroup:
+    """Runs several strategies on one symbol's analyzer, computing each unique indicator once per bar."""
+
+    def __init__(self, technical_analyzer: TechnicalAnalyzer, strategies: Sequence[Strategy]):
+        labels = [strategy.label for strategy in strategies]
+        if len(set(labels)) != len(labels):
+            raise ValueError(f"Strategy labels must be unique within a group: {labels}")
+        self.technical_analyzer = technical_analyzer
+        self.strategies = list(strategies)
+        # Insertion-ordered union of every declaration
+        self.indicators: Tuple[IndicatorSpec, ...] = tuple(dict.fromkeys(
+            spec for strategy in self.strategies for spec in strategy.indicators))
+
+    def generate_signals(self, ochlv_data: OCHLVData) -> Dict[str, TradeSignal]:
+        """Signals by strategy label for a closed bar; strategies without a signal are omitted."""
+        self.technical_analyzer.add_ohlcv_data(ochlv_data)
+        values = {spec: spec.compute(self.technical_analyzer) for spec in self.indicators}
+        signals = {}
+        for strategy in self.strategies:
+            signal = strategy.evaluate(ochlv_data, values)
+            if signal is not None:
+                signals[strategy.label] = signal
+        return signals
+
+    def generate_signal(self, ochlv_data: OCHLVData, in_position: bool) -> TradeSignal | None:
+        """The one signal to act on for a symbol holding at most one position.
+
+        Flat, it is the first entry signal in group order; in a position, the
+        first exit signal, whichever strategy opened the position.
+        """
+        wanted = 'exit' if in_position else 'enter'
+        for label, signal in self.generate_signals(ochlv_data).items():
+            if signal.action == wanted:
+                logger.info(f"{label} signals {wanted}")
+                return signal
+        return None
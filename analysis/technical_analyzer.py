@@ -1,55 +1,114 @@
 import pandas as pd
-import pandas_ta as ta # type: ignore
 from decimal import Decimal
+from typing import Callable, Dict, Hashable, Optional, Tuple
+from analysis.indicators import (StreamingATR, StreamingBollingerBands, StreamingEMA, StreamingKeltnerChannels,
+                                 StreamingMACD, StreamingRSI, StreamingSMA)
+from analysis.ohlcv_buffer import OHLCVRingBuffer
 
 class TechnicalAnalyzer:
-    def __init__(self):
-        self.data = pd.DataFrame(columns=['open', 'high', 'low', 'close', 'volume', 'timestamp'])
-        self.data = self.data.set_index('timestamp') # Set timestamp as index
+    def __init__(self, window: int = 200):
+        # Keep only the last `window` bars in a preallocated ring buffer
+        self.buffer = OHLCVRingBuffer(capacity=window)
+        # Streaming indicators keyed by (name, *params), updated once per bar
+        self._indicators: Dict[Hashable, object] = {}
+        # Indicators that need the bar's high and low as well (ATR, Keltner Channels)
+        self._bar_indicators: Dict[Hashable, object] = {}
+
+    @property
+    def data(self) -> pd.DataFrame:
+        """DataFrame copy of the retained window, kept for compatibility."""
+        return self.buffer.to_dataframe()
 
     def add_ohlcv_data(self, ochlv_data):
-        # Convert Decimal to float for pandas_ta calculations
-        new_row = pd.DataFrame([{
-            'open': float(ochlv_data.open),
-            'high': float(ochlv_data.high),
-            'low': float(ochlv_data.low),
-            'close': float(ochlv_data.close),
-            'volume': float(ochlv_data.volume)
-        }], index=[ochlv_data.timestamp])
-        self.data = pd.concat([self.data, new_row])
-        # Keep only the last N data points to avoid excessive memory usage
-        self.data = self.data.iloc[-200:] # Keep last 200 data points for indicators
-
-    def calculate_rsi(self, length=14):
-        if len(self.data) < length:
+        # Convert Decimal (or raw string) prices to float for indicator calculations
+        open_, high, low, close, volume = ochlv_data.to_floats()
+        self.buffer.append(ochlv_data.timestamp, open_, high, low, close, volume)
+
+        for indicator in self._indicators.values():
+            indicator.update(close)
+        for indicator in self._bar_indicators.values():
+            indicator.update(high, low, close)
+
+    def warm_up(self, records):
+        """Seeds the window from stored history, e.g. ``KlineStore.read`` records, oldest first."""
+        records = records[max(0, len(records) - self.buffer.capacity):]
+        columns = [records[name].tolist() for name in ('timestamp', 'open', 'high', 'low', 'close', 'volume')]
+        for timestamp, open_, high, low, close, volume in zip(*columns):
+            self.buffer.append(timestamp, open_, high, low, close, volume)
+            for indicator in self._indicators.values():
+                indicator.update(close)
+            for indicator in self._bar_indicators.values():
+                indicator.update(high, low, close)
+
+    def _get_indicator(self, key: Hashable, factory: Callable[[], object]):
+        indicator = self._indicators.get(key)
+        if indicator is None:
+            indicator = factory()
+            # Reason: an indicator first requested after bars have arrived is
+            # warmed once from the retained window, then updated per bar.
+            for close in self.buffer.close.tolist():
+                indicator.update(close)
+            self._indicators[key] = indicator
+        return indicator
+
+    def _get_bar_indicator(self, key: Hashable, factory: Callable[[], object]):
+        indicator = self._bar_indicators.get(key)
+        if indicator is None:
+            indicator = factory()
+            for high, low, close in zip(self.buffer.high.tolist(), self.buffer.low.tolist(), self.buffer.close.tolist()):
+                indicator.update(high, low, close)
+            self._bar_indicators[key] = indicator
+        return indicator
+
+    def calculate_rsi(self, length=14) -> Optional[float]:
+        if len(self.buffer) < length:
             return None
-        return ta.rsi(self.data["close"], length=length).iloc[-1]
+        return self._get_indicator(("rsi", length), lambda: StreamingRSI(length)).value
 
-    def calculate_macd(self, fast=12, slow=26, signal=9):
-        if len(self.data) < max(fast, slow, signal):
+    def calculate_macd(self, fast=12, slow=26, signal=9) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        if len(self.buffer) < max(fast, slow, signal):
             return None, None, None
-        macd = ta.macd(self.data["close"], fast=fast, slow=slow, signal=signal)
-        return macd["MACD"].iloc[-1], macd["MACDH"].iloc[-1], macd["MACDS"].iloc[-1]
+        macd = self._get_indicator(("macd", fast, slow, signal), lambda: StreamingMACD(fast, slow, signal))
+        return macd.value
 
-    def calculate_sma(self, length=20):
-        if len(self.data) < length:
+    def calculate_sma(self, length=20) -> Optional[float]:
+        if len(self.buffer) < length:
             return None
-        return ta.sma(self.data["close"], length=length).iloc[-1]
+        return self._get_indicator(("sma", length), lambda: StreamingSMA(length)).value
 
-    def calculate_ema(self, length=20):
-        if len(self.data) < length:
+    def calculate_ema(self, length=20) -> Optional[float]:
+        if len(self.buffer) < length:
             return None
-        return ta.ema(self.data["close"], length=length).iloc[-1]
+        return self._get_indicator(("ema", length), lambda: StreamingEMA(length)).value
+
+    def calculate_atr(self, length=14) -> Optional[float]:
+        if len(self.buffer) <= length:
+            return None
+        return self._get_bar_indicator(("atr", length), lambda: StreamingATR(length)).value
+
+    def calculate_bollinger_bands(self, length=20, std=2.0) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        """Returns (lower, middle, upper) bands."""
+        if len(self.buffer) < length:
+            return None, None, None
+        return self._get_indicator(("bbands", length, std), lambda: StreamingBollingerBands(length, std)).value
+
+    def calculate_keltner_channels(self, length=20, scalar=2.0, atr_length=10) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        """Returns (lower, middle, upper) channel lines."""
+        if len(self.buffer) < length or len(self.buffer) <= atr_length:
+            return None, None, None
+        channels = self._get_bar_indicator(("kc", length, scalar, atr_length),
+                                           lambda: StreamingKeltnerChannels(length, scalar, atr_length))
+        return channels.value
 
     def get_latest_data(self):
-        if self.data.empty:
+        latest_row = self.buffer.latest()
+        if latest_row is None:
             return None
-        latest_row = self.data.iloc[-1]
         return {
             "open": Decimal(str(latest_row["open"])),
             "high": Decimal(str(latest_row["high"])),
             "low": Decimal(str(latest_row["low"])),
             "close": Decimal(str(latest_row["close"])),
             "volume": Decimal(str(latest_row["volume"])),
-            "timestamp": self.data.index[-1]
-        }
\ No newline at end of file
+            "timestamp": latest_row["timestamp"]
+        }
@@ -0,0 +1,61 @@
+"""Whole-array indicator computation for offline use (backtests, sweeps).
+
+These functions take a full NumPy close series and return one value per bar,
+with NaN where the indicator is not yet defined. They follow the same
+pandas_ta formulas as the streaming indicators in ``analysis.indicators``,
+so a backtest sees the values the live strategy would have seen.
+"""
+from typing import Tuple
+import numpy as np
+import pandas as pd
+
+
+def sma_array(close: np.ndarray, length: int = 20) -> np.ndarray:
+    return pd.Series(close).rolling(length).mean().to_numpy()
+
+
+def ema_array(close: np.ndarray, length: int = 20) -> np.ndarray:
+    result = np.full(len(close), np.nan)
+    if len(close) < length:
+        return result
+    seeded = np.asarray(close, dtype=np.float64)[length - 1:].copy()
+    # Seed with the SMA of the first `length` values, as pandas_ta does
+    seeded[0] = np.mean(close[:length])
+    result[length - 1:] = pd.Series(seeded).ewm(span=length, adjust=False).mean().to_numpy()
+    return result
+
+
+def rsi_array(close: np.ndarray, length: int = 14) -> np.ndarray:
+    change = np.diff(np.asarray(close, dtype=np.float64), prepend=np.nan)
+    gains = pd.Series(np.where(change > 0, change, 0.0))
+    losses = pd.Series(np.where(change < 0, -change, 0.0))
+    gains[0] = losses[0] = np.nan
+    average_gain = gains.ewm(alpha=1 / length, min_periods=length).mean().to_numpy()
+    average_loss = losses.ewm(alpha=1 / length, min_periods=length).mean().to_numpy()
+    total = average_gain + average_loss
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(total > 0, 100.0 * average_gain / total, np.nan)
+
+
+def macd_array(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns (macd, histogram, signal line) arrays."""
+    macd = ema_array(close, fast) - ema_array(close, slow)
+    signal_line = np.full(len(close), np.nan)
+    if len(close) >= slow:
+        # The signal EMA starts at the first defined MACD value
+        signal_line[slow - 1:] = ema_array(macd[slow - 1:], signal)
+    return macd, macd - signal_line, signal_line
+
+
+def atr_array(high: np.ndarray, low: np.ndarray, close: np.ndarray, length: int = 14) -> np.ndarray:
+    """Wilder ATR seeded with the mean of the first ``length`` true ranges, as ``StreamingATR``."""
+    close = np.asarray(close, dtype=np.float64)
+    result = np.full(len(close), np.nan)
+    if len(close) <= length:
+        return result
+    prev_close = close[:-1]
+    true_range = np.maximum(np.asarray(high)[1:], prev_close) - np.minimum(np.asarray(low)[1:], prev_close)
+    seeded = true_range[length - 1:].copy()
+    seeded[0] = np.mean(true_range[:length])
+    result[length:] = pd.Series(seeded).ewm(alpha=1 / length, adjust=False).mean().to_numpy()
+    return result
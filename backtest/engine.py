@@ -0,0 +1,226 @@
+"""Offline evaluation of the RSI/MACD strategy over historical klines.
+
+Two modes produce the same trades:
+
+* ``run_vectorized`` computes every indicator over the whole history at once
+  and turns the strategy rules into entry/exit masks. It is the fast path
+  for parameter sweeps.
+* ``run_bar_by_bar`` replays each bar through ``TradingStrategy`` and
+  ``TechnicalAnalyzer`` exactly as the live agent does, to validate the live
+  code path.
+
+Both hand their signals to the same fill simulator, which sizes entries with
+``RiskManager``, fills stop-loss and take-profit levels intrabar and tracks
+mark-to-market equity for PnL and drawdown.
+"""
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import List, Optional, Tuple
+import numpy as np
+from analysis.strategy import StrategyParameters, TradingStrategy
+from analysis.technical_analyzer import TechnicalAnalyzer
+from analysis.vectorized import atr_array, ema_array, macd_array, rsi_array
+from backtest.loader import OHLCVArrays
+from data.kline_decoder import KlineBar
+from trading.risk_manager import RiskManager
+
+# Bars scanned per step while looking for a trade's exit; grows geometrically
+_EXIT_SCAN_CHUNK = 256
+
+@dataclass
+class BacktestConfig:
+    initial_balance: float = 10000.0
+    risk_per_trade_percentage: float = 0.10
+    fee_rate: float = 0.0  # Charged on the notional of every fill
+    strategy: StrategyParameters = field(default_factory=StrategyParameters)
+
+@dataclass
+class Trade:
+    entry_index: int
+    exit_index: int
+    entry_price: float
+    exit_price: float
+    quantity: float
+    pnl: float
+    exit_reason: str  # 'stop_loss', 'take_profit', 'signal' or 'end_of_data'
+
+@dataclass
+class BacktestResult:
+    trades: List[Trade]
+    equity_curve: np.ndarray  # Mark-to-market equity after every bar
+    initial_balance: float
+    elapsed_seconds: float = 0.0
+    bars: int = field(init=False)
+
+    def __post_init__(self):
+        self.bars = len(self.equity_curve)
+
+    @property
+    def final_equity(self) -> float:
+        return float(self.equity_curve[-1]) if self.bars else self.initial_balance
+
+    @property
+    def total_pnl(self) -> float:
+        return self.final_equity - self.initial_balance
+
+    @property
+    def total_return(self) -> float:
+        return self.total_pnl / self.initial_balance
+
+    @property
+    def max_drawdown(self) -> float:
+        """Largest peak-to-trough equity decline as a fraction of the peak."""
+        if not self.bars:
+            return 0.0
+        peaks = np.maximum.accumulate(self.equity_curve)
+        return float(np.max((peaks - self.equity_curve) / peaks))
+
+    @property
+    def win_rate(self) -> float:
+        if not self.trades:
+            return 0.0
+        return sum(1 for trade in self.trades if trade.pnl > 0) / len(self.trades)
+
+    @property
+    def bars_per_second(self) -> float:
+        return self.bars / self.elapsed_seconds if self.elapsed_seconds > 0 else float('inf')
+
+class Backtester:
+    def __init__(self, config: Optional[BacktestConfig] = None):
+        self.config = config or BacktestConfig()
+
+    def signal_masks(self, data: OHLCVArrays, rsi: Optional[np.ndarray] = None, macd: Optional[Tuple[np.ndarray, ...]] = None):
+        """Entry and exit masks of the RSI/MACD rules in TradingStrategy.
+
+        ``rsi`` and ``macd`` (as returned by ``macd_array``) may be passed in
+        when the caller already computed them for these parameters.
+        """
+        params = self.config.strategy
+        if rsi is None:
+            rsi = rsi_array(data.close, params.rsi_length)
+        if macd is None:
+            macd = macd_array(data.close, params.macd_fast, params.macd_slow, params.macd_signal)
+        _, macdh, macds = macd
+        with np.errstate(invalid='ignore'):
+            enter = (rsi < params.rsi_oversold) & (macdh > 0) & (macdh > macds)
+            exit_ = (rsi > params.rsi_overbought) & (macdh < 0) & (macdh < macds)
+        return enter, exit_
+
+    def run_vectorized(self, data: OHLCVArrays, rsi: Optional[np.ndarray] = None,
+                       macd: Optional[Tuple[np.ndarray, ...]] = None, atr: Optional[np.ndarray] = None,
+                       channel_middle: Optional[np.ndarray] = None) -> BacktestResult:
+        started = time.perf_counter()
+        enter, exit_ = self.signal_masks(data, rsi, macd)
+        stop_loss, take_profit = self.entry_levels(data, atr, channel_middle)
+        # Entries whose levels are not defined yet (ATR warming up) are skipped, as in entry_levels()
+        enter &= ~np.isnan(stop_loss)
+        return self._simulate(data, enter, exit_, stop_loss, take_profit, started)
+
+    def entry_levels(self, data: OHLCVArrays, atr: Optional[np.ndarray] = None,
+                     channel_middle: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Stop-loss and take-profit arrays for an entry at each bar's close, per ``StrategyParameters.stop_mode``.
+
+        ``atr`` and the Keltner ``channel_middle`` EMA may be passed in, like
+        the indicators of ``signal_masks``.
+        """
+        params = self.config.strategy
+        close = np.asarray(data.close, dtype=np.float64)
+        if params.stop_mode == 'fixed':
+            return close * float(params.stop_loss_multiplier), close * float(params.take_profit_multiplier)
+        if atr is None:
+            atr = atr_array(data.high, data.low, close, params.atr_length)
+        stop_loss = close - float(params.atr_stop_multiple) * atr
+        take_profit = close + float(params.atr_target_multiple) * atr
+        if params.stop_mode == 'keltner':
+            middle = channel_middle if channel_middle is not None else ema_array(close, params.keltner_length)
+            channel_stop = middle - float(params.atr_stop_multiple) * atr
+            channel_target = middle + float(params.atr_target_multiple) * atr
+            with np.errstate(invalid='ignore'):
+                inside = (channel_stop < close) & (close < channel_target)
+            stop_loss = np.where(inside, np.minimum(channel_stop, stop_loss), stop_loss) # Never closer than the ATR stop
+            take_profit = np.where(inside, channel_target, take_profit)
+            stop_loss[np.isnan(middle)] = np.nan
+        return stop_loss, take_profit
+
+    def run_bar_by_bar(self, data: OHLCVArrays) -> BacktestResult:
+        started = time.perf_counter()
+        analyzer = TechnicalAnalyzer()
+        strategy = TradingStrategy(analyzer, self.config.strategy)
+        count = len(data)
+        enter = np.zeros(count, dtype=bool)
+        exit_ = np.zeros(count, dtype=bool)
+        stop_loss = np.full(count, np.nan)
+        take_profit = np.full(count, np.nan)
+        columns = (data.timestamp.tolist(), data.open.tolist(), data.high.tolist(),
+                   data.low.tolist(), data.close.tolist(), data.volume.tolist())
+        for index, (timestamp, open_, high, low, close, volume) in enumerate(zip(*columns)):
+            bar = KlineBar(timestamp, repr(open_), repr(high), repr(low), repr(close), repr(volume))
+            signal = strategy.generate_signal(bar)
+            if signal is None:
+                continue
+            if signal.action == 'enter':
+                enter[index] = True
+                stop_loss[index] = float(signal.stop_loss)
+                take_profit[index] = float(signal.take_profit)
+            elif signal.action == 'exit':
+                exit_[index] = True
+        return self._simulate(data, enter, exit_, stop_loss, take_profit, started)
+
+    def _find_exit(self, data: OHLCVArrays, exit_: np.ndarray, start: int, stop: float, target: float):
+        """First bar at or after ``start`` that closes the trade, and why."""
+        count = len(data)
+        chunk = _EXIT_SCAN_CHUNK
+        while start < count:
+            end = min(count, start + chunk)
+            stop_hit = data.low[start:end] <= stop
+            target_hit = data.high[start:end] >= target
+            any_hit = stop_hit | target_hit | exit_[start:end]
+            if any_hit.any():
+                offset = int(np.argmax(any_hit))
+                index = start + offset
+                # Reason: with only OHLC we cannot tell which level traded
+                # first inside a bar, so assume the stop (the pessimistic case).
+                if stop_hit[offset]:
+                    return index, min(stop, float(data.open[index])), 'stop_loss'
+                if target_hit[offset]:
+                    return index, max(target, float(data.open[index])), 'take_profit'
+                return index, float(data.close[index]), 'signal'
+            start = end
+            chunk *= 2
+        return count - 1, float(data.close[count - 1]), 'end_of_data'
+
+    def _simulate(self, data: OHLCVArrays, enter: np.ndarray, exit_: np.ndarray,
+                  stop_loss: np.ndarray, take_profit: np.ndarray, started: float) -> BacktestResult:
+        config = self.config
+        count = len(data)
+        risk_manager = RiskManager(Decimal(str(config.initial_balance)), Decimal(str(config.risk_per_trade_percentage)))
+        entry_indices = np.flatnonzero(enter)
+        realized = np.zeros(count)
+        unrealized = np.zeros(count)
+        trades: List[Trade] = []
+        equity = config.initial_balance
+        next_candidate = 0
+        while next_candidate < len(entry_indices):
+            entry_index = int(entry_indices[next_candidate])
+            entry_price = float(data.close[entry_index])
+            stop, target = float(stop_loss[entry_index]), float(take_profit[entry_index])
+            risk_manager.update_account_balance(Decimal(str(equity)))
+            try:
+                quantity = float(risk_manager.calculate_position_size(Decimal(str(entry_price)), Decimal(str(stop))))
+            except ValueError:
+                next_candidate += 1
+                continue
+            # Same cap as TradingAgent: never buy more than the balance covers
+            quantity = min(quantity, equity / (entry_price * (1 + config.fee_rate)))
+            exit_index, exit_price, reason = self._find_exit(data, exit_, entry_index + 1, stop, target)
+            fees = config.fee_rate * quantity * (entry_price + exit_price)
+            pnl = quantity * (exit_price - entry_price) - fees
+            trades.append(Trade(entry_index, exit_index, entry_price, exit_price, quantity, pnl, reason))
+            realized[exit_index] += pnl
+            unrealized[entry_index:exit_index] = quantity * (data.close[entry_index:exit_index] - entry_price)
+            equity += pnl
+            # Re-entry is only allowed after the bar that closed the trade
+            next_candidate = int(np.searchsorted(entry_indices, exit_index, side='right'))
+        equity_curve = config.initial_balance + np.cumsum(realized) + unrealized
+        return BacktestResult(trades, equity_curve, config.initial_balance, time.perf_counter() - started)
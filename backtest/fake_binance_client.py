@@ -0,0 +1,111 @@
+"""python-binance ``Client`` look-alike for the simulated exchange.
+
+``FakeBinanceClient`` calls a ``FakeExchange`` directly, so
+``Trader(client=FakeBinanceClient(exchange))`` trades without a socket.
+"""
+import itertools
+import json
+from decimal import Decimal
+from typing import Any, List, Optional
+from backtest.fake_exchange import FakeExchange, FakeExchangeError
+from backtest.fake_orders import format_amount
+
+def _decimal(value: Any, name: str) -> Decimal:
+    if value is None or value == '':
+        raise FakeExchangeError(-1102, f"Mandatory parameter '{name}' was not sent, was empty/null, or malformed.")
+    return Decimal(str(value))
+
+class FakeBinanceClient:
+    """python-binance ``Client`` look-alike calling a ``FakeExchange`` directly.
+
+    Covers the calls this project makes. Parameters are taken as keyword
+    arguments under their REST names and may be numbers or strings, and
+    errors are raised as ``BinanceAPIException``, as with the real client.
+    """
+
+    def __init__(self, exchange: FakeExchange):
+        self.exchange = exchange
+        self._listen_keys = itertools.count(1)
+
+    def ping(self) -> dict:
+        return {}
+
+    def get_server_time(self) -> dict:
+        return {'serverTime': self.exchange.clock()}
+
+    def get_exchange_info(self, **params) -> dict:
+        symbols = json.loads(params['symbols']) if 'symbols' in params else \
+            [params['symbol']] if 'symbol' in params else None
+        return self.exchange.exchange_info(symbols)
+
+    def get_symbol_info(self, symbol: str) -> Optional[dict]:
+        symbols = self.exchange.exchange_info()['symbols']
+        return next((info for info in symbols if info['symbol'] == symbol.upper()), None)
+
+    def get_account(self, **params) -> dict:
+        return self.exchange.account()
+
+    def get_asset_balance(self, asset: str, **params) -> Optional[dict]:
+        free, locked = self.exchange.balance(asset)
+        return {'asset': asset, 'free': format_amount(free), 'locked': format_amount(locked)}
+
+    def create_order(self, **params) -> dict:
+        return self.exchange.new_order(
+            params['symbol'], params.get('side', ''), params.get('type', ''), _decimal(params.get('quantity'), 'quantity'),
+            price=_decimal(params['price'], 'price') if params.get('price') is not None else None,
+            stop_price=_decimal(params['stopPrice'], 'stopPrice') if params.get('stopPrice') is not None else None,
+            time_in_force=params.get('timeInForce', 'GTC'), client_order_id=params.get('newClientOrderId'))
+
+    def order_market(self, **params) -> dict:
+        return self.create_order(type='MARKET', **params)
+
+    def order_market_buy(self, **params) -> dict:
+        return self.order_market(side='BUY', **params)
+
+    def order_market_sell(self, **params) -> dict:
+        return self.order_market(side='SELL', **params)
+
+    def order_limit(self, timeInForce: str = 'GTC', **params) -> dict:
+        return self.create_order(type='LIMIT', timeInForce=timeInForce, **params)
+
+    def order_limit_buy(self, timeInForce: str = 'GTC', **params) -> dict:
+        return self.order_limit(timeInForce=timeInForce, side='BUY', **params)
+
+    def order_limit_sell(self, timeInForce: str = 'GTC', **params) -> dict:
+        return self.order_limit(timeInForce=timeInForce, side='SELL', **params)
+
+    def create_oco_order(self, **params) -> dict:
+        def optional(name: str) -> Optional[Decimal]:
+            return _decimal(params[name], name) if params.get(name) is not None else None
+        return self.exchange.new_oco(
+            params['symbol'], params.get('side', ''), _decimal(params.get('quantity'), 'quantity'),
+            params.get('aboveType', ''), optional('abovePrice'), optional('aboveStopPrice'),
+            params.get('belowType', ''), optional('belowPrice'), optional('belowStopPrice'),
+            list_client_order_id=params.get('listClientOrderId'))
+
+    def order_oco_sell(self, **params) -> dict:
+        return self.create_oco_order(side='SELL', **params)
+
+    def order_oco_buy(self, **params) -> dict:
+        return self.create_oco_order(side='BUY', **params)
+
+    def get_order(self, **params) -> dict:
+        return self.exchange.get_order(params['symbol'], int(params['orderId']))
+
+    def get_open_orders(self, **params) -> List[dict]:
+        return self.exchange.open_orders(params.get('symbol'))
+
+    def cancel_order(self, **params) -> dict:
+        return self.exchange.cancel_order(params['symbol'], int(params['orderId']))
+
+    def v3_delete_order_list(self, **params) -> dict:
+        return self.exchange.cancel_order_list(params['symbol'], int(params['orderListId']))
+
+    def stream_get_listen_key(self) -> str:
+        return f"fake-listen-key-{next(self._listen_keys)}"
+
+    def stream_keepalive(self, listenKey: str) -> dict:
+        return {}
+
+    def stream_close(self, listenKey: str) -> dict:
+        return {}
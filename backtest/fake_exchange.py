@@ -0,0 +1,464 @@
+"""In-process stand-in for the Binance spot exchange.
+
+``FakeExchange`` holds one account's balances and resting orders and matches
+them against a reference price per symbol, which tests and load runs move
+with ``set_price`` or ``publish_bar``. The market behind that price has
+unlimited depth: marketable orders fill in full at the reference price,
+resting limit orders fill at their own price once the reference price
+reaches them (in price-time order), and stop orders turn into limit orders
+once it crosses their stop price. Each symbol's book keeps bids, asks and
+untriggered stops in heaps, so a price move only touches the orders it
+fills or triggers.
+
+Supported orders are MARKET, LIMIT, LIMIT_MAKER, STOP_LOSS and
+STOP_LOSS_LIMIT, plus OCO order lists pairing a LIMIT_MAKER leg with a stop
+leg. Orders are checked against the symbol's PRICE_FILTER, LOT_SIZE and
+NOTIONAL filters and the account's free balance, and funds are locked while
+orders rest, as on Binance. Every change is reported to listeners as
+user-data stream events (``executionReport``, ``listStatus`` and
+``outboundAccountPosition``).
+
+Order state and the payloads rendered from it live in
+``backtest/fake_orders.py``. ``backtest.fake_binance_client.FakeBinanceClient``
+exposes the exchange under python-binance ``Client`` method names, so
+``Trader(client=FakeBinanceClient(exchange))`` trades against it without a
+socket. ``backtest/fake_exchange_server.py`` serves the same exchange over
+HTTP and websockets for components that use the wire protocol.
+"""
+import heapq
+import itertools
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Tuple
+from binance.exceptions import BinanceAPIException # type: ignore
+from backtest.fake_orders import (STOP_TYPES, ZERO, FakeOrder, FakeOrderList, LockedFunds, account_position_event,
+                                  execution_report_event, format_amount, list_report, list_status_event, order_report)
+
+class FakeExchangeError(BinanceAPIException):
+    """A rejected request, carrying Binance's error code and message."""
+
+    def __init__(self, code: int, message: str, status_code: int = 400):
+        super().__init__(None, status_code, json.dumps({'code': code, 'msg': message}))
+
+@dataclass
+class SymbolRules:
+    """A symbol's assets and the exchangeInfo filters applied to its orders."""
+    symbol: str
+    base_asset: str
+    quote_asset: str
+    tick_size: Decimal = Decimal('0.01')
+    step_size: Decimal = Decimal('0.00001')
+    min_qty: Decimal = Decimal('0.00001')
+    min_notional: Decimal = Decimal('5')
+    status: str = 'TRADING'
+
+    def exchange_info(self) -> dict:
+        return {
+            'symbol': self.symbol, 'status': self.status, 'baseAsset': self.base_asset, 'quoteAsset': self.quote_asset,
+            'orderTypes': ['LIMIT', 'LIMIT_MAKER', 'MARKET', 'STOP_LOSS', 'STOP_LOSS_LIMIT'], 'ocoAllowed': True,
+            'filters': [
+                {'filterType': 'PRICE_FILTER', 'minPrice': f"{self.tick_size:f}", 'maxPrice': '1000000.00000000',
+                 'tickSize': f"{self.tick_size:f}"},
+                {'filterType': 'LOT_SIZE', 'minQty': f"{self.min_qty:f}", 'maxQty': '9000.00000000',
+                 'stepSize': f"{self.step_size:f}"},
+                {'filterType': 'NOTIONAL', 'minNotional': f"{self.min_notional:f}", 'applyMinToMarket': True},
+            ],
+        }
+
+@dataclass(eq=False)
+class _Book:
+    rules: SymbolRules
+    price: Optional[Decimal] = None
+    bids: list = field(default_factory=list)  # (-price, seq, order)
+    asks: list = field(default_factory=list)  # (price, seq, order)
+    sell_stops: list = field(default_factory=list)  # (-stop, seq, order): the highest stop triggers first
+    buy_stops: list = field(default_factory=list)  # (stop, seq, order)
+
+class FakeExchange:
+    """Matching engine, balances and exchange filters of a simulated spot account.
+
+    All methods are thread-safe. Listeners are called under the exchange's
+    lock, in event order, so they must be quick (queue the event or update a
+    cache) and must not block on other threads that use the exchange.
+    """
+
+    def __init__(self, fee_rate: Decimal = ZERO, clock: Optional[Callable[[], int]] = None):
+        self.fee_rate = fee_rate  # Commission charged on the asset received
+        self.clock = clock or (lambda: int(time.time() * 1000))
+        self._lock = threading.RLock()
+        self._books: Dict[str, _Book] = {}
+        self._free: Dict[str, Decimal] = {}
+        self._locked: Dict[str, Decimal] = {}
+        self._orders: Dict[int, FakeOrder] = {}  # Live orders only
+        self._order_lists: Dict[int, FakeOrderList] = {}  # Executing lists only
+        self._order_ids = itertools.count(1)
+        self._order_list_ids = itertools.count(1)
+        self._trade_ids = itertools.count(1)
+        self._sequence = itertools.count()  # Time priority within a price level
+        self._listeners: List[Callable[[dict], None]] = []
+        self.orders_placed = 0
+        self.trades = 0
+
+    # Setup and market data
+
+    def add_symbol(self, rules: SymbolRules, price: Optional[Decimal] = None):
+        with self._lock:
+            self._books[rules.symbol] = _Book(rules)
+        if price is not None:
+            self.set_price(rules.symbol, price)
+
+    def deposit(self, asset: str, amount: Decimal):
+        with self._lock:
+            self._free[asset] = self._free.get(asset, ZERO) + amount
+            events: List[dict] = []
+            self._balance_event(events, (asset,))
+            self._emit(events)
+
+    def add_listener(self, callback: Callable[[dict], None]):
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[dict], None]):
+        with self._lock:
+            self._listeners.remove(callback)
+
+    def exchange_info(self, symbols: Optional[List[str]] = None) -> dict:
+        with self._lock:
+            books = self._books if symbols is None else {symbol: self._book(symbol) for symbol in symbols}
+            return {'timezone': 'UTC', 'serverTime': self.clock(), 'rateLimits': [],
+                    'symbols': [book.rules.exchange_info() for book in books.values()]}
+
+    def price(self, symbol: str) -> Optional[Decimal]:
+        with self._lock:
+            return self._book(symbol).price
+
+    def set_price(self, symbol: str, price: Decimal):
+        """Moves the reference price, filling and triggering the resting orders it reaches."""
+        with self._lock:
+            book = self._book(symbol)
+            book.price = price
+            events: List[dict] = []
+            self._trigger_stops(book, events)
+            self._fill_resting(book, events)
+            self._emit(events)
+
+    def publish_bar(self, symbol: str, open_: Decimal, high: Decimal, low: Decimal, close: Decimal):
+        """Walks the price through a bar's range: via the low first on up bars, via the high first on down bars."""
+        path = (open_, low, high, close) if close >= open_ else (open_, high, low, close)
+        for price in path:
+            self.set_price(symbol, price)
+
+    # Account
+
+    def balance(self, asset: str) -> Tuple[Decimal, Decimal]:
+        with self._lock:
+            return self._free.get(asset, ZERO), self._locked.get(asset, ZERO)
+
+    def account(self) -> dict:
+        with self._lock:
+            assets = sorted(set(self._free) | set(self._locked))
+            return {'makerCommission': 0, 'takerCommission': 0, 'canTrade': True, 'canWithdraw': True,
+                    'canDeposit': True, 'updateTime': self.clock(), 'accountType': 'SPOT',
+                    'balances': [{'asset': asset, 'free': format_amount(self._free.get(asset, ZERO)),
+                                  'locked': format_amount(self._locked.get(asset, ZERO))} for asset in assets],
+                    'permissions': ['SPOT']}
+
+    def open_orders(self, symbol: Optional[str] = None) -> List[dict]:
+        with self._lock:
+            return [order_report(order) for order in self._orders.values()
+                    if symbol is None or order.symbol == symbol]
+
+    def get_order(self, symbol: str, order_id: int) -> dict:
+        with self._lock:
+            order = self._orders.get(order_id)
+            if order is None or order.symbol != symbol:
+                raise FakeExchangeError(-2013, "Order does not exist.")
+            return order_report(order)
+
+    # Orders
+
+    def new_order(self, symbol: str, side: str, order_type: str, quantity: Decimal, price: Optional[Decimal] = None,
+                  stop_price: Optional[Decimal] = None, time_in_force: str = 'GTC',
+                  client_order_id: Optional[str] = None) -> dict:
+        with self._lock:
+            book = self._book(symbol)
+            now = self.clock()
+            order = self._validate(book, side, order_type, quantity, price, stop_price, time_in_force,
+                                   client_order_id, now)
+            events: List[dict] = []
+            fills: List[dict] = []
+            self._accept(book, order, self._funds_for(book, [order]), events)
+            self._execute_new(book, order, events, fills)
+            self._emit(events)
+            response = order_report(order)
+            response['fills'] = fills
+            return response
+
+    def new_oco(self, symbol: str, side: str, quantity: Decimal, above_type: str, above_price: Optional[Decimal],
+                above_stop_price: Optional[Decimal], below_type: str, below_price: Optional[Decimal],
+                below_stop_price: Optional[Decimal], list_client_order_id: Optional[str] = None) -> dict:
+        """An OCO list of a LIMIT_MAKER leg and a stop leg; one filling expires the other."""
+        with self._lock:
+            book = self._book(symbol)
+            now = self.clock()
+            # Sells take profit above the market and stop below it; buys the other way round
+            (maker_type, maker_price), (stop_type, stop_limit, stop_trigger) = \
+                ((above_type, above_price), (below_type, below_price, below_stop_price)) if side == 'SELL' else \
+                ((below_type, below_price), (above_type, above_price, above_stop_price))
+            if maker_type != 'LIMIT_MAKER' or stop_type not in STOP_TYPES:
+                raise FakeExchangeError(-1106, "OCO needs one LIMIT_MAKER leg and one STOP_LOSS or STOP_LOSS_LIMIT leg.")
+            list_id = next(self._order_list_ids)
+            order_list = FakeOrderList(symbol, list_id, list_client_order_id or f"list{list_id}")
+            stop_leg = self._validate(book, side, stop_type, quantity, stop_limit, stop_trigger, 'GTC', None, now)
+            maker_leg = self._validate(book, side, maker_type, quantity, maker_price, None, 'GTC', None, now)
+            if book.price is not None and ((side == 'SELL' and not stop_leg.stop_price < book.price < maker_leg.price) or
+                                           (side == 'BUY' and not maker_leg.price < book.price < stop_leg.stop_price)):
+                raise FakeExchangeError(-2010, "The relationship of the prices for the orders is not correct.")
+            legs = [stop_leg, maker_leg]
+            funds = self._funds_for(book, legs)
+            events: List[dict] = []
+            for leg in legs:
+                leg.order_list = order_list
+                order_list.legs.append(leg)
+                self._accept(book, leg, funds, events)
+            self._order_lists[list_id] = order_list
+            events.append(list_status_event(order_list, 'EXEC_STARTED', self.clock()))
+            for leg in legs:
+                self._rest(book, leg)
+            self._emit(events)
+            return list_report(order_list, 'EXEC_STARTED', self.clock())
+
+    def cancel_order(self, symbol: str, order_id: int) -> dict:
+        with self._lock:
+            order = self._orders.get(order_id)
+            if order is None or order.symbol != symbol:
+                raise FakeExchangeError(-2011, "Unknown order sent.")
+            events: List[dict] = []
+            if order.order_list is not None:
+                # Canceling one leg cancels the whole list
+                self._finish_list(order.order_list, 'CANCELED', events)
+            else:
+                self._finish(order, 'CANCELED', events)
+            self._emit(events)
+            return order_report(order)
+
+    def cancel_order_list(self, symbol: str, order_list_id: int) -> dict:
+        with self._lock:
+            order_list = self._order_lists.get(order_list_id)
+            if order_list is None or order_list.symbol != symbol:
+                raise FakeExchangeError(-2011, "Unknown order list sent.")
+            events: List[dict] = []
+            self._finish_list(order_list, 'CANCELED', events)
+            self._emit(events)
+            return list_report(order_list, 'ALL_DONE', self.clock())
+
+    # Internals; callers hold the lock
+
+    def _book(self, symbol: str) -> _Book:
+        book = self._books.get(symbol)
+        if book is None:
+            raise FakeExchangeError(-1121, "Invalid symbol.")
+        return book
+
+    def _validate(self, book: _Book, side: str, order_type: str, quantity: Decimal, price: Optional[Decimal],
+                  stop_price: Optional[Decimal], time_in_force: str, client_order_id: Optional[str], now: int) -> FakeOrder:
+        rules = book.rules
+        if side not in ('BUY', 'SELL'):
+            raise FakeExchangeError(-1102, "Mandatory parameter 'side' was not sent, was empty/null, or malformed.")
+        if order_type not in ('MARKET', 'LIMIT', 'LIMIT_MAKER', 'STOP_LOSS', 'STOP_LOSS_LIMIT'):
+            raise FakeExchangeError(-1116, "Invalid orderType.")
+        if rules.status != 'TRADING':
+            raise FakeExchangeError(-1013, "Market is closed.")
+        limit = order_type in ('LIMIT', 'LIMIT_MAKER', 'STOP_LOSS_LIMIT')
+        if limit and price is None:
+            raise FakeExchangeError(-1102, "Mandatory parameter 'price' was not sent, was empty/null, or malformed.")
+        if order_type in STOP_TYPES and stop_price is None:
+            raise FakeExchangeError(-1102, "Mandatory parameter 'stopPrice' was not sent, was empty/null, or malformed.")
+        for value in (price if limit else None, stop_price if order_type in STOP_TYPES else None):
+            if value is not None and (value <= 0 or value % rules.tick_size != 0):
+                raise FakeExchangeError(-1013, "Filter failure: PRICE_FILTER")
+        if quantity < rules.min_qty or (quantity - rules.min_qty) % rules.step_size != 0:
+            raise FakeExchangeError(-1013, "Filter failure: LOT_SIZE")
+        reference = price if limit else (stop_price if order_type == 'STOP_LOSS' else book.price)
+        if reference is None:
+            raise FakeExchangeError(-1013, "No price to fill the order at.")
+        if quantity * reference < rules.min_notional:
+            raise FakeExchangeError(-1013, "Filter failure: NOTIONAL")
+        if book.price is not None:
+            if order_type == 'LIMIT_MAKER' and (price <= book.price if side == 'SELL' else price >= book.price):
+                raise FakeExchangeError(-2010, "Order would immediately match and take.")
+            if order_type in STOP_TYPES and (stop_price >= book.price if side == 'SELL' else stop_price <= book.price):
+                raise FakeExchangeError(-2010, "Stop price would trigger immediately.")
+        order_id = next(self._order_ids)
+        return FakeOrder(book.rules.symbol, order_id, client_order_id or f"order{order_id}", side, order_type, quantity,
+                      price if limit else ZERO, stop_price if order_type in STOP_TYPES else ZERO,
+                      time_in_force if order_type != 'MARKET' else 'GTC', now, update_time=now)
+
+    def _funds_for(self, book: _Book, orders: List[FakeOrder]) -> LockedFunds:
+        """Locks what the orders could spend (once for an order list) or rejects them."""
+        rules = book.rules
+        side = orders[0].side
+        if side == 'SELL':
+            asset, amount = rules.base_asset, orders[0].orig_qty
+        else:
+            asset = rules.quote_asset
+            amount = max(order.orig_qty * (order.price or order.stop_price or book.price) for order in orders)
+        if amount > self._free.get(asset, ZERO):
+            raise FakeExchangeError(-2010, "Account has insufficient balance for requested action.")
+        funds = LockedFunds(asset)
+        if orders[0].type != 'MARKET':
+            self._free[asset] -= amount
+            self._locked[asset] = self._locked.get(asset, ZERO) + amount
+            funds.locked = amount
+        return funds
+
+    def _accept(self, book: _Book, order: FakeOrder, funds: LockedFunds, events: List[dict]):
+        order.funds = funds
+        funds.live_orders += 1
+        self._orders[order.order_id] = order
+        self.orders_placed += 1
+        if self._listeners:
+            events.append(execution_report_event(order, 'NEW', self.clock()))
+            if funds.locked:
+                self._balance_event(events, (funds.asset,))
+
+    def _execute_new(self, book: _Book, order: FakeOrder, events: List[dict], fills: List[dict]):
+        if order.type == 'MARKET':
+            self._fill(book, order, book.price, False, events, fills)
+        elif order.type == 'LIMIT' and self._crosses(order, book.price):
+            self._fill(book, order, book.price, False, events, fills)
+        elif order.time_in_force in ('IOC', 'FOK') and order.type == 'LIMIT':
+            self._finish(order, 'EXPIRED', events)
+        else:
+            self._rest(book, order)
+
+    @staticmethod
+    def _crosses(order: FakeOrder, price: Optional[Decimal]) -> bool:
+        if price is None:
+            return False
+        return price <= order.price if order.side == 'BUY' else price >= order.price
+
+    def _rest(self, book: _Book, order: FakeOrder):
+        sequence = next(self._sequence)
+        if order.type in STOP_TYPES and not order.triggered:
+            if order.side == 'SELL':
+                heapq.heappush(book.sell_stops, (-order.stop_price, sequence, order))
+            else:
+                heapq.heappush(book.buy_stops, (order.stop_price, sequence, order))
+        elif order.side == 'BUY':
+            heapq.heappush(book.bids, (-order.price, sequence, order))
+        else:
+            heapq.heappush(book.asks, (order.price, sequence, order))
+
+    def _trigger_stops(self, book: _Book, events: List[dict]):
+        price = book.price
+        triggered = []
+        while book.sell_stops and (not book.sell_stops[0][2].is_live or -book.sell_stops[0][0] >= price):
+            order = heapq.heappop(book.sell_stops)[2]
+            if order.is_live:
+                triggered.append(order)
+        while book.buy_stops and (not book.buy_stops[0][2].is_live or book.buy_stops[0][0] <= price):
+            order = heapq.heappop(book.buy_stops)[2]
+            if order.is_live:
+                triggered.append(order)
+        for order in triggered:
+            if not order.is_live:
+                continue # Expired when an earlier trigger filled its OCO sibling
+            order.triggered = True
+            if order.type == 'STOP_LOSS' or self._crosses(order, price):
+                self._fill(book, order, price, False, events, None)
+            else:
+                self._rest(book, order) # A stop-limit whose limit the market has already passed
+
+    def _fill_resting(self, book: _Book, events: List[dict]):
+        price = book.price
+        while book.asks and (not book.asks[0][2].is_live or book.asks[0][0] <= price):
+            order = heapq.heappop(book.asks)[2]
+            if order.is_live:
+                self._fill(book, order, order.price, True, events, None)
+        while book.bids and (not book.bids[0][2].is_live or -book.bids[0][0] >= price):
+            order = heapq.heappop(book.bids)[2]
+            if order.is_live:
+                self._fill(book, order, order.price, True, events, None)
+
+    def _fill(self, book: _Book, order: FakeOrder, price: Decimal, is_maker: bool, events: List[dict],
+              fills: Optional[List[dict]]):
+        rules = book.rules
+        quantity = order.orig_qty - order.executed_qty
+        notional = quantity * price
+        funds = order.funds
+        if order.side == 'BUY':
+            reserved = min(funds.locked, quantity * (order.price or order.stop_price or price))
+            self._spend(rules.quote_asset, funds, reserved, notional)
+            commission_asset, received = rules.base_asset, quantity
+        else:
+            self._spend(rules.base_asset, funds, min(funds.locked, quantity), quantity)
+            commission_asset, received = rules.quote_asset, notional
+        commission = received * self.fee_rate
+        self._free[commission_asset] = self._free.get(commission_asset, ZERO) + received - commission
+        trade_id = next(self._trade_ids)
+        self.trades += 1
+        order.executed_qty += quantity
+        order.quote_qty += notional
+        order.update_time = self.clock()
+        if fills is not None:
+            fills.append({'price': format_amount(price), 'qty': format_amount(quantity), 'commission': format_amount(commission),
+                          'commissionAsset': commission_asset, 'tradeId': trade_id})
+        order.status = 'FILLED'
+        if self._listeners:
+            events.append(execution_report_event(order, 'TRADE', self.clock(), quantity, price, commission,
+                                                 commission_asset, trade_id, is_maker))
+        self._release(order, events)
+        if order.order_list is not None:
+            self._finish_list(order.order_list, 'EXPIRED', events)
+        if self._listeners:
+            self._balance_event(events, (rules.base_asset, rules.quote_asset))
+
+    def _spend(self, asset: str, funds: LockedFunds, reserved: Decimal, amount: Decimal):
+        # Spends ``amount`` out of ``reserved`` locked funds; what the lock over-covered goes back to free
+        if reserved:
+            funds.locked -= reserved
+            self._locked[asset] -= reserved
+        self._free[asset] = self._free.get(asset, ZERO) + reserved - amount
+
+    def _release(self, order: FakeOrder, events: List[dict]):
+        """Drops a no longer live order; its funds are unlocked once no order shares them."""
+        self._orders.pop(order.order_id, None)
+        funds = order.funds
+        funds.live_orders -= 1
+        if funds.live_orders == 0 and funds.locked:
+            self._locked[funds.asset] -= funds.locked
+            self._free[funds.asset] += funds.locked
+            funds.locked = ZERO
+            if self._listeners:
+                self._balance_event(events, (funds.asset,))
+
+    def _finish(self, order: FakeOrder, status: str, events: List[dict]):
+        order.status = status
+        order.update_time = self.clock()
+        if self._listeners:
+            events.append(execution_report_event(order, 'CANCELED' if status == 'CANCELED' else 'EXPIRED', self.clock()))
+        self._release(order, events)
+
+    def _finish_list(self, order_list: FakeOrderList, status: str, events: List[dict]):
+        for leg in order_list.legs:
+            if leg.is_live:
+                self._finish(leg, status, events)
+        order_list.status = 'ALL_DONE'
+        self._order_lists.pop(order_list.order_list_id, None)
+        if self._listeners:
+            events.append(list_status_event(order_list, 'ALL_DONE', self.clock()))
+
+    # Events
+
+    def _balance_event(self, events: List[dict], assets: Tuple[str, ...]):
+        events.append(account_position_event(self.clock(), [
+            (asset, self._free.get(asset, ZERO), self._locked.get(asset, ZERO)) for asset in dict.fromkeys(assets)]))
+
+    def _emit(self, events: List[dict]):
+        for event in events:
+            for listener in self._listeners:
+                listener(event)
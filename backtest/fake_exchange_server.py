@@ -0,0 +1,258 @@
+"""HTTP and websocket front ends serving a ``FakeExchange`` on localhost.
+
+``FakeExchangeServer`` answers the spot REST endpoints the project calls
+(``/api/v3/exchangeInfo``, ``order``, ``orderList/oco``, ``orderList``,
+``openOrders``, ``account`` and ``userDataStream``) and streams websocket
+frames in Binance's formats:
+
+* ``/ws/<listenKey>``: the exchange's user-data events,
+* ``/ws/<symbol>@kline_<interval>``: klines given to ``publish_kline``,
+* ``/stream?streams=a/b``: the same klines wrapped as combined-stream frames.
+
+So ``SymbolInfoManager(base_url=server.rest_url)``,
+``DataHandler(..., base_url=server.stream_url)`` and
+``Trader(client=server.client())`` run unmodified against the simulated
+exchange. Requests are not authenticated and signatures are ignored.
+
+Responses carry ``X-MBX-USED-WEIGHT-1M`` and ``X-MBX-ORDER-COUNT-10S``
+computed with ``trading.rate_limiter.ENDPOINT_COSTS``. With ``weight_limit``
+set, calls past it in the current minute get Binance's 429 and a
+``Retry-After``.
+"""
+import json
+import queue
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+from binance.client import Client # type: ignore
+from websockets.sync.server import serve # type: ignore
+from backtest.fake_binance_client import FakeBinanceClient
+from backtest.fake_exchange import FakeExchange, FakeExchangeError
+from trading.rate_limiter import ENDPOINT_COSTS
+
+# Weighted routes -> ENDPOINT_COSTS entries; the rest weigh 1
+_ROUTE_ENDPOINTS = {
+    ('GET', '/api/v3/exchangeInfo'): 'exchange_info',
+    ('GET', '/api/v3/account'): 'account',
+    ('GET', '/api/v3/openOrders'): 'open_orders',
+    ('POST', '/api/v3/order'): 'order',
+    ('DELETE', '/api/v3/order'): 'cancel_order',
+    ('POST', '/api/v3/orderList/oco'): 'order_list',
+    ('DELETE', '/api/v3/orderList'): 'cancel_order_list',
+}
+
+class FakeExchangeServer:
+    """Serves ``exchange`` over HTTP and websockets until the context exits."""
+
+    def __init__(self, exchange: FakeExchange, weight_limit: Optional[int] = None):
+        self.exchange = exchange
+        self.api = FakeBinanceClient(exchange)
+        self.requests: List[tuple] = []  # (method, path) of every REST call, for assertions
+        self.weight_limit = weight_limit
+        self.used_weight = 0
+        self._window_start = time.monotonic()
+        self._order_times: deque = deque()  # monotonic time of each new order in the last 10 s
+        self._usage_lock = threading.Lock()
+        self._routes = {
+            ('GET', '/api/v3/ping'): lambda params: self.api.ping(),
+            ('GET', '/api/v3/time'): lambda params: self.api.get_server_time(),
+            ('GET', '/api/v3/exchangeInfo'): lambda params: self.api.get_exchange_info(**params),
+            ('GET', '/api/v3/account'): lambda params: self.api.get_account(),
+            ('GET', '/api/v3/openOrders'): lambda params: self.api.get_open_orders(**params),
+            ('GET', '/api/v3/order'): lambda params: self.api.get_order(**params),
+            ('POST', '/api/v3/order'): lambda params: self.api.create_order(**params),
+            ('DELETE', '/api/v3/order'): lambda params: self.api.cancel_order(**params),
+            ('POST', '/api/v3/orderList/oco'): lambda params: self.api.create_oco_order(**params),
+            ('DELETE', '/api/v3/orderList'): lambda params: self.api.v3_delete_order_list(**params),
+            ('POST', '/api/v3/userDataStream'): lambda params: {'listenKey': self.api.stream_get_listen_key()},
+            ('PUT', '/api/v3/userDataStream'): lambda params: {},
+            ('DELETE', '/api/v3/userDataStream'): lambda params: {},
+        }
+        self._subscribers: Dict[str, list] = {}  # Stream name ('user' for user data) -> connections
+        self._subscribers_lock = threading.Lock()
+        self._subscribed = threading.Condition(self._subscribers_lock)
+        # Reason: exchange listeners run under the exchange lock, so frames are sent from their own
+        # thread and a slow client cannot stall REST calls or matching
+        self._outbox: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._sender_thread = threading.Thread(target=self._send_frames, daemon=True)
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Keep-alive, as the python-binance session expects
+            # Reason: headers and body go out in separate writes, which Nagle would hold for the client's delayed ACK
+            disable_nagle_algorithm = True
+
+            def _handle(self):
+                url = urlparse(self.path)
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    body = self.rfile.read(length).decode()
+                    params.update((key, values[0]) for key, values in parse_qs(body).items())
+                server.requests.append((self.command, url.path))
+                route = server._routes.get((self.command, url.path))
+                retry_after, usage_headers = server._spend(self.command, url.path, params)
+                if retry_after is not None:
+                    status, payload = 429, {'code': -1003, 'msg': "Too much request weight used"}
+                    usage_headers['Retry-After'] = str(retry_after)
+                elif route is None:
+                    status, payload = 404, {'code': -1000, 'msg': f"Unknown endpoint {self.command} {url.path}"}
+                else:
+                    try:
+                        status, payload = 200, route(params)
+                    except FakeExchangeError as e:
+                        status, payload = e.status_code, {'code': e.code, 'msg': e.message}
+                    except (KeyError, ValueError, ArithmeticError) as e:
+                        status, payload = 400, {'code': -1102, 'msg': f"Malformed request: {e}"}
+                body = json.dumps(payload, separators=(',', ':')).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in usage_headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+            def log_message(self, *args):
+                pass
+
+        self._http = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._http.daemon_threads = True
+        self._http_thread = threading.Thread(target=self._http.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+        self._ws = serve(self._handle_stream, "127.0.0.1", 0, close_timeout=0.5)
+        self._ws_thread = threading.Thread(target=self._ws.serve_forever, daemon=True)
+
+    def _spend(self, method: str, path: str, params: dict):
+        """Counts a call's weight and orders; returns (Retry-After seconds if over the limit, usage headers)."""
+        endpoint = _ROUTE_ENDPOINTS.get((method, path))
+        if endpoint == 'open_orders' and 'symbol' not in params:
+            endpoint = 'open_orders_all'
+        cost = ENDPOINT_COSTS[endpoint] if endpoint else None
+        with self._usage_lock:
+            now = time.monotonic()
+            if now - self._window_start >= 60:
+                self._window_start, self.used_weight = now, 0
+            while self._order_times and now - self._order_times[0] >= 10:
+                self._order_times.popleft()
+            self.used_weight += cost.weight if cost else 1
+            retry_after = None
+            if self.weight_limit is not None and self.used_weight > self.weight_limit:
+                retry_after = max(1, int(60 - (now - self._window_start)))
+            elif cost:
+                self._order_times.extend([now] * cost.orders)
+            headers = {'X-MBX-USED-WEIGHT-1M': str(self.used_weight)}
+            if cost and cost.orders:
+                headers['X-MBX-ORDER-COUNT-10S'] = str(len(self._order_times))
+            return retry_after, headers
+
+    @property
+    def rest_url(self) -> str:
+        host, port = self._http.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def stream_url(self) -> str:
+        host, port = self._ws.socket.getsockname()[:2]
+        return f"ws://{host}:{port}"
+
+    def client(self) -> Client:
+        """A python-binance ``Client`` whose REST calls go to this server."""
+        client = Client("fake-api-key", "fake-api-secret", ping=False)
+        client.API_URL = f"{self.rest_url}/api"
+        return client
+
+    def _handle_stream(self, connection):
+        url = urlparse(connection.request.path)
+        if url.path.startswith('/ws/'):
+            name = url.path[len('/ws/'):]
+            streams = [name if '@' in name else 'user']
+            combined = False
+        else:
+            streams = [stream for stream in parse_qs(url.query).get('streams', [''])[0].split('/') if stream]
+            combined = True
+        subscription = (connection, combined)
+        with self._subscribed:
+            for stream in streams:
+                self._subscribers.setdefault(stream, []).append(subscription)
+            self._subscribed.notify_all()
+        try:
+            for _ in connection:  # Held open until the client leaves
+                pass
+        finally:
+            with self._subscribers_lock:
+                for stream in streams:
+                    self._subscribers[stream].remove(subscription)
+
+    def wait_for_subscriber(self, stream: str, timeout: float = 3.0) -> bool:
+        """Waits until a client listens to ``stream`` ('user' for the user-data stream)."""
+        with self._subscribed:
+            return self._subscribed.wait_for(lambda: bool(self._subscribers.get(stream)), timeout)
+
+    def _send(self, stream: str, event: dict):
+        self._outbox.put((stream, event))
+
+    def _send_frames(self):
+        while True:
+            item = self._outbox.get()
+            if item is None:
+                return
+            self._deliver(*item)
+
+    def _deliver(self, stream: str, event: dict):
+        with self._subscribers_lock:
+            subscriptions = list(self._subscribers.get(stream, ()))
+        if not subscriptions:
+            return
+        frame = json.dumps(event, separators=(',', ':'))
+        wrapped: Optional[str] = None
+        for connection, combined in subscriptions:
+            if combined:
+                wrapped = wrapped or json.dumps({'stream': stream, 'data': event}, separators=(',', ':'))
+            try:
+                connection.send(wrapped if combined else frame)
+            except Exception:
+                pass # The client went away; its handler unsubscribes it
+
+    def _on_user_event(self, event: dict):
+        self._send('user', event)
+
+    def publish_kline(self, symbol: str, interval: str, open_time: int, close_time: int, open_, high, low, close,
+                      volume, closed: bool = True):
+        """Streams a kline update and moves the exchange's price with it.
+
+        A closed kline walks the price through the bar's range (see
+        ``FakeExchange.publish_bar``), so stops and targets inside the bar
+        fill before the frame reaches subscribers. Open updates only move the
+        price to the latest close.
+        """
+        if closed:
+            self.exchange.publish_bar(symbol, open_, high, low, close)
+        else:
+            self.exchange.set_price(symbol, close)
+        stream = f"{symbol.lower()}@kline_{interval}"
+        event_time = self.exchange.clock()
+        self._send(stream, {'e': 'kline', 'E': event_time, 's': symbol, 'k': {
+            't': open_time, 'T': close_time, 's': symbol, 'i': interval, 'o': f"{open_:f}", 'c': f"{close:f}",
+            'h': f"{high:f}", 'l': f"{low:f}", 'v': f"{volume:f}", 'x': closed}})
+
+    def __enter__(self) -> "FakeExchangeServer":
+        self.exchange.add_listener(self._on_user_event)
+        self._http_thread.start()
+        self._ws_thread.start()
+        self._sender_thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.exchange.remove_listener(self._on_user_event)
+        self._outbox.put(None)
+        self._sender_thread.join()
+        self._ws.shutdown()
+        self._ws_thread.join()
+        self._http.shutdown()
+        self._http.server_close()
+        self._http_thread.join()
@@ -0,0 +1,106 @@
+"""Order records of the simulated exchange and the Binance payloads built from them.
+
+``FakeOrder``, ``FakeOrderList`` and ``LockedFunds`` are the mutable state
+``FakeExchange`` keeps per order. The functions below render that state the
+way Binance does: REST order and order-list responses, and the user-data
+stream's ``executionReport``, ``listStatus`` and ``outboundAccountPosition``
+events. Amounts are formatted with eight decimals, as on the exchange.
+"""
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Iterable, List, Optional, Tuple
+
+ZERO = Decimal('0')
+LIVE_STATUSES = ('NEW', 'PARTIALLY_FILLED')
+STOP_TYPES = ('STOP_LOSS', 'STOP_LOSS_LIMIT')
+
+@dataclass(eq=False)
+class LockedFunds:
+    """Balance locked for an order, or shared by the legs of an order list."""
+    asset: str
+    locked: Decimal = ZERO
+    live_orders: int = 0
+
+@dataclass(eq=False)
+class FakeOrder:
+    symbol: str
+    order_id: int
+    client_order_id: str
+    side: str
+    type: str
+    orig_qty: Decimal
+    price: Decimal  # Limit price; 0 for market and STOP_LOSS orders
+    stop_price: Decimal
+    time_in_force: str
+    time: int
+    funds: Optional[LockedFunds] = None
+    order_list: Optional["FakeOrderList"] = None
+    status: str = 'NEW'
+    executed_qty: Decimal = ZERO
+    quote_qty: Decimal = ZERO
+    update_time: int = 0
+    triggered: bool = False
+
+    @property
+    def is_live(self) -> bool:
+        return self.status in LIVE_STATUSES
+
+    @property
+    def order_list_id(self) -> int:
+        return self.order_list.order_list_id if self.order_list is not None else -1
+
+@dataclass(eq=False)
+class FakeOrderList:
+    symbol: str
+    order_list_id: int
+    list_client_order_id: str
+    legs: List[FakeOrder] = field(default_factory=list)
+    status: str = 'EXECUTING'  # listOrderStatus: EXECUTING, ALL_DONE or REJECT
+
+def format_amount(value: Decimal) -> str:
+    return f"{value:.8f}"
+
+def order_report(order: FakeOrder) -> dict:
+    """The REST response for an order (new order, cancel, order query)."""
+    report = {'symbol': order.symbol, 'orderId': order.order_id, 'orderListId': order.order_list_id,
+              'clientOrderId': order.client_order_id, 'transactTime': order.update_time,
+              'price': format_amount(order.price), 'origQty': format_amount(order.orig_qty),
+              'executedQty': format_amount(order.executed_qty), 'cummulativeQuoteQty': format_amount(order.quote_qty),
+              'status': order.status, 'timeInForce': order.time_in_force, 'type': order.type, 'side': order.side,
+              'workingTime': order.time, 'selfTradePreventionMode': 'NONE'}
+    if order.type in STOP_TYPES:
+        report['stopPrice'] = format_amount(order.stop_price)
+    return report
+
+def list_report(order_list: FakeOrderList, list_status_type: str, now: int) -> dict:
+    """The REST response for an OCO placement or order-list cancel."""
+    return {'orderListId': order_list.order_list_id, 'contingencyType': 'OCO', 'listStatusType': list_status_type,
+            'listOrderStatus': order_list.status, 'listClientOrderId': order_list.list_client_order_id,
+            'transactionTime': now, 'symbol': order_list.symbol,
+            'orders': [{'symbol': leg.symbol, 'orderId': leg.order_id, 'clientOrderId': leg.client_order_id}
+                       for leg in order_list.legs],
+            'orderReports': [order_report(leg) for leg in order_list.legs]}
+
+def execution_report_event(order: FakeOrder, execution_type: str, now: int, last_qty: Decimal = ZERO,
+                           last_price: Decimal = ZERO, commission: Decimal = ZERO,
+                           commission_asset: Optional[str] = None, trade_id: int = -1, is_maker: bool = False) -> dict:
+    return {
+        'e': 'executionReport', 'E': now, 's': order.symbol, 'c': order.client_order_id, 'S': order.side,
+        'o': order.type, 'f': order.time_in_force, 'q': format_amount(order.orig_qty), 'p': format_amount(order.price),
+        'P': format_amount(order.stop_price), 'g': order.order_list_id, 'x': execution_type, 'X': order.status,
+        'r': 'NONE', 'i': order.order_id, 'l': format_amount(last_qty), 'z': format_amount(order.executed_qty),
+        'L': format_amount(last_price), 'n': format_amount(commission), 'N': commission_asset, 'T': order.update_time,
+        't': trade_id, 'w': order.is_live and not (order.type in STOP_TYPES and not order.triggered),
+        'm': is_maker, 'O': order.time, 'Z': format_amount(order.quote_qty),
+    }
+
+def list_status_event(order_list: FakeOrderList, list_status_type: str, now: int) -> dict:
+    return {'e': 'listStatus', 'E': now, 's': order_list.symbol, 'g': order_list.order_list_id,
+            'c': 'OCO', 'l': list_status_type, 'L': order_list.status, 'r': 'NONE',
+            'C': order_list.list_client_order_id, 'T': now,
+            'O': [{'s': leg.symbol, 'i': leg.order_id, 'c': leg.client_order_id} for leg in order_list.legs]}
+
+def account_position_event(now: int, balances: Iterable[Tuple[str, Decimal, Decimal]]) -> dict:
+    """``outboundAccountPosition`` for ``(asset, free, locked)`` balances."""
+    return {'e': 'outboundAccountPosition', 'E': now, 'u': now,
+            'B': [{'a': asset, 'f': format_amount(free), 'l': format_amount(locked)} for asset, free, locked in balances]}
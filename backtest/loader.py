@@ -0,0 +1,78 @@
+import os
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from data.kline_store import KLINE_FILE_EXTENSION, KLINE_RECORD_DTYPE
+
+# Column order of Binance kline dumps (data.binance.vision), which have no header row
+BINANCE_KLINE_COLUMNS = [
+    'timestamp', 'open', 'high', 'low', 'close', 'volume', 'close_time', 'quote_volume',
+    'trades', 'taker_buy_volume', 'taker_buy_quote_volume', 'ignore',
+]
+OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+@dataclass
+class OHLCVArrays:
+    """Column arrays of a kline history, oldest bar first."""
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    def slice(self, start: int, stop: int) -> "OHLCVArrays":
+        return OHLCVArrays(*(getattr(self, name)[start:stop] for name in OHLCV_COLUMNS))
+
+    @classmethod
+    def from_records(cls, records: np.ndarray) -> "OHLCVArrays":
+        """Column views over KlineStore records (no copy)."""
+        return cls(*(records[name] for name in OHLCV_COLUMNS))
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "OHLCVArrays":
+        missing = [name for name in OHLCV_COLUMNS if name not in frame.columns]
+        if missing:
+            raise ValueError(f"OHLCV data is missing columns: {missing}")
+        frame = frame.sort_values('timestamp')
+        return cls(
+            timestamp=frame['timestamp'].to_numpy(dtype=np.int64),
+            **{name: frame[name].to_numpy(dtype=np.float64) for name in OHLCV_COLUMNS[1:]}
+        )
+
+def _has_header(path: str) -> bool:
+    with open(path) as csv_file:
+        first_field = csv_file.readline().split(',')[0].strip()
+    return not first_field.replace('.', '', 1).isdigit()
+
+def _count_fields(path: str) -> int:
+    with open(path) as csv_file:
+        return len(csv_file.readline().split(','))
+
+def load_ohlcv(path: str) -> OHLCVArrays:
+    """Loads klines from a CSV, Parquet or KlineStore (``.klines``) file.
+
+    CSV files either carry a header with timestamp/open/high/low/close/volume
+    columns or are raw Binance kline dumps without a header. Parquet files
+    need ``pyarrow`` (or ``fastparquet``) installed. KlineStore files are
+    memory-mapped rather than read into memory.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == KLINE_FILE_EXTENSION:
+        count = os.path.getsize(path) // KLINE_RECORD_DTYPE.itemsize
+        if count == 0:
+            return OHLCVArrays.from_records(np.empty(0, dtype=KLINE_RECORD_DTYPE))
+        return OHLCVArrays.from_records(np.memmap(path, dtype=KLINE_RECORD_DTYPE, mode='r', shape=(count,)))
+    if extension == '.parquet':
+        frame = pd.read_parquet(path)
+    elif extension == '.csv':
+        if _has_header(path):
+            frame = pd.read_csv(path)
+        else:
+            frame = pd.read_csv(path, header=None, names=BINANCE_KLINE_COLUMNS[:_count_fields(path)])
+    else:
+        raise ValueError(f"Unsupported OHLCV file type: {path}")
+    return OHLCVArrays.from_frame(frame)
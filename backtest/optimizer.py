@@ -0,0 +1,263 @@
+"""Parallel parameter sweeps and walk-forward tuning of StrategyParameters.
+
+The kline histories of every symbol are copied once into a single
+shared-memory block. Worker processes attach to it when they start, so a
+task only ships a symbol name, a bar window and a batch of parameter sets
+instead of pickling the price arrays each time.
+"""
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from analysis.strategy import StrategyParameters
+from analysis.vectorized import atr_array, ema_array, macd_array, rsi_array
+from backtest.engine import BacktestConfig, Backtester
+from backtest.loader import OHLCV_COLUMNS, OHLCVArrays
+
+# Parameter sets sent to a worker per task; amortizes IPC over many backtests
+DEFAULT_BATCH_SIZE = 32
+
+Window = Tuple[int, int]  # [start, stop) bar indices
+
+@dataclass(frozen=True)
+class SweepResult:
+    symbol: str
+    parameters: StrategyParameters
+    window: Window
+    total_return: float
+    max_drawdown: float
+    trades: int
+    win_rate: float
+
+@dataclass(frozen=True)
+class WalkForwardStep:
+    symbol: str
+    parameters: StrategyParameters  # Best parameters on the training window
+    train: SweepResult
+    test: SweepResult  # The same parameters on the following, unseen window
+
+def grid_search(**ranges: Sequence) -> List[StrategyParameters]:
+    """Every valid combination of the given StrategyParameters field values.
+
+    Example: ``grid_search(rsi_oversold=[20, 25, 30], macd_fast=[8, 12])``.
+    Fields that are not given keep their defaults.
+    """
+    _check_fields(ranges)
+    names = list(ranges)
+    combinations = []
+    for values in itertools.product(*(ranges[name] for name in names)):
+        parameters = _make_parameters(dict(zip(names, values)))
+        if parameters is not None:
+            combinations.append(parameters)
+    return combinations
+
+def random_search(samples: int, seed: Optional[int] = None, **ranges: Sequence) -> List[StrategyParameters]:
+    """Up to ``samples`` distinct valid combinations drawn uniformly from the ranges."""
+    _check_fields(ranges)
+    rng = random.Random(seed)
+    chosen = {}
+    # Reason: invalid draws (e.g. fast >= slow) are skipped, so bound the
+    # number of attempts instead of looping forever on tight ranges.
+    for _ in range(samples * 20):
+        if len(chosen) >= samples:
+            break
+        parameters = _make_parameters({name: rng.choice(list(values)) for name, values in ranges.items()})
+        if parameters is not None:
+            chosen.setdefault(parameters, None)
+    return list(chosen)
+
+def walk_forward_windows(length: int, train_bars: int, test_bars: int, step: Optional[int] = None) -> List[Tuple[Window, Window]]:
+    """Consecutive (train, test) windows; the test window follows its training window."""
+    if train_bars <= 0 or test_bars <= 0:
+        raise ValueError("Training and test windows must contain at least one bar.")
+    step = step or test_bars
+    windows = []
+    start = 0
+    while start + train_bars + test_bars <= length:
+        train_stop = start + train_bars
+        windows.append(((start, train_stop), (train_stop, train_stop + test_bars)))
+        start += step
+    return windows
+
+def _check_fields(ranges: Dict[str, Sequence]):
+    unknown = set(ranges) - {field.name for field in fields(StrategyParameters)}
+    if unknown:
+        raise ValueError(f"Unknown strategy parameters: {sorted(unknown)}")
+
+def _make_parameters(values: dict) -> Optional[StrategyParameters]:
+    try:
+        return StrategyParameters(**values)
+    except ValueError:
+        return None
+
+@dataclass(frozen=True)
+class _SharedLayout:
+    """Where each symbol's columns live inside the shared-memory block."""
+    name: str
+    offsets: Dict[str, Tuple[int, int]]  # symbol -> (first bar, bar count)
+    total_bars: int
+
+def _column_views(buffer, total_bars: int) -> Dict[str, np.ndarray]:
+    # One int64 timestamp row followed by five float64 price/volume rows
+    views = {'timestamp': np.ndarray((total_bars,), dtype=np.int64, buffer=buffer)}
+    for row, name in enumerate(OHLCV_COLUMNS[1:], start=1):
+        views[name] = np.ndarray((total_bars,), dtype=np.float64, buffer=buffer, offset=row * total_bars * 8)
+    return views
+
+# Per-worker state, set by _attach_worker
+_worker_memory: Optional[shared_memory.SharedMemory] = None
+_worker_data: Dict[str, OHLCVArrays] = {}
+_worker_config: Optional[BacktestConfig] = None
+
+def _attach_worker(layout: _SharedLayout, config: BacktestConfig):
+    global _worker_memory, _worker_config
+    # Workers share the parent's resource tracker, so attaching here does not
+    # take ownership; the parent unlinks the block in ParameterOptimizer.close
+    _worker_memory = shared_memory.SharedMemory(name=layout.name)
+    views = _column_views(_worker_memory.buf, layout.total_bars)
+    _worker_data.clear()
+    for symbol, (first, count) in layout.offsets.items():
+        _worker_data[symbol] = OHLCVArrays(*(views[name][first:first + count] for name in OHLCV_COLUMNS))
+    _worker_config = config
+    _cached_rsi.cache_clear()
+    _cached_macd.cache_clear()
+    _cached_atr.cache_clear()
+    _cached_ema.cache_clear()
+
+# Reason: indicators span the symbol's whole history and windows slice them,
+# so a window's first bars are warmed by the bars before it, as they would
+# be for a live bot, and every window of a symbol shares one computation.
+@lru_cache(maxsize=8)
+def _cached_rsi(symbol: str, length: int) -> np.ndarray:
+    return rsi_array(_worker_data[symbol].close, length)
+
+@lru_cache(maxsize=8)
+def _cached_macd(symbol: str, fast: int, slow: int, signal: int):
+    return macd_array(_worker_data[symbol].close, fast, slow, signal)
+
+@lru_cache(maxsize=8)
+def _cached_atr(symbol: str, length: int) -> np.ndarray:
+    data = _worker_data[symbol]
+    return atr_array(data.high, data.low, data.close, length)
+
+@lru_cache(maxsize=8)
+def _cached_ema(symbol: str, length: int) -> np.ndarray:
+    return ema_array(_worker_data[symbol].close, length)
+
+def _evaluate_batch(symbol: str, window: Window, batch: List[StrategyParameters]) -> List[SweepResult]:
+    # Runs in a worker process; indicators are reused across parameter sets
+    # that only differ in thresholds or multipliers.
+    data = _worker_data[symbol].slice(*window)
+    bars = slice(*window)
+    results = []
+    for parameters in batch:
+        config = BacktestConfig(_worker_config.initial_balance, _worker_config.risk_per_trade_percentage,
+                                _worker_config.fee_rate, parameters)
+        rsi = _cached_rsi(symbol, parameters.rsi_length)[bars]
+        macd = tuple(line[bars] for line in _cached_macd(symbol, parameters.macd_fast, parameters.macd_slow,
+                                                          parameters.macd_signal))
+        atr = _cached_atr(symbol, parameters.atr_length)[bars] if parameters.stop_mode != 'fixed' else None
+        middle = _cached_ema(symbol, parameters.keltner_length)[bars] if parameters.stop_mode == 'keltner' else None
+        result = Backtester(config).run_vectorized(data, rsi, macd, atr, middle)
+        results.append(SweepResult(symbol, parameters, window, result.total_return, result.max_drawdown,
+                                   len(result.trades), result.win_rate))
+    return results
+
+def _by_return(result: SweepResult) -> float:
+    return result.total_return
+
+class ParameterOptimizer:
+    """Runs backtests for many StrategyParameters across a process pool.
+
+    Use as a context manager so the pool and the shared-memory block are
+    released::
+
+        with ParameterOptimizer({'BTCUSDT': load_ohlcv('btc.csv')}) as optimizer:
+            results = optimizer.sweep(grid_search(rsi_oversold=[20, 25, 30]))
+    """
+
+    def __init__(self, data: Dict[str, OHLCVArrays], config: Optional[BacktestConfig] = None,
+                 workers: Optional[int] = None, batch_size: int = DEFAULT_BATCH_SIZE):
+        if not data:
+            raise ValueError("At least one symbol's history is required.")
+        self.config = config or BacktestConfig()
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.lengths = {symbol: len(arrays) for symbol, arrays in data.items()}
+        self._memory: Optional[shared_memory.SharedMemory] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._share(data)
+
+    def _share(self, data: Dict[str, OHLCVArrays]):
+        total_bars = sum(self.lengths.values())
+        self._memory = shared_memory.SharedMemory(create=True, size=max(1, total_bars * 8 * len(OHLCV_COLUMNS)))
+        views = _column_views(self._memory.buf, total_bars)
+        offsets = {}
+        first = 0
+        for symbol, arrays in data.items():
+            count = len(arrays)
+            for name in OHLCV_COLUMNS:
+                views[name][first:first + count] = getattr(arrays, name)
+            offsets[symbol] = (first, count)
+            first += count
+        del views  # The block cannot be closed while NumPy views reference it
+        layout = _SharedLayout(self._memory.name, offsets, total_bars)
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_attach_worker,
+                                             initargs=(layout, self.config))
+
+    def _submit(self, symbol: str, window: Window, parameters: List[StrategyParameters]) -> list:
+        if self._executor is None:
+            raise RuntimeError("ParameterOptimizer is closed.")
+        # Reason: batches grouped by indicator lengths let each worker hit
+        # its indicator cache instead of recomputing RSI/MACD per set.
+        ordered = sorted(parameters, key=lambda p: (p.rsi_length, p.macd_fast, p.macd_slow, p.macd_signal))
+        return [self._executor.submit(_evaluate_batch, symbol, window, ordered[start:start + self.batch_size])
+                for start in range(0, len(ordered), self.batch_size)]
+
+    @staticmethod
+    def _collect(tasks: list) -> List[SweepResult]:
+        return [result for task in tasks for result in task.result()]
+
+    def sweep(self, parameters: Iterable[StrategyParameters], symbols: Optional[Iterable[str]] = None,
+              window: Optional[Window] = None) -> List[SweepResult]:
+        """Backtest every parameter set on every symbol (optionally on a bar window)."""
+        parameters = list(parameters)
+        tasks = []
+        for symbol in symbols or self.lengths:
+            tasks.extend(self._submit(symbol, window or (0, self.lengths[symbol]), parameters))
+        return self._collect(tasks)
+
+    def walk_forward(self, parameters: Iterable[StrategyParameters], train_bars: int, test_bars: int,
+                     step: Optional[int] = None, symbols: Optional[Iterable[str]] = None,
+                     objective: Callable[[SweepResult], float] = _by_return) -> List[WalkForwardStep]:
+        """Tune on each training window, then score the winner on the next window."""
+        parameters = list(parameters)
+        # Submit every training sweep up front so all windows share the pool
+        pending = []
+        for symbol in symbols or self.lengths:
+            for train, test in walk_forward_windows(self.lengths[symbol], train_bars, test_bars, step):
+                pending.append((symbol, test, self._submit(symbol, train, parameters)))
+        winners = [(symbol, test, max(self._collect(tasks), key=objective)) for symbol, test, tasks in pending]
+        tests = [self._submit(symbol, test, [best.parameters]) for symbol, test, best in winners]
+        return [WalkForwardStep(symbol, best.parameters, best, self._collect(tasks)[0])
+                for (symbol, _, best), tasks in zip(winners, tests)]
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._memory is not None:
+            self._memory.close()
+            self._memory.unlink()
+            self._memory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,179 @@
+"""Replay of recorded websocket frames through the live trading pipeline.
+
+Unlike the backtester, which feeds bars straight to the strategy, a replay
+pushes raw frames (see data/frame_recorder.py) through
+``DataHandler._on_message`` and on into ``TradingAgent._process_ochlv_data``
+and the order executor, exactly as a live session would handle them. Orders
+go to a ``SimulatedTrader`` instead of Binance. Frames are fed either as fast
+as the pipeline takes them or paced by their recorded receive times, and the
+result reports throughput and the agent's per-stage latencies, so a
+regression in decoding, the analyzer or the strategy shows up as a
+repeatable number.
+"""
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from agents.trading_agent import TradingAgent
+from data.kline_store import interval_milliseconds
+from models import AccountBalance
+from monitoring.latency import LatencyRecorder, StageSummary
+from trading.symbol_info_manager import split_symbol
+
+logger = logging.getLogger(__name__)
+
+# Compares a recorded exchange time with the current clock, so it is meaningless in a replay
+_LIVE_ONLY_STAGES = {'exchange_to_receive'}
+
+class SimulatedTrader:
+    """Stands in for ``Trader`` in replays: market orders fill at once at their reference price.
+
+    Balances start from ``balances`` and move with every fill, so sizing and
+    exits behave as they would against a real account. Nothing is sent over
+    the network and no exchange filters are applied.
+    """
+
+    def __init__(self, balances: Dict[str, Decimal]):
+        self.symbol_info_manager = None
+        self.balance_cache = None
+        self._balances = dict(balances)
+        self._lock = threading.Lock() # Orders are placed from executor worker threads
+        self.fills: List[dict] = []
+
+    def start_balance_tracking(self, *args, **kwargs):
+        pass # Balances are local already
+
+    def stop_balance_tracking(self):
+        pass
+
+    def get_account_balance(self, asset: str) -> AccountBalance:
+        with self._lock:
+            return AccountBalance(asset=asset, free=self._balances.get(asset, Decimal('0')), locked=Decimal('0'))
+
+    def place_market_order(self, symbol: str, side: str, quantity: Decimal, reference_price: Optional[Decimal] = None) -> dict:
+        if reference_price is None:
+            raise ValueError("Simulated market orders need a reference_price to fill at.")
+        base_asset, quote_asset = split_symbol(symbol)
+        notional = quantity * reference_price
+        with self._lock:
+            order_id = len(self.fills) + 1
+            pay_asset, pay_amount = (quote_asset, notional) if side == 'BUY' else (base_asset, quantity)
+            if pay_amount > self._balances.get(pay_asset, Decimal('0')):
+                return {'symbol': symbol, 'orderId': order_id, 'side': side, 'status': 'REJECTED',
+                        'origQty': f"{quantity:f}", 'executedQty': '0'}
+            receive_asset, receive_amount = (base_asset, quantity) if side == 'BUY' else (quote_asset, notional)
+            self._balances[pay_asset] -= pay_amount
+            self._balances[receive_asset] = self._balances.get(receive_asset, Decimal('0')) + receive_amount
+            order = {'symbol': symbol, 'orderId': order_id, 'side': side, 'status': 'FILLED',
+                     'origQty': f"{quantity:f}", 'executedQty': f"{quantity:f}", 'cummulativeQuoteQty': f"{notional:f}"}
+            self.fills.append(order)
+        return order
+
+@dataclass
+class ReplayResult:
+    frames: int
+    bars: int  # Closed klines delivered to the agent
+    orders: int  # Order events that filled
+    elapsed_seconds: float
+    stages: List[StageSummary] = field(default_factory=list)
+
+    @property
+    def bars_per_second(self) -> float:
+        return self.bars / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+    @property
+    def frames_per_second(self) -> float:
+        return self.frames / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+    def report(self) -> List[str]:
+        lines = [f"{self.frames} frames, {self.bars} bars, {self.orders} orders in {self.elapsed_seconds:.3f}s "
+                 f"({self.frames_per_second:,.0f} frames/s, {self.bars_per_second:,.0f} bars/s)"]
+        lines += [stage.log_line() for stage in self.stages]
+        return lines
+
+def create_replay_agent(symbol: str, interval: str, initial_balance: Decimal,
+                        latency: Optional[LatencyRecorder] = None, **agent_options) -> TradingAgent:
+    """A ``TradingAgent`` trading ``initial_balance`` of the quote asset on a ``SimulatedTrader``."""
+    quote_asset = split_symbol(symbol)[1]
+    trader = SimulatedTrader({quote_asset: initial_balance})
+    return TradingAgent(symbol, interval, initial_balance, trader=trader, latency=latency, **agent_options)
+
+class FrameReplayer:
+    """Feeds ``(received_time_ns, frame)`` pairs to an agent's data handler.
+
+    The agent's order executor is started for the run and stopped at the end,
+    after the orders the replay queued have been placed, so the elapsed time
+    covers the whole path from frame to fill.
+    """
+
+    def __init__(self, agent: TradingAgent):
+        self.agent = agent
+
+    def run(self, frames: Iterable[Tuple[int, str]], speed: Optional[float] = None) -> ReplayResult:
+        """Replays ``frames``; ``speed`` None runs flat out, 1.0 at recorded pace, 10.0 ten times faster."""
+        agent = self.agent
+        handler = agent.data_handler
+        executor = agent.order_executor
+        deliver, on_event = handler.callback, executor.on_event
+        counts = {'bars': 0, 'orders': 0}
+        order_lock = threading.Lock() # Order events arrive on several worker threads
+
+        def count_bar(bar):
+            counts['bars'] += 1
+            deliver(bar)
+
+        def count_order(event):
+            if event.is_filled:
+                with order_lock:
+                    counts['orders'] += 1
+            on_event(event)
+
+        handler.callback, executor.on_event = count_bar, count_order
+        executor.start()
+        frame_count = 0
+        first_ns: Optional[int] = None
+        started = time.perf_counter()
+        try:
+            for received_ns, frame in frames:
+                if speed is not None:
+                    if first_ns is None:
+                        first_ns = received_ns
+                    delay = (received_ns - first_ns) / 1e9 / speed - (time.perf_counter() - started)
+                    if delay > 0:
+                        time.sleep(delay)
+                handler._on_message(None, frame)
+                frame_count += 1
+        finally:
+            executor.stop() # Drains the orders still queued
+            handler.callback, executor.on_event = deliver, on_event
+        elapsed = time.perf_counter() - started
+        stages = [stage for stage in agent.latency.summary() if stage.stage not in _LIVE_ONLY_STAGES] \
+            if agent.latency is not None else []
+        return ReplayResult(frame_count, counts['bars'], counts['orders'], elapsed, stages)
+
+def synthetic_kline_frames(records: np.ndarray, symbol: str, interval: str,
+                           updates_per_bar: int = 0) -> List[Tuple[int, str]]:
+    """Raw single-stream kline frames for ``KLINE_RECORD_DTYPE`` records, as a recording would hold them.
+
+    Each bar gets ``updates_per_bar`` open-candle frames before its closing
+    frame, since live streams send several updates per candle. Receive times
+    are spread evenly over the bar's interval.
+    """
+    step = interval_milliseconds(interval)
+    symbol = symbol.upper()
+    frames: List[Tuple[int, str]] = []
+    for record in records:
+        open_time = int(record['timestamp'])
+        kline = {'t': open_time, 'T': open_time + step - 1, 's': symbol, 'i': interval,
+                 'o': f"{record['open']:.8f}", 'c': f"{record['close']:.8f}", 'h': f"{record['high']:.8f}",
+                 'l': f"{record['low']:.8f}", 'v': f"{record['volume']:.8f}", 'x': False}
+        for update in range(updates_per_bar + 1):
+            event_time = open_time + step * (update + 1) // (updates_per_bar + 1) - 1
+            kline['x'] = update == updates_per_bar
+            payload = {'e': 'kline', 'E': event_time, 's': symbol, 'k': kline}
+            frames.append((event_time * 1_000_000, json.dumps(payload, separators=(',', ':'))))
+    return frames
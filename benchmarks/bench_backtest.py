@@ -0,0 +1,43 @@
+"""Microbenchmark: backtest throughput in bars per second, vectorized vs. bar-by-bar.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_backtest --bars 1000000 --bar-by-bar-bars 20000
+
+The bar-by-bar mode replays the live TradingStrategy path and is much slower,
+so it runs on a shorter prefix of the same synthetic random walk.
+"""
+import argparse
+import numpy as np
+from backtest.engine import Backtester
+from backtest.loader import OHLCVArrays
+
+
+def make_bars(count: int, seed: int = 7) -> OHLCVArrays:
+    rng = np.random.default_rng(seed)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.002, count)))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.001, count)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.001, count)))
+    return OHLCVArrays(np.arange(count, dtype=np.int64) * 60000, open_, high, low, close, np.ones(count))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bars", type=int, default=1000000)
+    parser.add_argument("--bar-by-bar-bars", type=int, default=20000)
+    args = parser.parse_args()
+
+    data = make_bars(args.bars)
+    backtester = Backtester()
+    rows = [
+        ("vectorized", backtester.run_vectorized(data)),
+        ("bar-by-bar", backtester.run_bar_by_bar(data.slice(0, args.bar_by_bar_bars))),
+    ]
+    for name, result in rows:
+        print(f"{name:12s} {result.bars:>10,} bars {result.bars_per_second:>14,.0f} bars/s  "
+              f"{len(result.trades):>6} trades  max drawdown {result.max_drawdown:.2%}")
+
+
+if __name__ == "__main__":
+    main()
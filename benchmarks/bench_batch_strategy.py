@@ -0,0 +1,66 @@
+"""Microbenchmark: per-interval strategy time for a symbol universe, batched vs. per symbol.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_batch_strategy --symbols 500 --intervals 300
+
+Both paths are warmed with the same history first, then time the evaluation
+of one closed bar per symbol for each interval.
+"""
+import argparse
+import time
+from decimal import Decimal
+import numpy as np
+from analysis.batch_strategy import BatchStrategyEvaluator
+from analysis.strategy import TradingStrategy
+from analysis.technical_analyzer import TechnicalAnalyzer
+from models import OCHLVData
+
+
+def make_closes(symbols: int, count: int, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.002, (symbols, count)), axis=1)), 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--intervals", type=int, default=300)
+    parser.add_argument("--warm-up", type=int, default=200)
+    args = parser.parse_args()
+
+    closes = make_closes(args.symbols, args.warm_up + args.intervals)
+    symbols = [f"SYM{index}USDT" for index in range(args.symbols)]
+    # Bars are decoded once up front; both paths receive the same OCHLVData objects
+    bars = [{symbol: OCHLVData(timestamp=step, open=Decimal(str(price)), high=Decimal(str(price)), low=Decimal(str(price)),
+                               close=Decimal(str(price)), volume=Decimal('1'))
+             for symbol, price in zip(symbols, closes[:, step])}
+            for step in range(args.warm_up, closes.shape[1])]
+
+    strategies = {symbol: TradingStrategy(TechnicalAnalyzer()) for symbol in symbols}
+    records = np.zeros(args.warm_up, dtype=[('timestamp', '<i8'), ('open', '<f8'), ('high', '<f8'),
+                                             ('low', '<f8'), ('close', '<f8'), ('volume', '<f8')])
+    for row, symbol in enumerate(symbols):
+        records['close'] = closes[row, :args.warm_up]
+        strategies[symbol].technical_analyzer.warm_up(records)
+    evaluator = BatchStrategyEvaluator(symbols)
+    evaluator.warm_up({symbol: closes[row, :args.warm_up] for row, symbol in enumerate(symbols)})
+
+    start = time.perf_counter()
+    for interval_bars in bars:
+        for symbol, bar in interval_bars.items():
+            strategies[symbol].generate_signal(bar)
+    looped = (time.perf_counter() - start) / len(bars)
+
+    start = time.perf_counter()
+    for interval_bars in bars:
+        evaluator.evaluate(interval_bars)
+    batched = (time.perf_counter() - start) / len(bars)
+
+    print(f"{args.symbols} symbols, {len(bars)} intervals")
+    print(f"per-symbol loop {looped * 1000:>10.3f} ms/interval")
+    print(f"batched         {batched * 1000:>10.3f} ms/interval  ({looped / batched:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
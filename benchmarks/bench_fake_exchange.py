@@ -0,0 +1,69 @@
+"""Benchmark: order throughput of Trader against the simulated Binance exchange.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_fake_exchange --orders 50000 --threads 4
+    python -m benchmarks.bench_fake_exchange --http --orders 2000
+
+Each thread alternates market buys and sells and resting limit orders that
+are canceled again, through ``Trader`` on an in-process ``FakeBinanceClient``
+or, with ``--http``, through python-binance over the local REST server.
+"""
+import argparse
+import os
+import threading
+import time
+from decimal import Decimal
+
+# Nothing talks to Binance, but importing the trader loads the settings
+os.environ.setdefault("BINANCE_API_KEY", "fake")
+os.environ.setdefault("BINANCE_API_SECRET", "fake")
+
+from backtest.fake_binance_client import FakeBinanceClient
+from backtest.fake_exchange import FakeExchange, SymbolRules
+from backtest.fake_exchange_server import FakeExchangeServer
+from trading.trader import Trader
+
+
+def place_orders(trader: Trader, count: int):
+    quantity = Decimal('0.1')
+    for index in range(count // 4):
+        trader.place_market_order("BTCUSDT", "BUY", quantity)
+        trader.place_market_order("BTCUSDT", "SELL", quantity)
+        order = trader.place_limit_order("BTCUSDT", "BUY", quantity, Decimal('90'))
+        trader.cancel_order("BTCUSDT", order['orderId'])
+
+
+def run(trader_factory, orders: int, threads: int) -> float:
+    traders = [trader_factory() for _ in range(threads)]
+    workers = [threading.Thread(target=place_orders, args=(trader, orders // threads)) for trader in traders]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=50000, help="Requests in total, split across threads")
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--http", action="store_true", help="Go through python-binance and the local REST server")
+    args = parser.parse_args()
+
+    exchange = FakeExchange()
+    exchange.add_symbol(SymbolRules("BTCUSDT", "BTC", "USDT"), Decimal('100'))
+    exchange.deposit("USDT", Decimal('1000000000'))
+    if args.http:
+        with FakeExchangeServer(exchange) as server:
+            elapsed = run(lambda: Trader(client=server.client()), args.orders, args.threads)
+    else:
+        client = FakeBinanceClient(exchange)
+        elapsed = run(lambda: Trader(client=client), args.orders, args.threads)
+    print(f"{exchange.orders_placed} orders, {exchange.trades} trades in {elapsed:.3f}s "
+          f"({args.orders / elapsed:,.0f} requests/s over {'HTTP' if args.http else 'in-process'}, {args.threads} threads)")
+
+
+if __name__ == "__main__":
+    main()
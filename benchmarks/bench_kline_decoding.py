@@ -0,0 +1,70 @@
+"""Microbenchmark: kline frames decoded per second, old path vs. decoder presets.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_kline_decoding --frames 200000 --closed-ratio 0.02
+
+The synthetic stream mimics a busy 1m kline feed where only a small fraction
+of frames close a candle. The "baseline" row reproduces the original
+DataHandler._on_message (json.loads + closed check + OCHLVData with Decimals).
+"""
+import argparse
+import json
+import time
+from decimal import Decimal
+from typing import Callable, List
+from data.kline_decoder import fast_kline_decoder, fast_loads, pydantic_kline_decoder
+from models import OCHLVData
+
+
+def make_frames(count: int, closed_ratio: float) -> List[str]:
+    every = max(1, round(1 / closed_ratio)) if closed_ratio > 0 else count + 1
+    frames = []
+    for index in range(count):
+        kline = {"t": 1700000000000 + index * 60000, "T": 1700000059999 + index * 60000, "s": "BTCUSDT",
+                 "i": "1m", "f": 100, "L": 200, "o": "37000.10", "c": "37005.20", "h": "37012.55",
+                 "l": "36990.00", "v": "12.304", "n": 101, "x": (index + 1) % every == 0, "q": "455300.12",
+                 "V": "6.1", "Q": "225700.4", "B": "0"}
+        frames.append(json.dumps({"e": "kline", "E": kline["t"] + 1000, "s": "BTCUSDT", "k": kline},
+                                 separators=(",", ":")))
+    return frames
+
+
+def baseline_decode(message):
+    kline = json.loads(message)['k']
+    if kline['x']:
+        return OCHLVData(timestamp=kline['t'], open=Decimal(kline['o']), close=Decimal(kline['c']),
+                         high=Decimal(kline['h']), low=Decimal(kline['l']), volume=Decimal(kline['v']))
+    return None
+
+
+def measure(decode: Callable, frames: List[str]) -> float:
+    start = time.perf_counter()
+    for frame in frames:
+        decode(frame)
+    return len(frames) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=200000)
+    parser.add_argument("--closed-ratio", type=float, default=0.02, help="Fraction of frames with x=true")
+    args = parser.parse_args()
+
+    frames = make_frames(args.frames, args.closed_ratio)
+    candidates = {
+        "baseline (json + OCHLVData)": baseline_decode,
+        "pydantic_kline_decoder (prefilter)": pydantic_kline_decoder().decode,
+        "fast_kline_decoder (prefilter + KlineBar)": fast_kline_decoder().decode,
+    }
+    print(f"JSON backend for fast path: {fast_loads.__module__}")
+    print(f"{len(frames)} frames, closed ratio {args.closed_ratio}")
+    baseline_rate = None
+    for name, decode in candidates.items():
+        rate = measure(decode, frames)
+        baseline_rate = baseline_rate or rate
+        print(f"{name:45s} {rate:>14,.0f} msg/s  x{rate / baseline_rate:.1f}")
+
+
+if __name__ == "__main__":
+    main()
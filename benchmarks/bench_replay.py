@@ -0,0 +1,63 @@
+"""Benchmark: recorded kline frames replayed through TradingAgent at full speed.
+
+Run from the repository root, either on a recording made with
+``main.py trade --record_frames FILE`` or on a synthetic random walk:
+
+    python -m benchmarks.bench_replay --frames frames.jsonl.gz --symbol BTCUSDT --interval 1m
+    python -m benchmarks.bench_replay --bars 20000 --updates-per-bar 5
+
+Frames are read into memory first, so decompression is not timed. Reports
+frames and bars per second and the per-stage latency percentiles.
+"""
+import argparse
+import logging
+import os
+from decimal import Decimal
+import numpy as np
+
+# Nothing talks to Binance, but importing the agent loads the settings
+os.environ.setdefault("BINANCE_API_KEY", "replay")
+os.environ.setdefault("BINANCE_API_SECRET", "replay")
+
+from backtest.replay import FrameReplayer, create_replay_agent, synthetic_kline_frames
+from data.frame_recorder import read_frames
+from data.kline_store import KLINE_RECORD_DTYPE
+from monitoring.latency import LatencyRecorder
+
+
+def random_walk_records(count: int, seed: int = 3) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    records = np.zeros(count, dtype=KLINE_RECORD_DTYPE)
+    records['timestamp'] = 1700000000000 // 60000 * 60000 + np.arange(count, dtype=np.int64) * 60000
+    records['close'] = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, count)))
+    records['open'] = np.r_[records['close'][0], records['close'][:-1]]
+    records['high'] = np.maximum(records['open'], records['close']) * 1.001
+    records['low'] = np.minimum(records['open'], records['close']) * 0.999
+    records['volume'] = 1.0
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=str, default="", help="Recording to replay (default: synthetic frames)")
+    parser.add_argument("--symbol", type=str, default="BTCUSDT")
+    parser.add_argument("--interval", type=str, default="1m")
+    parser.add_argument("--bars", type=int, default=20000)
+    parser.add_argument("--updates-per-bar", type=int, default=5)
+    parser.add_argument("--speed", type=float, default=None, help="Replay pace relative to the recording (default: flat out)")
+    args = parser.parse_args()
+    # Per-bar info logs would dominate the measurement
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.frames:
+        frames = list(read_frames(args.frames))
+    else:
+        frames = synthetic_kline_frames(random_walk_records(args.bars), args.symbol, args.interval, args.updates_per_bar)
+    agent = create_replay_agent(args.symbol, args.interval, Decimal('10000'), latency=LatencyRecorder())
+    result = FrameReplayer(agent).run(frames, speed=args.speed)
+    for line in result.report():
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+from websockets.asyncio.client import connect # type: ignore
+from websockets.exceptions import ConnectionClosed # type: ignore
+from data.data_handler import BINANCE_STREAM_URL, MAX_STREAMS_PER_CONNECTION, kline_stream_name
+from data.kline_decoder import KlineDecoder, pydantic_kline_decoder
+from models import OCHLVData
+
+logger = logging.getLogger(__name__)
+
+class AsyncDataHandler:
+    """asyncio kline feed for many symbols over Binance combined streams.
+
+    Closed klines are put on ``queue`` as ``(symbol, OCHLVData)`` tuples. The
+    queue should be bounded: when consumers fall behind, ``put`` blocks the
+    receive loop, which in turn lets the websocket's own flow control push
+    back on the exchange instead of buffering without limit.
+    """
+
+    def __init__(self, symbols: List[str], interval: str, queue: asyncio.Queue,
+                 base_url: str = BINANCE_STREAM_URL, max_streams_per_connection: int = 200,
+                 decoder: Optional[KlineDecoder] = None):
+        if not 1 <= max_streams_per_connection <= MAX_STREAMS_PER_CONNECTION:
+            raise ValueError(f"max_streams_per_connection must be between 1 and {MAX_STREAMS_PER_CONNECTION}.")
+        self.interval = interval
+        self.queue = queue
+        self.base_url = base_url.rstrip('/')
+        self.decoder = decoder or pydantic_kline_decoder()
+        # Map stream name (e.g. btcusdt@kline_1m) back to the exchange symbol
+        self.symbols_by_stream = {kline_stream_name(symbol, interval): symbol.upper() for symbol in symbols}
+        streams = list(self.symbols_by_stream)
+        self.urls = [
+            f"{self.base_url}/stream?streams={'/'.join(streams[index:index + max_streams_per_connection])}"
+            for index in range(0, len(streams), max_streams_per_connection)
+        ]
+        self.is_running = False
+        self._connections: list = []
+
+    def _parse_message(self, message) -> Optional[Tuple[str, OCHLVData]]:
+        decoded = self.decoder.decode_stream(message) # None for klines that are still open
+        if decoded is None:
+            return None
+        stream, ochlv_data = decoded
+        symbol = self.symbols_by_stream.get(stream)
+        if symbol is None:
+            return None
+        return symbol, ochlv_data
+
+    async def _run_connection(self, url: str):
+        # connect() used as an async iterator reconnects with exponential
+        # backoff, so no recursion or blocking sleeps are needed here.
+        async for websocket in connect(url, max_queue=64):
+            self._connections.append(websocket)
+            logger.info(f"Combined stream connected: {url}")
+            try:
+                async for message in websocket:
+                    item = self._parse_message(message)
+                    if item is not None:
+                        await self.queue.put(item)
+            except ConnectionClosed as e:
+                logger.warning(f"Combined stream closed: {e}")
+            finally:
+                self._connections.remove(websocket)
+            if not self.is_running:
+                break
+
+    async def run(self):
+        self.is_running = True
+        await asyncio.gather(*(self._run_connection(url) for url in self.urls))
+
+    async def stop(self):
+        self.is_running = False
+        for websocket in list(self._connections):
+            await websocket.close()
@@ -0,0 +1,154 @@
+"""Higher-timeframe bars built from one stream of closed base klines.
+
+Subscribing to ``@kline_5m``, ``@kline_15m`` and ``@kline_1h`` next to
+``@kline_1m`` costs a socket (or stream) each and lets the timeframes drift
+apart when one connection lags. ``BarAggregator`` instead folds every closed
+1m bar into the bucket it belongs to in constant time, and closes a bucket as
+soon as its last base bar arrives, with the bucket aligned to the exchange's
+interval boundaries. ``MultiTimeframeAggregator`` fans one base stream out to
+several aggregators and keeps a ``TechnicalAnalyzer`` per timeframe.
+"""
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from analysis.technical_analyzer import TechnicalAnalyzer
+from data.kline_store import KLINE_RECORD_DTYPE, interval_milliseconds
+from models import OCHLVData
+
+# Binance weeks open on Monday 00:00 UTC; the epoch fell on a Thursday
+_WEEK_OFFSET_MS = 4 * 86400000
+
+def bucket_open_time(timestamp: int, interval: str) -> int:
+    """Open time of the ``interval`` kline containing ``timestamp`` (epoch ms)."""
+    step = interval_milliseconds(interval)
+    offset = _WEEK_OFFSET_MS if interval.endswith('w') else 0
+    return (timestamp - offset) // step * step + offset
+
+def aggregate_records(records: np.ndarray, interval: str) -> np.ndarray:
+    """Resamples ``KLINE_RECORD_DTYPE`` records (oldest first) into ``interval`` records.
+
+    Every bucket that has at least one record is returned, including a
+    trailing bucket that is not complete yet.
+    """
+    if not len(records):
+        return np.empty(0, dtype=KLINE_RECORD_DTYPE)
+    timestamps = np.asarray(records['timestamp'])
+    step = interval_milliseconds(interval)
+    offset = _WEEK_OFFSET_MS if interval.endswith('w') else 0
+    buckets = (timestamps - offset) // step * step + offset
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(records)] - 1
+    result = np.empty(len(starts), dtype=KLINE_RECORD_DTYPE)
+    result['timestamp'] = buckets[starts]
+    result['open'] = records['open'][starts]
+    result['high'] = np.maximum.reduceat(records['high'], starts)
+    result['low'] = np.minimum.reduceat(records['low'], starts)
+    result['close'] = records['close'][ends]
+    result['volume'] = np.add.reduceat(records['volume'], starts)
+    return result
+
+class BarAggregator:
+    """Builds ``interval`` bars from closed ``base_interval`` bars (OCHLVData or KlineBar).
+
+    ``update`` returns the higher-timeframe bars it closed, oldest first and
+    usually none. A bucket is closed by its last base bar; if that bar never
+    arrives (a gap in the base stream), the partial bucket is closed by the
+    first bar of a later bucket.
+    """
+
+    def __init__(self, base_interval: str, interval: str):
+        base_step = interval_milliseconds(base_interval)
+        step = interval_milliseconds(interval)
+        if step <= base_step or step % base_step:
+            raise ValueError(f"{interval} is not a multiple of the {base_interval} base interval.")
+        self.base_interval = base_interval
+        self.interval = interval
+        self._base_step = base_step
+        self._step = step
+        self._open_time: Optional[int] = None  # Open time of the bucket being built
+        self._open = self._high = self._low = self._close = self._volume = Decimal('0')
+
+    @property
+    def partial(self) -> Optional[OCHLVData]:
+        """The bucket still being built, e.g. for display; None between buckets."""
+        return self._bar() if self._open_time is not None else None
+
+    def _bar(self) -> OCHLVData:
+        return OCHLVData(timestamp=self._open_time, open=self._open, high=self._high,
+                         low=self._low, close=self._close, volume=self._volume)
+
+    def resume(self, open_time: int, open_: Decimal, high: Decimal, low: Decimal, close: Decimal, volume: Decimal):
+        """Continues a bucket that was partly built elsewhere, e.g. from stored history."""
+        self._open_time = open_time
+        self._open, self._high, self._low, self._close, self._volume = open_, high, low, close, volume
+
+    def update(self, bar) -> List[OCHLVData]:
+        open_time = bucket_open_time(bar.timestamp, self.interval)
+        closed: List[OCHLVData] = []
+        if self._open_time is not None and open_time != self._open_time:
+            if open_time < self._open_time:
+                return closed  # Replayed bar from a bucket already emitted
+            closed.append(self._bar())  # Gap: the bucket's last base bar never came
+            self._open_time = None
+        if self._open_time is None:
+            self._open_time = open_time
+            self._open, self._high, self._low = bar.open, bar.high, bar.low
+            self._close, self._volume = bar.close, bar.volume
+        else:
+            if bar.high > self._high:
+                self._high = bar.high
+            if bar.low < self._low:
+                self._low = bar.low
+            self._close = bar.close
+            self._volume += bar.volume
+        if bar.timestamp + self._base_step >= open_time + self._step:
+            closed.append(self._bar())
+            self._open_time = None
+        return closed
+
+class MultiTimeframeAggregator:
+    """Builds higher-timeframe bars from one closed base-kline stream, with an analyzer per timeframe.
+
+    Pass every closed base bar to ``on_bar`` before the base timeframe's own
+    strategy sees it, so the higher timeframes are current when that strategy
+    runs. Each higher-timeframe bar it closes is added to
+    ``analyzers[interval]`` and then passed to ``callback(interval, bar)``
+    when one is set.
+    """
+
+    def __init__(self, base_interval: str, intervals: List[str],
+                 callback: Optional[Callable[[str, OCHLVData], None]] = None, window: int = 200):
+        self.base_interval = base_interval
+        self.aggregators = [BarAggregator(base_interval, interval) for interval in intervals]
+        self.analyzers: Dict[str, TechnicalAnalyzer] = {interval: TechnicalAnalyzer(window) for interval in intervals}
+        self.callback = callback
+
+    def warm_up(self, records: np.ndarray):
+        """Seeds every timeframe from base-interval history, e.g. ``KlineStore.recent`` records.
+
+        Complete buckets warm the analyzers; the trailing incomplete bucket is
+        resumed so the next live base bars finish it. A leading bucket that
+        the history starts in the middle of is dropped.
+        """
+        if not len(records):
+            return
+        first_open_time = int(records['timestamp'][0])
+        next_open_time = int(records['timestamp'][-1]) + interval_milliseconds(self.base_interval)
+        for aggregator in self.aggregators:
+            aggregated = aggregate_records(records, aggregator.interval)
+            starts_mid_bucket = first_open_time != int(aggregated['timestamp'][0])
+            last = aggregated[-1]
+            if next_open_time < int(last['timestamp']) + interval_milliseconds(aggregator.interval):
+                aggregated = aggregated[:-1]
+                if len(aggregated) or not starts_mid_bucket:
+                    aggregator.resume(int(last['timestamp']), *(Decimal(str(last[name])) for name in ('open', 'high', 'low', 'close', 'volume')))
+            if starts_mid_bucket:
+                aggregated = aggregated[1:]
+            self.analyzers[aggregator.interval].warm_up(aggregated)
+
+    def on_bar(self, bar):
+        for aggregator in self.aggregators:
+            for closed in aggregator.update(bar):
+                self.analyzers[aggregator.interval].add_ohlcv_data(closed)
+                if self.callback is not None:
+                    self.callback(aggregator.interval, closed)
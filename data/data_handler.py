@@ -1,66 +1,201 @@
-import websocket # type: ignore
-import json
-import threading
+import itertools
 import time
-from decimal import Decimal
+import requests
+from typing import Callable, Dict, List, Optional, Tuple
+from data.kline_decoder import KlineDecoder, parse_kline, pydantic_kline_decoder # noqa: F401 (parse_kline re-exported)
+from data.feed_supervisor import FeedSupervisor, SupervisedFeed
+from data.frame_recorder import FrameRecorder
+from data.kline_backfill import KlineBackfiller, missing_open_times
+from data.kline_store import KlineStore, next_open_time
 from models import OCHLVData # Import from models.py
+from monitoring.latency import LatencyRecorder
+
+BINANCE_STREAM_URL = "wss://stream.binance.com:9443"
+# Binance accepts at most 1024 streams on a single combined-stream connection
+MAX_STREAMS_PER_CONNECTION = 1024
+
+def kline_stream_name(symbol: str, interval: str) -> str:
+    return f"{symbol.lower()}@kline_{interval}"
 
 class DataHandler:
-    def __init__(self, symbol: str, interval: str, callback):
+    def __init__(self, symbol: str, interval: str, callback, decoder: Optional[KlineDecoder] = None,
+                 store: Optional[KlineStore] = None, backfiller: Optional[KlineBackfiller] = None,
+                 supervisor: Optional[FeedSupervisor] = None, base_url: str = BINANCE_STREAM_URL,
+                 latency: Optional[LatencyRecorder] = None, recorder: Optional[FrameRecorder] = None):
         self.symbol = symbol.lower()
         self.interval = interval
         self.callback = callback
-        self.ws_url = f"wss://stream.binance.com:9443/ws/{self.symbol}@kline_{self.interval}"
-        self.ws = None
-        self.reconnect_interval = 5  # seconds
+        # Turns raw frames into bars; see data/kline_decoder.py for the fast path
+        self.decoder = decoder or pydantic_kline_decoder()
+        self.store = store # Closed bars are persisted here when set
+        # Recovers bars missed while disconnected when set
+        self.backfiller = backfiller
+        self.last_timestamp: Optional[int] = None # Open time of the last bar handed to the callback
+        self.ws_url = f"{base_url.rstrip('/')}/ws/{kline_stream_name(self.symbol, self.interval)}"
+        # Reconnects, pings and stale detection; may be shared by many handlers
+        self.supervisor = supervisor or FeedSupervisor()
+        self._owns_supervisor = supervisor is None
+        self.feed: Optional[SupervisedFeed] = None
         self.is_running = False
-        self.thread = None
+        # Stage timings when set; None skips all timing on the hot path
+        self.latency = latency
+        self.received_ns = 0 # perf_counter_ns() when the frame being handled arrived
+        self.recorder = recorder # Raw frames are captured here for replay when set
 
     def _on_message(self, ws, message):
-        json_message = json.loads(message)
-        kline = json_message['k']
-        if kline['x']:  # 'x' indicates if the kline is closed
-            ochlv_data = OCHLVData(
-                timestamp=kline['t'],
-                open=Decimal(kline['o']),
-                close=Decimal(kline['c']),
-                high=Decimal(kline['h']),
-                low=Decimal(kline['l']),
-                volume=Decimal(kline['v'])
-            )
-            self.callback(ochlv_data)
+        latency = self.latency
+        received_ns = time.perf_counter_ns() if latency is not None else 0
+        ochlv_data = self.decoder.decode(message) # None for klines that are still open
+        if ochlv_data is not None and latency is not None:
+            latency.record_since('decode', received_ns)
+            # Exchange close time to local receipt; wall clock, so only as good as clock sync
+            close_ns = next_open_time(ochlv_data.timestamp, self.interval) * 1_000_000
+            latency.record('exchange_to_receive', max(0, time.time_ns() - close_ns))
+            self.received_ns = received_ns
+        # Recorded after the decode timing; the recorder's writer thread does the compression and I/O
+        if self.recorder is not None:
+            self.recorder.record(message)
+        if ochlv_data is None:
+            return
+        if self.last_timestamp is not None:
+            if ochlv_data.timestamp <= self.last_timestamp:
+                return # Already delivered, e.g. by a backfill
+            if self.backfiller is not None and missing_open_times(self.last_timestamp, ochlv_data.timestamp, self.interval):
+                self._backfill(ochlv_data.timestamp)
+        self._emit(ochlv_data)
+
+    def _emit(self, ochlv_data):
+        if self.store is not None:
+            self.store.append(self.symbol, self.interval, ochlv_data)
+        self.callback(ochlv_data)
+        self.last_timestamp = ochlv_data.timestamp
+
+    def _backfill(self, end: int):
+        """Delivers the closed bars after ``last_timestamp`` with open times before ``end``."""
+        start = next_open_time(self.last_timestamp, self.interval)
+        try:
+            bars = self.backfiller.fetch(self.symbol, self.interval, start, end, self.decoder.bar_factory)
+        except requests.RequestException as e:
+            print(f"Kline backfill failed for {self.symbol}@{self.interval}: {e}")
+            return
+        if bars:
+            print(f"Backfilled {len(bars)} klines for {self.symbol}@{self.interval}")
+        for bar in bars:
+            self._emit(bar)
 
     def _on_error(self, ws, error):
         print(f"WebSocket error: {error}")
 
     def _on_close(self, ws, close_status_code, close_msg):
+        # The supervisor reconnects with backoff unless stop() was called
         print(f"WebSocket closed: {close_status_code} - {close_msg}")
-        if self.is_running:
-            print(f"Attempting to reconnect in {self.reconnect_interval} seconds...")
-            time.sleep(self.reconnect_interval)
-            self._connect_websocket()
 
     def _on_open(self, ws):
         print(f"WebSocket opened for {self.symbol}@{self.interval}")
+        if self.backfiller is not None and self.last_timestamp is not None:
+            # Reason: runs on the socket thread, so live frames wait in the
+            # socket buffer and are handled after the missed bars, in order.
+            self._backfill(self.backfiller.current_open_time(self.interval))
 
-    def _connect_websocket(self):
-        self.ws = websocket.WebSocketApp(
+    def start(self):
+        self.is_running = True
+        self.feed = self.supervisor.add_feed(
+            kline_stream_name(self.symbol, self.interval),
             self.ws_url,
             on_message=self._on_message,
+            on_open=self._on_open,
             on_error=self._on_error,
-            on_close=self._on_close,
-            on_open=self._on_open
+            on_close=self._on_close
         )
-        self.ws.run_forever()
+        if self._owns_supervisor:
+            self.supervisor.start()
+
+    def stop(self):
+        self.is_running = False
+        if self._owns_supervisor:
+            self.supervisor.stop()
+        elif self.feed is not None:
+            self.supervisor.remove_feed(self.feed.name)
+
+    def metrics(self) -> dict:
+        """Uptime, reconnect and latency figures of the feed (see FeedMetrics)."""
+        return self.feed.metrics.snapshot() if self.feed is not None else {}
+
+class MultiplexedDataHandler:
+    """Receives klines for many symbols/intervals over Binance combined streams.
+
+    Subscriptions are sharded across as few connections as possible, at most
+    ``max_streams_per_connection`` streams each, and every closed kline is
+    routed to the callback registered for its stream.
+    """
+    _handler_ids = itertools.count() # Keeps feed names unique across handlers on one supervisor
+
+    def __init__(self, base_url: str = BINANCE_STREAM_URL, max_streams_per_connection: int = 200,
+                 decoder: Optional[KlineDecoder] = None, store: Optional[KlineStore] = None,
+                 supervisor: Optional[FeedSupervisor] = None):
+        if not 1 <= max_streams_per_connection <= MAX_STREAMS_PER_CONNECTION:
+            raise ValueError(f"max_streams_per_connection must be between 1 and {MAX_STREAMS_PER_CONNECTION}.")
+        self.base_url = base_url.rstrip('/')
+        self.max_streams_per_connection = max_streams_per_connection
+        self.decoder = decoder or pydantic_kline_decoder()
+        self.store = store # Closed bars are persisted here when set
+        self.callbacks: Dict[str, Callable[[OCHLVData], None]] = {}
+        self.stream_keys: Dict[str, Tuple[str, str]] = {} # stream name -> (symbol, interval)
+        # One supervised feed per shard of streams
+        self.supervisor = supervisor or FeedSupervisor()
+        self._owns_supervisor = supervisor is None
+        self.feeds: List[SupervisedFeed] = []
+        self.handler_id = next(self._handler_ids)
+        self.is_running = False
+
+    def subscribe(self, symbol: str, interval: str, callback: Callable[[OCHLVData], None]):
+        if self.is_running:
+            raise RuntimeError("Subscriptions must be registered before start().")
+        stream = kline_stream_name(symbol, interval)
+        self.callbacks[stream] = callback
+        self.stream_keys[stream] = (symbol, interval)
+
+    def shard_streams(self) -> List[List[str]]:
+        streams = list(self.callbacks)
+        size = self.max_streams_per_connection
+        return [streams[index:index + size] for index in range(0, len(streams), size)]
+
+    def _on_message(self, ws, message):
+        decoded = self.decoder.decode_stream(message) # None for klines that are still open
+        if decoded is None:
+            return
+        stream, ochlv_data = decoded
+        callback = self.callbacks.get(stream)
+        if callback is not None:
+            if self.store is not None:
+                self.store.append(*self.stream_keys[stream], ochlv_data)
+            callback(ochlv_data)
+
+    def _on_error(self, ws, error):
+        print(f"WebSocket error: {error}")
 
     def start(self):
         self.is_running = True
-        self.thread = threading.Thread(target=self._connect_websocket)
-        self.thread.start()
+        self.feeds = [
+            self.supervisor.add_feed(
+                f"combined-{self.handler_id}-{index}",
+                f"{self.base_url}/stream?streams={'/'.join(streams)}",
+                on_message=self._on_message,
+                on_error=self._on_error
+            )
+            for index, streams in enumerate(self.shard_streams())
+        ]
+        if self._owns_supervisor:
+            self.supervisor.start()
 
     def stop(self):
         self.is_running = False
-        if self.ws:
-            self.ws.close()
-        if self.thread:
-            self.thread.join()
\ No newline at end of file
+        if self._owns_supervisor:
+            self.supervisor.stop()
+        else:
+            for feed in self.feeds:
+                self.supervisor.remove_feed(feed.name)
+
+    def metrics(self) -> Dict[str, dict]:
+        """Uptime, reconnect and latency figures per connection (see FeedMetrics)."""
+        return {feed.name: feed.metrics.snapshot() for feed in self.feeds}
@@ -0,0 +1,294 @@
+"""Connection lifecycle management for long-running websocket feeds.
+
+Each ``SupervisedFeed`` runs one websocket in a plain loop on its own thread:
+connect, serve until the socket closes, wait a jittered exponential backoff,
+reconnect. Nothing recurses, so a feed that reconnects for weeks uses the
+same stack and memory as on its first connection. Full jitter spreads the
+reconnects of many feeds dropped by the same exchange-wide disconnect.
+
+``FeedSupervisor`` groups feeds, shares their ping/backoff settings and runs
+a watchdog that recycles connections that are open but have stopped
+delivering messages. Per-feed uptime, reconnect counts and message latency
+are available from ``FeedSupervisor.metrics()``.
+"""
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+import websocket # type: ignore
+
+logger = logging.getLogger(__name__)
+
+_EVENT_TIME_KEY = '"E":'
+
+def extract_event_time(message) -> Optional[int]:
+    """Binance event time (``"E"``, epoch ms) of a frame, without parsing the JSON."""
+    if isinstance(message, bytes):
+        message = message.decode('utf-8', 'ignore')
+    start = message.find(_EVENT_TIME_KEY)
+    if start < 0:
+        return None
+    start += len(_EVENT_TIME_KEY)
+    end = start
+    while end < len(message) and message[end].isdigit():
+        end += 1
+    return int(message[start:end]) if end > start else None
+
+class Backoff:
+    """Exponential backoff with full jitter: uniform(0, min(max_delay, base * 2**attempt))."""
+
+    def __init__(self, base_delay: float = 1.0, max_delay: float = 60.0, rng: Callable[[], float] = random.random):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rng = rng
+        self.attempt = 0
+
+    def next_delay(self) -> float:
+        ceiling = min(self.max_delay, self.base_delay * 2 ** min(self.attempt, 32))
+        self.attempt += 1
+        return ceiling * self.rng()
+
+    def reset(self):
+        self.attempt = 0
+
+@dataclass
+class FeedMetrics:
+    connects: int = 0
+    stale_disconnects: int = 0  # Connections closed by the watchdog
+    messages: int = 0
+    connected_since: Optional[float] = None  # time.monotonic() of the current connection
+    last_message_at: Optional[float] = None  # time.monotonic()
+    uptime_before: float = 0.0  # Seconds connected in earlier connections
+    latency_ms_last: Optional[float] = None  # Receive time minus exchange event time
+    latency_ms_max: float = 0.0
+    _latency_ms_total: float = field(default=0.0, repr=False)
+    _latency_samples: int = field(default=0, repr=False)
+
+    @property
+    def reconnects(self) -> int:
+        return max(0, self.connects - 1)
+
+    @property
+    def is_connected(self) -> bool:
+        return self.connected_since is not None
+
+    def uptime(self, now: Optional[float] = None) -> float:
+        current = (now or time.monotonic()) - self.connected_since if self.connected_since is not None else 0.0
+        return self.uptime_before + current
+
+    @property
+    def latency_ms_mean(self) -> Optional[float]:
+        return self._latency_ms_total / self._latency_samples if self._latency_samples else None
+
+    def mark_connected(self, now: float):
+        self.connects += 1
+        self.connected_since = now
+        self.last_message_at = None
+
+    def mark_disconnected(self, now: float):
+        if self.connected_since is not None:
+            self.uptime_before += now - self.connected_since
+            self.connected_since = None
+
+    def record_message(self, now: float, latency_ms: Optional[float] = None):
+        self.messages += 1
+        self.last_message_at = now
+        if latency_ms is not None:
+            self.latency_ms_last = latency_ms
+            self.latency_ms_max = max(self.latency_ms_max, latency_ms)
+            self._latency_ms_total += latency_ms
+            self._latency_samples += 1
+
+    def snapshot(self) -> dict:
+        return {
+            'connected': self.is_connected,
+            'uptime_seconds': self.uptime(),
+            'connects': self.connects,
+            'reconnects': self.reconnects,
+            'stale_disconnects': self.stale_disconnects,
+            'messages': self.messages,
+            'latency_ms_last': self.latency_ms_last,
+            'latency_ms_mean': self.latency_ms_mean,
+            'latency_ms_max': self.latency_ms_max,
+        }
+
+class SupervisedFeed:
+    """One websocket connection kept alive by a reconnect loop.
+
+    The callbacks have websocket-client's signatures and are invoked on the
+    feed's thread.
+    """
+
+    def __init__(self, name: str, url: str, on_message: Callable, on_open: Optional[Callable] = None,
+                 on_error: Optional[Callable] = None, on_close: Optional[Callable] = None,
+                 ping_interval: float = 30, ping_timeout: float = 10, backoff: Optional[Backoff] = None):
+        self.name = name
+        self.url = url
+        self.on_message = on_message
+        self.on_open = on_open
+        self.on_error = on_error
+        self.on_close = on_close
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.backoff = backoff or Backoff()
+        self.metrics = FeedMetrics()
+        self.ws = None
+        self.thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def _handle_open(self, ws):
+        self.metrics.mark_connected(time.monotonic())
+        logger.info(f"Feed {self.name} connected (connection #{self.metrics.connects})")
+        if self.on_open is not None:
+            self.on_open(ws)
+
+    def _handle_message(self, ws, message):
+        event_time = extract_event_time(message)
+        latency_ms = time.time() * 1000 - event_time if event_time is not None else None
+        if self.metrics.last_message_at is None:
+            # The connection works end to end; start the next outage from scratch
+            self.backoff.reset()
+        self.metrics.record_message(time.monotonic(), latency_ms)
+        self.on_message(ws, message)
+
+    def _handle_error(self, ws, error):
+        if self.on_error is not None:
+            self.on_error(ws, error)
+        else:
+            logger.error(f"Feed {self.name} error: {error}")
+
+    def _handle_close(self, ws, close_status_code, close_msg):
+        if self.on_close is not None:
+            self.on_close(ws, close_status_code, close_msg)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self.ws = websocket.WebSocketApp(
+                self.url,
+                on_message=self._handle_message,
+                on_error=self._handle_error,
+                on_close=self._handle_close,
+                on_open=self._handle_open
+            )
+            try:
+                self.ws.run_forever(ping_interval=self.ping_interval, ping_timeout=self.ping_timeout)
+            except Exception as e:
+                logger.error(f"Feed {self.name} connection failed: {e}")
+            self.metrics.mark_disconnected(time.monotonic())
+            if self._stopped.is_set():
+                break
+            delay = self.backoff.next_delay()
+            logger.info(f"Feed {self.name} reconnecting in {delay:.1f} seconds...")
+            self._stopped.wait(delay)
+
+    def is_stale(self, now: float, stale_after: float) -> bool:
+        """Connected, but nothing received for ``stale_after`` seconds."""
+        connected_since = self.metrics.connected_since
+        if connected_since is None:
+            return False
+        return now - (self.metrics.last_message_at or connected_since) > stale_after
+
+    def close_connection(self):
+        """Closes the current connection; the loop reconnects unless stopped."""
+        ws = self.ws
+        if ws and ws.sock and ws.sock.connected:
+            # Reason: closing the socket from this thread can leave run_forever
+            # blocked in select, so ask the server to close and let the reader
+            # thread finish the handshake itself.
+            ws.sock.send_close()
+        elif ws:
+            ws.close()
+
+    def start(self):
+        self._stopped.clear()
+        self.thread = threading.Thread(target=self._run, name=f"feed-{self.name}", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self.close_connection()
+        if self.thread:
+            self.thread.join()
+
+class FeedSupervisor:
+    """Owns a set of feeds and recycles the ones that go quiet.
+
+    Args:
+        ping_interval: Seconds between client pings on every connection.
+        ping_timeout: Seconds to wait for a pong before the connection is dropped.
+        stale_after: Seconds without any message before a connection is recycled.
+        base_delay, max_delay: Backoff bounds for reconnect delays.
+    """
+
+    def __init__(self, ping_interval: float = 30, ping_timeout: float = 10, stale_after: float = 90,
+                 base_delay: float = 1.0, max_delay: float = 60.0, check_interval: float = 1.0):
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.stale_after = stale_after
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.check_interval = check_interval
+        self.feeds: Dict[str, SupervisedFeed] = {}
+        self.is_running = False
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    def add_feed(self, name: str, url: str, on_message: Callable, on_open: Optional[Callable] = None,
+                 on_error: Optional[Callable] = None, on_close: Optional[Callable] = None) -> SupervisedFeed:
+        """Registers a feed; it connects right away if the supervisor is running."""
+        feed = SupervisedFeed(name, url, on_message, on_open, on_error, on_close,
+                              self.ping_interval, self.ping_timeout, Backoff(self.base_delay, self.max_delay))
+        with self._lock:
+            if name in self.feeds:
+                raise ValueError(f"Feed {name} is already supervised.")
+            self.feeds[name] = feed
+            if self.is_running:
+                feed.start()
+        return feed
+
+    def remove_feed(self, name: str):
+        with self._lock:
+            feed = self.feeds.pop(name, None)
+        if feed is not None:
+            feed.stop()
+
+    def _watch(self):
+        while not self._stopped.wait(self.check_interval):
+            now = time.monotonic()
+            with self._lock:
+                feeds = list(self.feeds.values())
+            for feed in feeds:
+                if feed.is_stale(now, self.stale_after):
+                    logger.warning(f"Feed {feed.name} stale for over {self.stale_after} seconds, reconnecting")
+                    feed.metrics.stale_disconnects += 1
+                    # Reset so the watchdog does not close the same connection again
+                    feed.metrics.last_message_at = now
+                    feed.close_connection()
+
+    def start(self):
+        with self._lock:
+            self.is_running = True
+            self._stopped.clear()
+            for feed in self.feeds.values():
+                feed.start()
+        self._watchdog = threading.Thread(target=self._watch, name="feed-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        with self._lock:
+            self.is_running = False
+            feeds = list(self.feeds.values())
+        self._stopped.set()
+        for feed in feeds:
+            feed._stopped.set() # Stop every reconnect loop before waiting on any of them
+        for feed in feeds:
+            feed.stop()
+        if self._watchdog:
+            self._watchdog.join()
+
+    def metrics(self) -> Dict[str, dict]:
+        with self._lock:
+            return {name: feed.metrics.snapshot() for name, feed in self.feeds.items()}
@@ -0,0 +1,133 @@
+"""Capture of raw websocket frames for offline replay.
+
+``FrameRecorder`` appends every frame a handler receives, untouched and with
+its wall-clock receive time, to a gzip file of ``<time_ns>\\t<frame>`` lines.
+JSON frames never contain a raw tab, so each line splits unambiguously.
+Frames are compressed and written on a writer thread, off the websocket
+thread. The recording is a series of small gzip members, each closed after
+``member_frames`` frames or ``flush_seconds``, so a crash loses at most the
+member being written. Gzip members concatenate, so reopening a recording
+appends to it.
+
+``read_frames`` streams a recording back in order; see backtest/replay.py.
+It skips a member cut short by a crash, whether at the tail or followed by
+members appended after a restart, instead of failing the whole recording.
+"""
+import gzip
+import logging
+import mmap
+import os
+import queue
+import threading
+import time
+import zlib
+from typing import Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+GZIP_MAGIC = b'\x1f\x8b\x08'
+_READ_CHUNK = 1 << 16
+_STOP = None  # Queue sentinel that ends the writer thread
+
+class FrameRecorder:
+    """Appends raw frames to a gzip recording; safe to share between handler threads."""
+
+    def __init__(self, path: str, compresslevel: int = 6, member_frames: int = 1000, flush_seconds: float = 1.0):
+        self.path = path
+        self.compresslevel = compresslevel
+        self.member_frames = member_frames
+        self.flush_seconds = flush_seconds
+        self._file = open(path, 'ab')
+        self._queue: "queue.Queue[Optional[Tuple[int, str]]]" = queue.Queue()
+        self.frames = 0  # Frames written so far
+        self._writer = threading.Thread(target=self._write_frames, name="frame-recorder", daemon=True)
+        self._writer.start()
+
+    def record(self, frame: str):
+        self._queue.put((time.time_ns(), frame))
+
+    def _write_frames(self):
+        member: Optional[gzip.GzipFile] = None
+        member_frames = 0
+        member_deadline = 0.0
+        while True:
+            timeout = max(0.0, member_deadline - time.monotonic()) if member is not None else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = ()  # The open member is due to be closed
+            if item:
+                if member is None:
+                    member = gzip.GzipFile(filename='', mode='wb', fileobj=self._file, compresslevel=self.compresslevel)
+                    member_frames = 0
+                    member_deadline = time.monotonic() + self.flush_seconds
+                received_ns, frame = item
+                member.write(f"{received_ns}\t{frame}\n".encode('utf-8'))
+                member_frames += 1
+                self.frames += 1
+            if member is not None and (item is _STOP or member_frames >= self.member_frames
+                                       or time.monotonic() >= member_deadline):
+                member.close()  # Writes the member trailer; the underlying file stays open
+                self._file.flush()
+                member = None
+            if item is _STOP:
+                return
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        self._file.close()
+
+    def __enter__(self) -> "FrameRecorder":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def _members(data) -> Iterator[bytes]:
+    """Decompressed gzip members of ``data``; corrupt or truncated members are skipped."""
+    view = memoryview(data)
+    try:
+        yield from _split_members(data, view)
+    finally:
+        view.release()  # Reason: an mmap cannot be closed while a view of it is exported
+
+def _split_members(data, view: memoryview) -> Iterator[bytes]:
+    start = 0
+    while start < len(data):
+        decompressor = zlib.decompressobj(wbits=31)
+        parts = []
+        position = start
+        try:
+            while not decompressor.eof and position < len(data):
+                parts.append(decompressor.decompress(view[position:position + _READ_CHUNK]))
+                position += _READ_CHUNK
+        except zlib.error:
+            pass
+        if decompressor.eof:
+            yield b''.join(parts)
+            start = min(position, len(data)) - len(decompressor.unused_data)
+            continue
+        # Reason: a member cut short by a crash runs into the next member's header or the end of the file
+        next_start = data.find(GZIP_MAGIC, start + 1)
+        logger.warning(f"Skipping a truncated gzip member at byte {start} of the recording")
+        if next_start < 0:
+            return
+        start = next_start
+
+def read_frames(path: str) -> Iterator[Tuple[int, str]]:
+    """Yields ``(received_time_ns, frame)`` pairs of a recording in recorded order."""
+    with open(path, 'rb') as recording:
+        if os.fstat(recording.fileno()).st_size == 0:
+            return
+        with mmap.mmap(recording.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            members = _members(data)
+            try:
+                for member in members:
+                    for line in member.decode('utf-8').split('\n'):
+                        received_ns, _, frame = line.partition('\t')
+                        if frame:
+                            yield int(received_ns), frame
+            finally:
+                members.close()
@@ -0,0 +1,90 @@
+"""REST backfill of closed klines from ``/api/v3/klines``.
+
+Used to prefill the analyzer window at startup and to recover the bars that
+closed while the websocket was disconnected. A range is split into pages of
+at most ``MAX_KLINES_PER_REQUEST`` bars that are fetched concurrently over a
+shared HTTP session, then merged back into open-time order.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+import numpy as np
+import requests
+from data.kline_decoder import KlineBar
+from data.kline_store import KLINE_RECORD_DTYPE, interval_milliseconds
+
+BINANCE_REST_URL = "https://api.binance.com"
+KLINES_ENDPOINT = "/api/v3/klines"
+# Binance returns at most 1000 klines per request
+MAX_KLINES_PER_REQUEST = 1000
+
+def rest_kline_to_dict(row: Sequence) -> dict:
+    """Maps a REST kline row onto the websocket ``k`` fields bar factories expect."""
+    return {'t': row[0], 'o': row[1], 'h': row[2], 'l': row[3], 'c': row[4], 'v': row[5], 'x': True}
+
+def bars_to_records(bars: List[Any]) -> np.ndarray:
+    """KlineStore records for bars exposing ``timestamp`` and ``to_floats()``."""
+    return np.array([(bar.timestamp, *bar.to_floats()) for bar in bars], dtype=KLINE_RECORD_DTYPE)
+
+def missing_open_times(last_timestamp: int, next_timestamp: int, interval: str) -> Optional[Tuple[int, int]]:
+    """The [start, end) open-time range skipped between two consecutive bars, if any."""
+    start = last_timestamp + interval_milliseconds(interval)
+    return (start, next_timestamp) if next_timestamp > start else None
+
+class KlineBackfiller:
+    def __init__(self, base_url: str = BINANCE_REST_URL, max_workers: int = 4, timeout: float = 10,
+                 session: Optional[requests.Session] = None, page_size: int = MAX_KLINES_PER_REQUEST):
+        self.base_url = base_url.rstrip('/')
+        self.max_workers = max_workers
+        self.timeout = timeout  # seconds, per request
+        self.session = session or requests.Session()
+        self.page_size = page_size
+        self.clock: Callable[[], float] = time.time  # Replaced in tests
+
+    def current_open_time(self, interval: str) -> int:
+        """Open time of the kline in progress; every earlier kline has closed."""
+        step = interval_milliseconds(interval)
+        return int(self.clock() * 1000) // step * step
+
+    def _fetch_page(self, symbol: str, interval: str, start: int, end: int) -> list:
+        response = self.session.get(
+            f"{self.base_url}{KLINES_ENDPOINT}",
+            params={'symbol': symbol.upper(), 'interval': interval, 'startTime': start,
+                    'endTime': end - 1, 'limit': self.page_size},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def fetch(self, symbol: str, interval: str, start: int, end: int,
+              bar_factory: Callable[[dict], Any] = KlineBar.from_kline) -> List[Any]:
+        """Closed bars with open times in [start, end), oldest first.
+
+        Bars at or after the kline in progress are dropped, so ``end`` may be
+        given loosely. Raises ``requests.RequestException`` on HTTP errors.
+        """
+        end = min(end, self.current_open_time(interval))
+        if end <= start:
+            return []
+        span = interval_milliseconds(interval) * self.page_size
+        pages = [(page_start, min(end, page_start + span)) for page_start in range(start, end, span)]
+        if len(pages) == 1:
+            rows_per_page = [self._fetch_page(symbol, interval, *pages[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pages))) as executor:
+                rows_per_page = list(executor.map(lambda page: self._fetch_page(symbol, interval, *page), pages))
+        bars = []
+        last_timestamp = start - 1
+        # Pages are disjoint and ordered; the check also drops any overlap
+        for rows in rows_per_page:
+            for row in rows:
+                if last_timestamp < row[0] < end:
+                    bars.append(bar_factory(rest_kline_to_dict(row)))
+                    last_timestamp = row[0]
+        return bars
+
+    def prefill(self, symbol: str, interval: str, bars: int,
+                bar_factory: Callable[[dict], Any] = KlineBar.from_kline) -> List[Any]:
+        """The last ``bars`` closed klines, for warming an analyzer window."""
+        end = self.current_open_time(interval)
+        return self.fetch(symbol, interval, end - bars * interval_milliseconds(interval), end, bar_factory)
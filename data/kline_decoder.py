@@ -0,0 +1,151 @@
+"""Pluggable decoding of Binance kline websocket frames.
+
+Most frames on a busy kline stream are updates for the still-open candle
+(``"x":false``). ``KlineDecoder`` can drop those with a substring check before
+any JSON parsing, parse the remaining frames with a faster JSON backend when
+one is installed, and build either the validated ``OCHLVData`` model or the
+lightweight ``KlineBar``.
+"""
+import json
+from decimal import Decimal
+from typing import Any, Callable, Optional, Tuple, Union
+from models import OCHLVData
+
+try:
+    import orjson # type: ignore
+
+    fast_loads: Callable[[Union[str, bytes]], Any] = orjson.loads
+except ImportError: # Reason: orjson is optional, the stdlib parser is always available
+    fast_loads = json.loads
+
+Message = Union[str, bytes]
+
+OPEN_KLINE_MARKER = '"x":false'
+OPEN_KLINE_MARKER_BYTES = b'"x":false'
+
+
+def parse_kline(kline: dict) -> OCHLVData:
+    return OCHLVData(
+        timestamp=kline['t'],
+        open=Decimal(kline['o']),
+        close=Decimal(kline['c']),
+        high=Decimal(kline['h']),
+        low=Decimal(kline['l']),
+        volume=Decimal(kline['v'])
+    )
+
+
+def is_open_kline_frame(message: Message) -> bool:
+    """Cheap check for an in-progress kline without parsing the frame.
+
+    Binance sends compact JSON, so the closed flag always appears as
+    ``"x":false`` or ``"x":true``. A miss only means the frame is fully parsed.
+    """
+    if isinstance(message, bytes):
+        return OPEN_KLINE_MARKER_BYTES in message
+    return OPEN_KLINE_MARKER in message
+
+
+class KlineBar:
+    """Closed kline with raw string prices and lazily materialised Decimals.
+
+    Exposes the same ``timestamp``/``open``/``high``/``low``/``close``/``volume``
+    attributes as ``OCHLVData``; each Decimal is only built (once) when read.
+    """
+
+    __slots__ = ("timestamp", "_raw", "_decimals")
+
+    _FIELDS = ("open", "high", "low", "close", "volume")
+
+    def __init__(self, timestamp: int, open_: str, high: str, low: str, close: str, volume: str):
+        self.timestamp = timestamp
+        self._raw = (open_, high, low, close, volume)
+        self._decimals: list = [None, None, None, None, None]
+
+    @classmethod
+    def from_kline(cls, kline: dict) -> "KlineBar":
+        return cls(kline['t'], kline['o'], kline['h'], kline['l'], kline['c'], kline['v'])
+
+    def _decimal(self, index: int) -> Decimal:
+        value = self._decimals[index]
+        if value is None:
+            value = self._decimals[index] = Decimal(self._raw[index])
+        return value
+
+    @property
+    def open(self) -> Decimal:
+        return self._decimal(0)
+
+    @property
+    def high(self) -> Decimal:
+        return self._decimal(1)
+
+    @property
+    def low(self) -> Decimal:
+        return self._decimal(2)
+
+    @property
+    def close(self) -> Decimal:
+        return self._decimal(3)
+
+    @property
+    def volume(self) -> Decimal:
+        return self._decimal(4)
+
+    def to_floats(self) -> Tuple[float, float, float, float, float]:
+        """Returns (open, high, low, close, volume) parsed straight from the raw strings."""
+        open_, high, low, close, volume = self._raw
+        return float(open_), float(high), float(low), float(close), float(volume)
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{name}={raw}" for name, raw in zip(self._FIELDS, self._raw))
+        return f"KlineBar(timestamp={self.timestamp}, {values})"
+
+
+class KlineDecoder:
+    """Turns raw kline frames into bars, skipping in-progress klines.
+
+    Args:
+        bar_factory: Builds a bar from the ``k`` object of a kline event.
+        loads: JSON parser used for frames that pass the pre-filter.
+        prefilter: Drop ``"x":false`` frames before parsing them.
+    """
+
+    def __init__(self, bar_factory: Callable[[dict], Any], loads: Callable[[Message], Any] = json.loads,
+                 prefilter: bool = True):
+        self.bar_factory = bar_factory
+        self.loads = loads
+        self.prefilter = prefilter
+
+    def decode_payload(self, message: Message) -> Optional[dict]:
+        """Returns the parsed frame if it carries a closed kline, else None."""
+        if self.prefilter and is_open_kline_frame(message):
+            return None
+        payload = self.loads(message)
+        event = payload.get('data', payload) # Combined streams wrap the event in 'data'
+        if not event['k']['x']:  # 'x' indicates if the kline is closed
+            return None
+        return payload
+
+    def decode(self, message: Message) -> Optional[Any]:
+        payload = self.decode_payload(message)
+        if payload is None:
+            return None
+        return self.bar_factory(payload.get('data', payload)['k'])
+
+    def decode_stream(self, message: Message) -> Optional[Tuple[str, Any]]:
+        """Decodes a combined-stream frame into ``(stream name, bar)``."""
+        payload = self.decode_payload(message)
+        if payload is None:
+            return None
+        return payload.get('stream'), self.bar_factory(payload['data']['k'])
+
+
+def pydantic_kline_decoder() -> KlineDecoder:
+    """Stdlib JSON and validated ``OCHLVData`` bars, the DataHandler default."""
+    return KlineDecoder(bar_factory=parse_kline)
+
+
+def fast_kline_decoder() -> KlineDecoder:
+    """Fastest available JSON backend and lazy ``KlineBar`` bars."""
+    return KlineDecoder(bar_factory=KlineBar.from_kline, loads=fast_loads)
@@ -0,0 +1,102 @@
+import websocket # type: ignore
+import json
+import threading
+import time
+import logging
+from typing import Callable, Optional
+from data.feed_supervisor import Backoff
+
+logger = logging.getLogger(__name__)
+
+BINANCE_TESTNET_USER_STREAM_URL = "wss://stream.testnet.binance.vision"
+# Binance expires a listen key after 60 minutes without a keepalive
+LISTEN_KEY_KEEPALIVE_SECONDS = 30 * 60
+
+class UserDataStream:
+    """Binance spot user-data stream (balances and execution reports).
+
+    Obtains a listen key through the python-binance client, keeps it alive
+    in the background and passes every decoded event dict to ``callback``.
+    """
+
+    def __init__(self, client, callback: Callable[[dict], None], base_url: str = BINANCE_TESTNET_USER_STREAM_URL,
+                 keepalive_seconds: float = LISTEN_KEY_KEEPALIVE_SECONDS):
+        self.client = client
+        self.callback = callback
+        self.base_url = base_url.rstrip('/')
+        self.keepalive_seconds = keepalive_seconds
+        self.listen_key: Optional[str] = None
+        self.ws = None
+        self.backoff = Backoff() # Jittered so many clients do not reconnect in lockstep
+        self.is_running = False
+        self.connected = threading.Event()
+        self._stopped = threading.Event()
+        self.thread = None
+        self.keepalive_thread = None
+
+    def _on_message(self, ws, message):
+        try:
+            self.callback(json.loads(message))
+        except Exception as e:
+            logger.error(f"Error handling user data event: {e}")
+
+    def _on_error(self, ws, error):
+        logger.error(f"User data stream error: {error}")
+
+    def _on_open(self, ws):
+        logger.info("User data stream opened")
+        self.backoff.reset()
+        self.connected.set()
+
+    def _on_close(self, ws, close_status_code, close_msg):
+        self.connected.clear()
+        logger.info(f"User data stream closed: {close_status_code} - {close_msg}")
+
+    def _run(self):
+        while self.is_running:
+            try:
+                self.listen_key = self.client.stream_get_listen_key()
+            except Exception as e:
+                logger.error(f"Error obtaining listen key: {e}")
+                self._stopped.wait(self.backoff.next_delay())
+                continue
+            self.ws = websocket.WebSocketApp(
+                f"{self.base_url}/ws/{self.listen_key}",
+                on_message=self._on_message,
+                on_error=self._on_error,
+                on_close=self._on_close,
+                on_open=self._on_open
+            )
+            self.ws.run_forever()
+            if self.is_running:
+                delay = self.backoff.next_delay()
+                logger.info(f"Reconnecting user data stream in {delay:.1f} seconds...")
+                self._stopped.wait(delay)
+
+    def _keepalive(self):
+        while not self._stopped.wait(self.keepalive_seconds):
+            if self.listen_key:
+                try:
+                    self.client.stream_keepalive(self.listen_key)
+                except Exception as e:
+                    logger.error(f"Error keeping listen key alive: {e}")
+
+    def start(self):
+        self.is_running = True
+        self._stopped.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.keepalive_thread = threading.Thread(target=self._keepalive, daemon=True)
+        self.thread.start()
+        self.keepalive_thread.start()
+
+    def stop(self):
+        self.is_running = False
+        self._stopped.set()
+        if self.ws and self.ws.sock and self.ws.sock.connected:
+            # Let the reader thread complete the close handshake (see SupervisedFeed.close_connection)
+            self.ws.sock.send_close()
+        elif self.ws:
+            self.ws.close()
+        for thread in (self.thread, self.keepalive_thread):
+            if thread:
+                thread.join()
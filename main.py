@@ -1,6 +1,19 @@
 import argparse
+import asyncio
 from agents.trading_agent import TradingAgent
+from agents.async_trading_agent import AsyncTradingAgent
 from agents.query_agent import QueryAgent
+from backtest.engine import BacktestConfig, Backtester
+from backtest.loader import load_ohlcv
+from analysis.strategy_registry import available_strategies, create_strategy
+from backtest.replay import FrameReplayer, create_replay_agent
+from data.frame_recorder import FrameRecorder, read_frames
+from data.kline_backfill import KlineBackfiller
+from data.kline_store import KlineStore
+from monitoring.latency import LatencyRecorder, LatencyReporter, serve_prometheus
+from trading.portfolio_risk import PortfolioLimits
+from trading.symbol_info_manager import SymbolInfoManager
+from trading.trader import Trader
 from decimal import Decimal
 import logging
 
@@ -12,9 +25,38 @@ def main():
 
     # Trade subcommand
     trade_parser = subparsers.add_parser("trade", help="Start the trading bot")
-    trade_parser.add_argument("--symbol", type=str, required=True, help="Trading symbol (e.g., BTCUSDT)")
+    trade_parser.add_argument("--symbol", type=str, nargs="+", required=True, help="Trading symbol(s) (e.g., BTCUSDT). Several symbols require --async_mode")
     trade_parser.add_argument("--interval", type=str, default="1m", help="Kline interval (e.g., 1m, 5m, 1h)")
     trade_parser.add_argument("--initial_balance", type=Decimal, default=Decimal('10000'), help="Initial account balance for risk management")
+    trade_parser.add_argument("--async_mode", action="store_true", help="Run feed, strategy and orders as asyncio tasks on one event loop")
+    trade_parser.add_argument("--batch_evaluation", action="store_true", help="With --async_mode, evaluate the strategy for all symbols in one vectorized pass per interval")
+    trade_parser.add_argument("--max_gross_exposure", type=float, default=None, help="With --async_mode, cap the summed absolute position notional at this fraction of equity")
+    trade_parser.add_argument("--max_net_exposure", type=float, default=None, help="With --async_mode, cap the signed position notional at this fraction of equity")
+    trade_parser.add_argument("--max_asset_concentration", type=float, default=None, help="With --async_mode, cap the notional held in any one base asset at this fraction of equity")
+    trade_parser.add_argument("--max_portfolio_volatility", type=float, default=None, help="With --async_mode, cap the per-interval standard deviation of portfolio returns at this fraction of equity")
+    trade_parser.add_argument("--brackets", action="store_true", help="Protect each entry with an exchange-side OCO stop-loss/take-profit bracket (threaded mode)")
+    trade_parser.add_argument("--strategies", type=str, nargs="+", choices=available_strategies(), default=None, help="Registered strategies to run together on the symbol instead of the default RSI/MACD strategy (threaded mode)")
+    trade_parser.add_argument("--higher_timeframes", type=str, nargs="*", default=[], help="Higher intervals (e.g., 5m 15m 1h) resampled from the --interval stream, without extra sockets")
+    trade_parser.add_argument("--latency_log_seconds", type=float, default=0, help="Log kline-to-order stage latency percentiles at this period (0 disables)")
+    trade_parser.add_argument("--metrics_port", type=int, default=0, help="Serve stage latencies in Prometheus text format on this port at /metrics (0 disables)")
+    trade_parser.add_argument("--history_dir", type=str, default="kline_history", help="Directory of the on-disk kline store used to warm indicators on restart (empty string disables it)")
+    trade_parser.add_argument("--record_frames", type=str, default="", help="Append every raw kline frame to this gzip file for replay (threaded mode)")
+    trade_parser.add_argument("--exchange_info_cache", type=str, default="exchange_info_cache.json", help="File caching exchange symbol filters between runs (empty string disables it)")
+
+    # Backtest subcommand
+    backtest_parser = subparsers.add_parser("backtest", help="Run the strategy over historical klines")
+    backtest_parser.add_argument("--data", type=str, required=True, help="CSV, Parquet or kline store (.klines) file with OHLCV klines")
+    backtest_parser.add_argument("--mode", choices=["vectorized", "bar"], default="vectorized", help="Whole-array signals or bar-by-bar replay through TradingStrategy")
+    backtest_parser.add_argument("--initial_balance", type=float, default=10000.0, help="Starting balance of the simulated account")
+    backtest_parser.add_argument("--fee_rate", type=float, default=0.0, help="Fee charged on the notional of every fill (e.g., 0.001)")
+
+    # Replay subcommand
+    replay_parser = subparsers.add_parser("replay", help="Replay recorded kline frames through the trading agent against a simulated trader")
+    replay_parser.add_argument("--frames", type=str, required=True, help="Recording made with trade --record_frames")
+    replay_parser.add_argument("--symbol", type=str, required=True, help="Symbol of the recorded stream (e.g., BTCUSDT)")
+    replay_parser.add_argument("--interval", type=str, default="1m", help="Kline interval of the recorded stream")
+    replay_parser.add_argument("--initial_balance", type=Decimal, default=Decimal('10000'), help="Starting quote balance of the simulated trader")
+    replay_parser.add_argument("--speed", type=float, default=None, help="Pace relative to the recording (e.g., 1 for real time); omit to replay at maximum speed")
 
     # Chat subcommand
     chat_parser = subparsers.add_parser("chat", help="Start the chat interface")
@@ -22,8 +64,59 @@ def main():
     args = parser.parse_args()
 
     if args.command == "trade":
-        agent = TradingAgent(args.symbol, args.interval, args.initial_balance)
-        agent.start()
+        kline_store = KlineStore(args.history_dir) if args.history_dir else None
+        symbol_info_manager = SymbolInfoManager(cache_path=args.exchange_info_cache or None)
+        if args.async_mode:
+            limits = PortfolioLimits(args.max_gross_exposure, args.max_net_exposure, args.max_asset_concentration,
+                                     args.max_portfolio_volatility)
+            # Portfolio tracking is only switched on when at least one limit is given
+            portfolio_limits = limits if any(value is not None for value in vars(limits).values()) else None
+            async_agent = AsyncTradingAgent(args.symbol, args.interval, args.initial_balance, kline_store=kline_store,
+                                            symbol_info_manager=symbol_info_manager, batch_evaluation=args.batch_evaluation,
+                                            portfolio_limits=portfolio_limits)
+            try:
+                asyncio.run(async_agent.run())
+            except KeyboardInterrupt:
+                logging.info("Stopping Trading Agent...")
+        elif len(args.symbol) > 1:
+            parser.error("Trading several symbols requires --async_mode")
+        else:
+            latency = LatencyRecorder() if args.latency_log_seconds or args.metrics_port else None
+            recorder = FrameRecorder(args.record_frames) if args.record_frames else None
+            agent = TradingAgent(args.symbol[0], args.interval, args.initial_balance,
+                                 trader=Trader(symbol_info_manager=symbol_info_manager),
+                                 kline_store=kline_store, backfiller=KlineBackfiller(),
+                                 higher_timeframes=args.higher_timeframes, latency=latency, recorder=recorder,
+                                 use_brackets=args.brackets,
+                                 strategies=[create_strategy(name) for name in args.strategies] if args.strategies else None)
+            reporter = LatencyReporter(latency, args.latency_log_seconds) if args.latency_log_seconds else None
+            metrics_server = serve_prometheus(latency, args.metrics_port) if args.metrics_port else None
+            if reporter is not None:
+                reporter.start()
+            try:
+                agent.start()
+            finally:
+                if reporter is not None:
+                    reporter.stop()
+                if metrics_server is not None:
+                    metrics_server.shutdown()
+                if recorder is not None:
+                    recorder.close()
+                if agent.trader.rate_limiter is not None:
+                    logging.info(f"REST rate limiter: {agent.trader.rate_limiter.stats()}")
+    elif args.command == "replay":
+        frames = list(read_frames(args.frames)) # Decompressed up front so it is not timed
+        agent = create_replay_agent(args.symbol, args.interval, args.initial_balance, latency=LatencyRecorder())
+        result = FrameReplayer(agent).run(frames, speed=args.speed)
+        for line in result.report():
+            print(line)
+    elif args.command == "backtest":
+        data = load_ohlcv(args.data)
+        backtester = Backtester(BacktestConfig(initial_balance=args.initial_balance, fee_rate=args.fee_rate))
+        result = backtester.run_vectorized(data) if args.mode == "vectorized" else backtester.run_bar_by_bar(data)
+        print(f"Bars: {result.bars} ({result.bars_per_second:,.0f} bars/s)")
+        print(f"Trades: {len(result.trades)}, win rate {result.win_rate:.1%}")
+        print(f"PnL: {result.total_pnl:.2f} ({result.total_return:.2%}), max drawdown {result.max_drawdown:.2%}")
     elif args.command == "chat":
         query_agent = QueryAgent()
         query_agent.start_chat()
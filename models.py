@@ -10,6 +10,9 @@ class OCHLVData(BaseModel):
     low: Decimal
     volume: Decimal
 
+    def to_floats(self) -> tuple[float, float, float, float, float]:
+        return float(self.open), float(self.high), float(self.low), float(self.close), float(self.volume)
+
 class TradeSignal(BaseModel):
     action: str  # 'enter' or 'exit'
     stop_loss: Optional[Decimal] = None
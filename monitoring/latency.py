@@ -0,0 +1,210 @@
+"""Stage latency histograms for the kline-to-order hot path.
+
+``LatencyRecorder`` keeps one log-linear histogram per stage (decode,
+strategy, sizing, placement, ...). Every thread records into its own copy of
+each histogram, so recording is a couple of integer operations and a list
+increment with no lock; copies are only merged when a snapshot is taken.
+Buckets keep 5 significant bits, so reported percentiles are within about 3%
+of the true value, the same trade-off HdrHistogram makes.
+
+Components take an optional recorder and skip all timing when it is None,
+which keeps disabled instrumentation to one attribute check per stage.
+``LatencyReporter`` logs percentiles periodically and ``serve_prometheus``
+exposes them in the Prometheus text format.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SUB_BUCKET_BITS = 5
+_HALF_SUB_BUCKETS = 1 << (_SUB_BUCKET_BITS - 1)
+# Covers up to 2**63 ns; larger values are clamped into the last bucket
+_BUCKET_COUNT = (64 - _SUB_BUCKET_BITS + 2) * _HALF_SUB_BUCKETS
+
+def bucket_index(value_ns: int) -> int:
+    if value_ns < (1 << _SUB_BUCKET_BITS):
+        return max(0, value_ns)
+    shift = value_ns.bit_length() - _SUB_BUCKET_BITS
+    return min(_BUCKET_COUNT - 1, shift * _HALF_SUB_BUCKETS + (value_ns >> shift))
+
+def bucket_midpoint(index: int) -> float:
+    """Representative value (ns) of a bucket."""
+    if index < (1 << _SUB_BUCKET_BITS):
+        return float(index)
+    shift = index // _HALF_SUB_BUCKETS - 1
+    sub_bucket = index - shift * _HALF_SUB_BUCKETS
+    return ((sub_bucket << shift) + ((sub_bucket + 1) << shift) - 1) / 2
+
+class LatencyHistogram:
+    """Counts of nanosecond durations in log-linear buckets. Not thread-safe; see LatencyRecorder."""
+
+    __slots__ = ('counts', 'count', 'total_ns', 'max_ns')
+
+    def __init__(self):
+        self.counts = [0] * _BUCKET_COUNT
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, value_ns: int):
+        self.counts[bucket_index(value_ns)] += 1
+        self.count += 1
+        self.total_ns += value_ns
+        if value_ns > self.max_ns:
+            self.max_ns = value_ns
+
+    def merge(self, other: "LatencyHistogram"):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total_ns += other.total_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Value (ns) at or below which ``fraction`` of the recorded durations fall."""
+        if not self.count:
+            return None
+        rank = max(1, int(fraction * self.count + 0.5))
+        if rank >= self.count:
+            return float(self.max_ns) # The maximum is tracked exactly
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(bucket_midpoint(index), float(self.max_ns))
+        return float(self.max_ns)
+
+@dataclass
+class StageSummary:
+    stage: str
+    count: int
+    total_ms: float
+    p50_ms: Optional[float]
+    p99_ms: Optional[float]
+    p999_ms: Optional[float]
+    max_ms: float
+
+    def log_line(self) -> str:
+        if not self.count:
+            return f"{self.stage}: no samples"
+        return (f"{self.stage}: n={self.count} p50={self.p50_ms:.3f}ms p99={self.p99_ms:.3f}ms "
+                f"p999={self.p999_ms:.3f}ms max={self.max_ms:.3f}ms")
+
+class LatencyRecorder:
+    """Named per-stage histograms with a private copy per recording thread."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock() # Guards the list of per-thread copies, not recording
+        self._histograms: List[Tuple[str, LatencyHistogram]] = []
+        self._stages: List[str] = []
+
+    def _histogram(self, stage: str) -> LatencyHistogram:
+        histograms = getattr(self._local, 'histograms', None)
+        if histograms is None:
+            histograms = self._local.histograms = {}
+        histogram = histograms[stage] = LatencyHistogram()
+        with self._lock:
+            self._histograms.append((stage, histogram))
+            if stage not in self._stages:
+                self._stages.append(stage)
+        return histogram
+
+    def record(self, stage: str, duration_ns: int):
+        histograms = getattr(self._local, 'histograms', None)
+        histogram = histograms.get(stage) if histograms is not None else None
+        if histogram is None:
+            histogram = self._histogram(stage)
+        histogram.record(duration_ns)
+
+    def record_since(self, stage: str, started_ns: int) -> int:
+        """Records the time since a ``time.perf_counter_ns()`` reading and returns the current reading."""
+        now = time.perf_counter_ns()
+        self.record(stage, now - started_ns)
+        return now
+
+    def merged(self) -> Dict[str, LatencyHistogram]:
+        """Per-stage histograms merged across threads, in first-recorded order."""
+        with self._lock:
+            histograms = list(self._histograms)
+            stages = list(self._stages)
+        merged = {stage: LatencyHistogram() for stage in stages}
+        for stage, histogram in histograms:
+            merged[stage].merge(histogram)
+        return merged
+
+    def summary(self) -> List[StageSummary]:
+        summaries = []
+        for stage, histogram in self.merged().items():
+            def to_ms(value: Optional[float]) -> Optional[float]:
+                return value / 1e6 if value is not None else None
+            summaries.append(StageSummary(stage, histogram.count, histogram.total_ns / 1e6,
+                                          to_ms(histogram.percentile(0.5)), to_ms(histogram.percentile(0.99)),
+                                          to_ms(histogram.percentile(0.999)), histogram.max_ns / 1e6))
+        return summaries
+
+    def prometheus_text(self, metric: str = "trading_stage_latency_seconds") -> str:
+        """All stages as a Prometheus ``summary`` in the text exposition format."""
+        lines = [f"# HELP {metric} Latency of each stage of the kline-to-order path.", f"# TYPE {metric} summary"]
+        for summary in self.summary():
+            for quantile, value in (("0.5", summary.p50_ms), ("0.99", summary.p99_ms), ("0.999", summary.p999_ms)):
+                if value is not None:
+                    lines.append(f'{metric}{{stage="{summary.stage}",quantile="{quantile}"}} {value / 1000:.9f}')
+            lines.append(f'{metric}_sum{{stage="{summary.stage}"}} {summary.total_ms / 1000:.9f}')
+            lines.append(f'{metric}_count{{stage="{summary.stage}"}} {summary.count}')
+        return "\n".join(lines) + "\n"
+
+class LatencyReporter:
+    """Logs one percentile line per stage every ``interval_seconds``."""
+
+    def __init__(self, recorder: LatencyRecorder, interval_seconds: float = 60):
+        self.recorder = recorder
+        self.interval_seconds = interval_seconds
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def report(self):
+        for summary in self.recorder.summary():
+            logger.info(f"Latency {summary.log_line()}")
+
+    def _run(self):
+        while not self._stopped.wait(self.interval_seconds):
+            self.report()
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="latency-reporter", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+def serve_prometheus(recorder: LatencyRecorder, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serves ``recorder.prometheus_text()`` at ``/metrics`` on a daemon thread; call ``shutdown()`` to stop."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = recorder.prometheus_text().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass # Scrapes every few seconds would flood the log
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.5}, name="metrics-server", daemon=True).start()
+    return server
@@ -0,0 +1,211 @@
+"""Local stand-ins for Binance endpoints, and helpers shared by several test modules."""
+import json
+import os
+import threading
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+from websockets.sync.server import serve # type: ignore
+from backtest.fake_exchange import FakeExchange, SymbolRules
+from backtest.loader import OHLCVArrays
+from models import OCHLVData
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+def load_frames(filename: str) -> List[str]:
+    with open(os.path.join(FIXTURES_DIR, filename)) as fixture:
+        return [line.strip() for line in fixture if line.strip()]
+
+def wait_for(condition, timeout: float = 3.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+class KlineReplayServer:
+    """Websocket server replaying recorded combined-stream kline frames.
+
+    Each connection receives, in recorded order, the frames whose stream is
+    listed in its ``/stream?streams=...`` query (or, unwrapped, the frames of
+    the single stream in a ``/ws/<stream>`` path). It then stays open until
+    the client disconnects, or is closed by the server when ``hold_open`` is
+    false. Requested paths are kept in ``paths`` for assertions.
+    """
+
+    def __init__(self, frames: List[str], hold_open: bool = True):
+        self.frames = frames
+        self.hold_open = hold_open
+        self.paths: List[str] = []
+        self._server = serve(self._handle, "127.0.0.1", 0, close_timeout=0.5)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.socket.getsockname()[:2]
+        return f"ws://{host}:{port}"
+
+    def _handle(self, connection):
+        path = connection.request.path
+        self.paths.append(path)
+        if path.startswith('/ws/'):
+            single_stream = path[len('/ws/'):]
+            for frame in self.frames:
+                payload = json.loads(frame)
+                if payload.get('stream') == single_stream:
+                    connection.send(json.dumps(payload['data'], separators=(',', ':')))
+        else:
+            streams = set(parse_qs(urlparse(path).query).get('streams', [''])[0].split('/'))
+            for frame in self.frames:
+                if json.loads(frame).get('stream') in streams:
+                    connection.send(frame)
+        if not self.hold_open:
+            return
+        for _ in connection:  # Keep the socket open until the client leaves
+            pass
+
+    def __enter__(self) -> "KlineReplayServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._thread.join()
+
+class UserDataStreamServer:
+    """Websocket server standing in for the Binance user-data stream.
+
+    Clients connect to ``/ws/<listenKey>``; events given to ``push`` are sent
+    to every connected client.
+    """
+
+    def __init__(self):
+        self.paths: List[str] = []
+        self.connections: list = []
+        self.client_connected = threading.Event()
+        self._server = serve(self._handle, "127.0.0.1", 0, close_timeout=0.5)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.socket.getsockname()[:2]
+        return f"ws://{host}:{port}"
+
+    def _handle(self, connection):
+        self.paths.append(connection.request.path)
+        self.connections.append(connection)
+        self.client_connected.set()
+        for _ in connection:
+            pass
+        self.connections.remove(connection)
+
+    def push(self, event: dict):
+        frame = json.dumps(event, separators=(',', ':'))
+        for connection in list(self.connections):
+            connection.send(frame)
+
+    def __enter__(self) -> "UserDataStreamServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._thread.join()
+
+class KlineRestServer:
+    """HTTP server standing in for ``GET /api/v3/klines``.
+
+    Serves REST kline rows from ``klines`` (``{symbol: [row, ...]}``, oldest
+    first), honouring ``startTime``, ``endTime`` and ``limit`` like Binance.
+    Query parameters of every request are kept in ``requests``.
+    """
+
+    def __init__(self, klines: Dict[str, list], status: int = 200):
+        self.klines = klines
+        self.status = status
+        self.requests: List[dict] = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+                server.requests.append(query)
+                if server.status != 200:
+                    self.send_error(server.status)
+                    return
+                start = int(query.get('startTime', 0))
+                end = int(query.get('endTime', 2 ** 63))
+                rows = [row for row in server.klines.get(query['symbol'], []) if start <= row[0] <= end]
+                body = json.dumps(rows[:int(query.get('limit', 500))]).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "KlineRestServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+def rest_kline_rows(start: int, count: int, step: int = 60000) -> list:
+    """Binance REST kline rows with distinct closes, one per ``step`` from ``start``."""
+    return [[start + index * step, "100.0", "101.0", "99.0", f"{100 + index}.5", "1.0",
+             start + (index + 1) * step - 1, "100.0", 10, "0.5", "50.0", "0"] for index in range(count)]
+
+def make_bar(timestamp: int, close: float) -> OCHLVData:
+    price = Decimal(str(close))
+    return OCHLVData(timestamp=timestamp, open=price, high=price, low=price, close=price, volume=Decimal('1'))
+
+def random_closes(count: int, seed: int = 3) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.01, count))), 2)
+
+def random_walk_ohlcv(count: int, seed: int = 1) -> OHLCVArrays:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, count)))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.001, count)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.001, count)))
+    return OHLCVArrays(np.arange(count, dtype=np.int64) * 60000, open_, high, low, close, np.ones(count))
+
+def execution_report(order_id: int, status: str, executed: str = "0", quote: str = "0", time: int = 1000,
+                     order_type: str = "MARKET", list_id: int = -1, symbol: str = "BTCUSDT") -> dict:
+    return {"e": "executionReport", "s": symbol, "S": "SELL" if list_id >= 0 else "BUY", "o": order_type,
+            "X": status, "i": order_id, "q": "1.0", "z": executed, "Z": quote, "p": "0", "P": "0",
+            "g": list_id, "T": time}
+
+def oco_response(list_id: int, stop_id: int, target_id: int, quantity: str, status: str = "NEW",
+                 symbol: str = "BTCUSDT") -> dict:
+    def report(order_id: int, order_type: str, price: str, stop_price: str) -> dict:
+        return {"symbol": symbol, "orderId": order_id, "orderListId": list_id, "transactTime": 1000,
+                "price": price, "origQty": quantity, "executedQty": "0", "cummulativeQuoteQty": "0",
+                "status": status, "type": order_type, "side": "SELL", "stopPrice": stop_price}
+    return {"orderListId": list_id, "contingencyType": "OCO", "symbol": symbol,
+            "orders": [{"symbol": symbol, "orderId": stop_id}, {"symbol": symbol, "orderId": target_id}],
+            "orderReports": [report(stop_id, "STOP_LOSS_LIMIT", "97.8", "98"), report(target_id, "LIMIT_MAKER", "103", "0")]}
+
+def btc_exchange(price: str = "100", usdt: str = "10000", fee_rate: str = "0") -> FakeExchange:
+    exchange = FakeExchange(fee_rate=Decimal(fee_rate), clock=lambda: 1700000000000)
+    exchange.add_symbol(SymbolRules("BTCUSDT", "BTC", "USDT"), Decimal(price))
+    exchange.deposit("USDT", Decimal(usdt))
+    return exchange
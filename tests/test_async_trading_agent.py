@@ -0,0 +1,117 @@
+import asyncio
+import os
+import unittest
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
+
+os.environ.setdefault("BINANCE_API_KEY", "test")
+os.environ.setdefault("BINANCE_API_SECRET", "test")
+
+from agents.async_trading_agent import AsyncTradingAgent
+from data.async_data_handler import AsyncDataHandler
+from models import AccountBalance, OCHLVData, TradeSignal
+from stand_ins import KlineReplayServer, load_frames
+
+def make_bar(close: str) -> OCHLVData:
+    price = Decimal(close)
+    return OCHLVData(timestamp=1700000000000, open=price, high=price, low=price, close=price, volume=Decimal('1'))
+
+class TestAsyncDataHandler(unittest.IsolatedAsyncioTestCase):
+
+    async def test_replayed_frames_reach_queue(self):
+        queue: asyncio.Queue = asyncio.Queue(maxsize=10)
+        with KlineReplayServer(load_frames('combined_kline_frames.jsonl')) as server:
+            handler = AsyncDataHandler(["BTCUSDT", "ETHUSDT", "BNBUSDT"], "1m", queue,
+                                       base_url=server.url, max_streams_per_connection=2)
+            self.assertEqual(len(handler.urls), 2)
+            run_task = asyncio.create_task(handler.run())
+            received = [await asyncio.wait_for(queue.get(), timeout=5) for _ in range(6)]
+            await handler.stop()
+            await asyncio.wait_for(run_task, timeout=5)
+        self.assertEqual(sorted(symbol for symbol, _ in received), ["BNBUSDT", "BNBUSDT", "BTCUSDT", "BTCUSDT", "ETHUSDT", "ETHUSDT"])
+        self.assertTrue(all(isinstance(bar, OCHLVData) for _, bar in received))
+
+    def test_parse_message_skips_open_kline(self):
+        handler = AsyncDataHandler(["BTCUSDT"], "1m", asyncio.Queue())
+        frames = load_frames('combined_kline_frames.jsonl')
+        self.assertIsNone(handler._parse_message(frames[0]))
+        symbol, bar = handler._parse_message(frames[1])
+        self.assertEqual(symbol, "BTCUSDT")
+        self.assertEqual(bar.close, Decimal("37005.20"))
+
+class TestAsyncTradingAgent(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.trader = MagicMock()
+        self.trader.get_account_balance = AsyncMock(return_value=AccountBalance(asset="USDT", free=Decimal('1000'), locked=Decimal('0')))
+        self.trader.place_market_order = AsyncMock(return_value={"orderId": 1})
+        self.agent = AsyncTradingAgent(["BTCUSDT", "ETHUSDT"], "1m", Decimal('10000'), trader=self.trader)
+
+    async def test_enter_signal_places_buy_order(self):
+        signal = TradeSignal(action='enter', stop_loss=Decimal('99'), take_profit=Decimal('102'))
+        await self.agent._execute_signal("BTCUSDT", signal, Decimal('100'))
+        # 10% of 10000 at 1 USDT risk per unit is capped by the 1000 USDT balance
+        self.trader.place_market_order.assert_awaited_once_with(symbol="BTCUSDT", side='BUY', quantity=Decimal('10'))
+        self.assertTrue(self.agent.states["BTCUSDT"].in_position)
+        self.assertFalse(self.agent.states["ETHUSDT"].in_position)
+
+    async def test_exit_signal_ignored_without_position(self):
+        await self.agent._execute_signal("BTCUSDT", TradeSignal(action='exit'), Decimal('100'))
+        self.trader.place_market_order.assert_not_awaited()
+
+    async def test_enter_signal_with_invalid_stop_does_not_order(self):
+        signal = TradeSignal(action='enter', stop_loss=Decimal('101'))
+        await self.agent._execute_signal("BTCUSDT", signal, Decimal('100'))
+        self.trader.place_market_order.assert_not_awaited()
+        self.assertFalse(self.agent.states["BTCUSDT"].in_position)
+
+    async def test_signals_are_queued_for_order_workers(self):
+        strategy = MagicMock()
+        strategy.generate_signal.return_value = TradeSignal(action='enter', stop_loss=Decimal('99'))
+        self.agent.states["ETHUSDT"].strategy = strategy
+        await self.agent._process_ochlv_data("ETHUSDT", make_bar('100'))
+        symbol, signal, close = self.agent.order_queue.get_nowait()
+        self.assertEqual((symbol, signal.action, close), ("ETHUSDT", 'enter', Decimal('100')))
+        self.trader.place_market_order.assert_not_awaited()
+
+    async def test_slow_orders_do_not_block_evaluation(self):
+        release = asyncio.Event()
+
+        async def slow_order(**kwargs):
+            await release.wait()
+            return {"orderId": 1}
+
+        self.trader.place_market_order = AsyncMock(side_effect=slow_order)
+        strategy = MagicMock()
+        strategy.generate_signal.return_value = TradeSignal(action='enter', stop_loss=Decimal('99'))
+        self.agent.states["BTCUSDT"].strategy = strategy
+        tasks = [asyncio.create_task(self.agent._evaluate_klines()), asyncio.create_task(self.agent._execute_orders())]
+        for _ in range(5):
+            await self.agent.kline_queue.put(("BTCUSDT", make_bar('100')))
+        await asyncio.wait_for(self.agent.kline_queue.join(), timeout=1)
+        self.assertEqual(strategy.generate_signal.call_count, 5)
+        release.set()
+        await asyncio.wait_for(self.agent.order_queue.join(), timeout=1)
+        self.trader.place_market_order.assert_awaited_once()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def test_batch_mode_evaluates_queued_bars_together(self):
+        agent = AsyncTradingAgent(["BTCUSDT", "ETHUSDT"], "1m", Decimal('10000'), trader=self.trader, batch_evaluation=True)
+        agent.batch_evaluator.evaluate = MagicMock(return_value={"ETHUSDT": TradeSignal(action='exit')})
+        for symbol, close in (("BTCUSDT", '100'), ("ETHUSDT", '50'), ("BTCUSDT", '101')):
+            agent.kline_queue.put_nowait((symbol, make_bar(close)))
+        task = asyncio.create_task(agent._evaluate_klines())
+        await asyncio.wait_for(agent.kline_queue.join(), timeout=5)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        # The second BTCUSDT bar starts a new batch instead of overwriting the first
+        batches = [call.args[0] for call in agent.batch_evaluator.evaluate.call_args_list]
+        self.assertEqual([sorted(batch) for batch in batches], [["BTCUSDT", "ETHUSDT"], ["BTCUSDT"]])
+        self.assertEqual(batches[1]["BTCUSDT"].close, Decimal('101'))
+        symbol, signal, close = agent.order_queue.get_nowait()
+        self.assertEqual((symbol, signal.action, close), ("ETHUSDT", 'exit', Decimal('50')))
+
+if __name__ == '__main__':
+    unittest.main()
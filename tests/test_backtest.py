@@ -0,0 +1,128 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from analysis.indicators import StreamingATR, StreamingMACD, StreamingRSI
+from analysis.strategy import StrategyParameters
+from analysis.vectorized import atr_array, ema_array, macd_array, rsi_array
+from backtest.engine import BacktestConfig, Backtester, BacktestResult
+from backtest.loader import OHLCVArrays, load_ohlcv
+from stand_ins import random_walk_ohlcv
+
+def flat_ohlcv(close: list, high: list, low: list) -> OHLCVArrays:
+    count = len(close)
+    close = np.array(close, dtype=float)
+    open_ = np.r_[close[0], close[:-1]]
+    return OHLCVArrays(np.arange(count, dtype=np.int64), open_, np.array(high, dtype=float),
+                       np.array(low, dtype=float), close, np.ones(count))
+
+class TestVectorizedIndicators(unittest.TestCase):
+
+    def test_match_streaming_indicators(self):
+        close = random_walk_ohlcv(300).close
+        rsi, macd = StreamingRSI(14), StreamingMACD(12, 26, 9)
+        streamed = [(rsi.update(value), macd.update(value)) for value in close.tolist()]
+        rsi_values = rsi_array(close, 14)
+        macd_line, histogram, signal_line = macd_array(close, 12, 26, 9)
+        self.assertTrue(np.isnan(rsi_values[13]))
+        self.assertTrue(np.isnan(histogram[32]))
+        self.assertAlmostEqual(rsi_values[14], streamed[14][0], places=8)
+        for index in (33, 150, 299):
+            self.assertAlmostEqual(rsi_values[index], streamed[index][0], places=8)
+            self.assertAlmostEqual(macd_line[index], streamed[index][1][0], places=8)
+            self.assertAlmostEqual(histogram[index], streamed[index][1][1], places=8)
+            self.assertAlmostEqual(signal_line[index], streamed[index][1][2], places=8)
+
+    def test_atr_matches_streaming(self):
+        data = random_walk_ohlcv(300)
+        atr = StreamingATR(14)
+        streamed = [atr.update(*bar) for bar in zip(data.high.tolist(), data.low.tolist(), data.close.tolist())]
+        values = atr_array(data.high, data.low, data.close, 14)
+        self.assertTrue(np.isnan(values[13]))
+        for index in (14, 100, 299):
+            self.assertAlmostEqual(values[index], streamed[index], places=8)
+
+    def test_short_series_is_all_nan(self):
+        self.assertTrue(np.isnan(ema_array(np.arange(5.0), 10)).all())
+
+class TestBacktester(unittest.TestCase):
+
+    def test_vectorized_matches_bar_by_bar(self):
+        data = random_walk_ohlcv(6000)
+        backtester = Backtester()
+        vectorized = backtester.run_vectorized(data)
+        bar_by_bar = backtester.run_bar_by_bar(data)
+        self.assertGreater(len(vectorized.trades), 0)
+        self.assertEqual([(trade.entry_index, trade.exit_index, trade.exit_reason) for trade in vectorized.trades],
+                         [(trade.entry_index, trade.exit_index, trade.exit_reason) for trade in bar_by_bar.trades])
+        np.testing.assert_allclose(vectorized.equity_curve, bar_by_bar.equity_curve, rtol=1e-9)
+
+    def test_volatility_stops_match_bar_by_bar(self):
+        data = random_walk_ohlcv(6000)
+        for stop_mode in ('atr', 'keltner'):
+            backtester = Backtester(BacktestConfig(strategy=StrategyParameters(stop_mode=stop_mode)))
+            vectorized = backtester.run_vectorized(data)
+            bar_by_bar = backtester.run_bar_by_bar(data)
+            self.assertGreater(len(vectorized.trades), 0)
+            self.assertEqual([(trade.entry_index, trade.exit_index, trade.exit_reason) for trade in vectorized.trades],
+                             [(trade.entry_index, trade.exit_index, trade.exit_reason) for trade in bar_by_bar.trades])
+            np.testing.assert_allclose(vectorized.equity_curve, bar_by_bar.equity_curve, rtol=1e-9)
+
+    def test_stop_loss_fill_and_drawdown(self):
+        data = flat_ohlcv(close=[100, 100, 100, 100], high=[100, 100.5, 100, 100], low=[100, 99.5, 98, 98])
+        enter = np.array([True, False, False, False])
+        backtester = Backtester(BacktestConfig(initial_balance=1000))
+        result = backtester._simulate(data, enter, np.zeros(4, dtype=bool), data.close * 0.99, data.close * 1.02, 0.0)
+        trade = result.trades[0]
+        self.assertEqual((trade.exit_index, trade.exit_reason, trade.exit_price), (2, 'stop_loss', 99.0))
+        # Position capped at 10 units by the 1000 balance, losing 1 per unit
+        self.assertAlmostEqual(trade.pnl, -10.0)
+        self.assertAlmostEqual(result.final_equity, 990.0)
+        self.assertAlmostEqual(result.max_drawdown, 0.01)
+
+    def test_take_profit_and_fees(self):
+        data = flat_ohlcv(close=[100, 101, 103], high=[100, 101, 103], low=[100, 100.5, 102])
+        enter = np.array([True, False, False])
+        backtester = Backtester(BacktestConfig(initial_balance=1000, fee_rate=0.001))
+        result = backtester._simulate(data, enter, np.zeros(3, dtype=bool), data.close * 0.99, data.close * 1.02, 0.0)
+        trade = result.trades[0]
+        self.assertEqual((trade.exit_reason, trade.exit_price), ('take_profit', 102.0))
+        self.assertAlmostEqual(trade.pnl, trade.quantity * 2 - 0.001 * trade.quantity * 202)
+        self.assertEqual(result.win_rate, 1.0)
+
+    def test_empty_result(self):
+        result = BacktestResult([], np.array([]), 1000.0)
+        self.assertEqual(result.final_equity, 1000.0)
+        self.assertEqual(result.max_drawdown, 0.0)
+
+class TestLoader(unittest.TestCase):
+
+    def write(self, content: str, suffix: str = '.csv') -> str:
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, 'w') as csv_file:
+            csv_file.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_csv_with_header(self):
+        path = self.write("timestamp,open,high,low,close,volume\n120000,2,3,1,2.5,10\n60000,1,2,0.5,1.5,5\n")
+        data = load_ohlcv(path)
+        self.assertEqual(data.timestamp.tolist(), [60000, 120000])
+        self.assertEqual(data.close.tolist(), [1.5, 2.5])
+
+    def test_binance_dump_without_header(self):
+        path = self.write("1700000000000,37000.1,37012.5,36990.0,37005.2,12.3,1700000059999,455300.1,101,6.1,225700.4,0\n")
+        data = load_ohlcv(path)
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data.high[0], 37012.5)
+
+    def test_unsupported_extension(self):
+        with self.assertRaises(ValueError):
+            load_ohlcv(self.write("", suffix='.txt'))
+
+    def test_missing_columns(self):
+        with self.assertRaises(ValueError):
+            load_ohlcv(self.write("timestamp,close\n1,2\n"))
+
+if __name__ == '__main__':
+    unittest.main()
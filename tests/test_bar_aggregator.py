@@ -0,0 +1,104 @@
+import unittest
+from decimal import Decimal
+
+import numpy as np
+
+from data.bar_aggregator import BarAggregator, MultiTimeframeAggregator, aggregate_records, bucket_open_time
+from data.kline_decoder import KlineBar
+from data.kline_store import KLINE_RECORD_DTYPE
+from models import OCHLVData
+
+MINUTE = 60000
+# 2023-11-14 22:00 UTC, a 1h boundary
+HOUR_OPEN = 1700000000000 // 3600000 * 3600000
+
+def minute_bars(start: int, closes: list) -> list:
+    bars = []
+    for index, close in enumerate(closes):
+        price = Decimal(str(close))
+        bars.append(OCHLVData(timestamp=start + index * MINUTE, open=price - 1, high=price + 2,
+                              low=price - 2, close=price, volume=Decimal('1.5')))
+    return bars
+
+def to_records(bars: list) -> np.ndarray:
+    return np.array([(bar.timestamp, *bar.to_floats()) for bar in bars], dtype=KLINE_RECORD_DTYPE)
+
+class TestBarAggregator(unittest.TestCase):
+
+    def test_bucket_alignment(self):
+        self.assertEqual(bucket_open_time(HOUR_OPEN + 7 * MINUTE, "5m"), HOUR_OPEN + 5 * MINUTE)
+        self.assertEqual(bucket_open_time(HOUR_OPEN + 59 * MINUTE, "1h"), HOUR_OPEN)
+        # Weekly klines open on Monday 00:00 UTC: 2023-11-13 for 2023-11-14
+        self.assertEqual(bucket_open_time(HOUR_OPEN, "1w"), 1699833600000)
+
+    def test_closes_bucket_on_its_last_base_bar(self):
+        aggregator = BarAggregator("1m", "5m")
+        bars = minute_bars(HOUR_OPEN, [10, 12, 9, 11, 13, 14])
+        emitted = [aggregator.update(bar) for bar in bars]
+        self.assertEqual(emitted[:4], [[], [], [], []])
+        (five_minute,) = emitted[4]
+        self.assertEqual(five_minute, OCHLVData(timestamp=HOUR_OPEN, open=Decimal(9), high=Decimal(15), low=Decimal(7),
+                                                close=Decimal(13), volume=Decimal('7.5')))
+        self.assertEqual(emitted[5], [])
+        self.assertEqual(aggregator.partial.timestamp, HOUR_OPEN + 5 * MINUTE)
+
+    def test_gap_closes_partial_bucket(self):
+        aggregator = BarAggregator("1m", "5m")
+        bars = minute_bars(HOUR_OPEN, list(range(20, 30)))
+        for bar in bars[:3]:
+            self.assertEqual(aggregator.update(bar), [])
+        # Minutes 3-8 are missing; minute 9 completes the second bucket on its own
+        closed = aggregator.update(bars[9])
+        self.assertEqual([bar.timestamp for bar in closed], [HOUR_OPEN, HOUR_OPEN + 5 * MINUTE])
+        self.assertEqual(closed[0].close, Decimal(22))
+        self.assertEqual(aggregator.update(bars[2]), []) # Late replay of an emitted bucket is ignored
+
+    def test_accepts_kline_bars(self):
+        aggregator = BarAggregator("1m", "5m")
+        closed = []
+        for minute in range(5):
+            closed += aggregator.update(KlineBar(HOUR_OPEN + minute * MINUTE, "1.0", "2.5", "0.5", str(minute), "0.25"))
+        self.assertEqual((closed[0].high, closed[0].close, closed[0].volume), (Decimal("2.5"), Decimal("4"), Decimal("1.25")))
+
+    def test_rejects_non_multiple_intervals(self):
+        with self.assertRaises(ValueError):
+            BarAggregator("3m", "5m")
+        with self.assertRaises(ValueError):
+            BarAggregator("5m", "1m")
+
+    def test_aggregate_records_matches_streaming(self):
+        bars = minute_bars(HOUR_OPEN, [100 + (index * 7) % 11 for index in range(60)])
+        aggregator = BarAggregator("1m", "15m")
+        streamed = [closed for bar in bars for closed in aggregator.update(bar)]
+        aggregated = aggregate_records(to_records(bars), "15m")
+        self.assertEqual(len(aggregated), 4)
+        np.testing.assert_array_equal(aggregated, to_records(streamed))
+
+class TestMultiTimeframeAggregator(unittest.TestCase):
+
+    def test_feeds_analyzer_per_timeframe(self):
+        received = []
+        timeframes = MultiTimeframeAggregator("1m", ["5m", "15m"], callback=lambda interval, bar: received.append((interval, bar.timestamp)))
+        for bar in minute_bars(HOUR_OPEN, [100 + index for index in range(30)]):
+            timeframes.on_bar(bar)
+        self.assertEqual([interval for interval, _ in received].count("5m"), 6)
+        self.assertEqual(received[-2:], [("5m", HOUR_OPEN + 25 * MINUTE), ("15m", HOUR_OPEN + 15 * MINUTE)])
+        self.assertEqual(len(timeframes.analyzers["15m"].buffer), 2)
+        self.assertEqual(timeframes.analyzers["5m"].buffer.close[-1], 129.0)
+
+    def test_warm_up_resumes_trailing_bucket(self):
+        # History starts mid-bucket (minute 3) and stops mid-bucket (minute 22)
+        history = minute_bars(HOUR_OPEN + 3 * MINUTE, [100 + index for index in range(20)])
+        timeframes = MultiTimeframeAggregator("1m", ["5m"])
+        timeframes.warm_up(to_records(history))
+        np.testing.assert_array_equal(timeframes.analyzers["5m"].buffer.timestamp,
+                                      [HOUR_OPEN + 5 * MINUTE, HOUR_OPEN + 10 * MINUTE, HOUR_OPEN + 15 * MINUTE])
+        live = minute_bars(HOUR_OPEN + 23 * MINUTE, [200, 201])
+        timeframes.on_bar(live[0])
+        timeframes.on_bar(live[1])
+        latest = timeframes.analyzers["5m"].get_latest_data()
+        self.assertEqual(latest["timestamp"], HOUR_OPEN + 20 * MINUTE)
+        self.assertEqual((latest["open"], latest["close"], latest["volume"]), (Decimal(116), Decimal(201), Decimal('7.5')))
+
+if __name__ == '__main__':
+    unittest.main()
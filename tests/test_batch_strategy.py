@@ -0,0 +1,64 @@
+import unittest
+
+import numpy as np
+
+from analysis.batch_strategy import BatchStrategyEvaluator
+from analysis.strategy import StrategyParameters, TradingStrategy
+from analysis.technical_analyzer import TechnicalAnalyzer
+from stand_ins import make_bar, random_closes
+
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "BNBUSDT", "SOLUSDT"]
+# Loose thresholds so a short random walk produces both kinds of signal
+PARAMETERS = StrategyParameters(rsi_oversold=45, rsi_overbought=55)
+
+class TestBatchStrategyEvaluator(unittest.TestCase):
+
+    def setUp(self):
+        self.closes = {symbol: random_closes(300, seed) for seed, symbol in enumerate(SYMBOLS)}
+
+    def test_signals_match_per_symbol_strategy(self):
+        evaluator = BatchStrategyEvaluator(SYMBOLS, PARAMETERS)
+        strategies = {symbol: TradingStrategy(TechnicalAnalyzer(), PARAMETERS) for symbol in SYMBOLS}
+        signal_count = 0
+        for step in range(300):
+            # Symbols drop out of some intervals, as when a stream lags behind
+            bars = {symbol: make_bar(step * 60000, closes[step])
+                    for position, (symbol, closes) in enumerate(self.closes.items()) if (step + position) % 7}
+            expected = {symbol: strategies[symbol].generate_signal(bar) for symbol, bar in bars.items()}
+            expected = {symbol: signal for symbol, signal in expected.items() if signal is not None}
+            self.assertEqual(evaluator.evaluate(bars), expected, f"step {step}")
+            signal_count += len(expected)
+        self.assertGreater(signal_count, 10)
+
+        for symbol in SYMBOLS:
+            analyzer = strategies[symbol].technical_analyzer
+            row = evaluator.rows[symbol]
+            self.assertAlmostEqual(evaluator.rsi.value[row], analyzer.calculate_rsi(), places=9)
+            for batch_value, value in zip((evaluator.macd.macd[row], evaluator.macd.histogram[row], evaluator.macd.signal_line[row]),
+                                          analyzer.calculate_macd()):
+                self.assertAlmostEqual(batch_value, value, places=9)
+            np.testing.assert_array_equal(evaluator.window_closes(symbol), analyzer.buffer.close)
+
+    def test_warm_up_matches_updating_bar_by_bar(self):
+        warmed = BatchStrategyEvaluator(SYMBOLS)
+        # Histories of different lengths are right-aligned on the newest bar
+        warmed.warm_up({symbol: closes[position * 20:] for position, (symbol, closes) in enumerate(self.closes.items())})
+        stepped = BatchStrategyEvaluator(SYMBOLS)
+        for symbol, closes in self.closes.items():
+            # Warm-up keeps only the newest window of each history
+            for close in closes[SYMBOLS.index(symbol) * 20:][-200:]:
+                stepped.update_closes({symbol: close})
+        np.testing.assert_allclose(warmed.rsi.value, stepped.rsi.value)
+        np.testing.assert_allclose(warmed.macd.histogram, stepped.macd.histogram)
+        self.assertEqual(len(warmed.window_closes("ETHUSDT")), 200)
+
+    def test_no_signal_before_indicators_are_defined(self):
+        evaluator = BatchStrategyEvaluator(SYMBOLS, PARAMETERS)
+        for step in range(30):
+            signals = evaluator.evaluate({symbol: make_bar(step, closes[step]) for symbol, closes in self.closes.items()})
+            self.assertEqual(signals, {})
+        self.assertTrue(np.isnan(evaluator.macd.signal_line).all())
+        self.assertEqual(evaluator.evaluate({}), {})
+
+if __name__ == '__main__':
+    unittest.main()
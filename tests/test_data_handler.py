@@ -2,8 +2,12 @@ import unittest
 from unittest.mock import MagicMock, patch
 import json
 from decimal import Decimal
-from data.data_handler import DataHandler
+import threading
+from data.data_handler import DataHandler, MultiplexedDataHandler
 from models import OCHLVData
+from monitoring.latency import LatencyRecorder
+from data.feed_supervisor import FeedSupervisor
+from stand_ins import KlineReplayServer, load_frames, wait_for
 
 class TestDataHandler(unittest.TestCase):
 
@@ -13,17 +17,15 @@ class TestDataHandler(unittest.TestCase):
         self.mock_callback = MagicMock()
         self.data_handler = DataHandler(self.symbol, self.interval, self.mock_callback)
 
-    @patch('websocket.WebSocketApp')
-    def test_data_handler_init(self, MockWebSocketApp):
+    def test_data_handler_init(self):
         self.assertEqual(self.data_handler.symbol, self.symbol.lower())
         self.assertEqual(self.data_handler.interval, self.interval)
         self.assertEqual(self.data_handler.callback, self.mock_callback)
         self.assertIn(self.symbol.lower(), self.data_handler.ws_url)
         self.assertIn(self.interval, self.data_handler.ws_url)
-        self.assertIsNone(self.data_handler.ws)
-        self.assertEqual(self.data_handler.reconnect_interval, 5)
+        self.assertIsNone(self.data_handler.feed)
         self.assertFalse(self.data_handler.is_running)
-        self.assertIsNone(self.data_handler.thread)
+        self.assertEqual(self.data_handler.metrics(), {})
 
     def test_on_message_closed_kline(self):
         mock_ws = MagicMock()
@@ -49,6 +51,15 @@ class TestDataHandler(unittest.TestCase):
         self.assertEqual(called_data.timestamp, 1678886400000)
         self.assertEqual(called_data.close, Decimal("20050.00"))
 
+    def test_monthly_klines_are_timed_against_the_calendar_close(self):
+        latency = LatencyRecorder()
+        handler = DataHandler(self.symbol, "1M", self.mock_callback, latency=latency)
+        message = {"e": "kline", "s": "BTCUSDT", "k": {"t": 1701388800000, "o": "1", "h": "1", "l": "1", "c": "1",
+                                                      "v": "1", "x": True}}
+        handler._on_message(MagicMock(), json.dumps(message))
+        self.mock_callback.assert_called_once()
+        self.assertEqual(latency.merged()['exchange_to_receive'].count, 1)
+
     def test_on_message_open_kline(self):
         mock_ws = MagicMock()
         # Example Binance kline message for an open kline
@@ -69,46 +80,119 @@ class TestDataHandler(unittest.TestCase):
         self.data_handler._on_message(mock_ws, json.dumps(message))
         self.mock_callback.assert_not_called() # Should not call callback for open kline
 
-    @patch('time.sleep', return_value=None) # Mock sleep to speed up test
-    @patch('websocket.WebSocketApp')
-    def test_on_close_reconnect(self, MockWebSocketApp, mock_sleep):
-        self.data_handler.is_running = True
-        self.data_handler._connect_websocket = MagicMock() # Mock this to prevent actual connection
-        self.data_handler._on_close(MagicMock(), 1000, "Normal Closure")
-        mock_sleep.assert_called_once_with(self.data_handler.reconnect_interval)
-        self.data_handler._connect_websocket.assert_called_once()
-
-    @patch('websocket.WebSocketApp')
-    def test_on_close_no_reconnect_if_not_running(self, MockWebSocketApp):
-        self.data_handler.is_running = False
-        self.data_handler._connect_websocket = MagicMock()
-        self.data_handler._on_close(MagicMock(), 1000, "Normal Closure")
-        self.data_handler._connect_websocket.assert_not_called()
-
-    @patch('websocket.WebSocketApp')
-    @patch('threading.Thread')
-    def test_start_stops_and_joins_thread(self, MockThread, MockWebSocketApp):
-        mock_ws_instance = MockWebSocketApp.return_value
-        mock_thread_instance = MockThread.return_value
-
-        self.data_handler.ws = mock_ws_instance
-        self.data_handler.thread = mock_thread_instance
+    def test_on_close_does_not_reconnect_itself(self):
+        # Reconnects belong to the feed supervisor's loop, not the close callback
         self.data_handler.is_running = True
+        with patch('websocket.WebSocketApp') as MockWebSocketApp:
+            self.data_handler._on_close(MagicMock(), 1000, "Normal Closure")
+        MockWebSocketApp.assert_not_called()
 
-        self.data_handler.stop()
+    def test_start_registers_feed_with_shared_supervisor(self):
+        supervisor = MagicMock()
+        handler = DataHandler(self.symbol, self.interval, self.mock_callback, supervisor=supervisor)
+        handler.start()
+        self.assertTrue(handler.is_running)
+        supervisor.add_feed.assert_called_once()
+        self.assertEqual(supervisor.add_feed.call_args.args, ("btcusdt@kline_1m", handler.ws_url))
+        supervisor.start.assert_not_called() # Shared supervisors are started by their owner
 
-        self.assertFalse(self.data_handler.is_running)
-        mock_ws_instance.close.assert_called_once()
-        mock_thread_instance.join.assert_called_once()
-
-    @patch('websocket.WebSocketApp')
-    @patch('threading.Thread')
-    def test_start_starts_thread(self, MockThread, MockWebSocketApp):
-        mock_thread_instance = MockThread.return_value
-        self.data_handler.start()
-        self.assertTrue(self.data_handler.is_running)
-        MockThread.assert_called_once_with(target=self.data_handler._connect_websocket)
-        mock_thread_instance.start.assert_called_once()
+        handler.stop()
+        self.assertFalse(handler.is_running)
+        supervisor.remove_feed.assert_called_once_with(supervisor.add_feed.return_value.name)
+        supervisor.stop.assert_not_called()
+
+    def test_reconnects_after_server_drops_connection(self):
+        frames = load_frames('combined_kline_frames.jsonl')
+        received = []
+        supervisor = FeedSupervisor(base_delay=0.01, max_delay=0.05)
+        with KlineReplayServer(frames, hold_open=False) as server:
+            handler = DataHandler(self.symbol, self.interval, received.append, base_url=server.url, supervisor=supervisor)
+            handler.start()
+            supervisor.start()
+            try:
+                self.assertTrue(wait_for(lambda: handler.metrics()['connects'] >= 3))
+            finally:
+                supervisor.stop()
+        self.assertEqual(server.paths[0], "/ws/btcusdt@kline_1m")
+        # The same two closed bars are replayed on every connection but delivered once
+        self.assertEqual([bar.timestamp for bar in received], [1700000000000, 1700000060000])
+        self.assertGreaterEqual(handler.metrics()['reconnects'], 2)
+
+class TestMultiplexedDataHandler(unittest.TestCase):
+
+    def test_shards_past_stream_limit(self):
+        handler = MultiplexedDataHandler(max_streams_per_connection=2)
+        for symbol in ["BTCUSDT", "ETHUSDT", "BNBUSDT"]:
+            handler.subscribe(symbol, "1m", MagicMock())
+        self.assertEqual(handler.shard_streams(), [["btcusdt@kline_1m", "ethusdt@kline_1m"], ["bnbusdt@kline_1m"]])
+
+    def test_invalid_stream_limit(self):
+        with self.assertRaises(ValueError):
+            MultiplexedDataHandler(max_streams_per_connection=2000)
+
+    def test_on_message_routes_to_symbol_callback(self):
+        handler = MultiplexedDataHandler()
+        btc_callback, eth_callback = MagicMock(), MagicMock()
+        handler.subscribe("BTCUSDT", "1m", btc_callback)
+        handler.subscribe("ETHUSDT", "1m", eth_callback)
+        for frame in load_frames('combined_kline_frames.jsonl'):
+            handler._on_message(MagicMock(), frame)
+        self.assertEqual(btc_callback.call_count, 2)
+        self.assertEqual(eth_callback.call_count, 2)
+        self.assertEqual(btc_callback.call_args_list[0][0][0].close, Decimal("37005.20"))
+
+    def test_on_message_ignores_unknown_stream(self):
+        handler = MultiplexedDataHandler()
+        callback = MagicMock()
+        handler.subscribe("BTCUSDT", "5m", callback)
+        handler._on_message(MagicMock(), load_frames('combined_kline_frames.jsonl')[1])
+        callback.assert_not_called()
+
+    def test_subscribe_after_start_raises(self):
+        handler = MultiplexedDataHandler()
+        handler.is_running = True
+        with self.assertRaises(RuntimeError):
+            handler.subscribe("BTCUSDT", "1m", MagicMock())
+
+    def test_handlers_share_a_supervisor(self):
+        supervisor = FeedSupervisor()
+        first = MultiplexedDataHandler(supervisor=supervisor)
+        second = MultiplexedDataHandler(supervisor=supervisor)
+        first.subscribe("BTCUSDT", "1m", MagicMock())
+        second.subscribe("ETHUSDT", "1m", MagicMock())
+        first.start()
+        second.start() # Both name their first shard's feed, without colliding
+        self.assertEqual(len(supervisor.feeds), 2)
+        first.stop()
+        self.assertEqual(list(supervisor.feeds), [second.feeds[0].name])
+
+    def test_replayed_frames_over_sharded_connections(self):
+        received = {"btcusdt": [], "ethusdt": [], "bnbusdt": []}
+        done = threading.Event()
+
+        def make_callback(symbol):
+            def callback(ochlv_data):
+                received[symbol].append(ochlv_data)
+                if all(len(bars) == 2 for bars in received.values()):
+                    done.set()
+            return callback
+
+        with KlineReplayServer(load_frames('combined_kline_frames.jsonl')) as server:
+            handler = MultiplexedDataHandler(base_url=server.url, max_streams_per_connection=2)
+            for symbol in received:
+                handler.subscribe(symbol, "1m", make_callback(symbol))
+            handler.start()
+            try:
+                self.assertTrue(done.wait(timeout=5))
+            finally:
+                handler.stop()
+
+        self.assertEqual(len(server.paths), 2)
+        self.assertEqual(sorted(server.paths), sorted([
+            "/stream?streams=btcusdt@kline_1m/ethusdt@kline_1m",
+            "/stream?streams=bnbusdt@kline_1m",
+        ]))
+        self.assertEqual([bar.timestamp for bar in received["bnbusdt"]], [1700000000000, 1700000060000])
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,168 @@
+import os
+import threading
+import time
+import unittest
+from decimal import Decimal
+
+os.environ.setdefault("BINANCE_API_KEY", "test")
+os.environ.setdefault("BINANCE_API_SECRET", "test")
+
+from binance.exceptions import BinanceAPIException # type: ignore
+from backtest.fake_binance_client import FakeBinanceClient
+from backtest.fake_exchange import FakeExchangeError
+from backtest.fake_exchange_server import FakeExchangeServer
+from data.data_handler import DataHandler
+from trading.symbol_info_manager import SymbolInfoManager
+from trading.trader import Trader
+from stand_ins import btc_exchange, wait_for
+
+class TestFakeExchange(unittest.TestCase):
+
+    def setUp(self):
+        self.exchange = btc_exchange(fee_rate="0.001")
+        self.client = FakeBinanceClient(self.exchange)
+        self.events = []
+        self.exchange.add_listener(self.events.append)
+
+    def test_market_order_fills_at_price_with_fee(self):
+        order = self.client.order_market(symbol="BTCUSDT", side="BUY", quantity="2")
+        self.assertEqual((order["status"], order["executedQty"], order["cummulativeQuoteQty"]),
+                         ("FILLED", "2.00000000", "200.00000000"))
+        self.assertEqual(order["fills"][0]["commission"], "0.00200000")
+        self.assertEqual(self.exchange.balance("BTC"), (Decimal("1.998"), Decimal("0")))
+        self.assertEqual(self.exchange.balance("USDT")[0], Decimal("9800"))
+        self.assertEqual([event["x"] for event in self.events if event["e"] == "executionReport"], ["NEW", "TRADE"])
+
+    def test_resting_limits_fill_in_price_time_order(self):
+        first = self.client.order_limit(symbol="BTCUSDT", side="BUY", quantity="1", price="99.00")
+        better = self.client.order_limit(symbol="BTCUSDT", side="BUY", quantity="1", price="99.50")
+        second = self.client.order_limit(symbol="BTCUSDT", side="BUY", quantity="1", price="99.00")
+        self.assertEqual(self.exchange.balance("USDT"), (Decimal("9702.50"), Decimal("297.50")))
+        self.exchange.set_price("BTCUSDT", Decimal("99.5"))
+        filled = [event["i"] for event in self.events if event.get("x") == "TRADE"]
+        self.assertEqual(filled, [better["orderId"]])
+        self.exchange.set_price("BTCUSDT", Decimal("98"))
+        filled = [event["i"] for event in self.events if event.get("x") == "TRADE"]
+        self.assertEqual(filled, [better["orderId"], first["orderId"], second["orderId"]])
+        self.assertEqual(self.exchange.balance("USDT"), (Decimal("9702.50"), Decimal("0")))
+        self.assertEqual(self.client.get_open_orders(symbol="BTCUSDT"), [])
+
+    def test_filters_and_balance_are_enforced(self):
+        cases = [({"quantity": "0.000015", "price": "90.00"}, "Filter failure: LOT_SIZE"),
+                 ({"quantity": "1", "price": "90.001"}, "Filter failure: PRICE_FILTER"),
+                 ({"quantity": "0.01", "price": "90.00"}, "Filter failure: NOTIONAL"),
+                 ({"quantity": "200", "price": "90.00"}, "Account has insufficient balance for requested action.")]
+        for params, message in cases:
+            with self.assertRaises(BinanceAPIException) as raised:
+                self.client.order_limit(symbol="BTCUSDT", side="BUY", **params)
+            self.assertEqual(raised.exception.message, message)
+        with self.assertRaises(FakeExchangeError) as raised:
+            self.client.create_order(symbol="BTCUSDT", side="BUY", type="LIMIT_MAKER", quantity="1", price="101.00")
+        self.assertEqual(raised.exception.code, -2010)
+        self.assertEqual(self.exchange.balance("USDT"), (Decimal("10000"), Decimal("0")))
+
+    def test_stop_limit_triggers_and_rests_below_limit(self):
+        self.client.order_market(symbol="BTCUSDT", side="BUY", quantity="1")
+        stop = self.client.create_order(symbol="BTCUSDT", side="SELL", type="STOP_LOSS_LIMIT", timeInForce="GTC",
+                                        quantity="0.99", price="97.00", stopPrice="98.00")
+        self.exchange.set_price("BTCUSDT", Decimal("96.5")) # Triggers, but the market is below the limit
+        self.assertEqual(self.client.get_order(symbol="BTCUSDT", orderId=stop["orderId"])["status"], "NEW")
+        self.exchange.set_price("BTCUSDT", Decimal("97.2"))
+        self.assertEqual(self.exchange.balance("BTC"), (Decimal("0.009"), Decimal("0")))
+        trade = [event for event in self.events if event.get("x") == "TRADE"][-1]
+        self.assertEqual((trade["i"], trade["L"], trade["m"]), (stop["orderId"], "97.00000000", True))
+
+    def test_oco_leg_fill_expires_the_other(self):
+        self.client.order_market(symbol="BTCUSDT", side="BUY", quantity="1")
+        placed = self.client.create_oco_order(symbol="BTCUSDT", side="SELL", quantity="0.99", aboveType="LIMIT_MAKER",
+                                              abovePrice="103.00", belowType="STOP_LOSS_LIMIT", belowStopPrice="98.00",
+                                              belowPrice="97.80", belowTimeInForce="GTC")
+        self.assertEqual(self.exchange.balance("BTC"), (Decimal("0.009"), Decimal("0.99"))) # Locked once for both legs
+        self.exchange.publish_bar("BTCUSDT", Decimal("100"), Decimal("103.5"), Decimal("99"), Decimal("103"))
+        stop_id, target_id = (order["orderId"] for order in placed["orders"])
+        statuses = {event["i"]: event["X"] for event in self.events if event["e"] == "executionReport"}
+        self.assertEqual((statuses[stop_id], statuses[target_id]), ("EXPIRED", "FILLED"))
+        self.assertEqual([event["l"] for event in self.events if event["e"] == "listStatus"], ["EXEC_STARTED", "ALL_DONE"])
+        self.assertEqual(self.exchange.balance("BTC"), (Decimal("0.009"), Decimal("0")))
+        with self.assertRaises(FakeExchangeError):
+            self.client.v3_delete_order_list(symbol="BTCUSDT", orderListId=placed["orderListId"])
+
+    def test_oco_rejects_wrong_price_order_and_cancel_unlocks(self):
+        self.client.order_market(symbol="BTCUSDT", side="BUY", quantity="1")
+        with self.assertRaises(FakeExchangeError):
+            self.client.order_oco_sell(symbol="BTCUSDT", quantity="0.99", aboveType="LIMIT_MAKER", abovePrice="99.00",
+                                       belowType="STOP_LOSS", belowStopPrice="98.00")
+        placed = self.client.order_oco_sell(symbol="BTCUSDT", quantity="0.99", aboveType="LIMIT_MAKER",
+                                            abovePrice="103.00", belowType="STOP_LOSS", belowStopPrice="98.00")
+        canceled = self.client.v3_delete_order_list(symbol="BTCUSDT", orderListId=placed["orderListId"])
+        self.assertEqual([report["status"] for report in canceled["orderReports"]], ["CANCELED", "CANCELED"])
+        self.assertEqual(self.exchange.balance("BTC"), (Decimal("0.999"), Decimal("0")))
+
+class TestFakeExchangeWithTrader(unittest.TestCase):
+
+    def test_trader_brackets_resolve_in_process(self):
+        exchange = btc_exchange()
+        trader = Trader(client=FakeBinanceClient(exchange))
+        exchange.add_listener(trader.order_tracker.apply_event)
+        trader.place_market_order("BTCUSDT", "BUY", Decimal("1"), reference_price=Decimal("100"))
+        bracket = trader.place_oco_bracket("BTCUSDT", Decimal("1"), Decimal("103"), Decimal("98"), Decimal("97.8"))
+        exchange.publish_bar("BTCUSDT", Decimal("100"), Decimal("100.5"), Decimal("97"), Decimal("97.9"))
+        self.assertEqual((bracket.exit_reason, bracket.exit_price), ("stop_loss", Decimal("97.8")))
+        self.assertEqual(trader.get_account_balance("USDT").free, Decimal("9997.8"))
+
+class TestFakeExchangeServer(unittest.TestCase):
+
+    def setUp(self):
+        self.exchange = btc_exchange()
+        self.server = FakeExchangeServer(self.exchange).__enter__()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    def test_components_run_against_the_server(self):
+        symbol_info_manager = SymbolInfoManager(base_url=self.server.rest_url)
+        trader = Trader(client=self.server.client(), symbol_info_manager=symbol_info_manager)
+        self.assertEqual(symbol_info_manager.base_quote("BTCUSDT"), ("BTC", "USDT"))
+        order = trader.place_market_order("BTCUSDT", "BUY", Decimal("0.0623456"), reference_price=Decimal("100"))
+        self.assertEqual(order["executedQty"], "0.06234000") # Rounded onto the served LOT_SIZE step
+        with self.assertRaises(BinanceAPIException) as raised:
+            trader.client.order_market(symbol="BTCUSDT", side="BUY", quantity="1000")
+        self.assertEqual(raised.exception.code, -2010)
+        self.assertIn(("POST", "/api/v3/order"), self.server.requests)
+
+    def test_user_data_stream_and_klines(self):
+        trader = Trader(client=self.server.client())
+        trader.start_balance_tracking(stream_url=self.server.stream_url)
+        bars = []
+        handler = DataHandler("BTCUSDT", "1m", bars.append, base_url=self.server.stream_url)
+        handler.start()
+        try:
+            self.assertTrue(self.server.wait_for_subscriber("user"))
+            self.assertTrue(self.server.wait_for_subscriber("btcusdt@kline_1m"))
+            trader.place_market_order("BTCUSDT", "BUY", Decimal("1"))
+            bracket = trader.place_oco_bracket("BTCUSDT", Decimal("1"), Decimal("103"), Decimal("98"))
+            self.server.publish_kline("BTCUSDT", "1m", 1700000040000, 1700000099999, Decimal("100"), Decimal("103.5"),
+                                      Decimal("99.5"), Decimal("103.2"), Decimal("12"))
+            self.assertTrue(wait_for(lambda: len(bars) == 1))
+            self.assertEqual(bars[0].close, Decimal("103.2"))
+            self.assertTrue(wait_for(lambda: bracket.exit_reason == "take_profit"))
+            self.assertTrue(wait_for(lambda: trader.get_account_balance("USDT").free == Decimal("10003")))
+        finally:
+            handler.stop()
+            trader.stop_balance_tracking()
+
+    def test_stalled_subscriber_does_not_block_orders(self):
+        release = threading.Event()
+        delivered = []
+        self.server._deliver = lambda stream, event: release.wait(5) and delivered.append(event) # A client that stops reading
+        client = self.server.client()
+        started = time.monotonic()
+        for _ in range(3):
+            client.order_market(symbol="BTCUSDT", side="BUY", quantity="0.1")
+        self.assertLess(time.monotonic() - started, 2)
+        release.set()
+        self.assertTrue(wait_for(lambda: len(delivered) >= 6)) # Queued events still go out, in order
+        self.assertEqual(delivered[0]["e"], "executionReport")
+
+if __name__ == '__main__':
+    unittest.main()
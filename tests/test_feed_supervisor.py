@@ -0,0 +1,80 @@
+import unittest
+from unittest.mock import MagicMock
+from data.feed_supervisor import Backoff, FeedMetrics, FeedSupervisor, extract_event_time
+from stand_ins import KlineReplayServer, load_frames, wait_for
+
+class TestBackoff(unittest.TestCase):
+
+    def test_ceiling_grows_to_cap_and_resets(self):
+        backoff = Backoff(base_delay=1.0, max_delay=10.0, rng=lambda: 1.0)
+        self.assertEqual([backoff.next_delay() for _ in range(6)], [1.0, 2.0, 4.0, 8.0, 10.0, 10.0])
+        backoff.reset()
+        self.assertEqual(backoff.next_delay(), 1.0)
+
+    def test_full_jitter(self):
+        backoff = Backoff(base_delay=1.0, max_delay=10.0, rng=lambda: 0.25)
+        backoff.attempt = 3
+        self.assertEqual(backoff.next_delay(), 2.0)
+        delays = [Backoff(1.0, 10.0).next_delay() for _ in range(50)]
+        self.assertTrue(all(0 <= delay <= 1.0 for delay in delays))
+        self.assertGreater(len(set(delays)), 1)
+
+class TestFeedMetrics(unittest.TestCase):
+
+    def test_extract_event_time(self):
+        frame = load_frames('combined_kline_frames.jsonl')[0]
+        self.assertIsInstance(extract_event_time(frame), int)
+        self.assertEqual(extract_event_time(b'{"e":"kline","E":1700000000123,"k":{}}'), 1700000000123)
+        self.assertIsNone(extract_event_time('{"result":null,"id":1}'))
+
+    def test_uptime_reconnects_and_latency(self):
+        metrics = FeedMetrics()
+        metrics.mark_connected(100.0)
+        metrics.record_message(101.0, latency_ms=20.0)
+        metrics.mark_disconnected(110.0)
+        metrics.mark_connected(115.0)
+        metrics.record_message(116.0, latency_ms=40.0)
+        self.assertEqual(metrics.uptime(now=120.0), 15.0)
+        self.assertEqual(metrics.reconnects, 1)
+        self.assertEqual((metrics.latency_ms_mean, metrics.latency_ms_max, metrics.latency_ms_last), (30.0, 40.0, 40.0))
+
+class TestFeedSupervisor(unittest.TestCase):
+
+    def test_stale_connection_is_recycled(self):
+        supervisor = FeedSupervisor(stale_after=0.2, check_interval=0.05, base_delay=0.01, max_delay=0.02)
+        on_message = MagicMock()
+        with KlineReplayServer([]) as server: # Accepts connections but never sends
+            supervisor.add_feed("quiet", f"{server.url}/ws/btcusdt@kline_1m", on_message)
+            supervisor.start()
+            try:
+                self.assertTrue(wait_for(lambda: supervisor.metrics()["quiet"]["connects"] >= 2))
+            finally:
+                supervisor.stop()
+        metrics = supervisor.metrics()["quiet"]
+        self.assertGreaterEqual(metrics["stale_disconnects"], 1)
+        self.assertFalse(metrics["connected"])
+        on_message.assert_not_called()
+
+    def test_messages_are_counted_and_forwarded(self):
+        frames = load_frames('combined_kline_frames.jsonl')
+        supervisor = FeedSupervisor()
+        received = []
+        with KlineReplayServer(frames) as server:
+            supervisor.add_feed("btc", f"{server.url}/stream?streams=btcusdt@kline_1m", lambda ws, message: received.append(message))
+            supervisor.start()
+            try:
+                self.assertTrue(wait_for(lambda: len(received) == 4))
+            finally:
+                supervisor.stop()
+        metrics = supervisor.metrics()["btc"]
+        self.assertEqual((metrics["messages"], metrics["connects"]), (4, 1))
+        self.assertIsNotNone(metrics["latency_ms_mean"])
+
+    def test_duplicate_feed_name(self):
+        supervisor = FeedSupervisor()
+        supervisor.add_feed("btc", "ws://127.0.0.1:1", MagicMock())
+        with self.assertRaises(ValueError):
+            supervisor.add_feed("btc", "ws://127.0.0.1:1", MagicMock())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import json
+import os
+import unittest
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+os.environ.setdefault("BINANCE_API_KEY", "test")
+os.environ.setdefault("BINANCE_API_SECRET", "test")
+
+from agents.trading_agent import TradingAgent
+from data.data_handler import DataHandler
+from data.kline_backfill import KlineBackfiller, missing_open_times
+from data.kline_decoder import KlineBar
+from models import OCHLVData
+from stand_ins import KlineRestServer, rest_kline_rows
+
+START = 1700000000000
+MINUTE = 60000
+
+def closed_frame(timestamp: int, close: str = "1.5") -> str:
+    return json.dumps({"e": "kline", "k": {"t": timestamp, "o": "1.0", "h": "2.0", "l": "0.5", "c": close, "v": "3.0", "x": True}})
+
+class TestKlineBackfiller(unittest.TestCase):
+
+    def setUp(self):
+        self.server = KlineRestServer({"BTCUSDT": rest_kline_rows(START, 2500)})
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+        self.backfiller = KlineBackfiller(self.server.url, max_workers=3)
+        self.backfiller.clock = lambda: (START + 2500 * MINUTE + 30000) / 1000 # Bar 2500 in progress
+
+    def test_fetch_pages_in_parallel_and_keeps_order(self):
+        bars = self.backfiller.fetch("btcusdt", "1m", START + 10 * MINUTE, START + 2400 * MINUTE)
+        self.assertEqual(len(bars), 2390)
+        self.assertIsInstance(bars[0], KlineBar)
+        self.assertEqual([bar.timestamp for bar in bars], [START + index * MINUTE for index in range(10, 2400)])
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertTrue(all(request["limit"] == "1000" and request["symbol"] == "BTCUSDT" for request in self.server.requests))
+
+    def test_prefill_returns_last_closed_bars(self):
+        bars = self.backfiller.prefill("BTCUSDT", "1m", 200, bar_factory=DataHandler("BTCUSDT", "1m", None).decoder.bar_factory)
+        self.assertEqual(len(bars), 200)
+        self.assertIsInstance(bars[-1], OCHLVData)
+        self.assertEqual(bars[-1].timestamp, START + 2499 * MINUTE)
+
+    def test_fetch_never_returns_bar_in_progress(self):
+        bars = self.backfiller.fetch("BTCUSDT", "1m", START + 2498 * MINUTE, START + 3000 * MINUTE)
+        self.assertEqual([bar.timestamp for bar in bars], [START + 2498 * MINUTE, START + 2499 * MINUTE])
+
+    def test_missing_open_times(self):
+        self.assertIsNone(missing_open_times(START, START + MINUTE, "1m"))
+        self.assertEqual(missing_open_times(START, START + 4 * MINUTE, "1m"), (START + MINUTE, START + 4 * MINUTE))
+
+class TestDataHandlerGapRecovery(unittest.TestCase):
+
+    def setUp(self):
+        self.server = KlineRestServer({"BTCUSDT": rest_kline_rows(START, 100)})
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+        self.backfiller = KlineBackfiller(self.server.url)
+        self.backfiller.clock = lambda: (START + 100 * MINUTE + 1000) / 1000
+        self.callback = MagicMock()
+        self.handler = DataHandler("BTCUSDT", "1m", self.callback, backfiller=self.backfiller)
+
+    def delivered(self) -> list:
+        return [call.args[0].timestamp for call in self.callback.call_args_list]
+
+    def test_gap_is_backfilled_before_live_bar(self):
+        self.handler._on_message(None, closed_frame(START + 10 * MINUTE))
+        self.handler._on_message(None, closed_frame(START + 14 * MINUTE))
+        self.assertEqual(self.delivered(), [START + index * MINUTE for index in (10, 11, 12, 13, 14)])
+        self.assertEqual(self.callback.call_args_list[1].args[0].close, 111.5) # From REST
+
+    def test_reconnect_backfills_up_to_bar_in_progress(self):
+        self.handler.last_timestamp = START + 95 * MINUTE
+        self.handler._on_open(None)
+        self.assertEqual(self.delivered(), [START + index * MINUTE for index in range(96, 100)])
+        self.handler._on_message(None, closed_frame(START + 99 * MINUTE)) # Replayed live bar
+        self.assertEqual(self.callback.call_count, 4)
+
+    def test_backfill_failure_keeps_live_stream(self):
+        self.server.status = 500
+        self.handler.last_timestamp = START
+        self.handler._on_message(None, closed_frame(START + 5 * MINUTE))
+        self.assertEqual(self.delivered(), [START + 5 * MINUTE])
+
+class TestTradingAgentPrefill(unittest.TestCase):
+
+    def test_warm_up_prefills_analyzer(self):
+        with KlineRestServer({"BTCUSDT": rest_kline_rows(START, 300)}) as server:
+            backfiller = KlineBackfiller(server.url)
+            backfiller.clock = lambda: (START + 300 * MINUTE) / 1000
+            agent = TradingAgent("BTCUSDT", "1m", Decimal("1000"), trader=MagicMock(), backfiller=backfiller)
+            agent.warm_up()
+        self.assertEqual(len(agent.technical_analyzer.buffer), 200)
+        self.assertIsNotNone(agent.technical_analyzer.calculate_macd()[2])
+        self.assertEqual(agent.data_handler.last_timestamp, START + 299 * MINUTE)
+
+if __name__ == '__main__':
+    unittest.main()
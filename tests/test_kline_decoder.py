@@ -0,0 +1,65 @@
+import json
+import unittest
+from decimal import Decimal
+from data.kline_decoder import (KlineBar, KlineDecoder, fast_kline_decoder, is_open_kline_frame,
+                                parse_kline, pydantic_kline_decoder)
+from analysis.technical_analyzer import TechnicalAnalyzer
+from models import OCHLVData
+from stand_ins import load_frames
+
+class TestKlineDecoder(unittest.TestCase):
+
+    def setUp(self):
+        self.frames = load_frames('combined_kline_frames.jsonl')
+        self.open_frame, self.closed_frame = self.frames[0], self.frames[1]
+
+    def test_prefilter_detects_open_kline(self):
+        self.assertTrue(is_open_kline_frame(self.open_frame))
+        self.assertTrue(is_open_kline_frame(self.open_frame.encode()))
+        self.assertFalse(is_open_kline_frame(self.closed_frame))
+
+    def test_prefilter_skips_parsing(self):
+        calls = []
+        decoder = KlineDecoder(bar_factory=parse_kline, loads=lambda message: calls.append(message) or json.loads(message))
+        self.assertIsNone(decoder.decode_stream(self.open_frame))
+        self.assertEqual(calls, [])
+
+    def test_unfiltered_open_kline_still_dropped(self):
+        # json.dumps adds a space after the colon, so the pre-filter misses it
+        frame = json.dumps(json.loads(self.open_frame))
+        self.assertFalse(is_open_kline_frame(frame))
+        self.assertIsNone(pydantic_kline_decoder().decode_stream(frame))
+
+    def test_decode_single_stream_frame(self):
+        frame = json.dumps(json.loads(self.closed_frame)['data'])
+        bar = pydantic_kline_decoder().decode(frame)
+        self.assertIsInstance(bar, OCHLVData)
+        self.assertEqual(bar.close, Decimal("37005.20"))
+
+    def test_fast_decoder_matches_pydantic_decoder(self):
+        stream, fast_bar = fast_kline_decoder().decode_stream(self.closed_frame.encode())
+        _, model_bar = pydantic_kline_decoder().decode_stream(self.closed_frame)
+        self.assertEqual(stream, "btcusdt@kline_1m")
+        self.assertIsInstance(fast_bar, KlineBar)
+        for field in ("timestamp", "open", "high", "low", "close", "volume"):
+            self.assertEqual(getattr(fast_bar, field), getattr(model_bar, field))
+        self.assertEqual(fast_bar.to_floats(), model_bar.to_floats())
+
+    def test_kline_bar_decimals_are_lazy_and_cached(self):
+        bar = KlineBar(1, "1.5", "2.5", "0.5", "2.0", "10")
+        self.assertEqual(bar._decimals, [None] * 5)
+        self.assertIs(bar.close, bar.close)
+        self.assertEqual(bar._decimals[3], Decimal("2.0"))
+        self.assertIsNone(bar._decimals[0])
+
+    def test_kline_bar_feeds_technical_analyzer(self):
+        analyzer = TechnicalAnalyzer()
+        analyzer.add_ohlcv_data(KlineBar(60000, "1.5", "2.5", "0.5", "2.0", "10"))
+        self.assertEqual(analyzer.get_latest_data()["close"], Decimal("2.0"))
+
+    def test_malformed_frame_raises(self):
+        with self.assertRaises(ValueError):
+            fast_kline_decoder().decode('{"k": ')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from decimal import Decimal
+from unittest.mock import MagicMock
+from analysis.technical_analyzer import TechnicalAnalyzer
+from backtest.loader import load_ohlcv
+from data.data_handler import DataHandler
+from data.kline_store import KLINE_RECORD_DTYPE, KlineStore, contiguous_tail, interval_milliseconds, next_open_time
+from models import OCHLVData
+
+START = 1700000000000
+MINUTE = 60000
+
+def bar(index: int, close: float = 100.0) -> OCHLVData:
+    price = Decimal(str(close))
+    return OCHLVData(timestamp=START + index * MINUTE, open=price, high=price + 1, low=price - 1, close=price, volume=Decimal('2'))
+
+class TestKlineStore(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.store = KlineStore(self.root)
+        self.addCleanup(self.store.close)
+
+    def test_append_and_read(self):
+        for index in range(5):
+            self.assertTrue(self.store.append('btcusdt', '1m', bar(index, 100 + index)))
+        self.assertTrue(os.path.exists(os.path.join(self.root, 'BTCUSDT-1m.klines')))
+        records = self.store.read('BTCUSDT', '1m')
+        self.assertEqual(records['close'].tolist(), [100.0, 101.0, 102.0, 103.0, 104.0])
+        self.assertEqual(records['high'][0], 101.0)
+        self.assertEqual(self.store.read('BTCUSDT', '1m', last=2)['close'].tolist(), [103.0, 104.0])
+        window = self.store.read('BTCUSDT', '1m', start=START + MINUTE, end=START + 3 * MINUTE)
+        self.assertEqual(window['close'].tolist(), [101.0, 102.0])
+        self.assertEqual(len(self.store.read('ETHUSDT', '1m')), 0)
+
+    def test_duplicate_and_old_bars_are_skipped(self):
+        self.store.append('BTCUSDT', '1m', bar(0))
+        self.store.append('BTCUSDT', '1m', bar(1))
+        self.assertFalse(self.store.append('BTCUSDT', '1m', bar(1))) # Replayed after a reconnect
+        self.assertFalse(self.store.append('BTCUSDT', '1m', bar(0)))
+        self.assertEqual(len(self.store.read('BTCUSDT', '1m')), 2)
+
+    def test_history_survives_reopen_and_torn_record(self):
+        self.store.append('BTCUSDT', '1m', bar(0))
+        self.store.close()
+        with open(self.store.path('BTCUSDT', '1m'), 'ab') as handle:
+            handle.write(b'\x01\x02\x03') # Partial record from a crash
+        store = KlineStore(self.root)
+        self.addCleanup(store.close)
+        self.assertFalse(store.append('BTCUSDT', '1m', bar(0)))
+        self.assertTrue(store.append('BTCUSDT', '1m', bar(1)))
+        self.assertEqual(store.read('BTCUSDT', '1m')['timestamp'].tolist(), [START, START + MINUTE])
+
+    def test_recent_skips_gaps_and_stale_history(self):
+        for index in (0, 1, 3, 4, 5):
+            self.store.append('BTCUSDT', '1m', bar(index))
+        now = START + 6 * MINUTE + 5000 # Bar 6 is in progress
+        self.assertEqual(len(self.store.recent('BTCUSDT', '1m', last=10, now_ms=now)), 3)
+        self.assertEqual(len(self.store.recent('BTCUSDT', '1m', last=10, now_ms=now + MINUTE)), 0)
+
+    def test_contiguous_tail_and_intervals(self):
+        self.assertEqual(interval_milliseconds('4h'), 4 * 3600000)
+        with self.assertRaises(ValueError):
+            interval_milliseconds('1x')
+        self.assertEqual(len(contiguous_tail(self.store.read('BTCUSDT', '1m'), '1m')), 0)
+
+    def test_monthly_open_times_follow_the_calendar(self):
+        with self.assertRaises(ValueError):
+            interval_milliseconds('1M') # No fixed step for the store, backfill or aggregator
+        december = 1701388800000 # 2023-12-01T00:00Z
+        self.assertEqual(next_open_time(december, '1M'), 1704067200000) # 2024-01-01
+        self.assertEqual(next_open_time(1704067200000, '1M'), 1706745600000) # 2024-02-01
+        self.assertEqual(next_open_time(december, '1h'), december + 3600000)
+
+    def test_data_handler_persists_closed_bars(self):
+        callback = MagicMock()
+        handler = DataHandler('BTCUSDT', '1m', callback, store=self.store)
+        kline = {"t": START, "o": "1.0", "h": "2.0", "l": "0.5", "c": "1.5", "v": "3.0"}
+        handler._on_message(None, json.dumps({"e": "kline", "k": dict(kline, x=False)}))
+        handler._on_message(None, json.dumps({"e": "kline", "k": dict(kline, x=True)}))
+        records = self.store.read('BTCUSDT', '1m')
+        self.assertEqual(records.tolist(), [(START, 1.0, 2.0, 0.5, 1.5, 3.0)])
+        callback.assert_called_once()
+
+    def test_analyzer_warm_up_matches_live_bars(self):
+        live = TechnicalAnalyzer(window=50)
+        for index in range(80):
+            data = bar(index, 100 + (index * 7) % 11)
+            self.store.append('BTCUSDT', '1m', data)
+            live.add_ohlcv_data(data)
+        warmed = TechnicalAnalyzer(window=50)
+        warmed.warm_up(self.store.read('BTCUSDT', '1m'))
+        self.assertEqual(len(warmed.buffer), 50)
+        self.assertAlmostEqual(warmed.calculate_rsi(), live.calculate_rsi())
+        self.assertEqual(warmed.get_latest_data(), live.get_latest_data())
+
+    def test_backtest_loader_reads_store_files(self):
+        for index in range(3):
+            self.store.append('BTCUSDT', '1m', bar(index, 100 + index))
+        data = load_ohlcv(self.store.path('BTCUSDT', '1m'))
+        self.assertEqual(data.close.tolist(), [100.0, 101.0, 102.0])
+        self.assertEqual(data.timestamp.dtype, KLINE_RECORD_DTYPE['timestamp'])
+
+if __name__ == '__main__':
+    unittest.main()
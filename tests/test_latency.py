@@ -0,0 +1,111 @@
+import json
+import threading
+import unittest
+import urllib.request
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from data.data_handler import DataHandler
+from monitoring.latency import LatencyHistogram, LatencyRecorder, LatencyReporter, bucket_index, serve_prometheus
+from trading.order_executor import OrderExecutor, OrderRequest
+
+CLOSED_KLINE = json.dumps({"e": "kline", "E": 1678886460000, "s": "BTCUSDT", "k": {
+    "t": 1678886400000, "o": "20000.00", "h": "20100.00", "l": "19900.00", "c": "20050.00", "v": "10.00", "x": True}})
+
+class TestLatencyHistogram(unittest.TestCase):
+
+    def test_percentiles_within_bucket_precision(self):
+        samples = np.random.default_rng(5).lognormal(mean=11, sigma=1.5, size=20000).astype(np.int64)
+        histogram = LatencyHistogram()
+        for sample in samples.tolist():
+            histogram.record(sample)
+        for fraction in (0.5, 0.99, 0.999):
+            exact = np.quantile(samples, fraction)
+            self.assertAlmostEqual(histogram.percentile(fraction) / exact, 1.0, delta=0.04)
+        self.assertEqual(histogram.max_ns, samples.max())
+        self.assertEqual(histogram.percentile(1.0), samples.max())
+        self.assertIsNone(LatencyHistogram().percentile(0.5))
+
+    def test_buckets_are_monotonic(self):
+        indexes = [bucket_index(value) for value in range(0, 100000, 7)]
+        self.assertEqual(indexes, sorted(indexes))
+        self.assertEqual(bucket_index(2 ** 70), bucket_index(2 ** 80)) # Clamped
+
+class TestLatencyRecorder(unittest.TestCase):
+
+    def test_threads_record_into_private_histograms_that_merge(self):
+        recorder = LatencyRecorder()
+
+        def record_many(value: int):
+            for _ in range(1000):
+                recorder.record("strategy", value)
+
+        threads = [threading.Thread(target=record_many, args=(1000 * (index + 1),)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        recorder.record("decode", 500)
+        merged = recorder.merged()
+        self.assertEqual(list(merged), ["strategy", "decode"])
+        self.assertEqual(merged["strategy"].count, 4000)
+        self.assertEqual(merged["strategy"].max_ns, 4000)
+        (strategy, decode) = recorder.summary()
+        self.assertAlmostEqual(strategy.p50_ms, 0.002, delta=0.0001)
+        self.assertIn("p999=", strategy.log_line())
+
+    def test_prometheus_text_and_endpoint(self):
+        recorder = LatencyRecorder()
+        recorder.record("placement", 2_000_000)
+        text = recorder.prometheus_text()
+        self.assertIn("# TYPE trading_stage_latency_seconds summary", text)
+        self.assertIn('trading_stage_latency_seconds{stage="placement",quantile="0.99"} 0.002000000', text)
+        self.assertIn('trading_stage_latency_seconds_count{stage="placement"} 1', text)
+
+        server = serve_prometheus(recorder, 0, host="127.0.0.1")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics", timeout=5) as response:
+                self.assertEqual(response.read().decode(), recorder.prometheus_text())
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_reporter_logs_each_stage(self):
+        recorder = LatencyRecorder()
+        recorder.record("decode", 1500)
+        with self.assertLogs("monitoring.latency", level="INFO") as logs:
+            LatencyReporter(recorder).report()
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("decode: n=1", logs.output[0])
+
+class TestHotPathInstrumentation(unittest.TestCase):
+
+    def test_data_handler_and_executor_record_stages(self):
+        recorder = LatencyRecorder()
+        handler = DataHandler("BTCUSDT", "1m", MagicMock(), latency=recorder)
+        handler._on_message(MagicMock(), CLOSED_KLINE)
+        self.assertGreater(handler.received_ns, 0)
+
+        trader = MagicMock()
+        trader.place_market_order.return_value = {"orderId": 1, "status": "FILLED"}
+        done = threading.Event()
+        executor = OrderExecutor(trader, lambda event: done.set(), workers=1, latency=recorder)
+        executor.start()
+        try:
+            executor.submit(OrderRequest("BTCUSDT", "BUY", size_order=lambda: Decimal('1'), received_ns=handler.received_ns))
+            self.assertTrue(done.wait(timeout=2))
+        finally:
+            executor.stop()
+        merged = recorder.merged()
+        self.assertEqual(set(merged), {"decode", "exchange_to_receive", "order_queue", "sizing", "placement", "tick_to_order"})
+        self.assertGreaterEqual(merged["tick_to_order"].max_ns, merged["placement"].max_ns)
+
+    def test_disabled_instrumentation_records_nothing(self):
+        handler = DataHandler("BTCUSDT", "1m", MagicMock())
+        handler._on_message(MagicMock(), CLOSED_KLINE)
+        self.assertEqual(handler.received_ns, 0)
+
+if __name__ == '__main__':
+    unittest.main()
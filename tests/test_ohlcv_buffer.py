@@ -0,0 +1,63 @@
+import unittest
+import numpy as np
+from analysis.ohlcv_buffer import OHLCVRingBuffer
+
+def fill(buffer: OHLCVRingBuffer, count: int):
+    for index in range(count):
+        price = float(index)
+        buffer.append(index * 60000, price, price + 1, price - 1, price + 0.5, 10.0 + index)
+
+class TestOHLCVRingBuffer(unittest.TestCase):
+
+    def test_partial_window_in_order(self):
+        buffer = OHLCVRingBuffer(capacity=5)
+        fill(buffer, 3)
+        self.assertEqual(len(buffer), 3)
+        self.assertEqual(buffer.close.tolist(), [0.5, 1.5, 2.5])
+        self.assertEqual(buffer.timestamp.tolist(), [0, 60000, 120000])
+
+    def test_wraparound_keeps_last_capacity_bars(self):
+        buffer = OHLCVRingBuffer(capacity=5)
+        fill(buffer, 13)
+        self.assertEqual(len(buffer), 5)
+        self.assertEqual(buffer.open.tolist(), [8.0, 9.0, 10.0, 11.0, 12.0])
+        self.assertEqual(buffer.high.tolist(), [9.0, 10.0, 11.0, 12.0, 13.0])
+        self.assertEqual(buffer.column('volume').tolist(), [18.0, 19.0, 20.0, 21.0, 22.0])
+        self.assertEqual(buffer.latest()['close'], 12.5)
+        self.assertEqual(buffer.latest()['timestamp'], 12 * 60000)
+
+    def test_views_are_zero_copy(self):
+        buffer = OHLCVRingBuffer(capacity=4)
+        fill(buffer, 7)
+        self.assertTrue(np.shares_memory(buffer.close, buffer._prices))
+        self.assertTrue(np.shares_memory(buffer.timestamp, buffer._timestamps))
+
+    def test_append_reuses_storage(self):
+        buffer = OHLCVRingBuffer(capacity=1000)
+        prices, timestamps = buffer._prices, buffer._timestamps
+        fill(buffer, 2500)
+        self.assertIs(buffer._prices, prices)
+        self.assertIs(buffer._timestamps, timestamps)
+        self.assertEqual(buffer.close[0], 1500.5)
+
+    def test_to_dataframe(self):
+        buffer = OHLCVRingBuffer(capacity=3)
+        fill(buffer, 4)
+        frame = buffer.to_dataframe()
+        self.assertEqual(list(frame.columns), ['open', 'high', 'low', 'close', 'volume'])
+        self.assertEqual(frame.index.tolist(), [60000, 120000, 180000])
+        self.assertEqual(frame['close'].tolist(), [1.5, 2.5, 3.5])
+        self.assertFalse(np.shares_memory(frame['close'].to_numpy(), buffer._prices))
+
+    def test_empty_buffer(self):
+        buffer = OHLCVRingBuffer(capacity=3)
+        self.assertIsNone(buffer.latest())
+        self.assertEqual(len(buffer.close), 0)
+        self.assertTrue(buffer.to_dataframe().empty)
+
+    def test_invalid_capacity(self):
+        with self.assertRaises(ValueError):
+            OHLCVRingBuffer(capacity=0)
+
+if __name__ == '__main__':
+    unittest.main()
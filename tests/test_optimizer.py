@@ -0,0 +1,87 @@
+import unittest
+from analysis.strategy import StrategyParameters
+from analysis.vectorized import macd_array, rsi_array
+from backtest.engine import BacktestConfig, Backtester
+from backtest.optimizer import ParameterOptimizer, grid_search, random_search, walk_forward_windows
+from stand_ins import random_walk_ohlcv
+
+class TestSearchSpaces(unittest.TestCase):
+
+    def test_grid_skips_invalid_combinations(self):
+        grid = grid_search(macd_fast=[8, 12, 30], rsi_oversold=[25, 30])
+        self.assertEqual(len(grid), 4) # macd_fast=30 is not shorter than macd_slow=26
+        self.assertEqual({parameters.macd_fast for parameters in grid}, {8, 12})
+
+    def test_random_search_is_distinct_and_seeded(self):
+        ranges = dict(rsi_oversold=range(15, 40), rsi_overbought=range(60, 85), macd_fast=[8, 10, 12])
+        first = random_search(50, seed=3, **ranges)
+        self.assertEqual(len(first), 50)
+        self.assertEqual(len(set(first)), 50)
+        self.assertEqual(first, random_search(50, seed=3, **ranges))
+
+    def test_unknown_field(self):
+        with self.assertRaises(ValueError):
+            grid_search(rsi_treshold=[30])
+
+    def test_walk_forward_windows(self):
+        self.assertEqual(walk_forward_windows(100, 40, 20),
+                         [((0, 40), (40, 60)), ((20, 60), (60, 80)), ((40, 80), (80, 100))])
+        self.assertEqual(walk_forward_windows(50, 40, 20), [])
+
+class TestParameterOptimizer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = {'BTCUSDT': random_walk_ohlcv(4000, seed=1), 'ETHUSDT': random_walk_ohlcv(3000, seed=2)}
+        cls.config = BacktestConfig(initial_balance=1000, fee_rate=0.001)
+        cls.grid = grid_search(rsi_oversold=[30, 40], rsi_overbought=[60, 70], macd_fast=[8, 12], take_profit_multiplier=[1.01, 1.02])
+        cls.optimizer = ParameterOptimizer(cls.data, cls.config, workers=2, batch_size=5)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.optimizer.close()
+
+    def backtest(self, symbol, parameters, window):
+        # Indicators are warmed on the whole history, as the optimizer's are
+        config = BacktestConfig(self.config.initial_balance, self.config.risk_per_trade_percentage, self.config.fee_rate, parameters)
+        close, bars = self.data[symbol].close, slice(*window)
+        rsi = rsi_array(close, parameters.rsi_length)[bars]
+        macd = tuple(line[bars] for line in macd_array(close, parameters.macd_fast, parameters.macd_slow, parameters.macd_signal))
+        return Backtester(config).run_vectorized(self.data[symbol].slice(*window), rsi, macd)
+
+    def test_sweep_matches_direct_backtests(self):
+        results = self.optimizer.sweep(self.grid)
+        self.assertEqual(len(results), 2 * len(self.grid))
+        self.assertTrue(any(result.trades for result in results))
+        for result in results[::7]:
+            expected = self.backtest(result.symbol, result.parameters, result.window)
+            self.assertEqual(result.trades, len(expected.trades))
+            self.assertAlmostEqual(result.total_return, expected.total_return, places=12)
+            self.assertAlmostEqual(result.max_drawdown, expected.max_drawdown, places=12)
+
+    def test_walk_forward_picks_best_training_result(self):
+        steps = self.optimizer.walk_forward(self.grid, train_bars=1500, test_bars=500, symbols=['BTCUSDT'])
+        self.assertEqual([step.test.window for step in steps], [(1500, 2000), (2000, 2500), (2500, 3000), (3000, 3500), (3500, 4000)])
+        step = steps[0]
+        training = self.optimizer.sweep(self.grid, ['BTCUSDT'], step.train.window)
+        self.assertEqual(step.train.total_return, max(result.total_return for result in training))
+        self.assertAlmostEqual(step.test.total_return, self.backtest('BTCUSDT', step.parameters, (1500, 2000)).total_return, places=12)
+
+    def test_window_starts_with_warm_indicators(self):
+        # A window opening on cold indicators could not signal in its first ~35 bars
+        parameters = StrategyParameters(rsi_oversold=45, rsi_overbought=55)
+        [result] = self.optimizer.sweep([parameters], ['BTCUSDT'], (1600, 1630))
+        self.assertEqual(result.trades, 2)
+        config = BacktestConfig(self.config.initial_balance, self.config.risk_per_trade_percentage, self.config.fee_rate, parameters)
+        cold = Backtester(config).run_vectorized(self.data['BTCUSDT'].slice(1600, 1630))
+        self.assertEqual(len(cold.trades), 0)
+        self.assertAlmostEqual(result.total_return, self.backtest('BTCUSDT', parameters, (1600, 1630)).total_return, places=12)
+
+    def test_closed_optimizer_rejects_work(self):
+        optimizer = ParameterOptimizer({'BTCUSDT': self.data['BTCUSDT']}, workers=1)
+        optimizer.close()
+        with self.assertRaises(RuntimeError):
+            optimizer.sweep(self.grid[:1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import threading
+import unittest
+from decimal import Decimal
+from unittest.mock import MagicMock
+from trading.order_executor import OrderEvent, OrderExecutor, OrderRequest
+
+class TestOrderExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.trader = MagicMock()
+        self.trader.place_market_order.return_value = {"orderId": 1, "status": "FILLED", "origQty": "0.5",
+                                                       "executedQty": "0.5"}
+        self.events = []
+        self.event_received = threading.Event()
+
+        def on_event(event: OrderEvent):
+            self.events.append(event)
+            self.event_received.set()
+
+        self.executor = OrderExecutor(self.trader, on_event, workers=2)
+
+    def tearDown(self):
+        self.executor.stop()
+
+    def run_request(self, request: OrderRequest) -> OrderEvent:
+        self.executor.start()
+        self.assertTrue(self.executor.submit(request))
+        self.assertTrue(self.event_received.wait(timeout=2))
+        return self.events[0]
+
+    def test_places_order_with_fixed_quantity(self):
+        event = self.run_request(OrderRequest("BTCUSDT", "BUY", quantity=Decimal('0.5')))
+        self.trader.place_market_order.assert_called_once_with(symbol="BTCUSDT", side="BUY", quantity=Decimal('0.5'))
+        self.assertEqual(event.status, "FILLED")
+        self.assertTrue(event.is_filled)
+        self.assertGreaterEqual(event.placement_seconds, 0)
+        self.assertEqual(self.executor.latency_summary()["count"], 1)
+
+    def test_sizes_order_on_worker_thread(self):
+        caller_threads = []
+
+        def size_order():
+            caller_threads.append(threading.current_thread().name)
+            return Decimal('2')
+
+        event = self.run_request(OrderRequest("ETHUSDT", "SELL", size_order=size_order))
+        self.assertEqual(event.quantity, Decimal('2'))
+        self.assertTrue(caller_threads[0].startswith("order-worker-"))
+
+    def test_zero_quantity_is_skipped(self):
+        event = self.run_request(OrderRequest("ETHUSDT", "SELL", quantity=Decimal('0')))
+        self.assertEqual(event.status, "SKIPPED")
+        self.assertFalse(event.is_filled)
+        self.trader.place_market_order.assert_not_called()
+
+    def test_rest_error_becomes_failed_event(self):
+        self.trader.place_market_order.side_effect = RuntimeError("timeout")
+        event = self.run_request(OrderRequest("BTCUSDT", "BUY", quantity=Decimal('1')))
+        self.assertEqual(event.status, "FAILED")
+        self.assertIsInstance(event.error, RuntimeError)
+        self.assertFalse(event.is_filled)
+
+    def test_rejected_order_is_not_filled(self):
+        self.trader.place_market_order.return_value = {"orderId": 2, "status": "EXPIRED", "origQty": "1",
+                                                       "executedQty": "0"}
+        event = self.run_request(OrderRequest("BTCUSDT", "BUY", quantity=Decimal('1')))
+        self.assertFalse(event.is_filled)
+
+    def test_fill_is_read_from_executed_quantity(self):
+        request = OrderRequest("BTCUSDT", "SELL", quantity=Decimal('1'))
+        accepted = OrderEvent(request, 'NEW', order={"status": "NEW", "origQty": "1", "executedQty": "0"})
+        self.assertFalse(accepted.is_filled)
+        expired = OrderEvent(request, 'EXPIRED', order={"status": "EXPIRED", "origQty": "1", "executedQty": "0.4"})
+        self.assertTrue(expired.is_filled)
+        self.assertTrue(expired.is_partially_filled)
+        self.assertEqual(expired.filled_quantity, Decimal('0.4'))
+        acknowledged = OrderEvent(request, 'NEW', order={"symbol": "BTCUSDT", "orderId": 3}) # newOrderRespType=ACK
+        self.assertEqual((acknowledged.is_filled, acknowledged.is_partially_filled), (False, False))
+
+    def test_submit_never_blocks_when_full(self):
+        executor = OrderExecutor(self.trader, MagicMock(), max_pending=1)
+        self.assertTrue(executor.submit(OrderRequest("BTCUSDT", "BUY", quantity=Decimal('1'))))
+        self.assertFalse(executor.submit(OrderRequest("BTCUSDT", "BUY", quantity=Decimal('1'))))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import unittest
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+os.environ.setdefault("BINANCE_API_KEY", "test")
+os.environ.setdefault("BINANCE_API_SECRET", "test")
+
+from trading.order_quantizer import OrderFilterError, SymbolQuantizer
+from trading.symbol_info_manager import SymbolInfoManager
+from trading.trader import Trader
+
+EXCHANGE_INFO = {"symbols": [{
+    "symbol": "BTCUSDT", "status": "TRADING", "baseAsset": "BTC", "quoteAsset": "USDT",
+    "filters": [
+        {"filterType": "PRICE_FILTER", "minPrice": "0.01000000", "maxPrice": "1000000.00000000", "tickSize": "0.01000000"},
+        {"filterType": "LOT_SIZE", "minQty": "0.00001000", "maxQty": "9000.00000000", "stepSize": "0.00001000"},
+        {"filterType": "NOTIONAL", "minNotional": "5.00000000", "applyMinToMarket": True},
+    ],
+}]}
+
+def btc_quantizer() -> SymbolQuantizer:
+    return SymbolQuantizer("BTCUSDT", Decimal("0.00001000"), Decimal("0.01000000"), Decimal("0.00001000"), Decimal("5"))
+
+class TestSymbolQuantizer(unittest.TestCase):
+
+    def setUp(self):
+        self.quantizer = btc_quantizer()
+
+    def test_quantity_rounds_down_to_step(self):
+        self.assertEqual(self.quantizer.quantize_quantity(Decimal("0.0123456789")), Decimal("0.01234"))
+        self.assertEqual(self.quantizer.quantize_quantity("1.99999"), Decimal("1.99999"))
+        self.assertEqual(self.quantizer.format_quantity(0.57), "0.57000") # 0.57 is 0.5699999... as a float
+        self.assertEqual(self.quantizer.format_quantity(Decimal("12")), "12.00000")
+
+    def test_price_rounds_down_to_tick(self):
+        self.assertEqual(self.quantizer.quantize_price(Decimal("37000.129")), Decimal("37000.12"))
+        self.assertEqual(self.quantizer.format_price(Decimal("0.015")), "0.01")
+
+    def test_coarse_step(self):
+        quantizer = SymbolQuantizer("SHIBUSDT", Decimal("1000"), Decimal("0.00000001"))
+        self.assertEqual(quantizer.format_quantity(Decimal("123456.7")), "123000")
+        self.assertEqual(quantizer.format_price(Decimal("0.0000123456")), "0.00001234")
+
+    def test_min_quantity_and_notional(self):
+        with self.assertRaises(OrderFilterError):
+            self.quantizer.check(Decimal("0.000009"))
+        with self.assertRaises(OrderFilterError):
+            self.quantizer.check(Decimal("0.0001"), price=Decimal("37000")) # 3.70 USDT notional
+        self.assertEqual(self.quantizer.check(Decimal("0.000149"), price=Decimal("37000")), Decimal("0.00014"))
+        self.assertEqual(self.quantizer.check(Decimal("0.0001")), Decimal("0.0001")) # No price, no notional check
+
+    def test_built_from_exchange_info(self):
+        manager = SymbolInfoManager()
+        with patch("trading.symbol_info_manager.requests.get") as mock_get:
+            mock_get.return_value.json.return_value = EXCHANGE_INFO
+            quantizer = manager.get_quantizer("btcusdt")
+        self.assertEqual((quantizer.step_size, quantizer.tick_size, quantizer.min_notional),
+                         (Decimal("0.00001000"), Decimal("0.01000000"), Decimal("5.00000000")))
+
+class TestTraderQuantization(unittest.TestCase):
+
+    def setUp(self):
+        self.client = MagicMock()
+        self.client.order_market.return_value = {"symbol": "BTCUSDT", "orderId": 1, "status": "FILLED", "executedQty": "0.01234"}
+        self.client.order_limit.return_value = {"symbol": "BTCUSDT", "orderId": 2, "status": "NEW", "executedQty": "0"}
+        manager = MagicMock()
+        manager.get_quantizer.return_value = btc_quantizer()
+        self.trader = Trader(client=self.client, symbol_info_manager=manager)
+
+    def test_market_order_quantity_is_rounded(self):
+        self.trader.place_market_order("BTCUSDT", "BUY", Decimal("0.0123456789"), reference_price=Decimal("37000"))
+        self.client.order_market.assert_called_once_with(symbol="BTCUSDT", side="BUY", quantity="0.01234")
+
+    def test_limit_order_price_and_quantity_are_rounded(self):
+        self.trader.place_limit_order("BTCUSDT", "SELL", Decimal("0.5000009"), Decimal("37000.129"))
+        self.client.order_limit.assert_called_once_with(symbol="BTCUSDT", side="SELL", quantity="0.50000", price="37000.12")
+
+    def test_order_below_min_notional_is_not_sent(self):
+        with self.assertRaises(OrderFilterError):
+            self.trader.place_market_order("BTCUSDT", "BUY", Decimal("0.0001"), reference_price=Decimal("37000"))
+        self.client.order_market.assert_not_called()
+
+    def test_without_symbol_info_quantity_passes_through(self):
+        trader = Trader(client=self.client)
+        trader.place_market_order("BTCUSDT", "BUY", Decimal("0.0123456789"))
+        self.client.order_market.assert_called_once_with(symbol="BTCUSDT", side="BUY", quantity=0.0123456789)
+
+if __name__ == '__main__':
+    unittest.main()
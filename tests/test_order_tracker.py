@@ -0,0 +1,98 @@
+import os
+import unittest
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+os.environ.setdefault("BINANCE_API_KEY", "test")
+os.environ.setdefault("BINANCE_API_SECRET", "test")
+
+from trading.order_tracker import OrderTracker
+from trading.trader import Trader
+from stand_ins import execution_report, oco_response
+
+class TestOrderTracker(unittest.TestCase):
+
+    def setUp(self):
+        self.tracker = OrderTracker()
+
+    def test_stream_lifecycle(self):
+        self.tracker.apply_event(execution_report(1, "NEW"))
+        self.tracker.apply_event(execution_report(1, "PARTIALLY_FILLED", "0.4", "40", time=1001))
+        self.assertEqual([order.order_id for order in self.tracker.open_orders("BTCUSDT")], [1])
+        self.tracker.apply_event(execution_report(1, "FILLED", "1.0", "101", time=1002))
+        order = self.tracker.get(1)
+        self.assertEqual(order.history, ["NEW", "PARTIALLY_FILLED", "FILLED"])
+        self.assertEqual(order.average_price, Decimal("101"))
+        self.assertEqual(self.tracker.open_orders(), [])
+
+    def test_out_of_order_reports_are_dropped(self):
+        # The REST response says FILLED before the stream's NEW report arrives
+        self.tracker.apply_response({"symbol": "BTCUSDT", "orderId": 2, "status": "FILLED", "executedQty": "1.0",
+                                     "cummulativeQuoteQty": "100", "transactTime": 1000})
+        self.tracker.apply_event(execution_report(2, "NEW"))
+        self.assertEqual(self.tracker.get(2).status, "FILLED")
+        self.tracker.apply_event(execution_report(3, "PARTIALLY_FILLED", "0.5", time=2000))
+        self.tracker.apply_event(execution_report(3, "NEW", time=1000)) # Older
+        self.tracker.apply_event(execution_report(3, "PARTIALLY_FILLED", "0.2", time=2000)) # Smaller fill
+        self.assertEqual((self.tracker.get(3).status, self.tracker.get(3).executed_qty), ("PARTIALLY_FILLED", Decimal("0.5")))
+
+    def test_bracket_closes_when_a_leg_fills(self):
+        closed = []
+        self.tracker.add_bracket_listener(closed.append)
+        bracket = self.tracker.apply_order_list(oco_response(7, 10, 11, "0.5"))
+        self.assertEqual((bracket.quantity, bracket.order_ids, bracket.status), (Decimal("0.5"), (10, 11), "ACTIVE"))
+        self.tracker.apply_event(execution_report(10, "FILLED", "0.5", "48.9", time=2000, order_type="STOP_LOSS_LIMIT", list_id=7))
+        self.assertEqual(closed, []) # The target leg has not been reported yet
+        self.tracker.apply_event(execution_report(11, "EXPIRED", time=2000, order_type="LIMIT_MAKER", list_id=7))
+        self.assertEqual(closed, [bracket])
+        self.assertEqual((bracket.exit_reason, bracket.filled_qty, bracket.exit_price), ("stop_loss", Decimal("0.5"), Decimal("97.8")))
+        self.tracker.apply_event(execution_report(11, "EXPIRED", time=2001, order_type="LIMIT_MAKER", list_id=7))
+        self.assertEqual(len(closed), 1)
+
+    def test_canceled_bracket_has_no_exit(self):
+        bracket = self.tracker.apply_order_list(oco_response(8, 20, 21, "0.5"))
+        self.tracker.apply_order_list(oco_response(8, 20, 21, "0.5", status="CANCELED"))
+        self.assertEqual((bracket.status, bracket.exit_reason), ("CLOSED", None))
+
+    def test_closed_orders_are_evicted(self):
+        tracker = OrderTracker(retain_closed=2)
+        for order_id in range(4):
+            tracker.apply_event(execution_report(order_id, "FILLED", "1.0", "100"))
+        tracker.apply_event(execution_report(9, "NEW"))
+        self.assertEqual(sorted(tracker.orders), [2, 3, 9])
+
+class TestTraderBrackets(unittest.TestCase):
+
+    def setUp(self):
+        self.client = MagicMock()
+        self.client.create_oco_order.return_value = oco_response(7, 10, 11, "0.5")
+        self.client.v3_delete_order_list.return_value = oco_response(7, 10, 11, "0.5", status="CANCELED")
+        self.trader = Trader(client=self.client)
+
+    def test_oco_bracket_request_and_tracking(self):
+        bracket = self.trader.place_oco_bracket("BTCUSDT", Decimal("0.5"), Decimal("103"), Decimal("98"), Decimal("97.8"))
+        self.client.create_oco_order.assert_called_once_with(
+            symbol="BTCUSDT", side="SELL", quantity=0.5, aboveType="LIMIT_MAKER", abovePrice="103.00000000",
+            belowType="STOP_LOSS_LIMIT", belowStopPrice="98.00000000", belowPrice="97.80000000", belowTimeInForce="GTC")
+        self.assertEqual(self.trader.order_tracker.brackets[7], bracket)
+        self.assertEqual(len(self.trader.order_tracker.open_orders()), 2)
+        self.trader.cancel_bracket(bracket)
+        self.client.v3_delete_order_list.assert_called_once_with(symbol="BTCUSDT", orderListId=7)
+        self.assertFalse(bracket.is_active)
+
+    def test_user_stream_events_reach_the_tracker(self):
+        bracket = self.trader.place_oco_bracket("BTCUSDT", Decimal("0.5"), Decimal("103"), Decimal("98"))
+        self.trader._on_user_event(execution_report(11, "FILLED", "0.5", "51.5", time=2000, order_type="LIMIT_MAKER", list_id=7))
+        self.trader._on_user_event(execution_report(10, "EXPIRED", time=2000, order_type="STOP_LOSS_LIMIT", list_id=7))
+        self.assertEqual((bracket.exit_reason, bracket.exit_price), ("take_profit", Decimal("103")))
+
+    def test_stop_loss_limit_order(self):
+        self.client.create_order.return_value = {"symbol": "BTCUSDT", "orderId": 5, "status": "NEW"}
+        self.trader.place_stop_loss_limit_order("BTCUSDT", "SELL", Decimal("0.5"), Decimal("97.8"), Decimal("98"))
+        self.client.create_order.assert_called_once_with(
+            symbol="BTCUSDT", side="SELL", type="STOP_LOSS_LIMIT", timeInForce="GTC", quantity=0.5,
+            price="97.80000000", stopPrice="98.00000000")
+        self.assertEqual(self.trader.order_tracker.get(5).status, "NEW")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import unittest
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+
+os.environ.setdefault("BINANCE_API_KEY", "test")
+os.environ.setdefault("BINANCE_API_SECRET", "test")
+
+from agents.async_trading_agent import AsyncTradingAgent
+from models import AccountBalance, TradeSignal
+from trading.portfolio_risk import PortfolioLimits, PortfolioRiskManager
+
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "BTCFDUSD", "SOLUSDT"]
+
+def unlimited(**limits) -> PortfolioLimits:
+    return PortfolioLimits(**{"max_gross_exposure": None, "max_net_exposure": None,
+                              "max_asset_concentration": None, **limits})
+
+def feed_random_prices(manager: PortfolioRiskManager, intervals: int, seed: int = 4) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    # SOL moves with ETH, so the covariance is far from diagonal
+    shocks = rng.normal(0, 0.01, (intervals, len(manager.symbols)))
+    shocks[:, 3] = shocks[:, 1] + rng.normal(0, 0.002, intervals)
+    prices = 100 * np.exp(np.cumsum(shocks, axis=0))
+    for step, row in enumerate(prices):
+        manager.update_prices(dict(zip(manager.symbols, row)), step * 60000)
+    return prices
+
+class TestPortfolioRiskManager(unittest.TestCase):
+
+    def test_exposure_and_concentration_caps(self):
+        manager = PortfolioRiskManager(Decimal('10000'), SYMBOLS, PortfolioLimits(
+            max_gross_exposure=1.0, max_net_exposure=1.0, max_asset_concentration=0.3))
+        manager.update_prices({"BTCUSDT": 100, "BTCFDUSD": 100, "ETHUSDT": 50, "SOLUSDT": 10}, 0)
+        manager.on_fill("BTCUSDT", "BUY", 20, 100) # 2000 of BTC
+        self.assertIsNone(manager.check_order("BTCFDUSD", "BUY", 10, 100))
+        # BTCUSDT and BTCFDUSD share the 3000 BTC concentration cap
+        self.assertEqual(manager.check_order("BTCFDUSD", "BUY", 11, 100), "BTC concentration")
+        self.assertAlmostEqual(manager.max_order_quantity("BTCFDUSD", "BUY"), 10.0)
+        manager.on_fill("ETHUSDT", "BUY", 60, 50)
+        manager.on_fill("SOLUSDT", "BUY", 300, 10)
+        self.assertEqual(manager.check_order("SOLUSDT", "BUY", 210, 10), "gross exposure")
+        self.assertEqual(manager.check_order("SOLUSDT", "BUY", 1, 10), "SOL concentration")
+        self.assertEqual(manager.max_order_quantity("SOLUSDT", "BUY"), 0.0)
+        self.assertAlmostEqual(manager.max_order_quantity("ETHUSDT", "SELL"), 120.0) # Through flat down to the -3000 ETH cap
+        self.assertIsNone(manager.check_order("ETHUSDT", "SELL", 60, 50)) # Reducing is always allowed
+        self.assertEqual(manager.exposure()["assets"], {"BTC": 0.2, "ETH": 0.3, "SOL": 0.3})
+
+    def test_marks_move_exposure(self):
+        manager = PortfolioRiskManager(Decimal('1000'), SYMBOLS, unlimited(max_gross_exposure=1.0))
+        manager.on_fill("ETHUSDT", "BUY", 5, 100)
+        self.assertAlmostEqual(manager.exposure()["gross"], 0.5)
+        manager.update_prices({"ETHUSDT": 150}, 0)
+        self.assertAlmostEqual(manager.exposure()["gross"], 0.75)
+        self.assertAlmostEqual(manager.max_order_quantity("ETHUSDT", "BUY"), 250 / 150)
+        manager.set_position("ETHUSDT", 0, 150)
+        self.assertAlmostEqual(manager.exposure()["gross"], 0.0)
+
+    def test_rolling_covariance_matches_numpy(self):
+        manager = PortfolioRiskManager(Decimal('10000'), SYMBOLS, unlimited(), window=50)
+        prices = feed_random_prices(manager, 131) # Commits 130 returns: wraps the window twice
+        for symbol, quantity in zip(SYMBOLS, [10, -5, 3, 40]):
+            manager.set_position(symbol, quantity, prices[-1][manager.rows[symbol]])
+        manager.update_prices(dict(zip(SYMBOLS, prices[-1])), 131 * 60000) # Commits the last interval
+        returns = np.diff(np.log(prices), axis=0)[-50:]
+        np.testing.assert_allclose(manager.covariance, np.cov(returns.T), rtol=1e-9, atol=1e-15)
+        notional = manager.quantity * prices[-1]
+        expected = np.sqrt(notional @ np.cov(returns.T) @ notional) / 10000
+        self.assertAlmostEqual(manager.exposure()["volatility"], expected, places=12)
+
+    def test_volatility_cap_accounts_for_correlation(self):
+        manager = PortfolioRiskManager(Decimal('10000'), SYMBOLS, unlimited(max_portfolio_volatility=0.002))
+        prices = feed_random_prices(manager, 100)
+        last = dict(zip(SYMBOLS, prices[-1]))
+        manager.on_fill("ETHUSDT", "BUY", 1000 / last["ETHUSDT"], last["ETHUSDT"])
+        # SOL is nearly ETH again, BTC is independent: less SOL than BTC fits under the cap
+        sol = manager.max_order_quantity("SOLUSDT", "BUY") * last["SOLUSDT"]
+        btc = manager.max_order_quantity("BTCUSDT", "BUY") * last["BTCUSDT"]
+        self.assertLess(sol, btc)
+        quantity = manager.max_order_quantity("SOLUSDT", "BUY")
+        self.assertIsNone(manager.check_order("SOLUSDT", "BUY", quantity * 0.999))
+        self.assertEqual(manager.check_order("SOLUSDT", "BUY", quantity * 1.01), "portfolio volatility")
+        manager.on_fill("SOLUSDT", "BUY", quantity, last["SOLUSDT"])
+        self.assertAlmostEqual(manager.exposure()["volatility"], 0.002, places=9)
+
+    def test_position_size_is_capped_by_limits(self):
+        manager = PortfolioRiskManager(Decimal('10000'), SYMBOLS, unlimited(max_asset_concentration=0.5))
+        # Per-trade sizing alone: 10% of 10000 at 1 risk per unit = 1000 units
+        self.assertEqual(manager.calculate_position_size(Decimal('100'), Decimal('99')), Decimal('1000'))
+        self.assertEqual(manager.calculate_position_size(Decimal('100'), Decimal('99'), symbol="BTCUSDT"), Decimal('50'))
+
+class TestAsyncAgentPortfolio(unittest.IsolatedAsyncioTestCase):
+
+    async def test_entries_respect_portfolio_limits(self):
+        trader = MagicMock()
+        trader.get_account_balance = AsyncMock(return_value=AccountBalance(asset="USDT", free=Decimal('100000'), locked=Decimal('0')))
+        trader.place_market_order = AsyncMock(side_effect=lambda symbol, side, quantity: {"orderId": 1, "executedQty": str(quantity)})
+        agent = AsyncTradingAgent(["BTCUSDT", "ETHUSDT"], "1m", Decimal('10000'), trader=trader,
+                                  portfolio_limits=unlimited(max_gross_exposure=0.3))
+        signal = TradeSignal(action='enter', stop_loss=Decimal('99'))
+        await agent._execute_signal("BTCUSDT", signal, Decimal('100'))
+        await agent._execute_signal("ETHUSDT", signal, Decimal('100'))
+        quantities = [call.kwargs["quantity"] for call in trader.place_market_order.await_args_list]
+        self.assertEqual(quantities, [Decimal('30')]) # 3000 of gross room, all taken by BTC
+        self.assertFalse(agent.states["ETHUSDT"].in_position)
+        await agent._execute_signal("BTCUSDT", TradeSignal(action='exit'), Decimal('100'))
+        self.assertAlmostEqual(agent.portfolio.exposure()["gross"], 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
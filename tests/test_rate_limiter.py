@@ -0,0 +1,131 @@
+import os
+import threading
+import time
+import unittest
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+os.environ.setdefault("BINANCE_API_KEY", "test")
+os.environ.setdefault("BINANCE_API_SECRET", "test")
+
+from binance.exceptions import BinanceAPIException # type: ignore
+from backtest.fake_exchange_server import FakeExchangeServer
+from trading.rate_limiter import (CANCEL_PRIORITY, ENDPOINT_COSTS, ORDER_PRIORITY, QUERY_PRIORITY, EndpointCost,
+                                  RequestRateLimiter)
+from trading.trader import Trader
+from stand_ins import btc_exchange, wait_for
+
+class TestRequestRateLimiter(unittest.TestCase):
+
+    def test_orders_wait_for_the_order_bucket(self):
+        limiter = RequestRateLimiter(orders_per_10s=100) # Refills one order every 0.1 s
+        for _ in range(100):
+            self.assertEqual(limiter.acquire(ENDPOINT_COSTS['order']), 0.0)
+        waited = limiter.acquire(ENDPOINT_COSTS['order'])
+        self.assertGreater(waited, 0.05)
+        self.assertLess(waited, 0.5)
+        stats = limiter.stats()
+        self.assertEqual((stats["orders_sent"], stats["weight_spent"], stats["waits"]), (101, 101, 1))
+
+    def test_cancels_then_orders_go_before_queued_queries(self):
+        limiter = RequestRateLimiter(query_reserve=0)
+        # Another process overspent the IP's weight: nothing goes for 0.3 s while the callers queue up
+        limiter.observe_response(200, {'X-MBX-USED-WEIGHT-1M': '6030'})
+        finished = []
+
+        def request(priority):
+            limiter.acquire(EndpointCost(1, 0, priority))
+            finished.append(priority)
+
+        threads = []
+        for priority in (QUERY_PRIORITY, QUERY_PRIORITY, ORDER_PRIORITY, CANCEL_PRIORITY):
+            threads.append(threading.Thread(target=request, args=(priority,)))
+            threads[-1].start()
+            self.assertTrue(wait_for(lambda: limiter.stats()["queued"] == len(threads)))
+        for thread in threads:
+            thread.join(timeout=2)
+        self.assertEqual(finished, [CANCEL_PRIORITY, ORDER_PRIORITY, QUERY_PRIORITY, QUERY_PRIORITY])
+        self.assertEqual(limiter.stats()["requests"], {"cancel": 1, "order": 1, "query": 2})
+
+    def test_queries_leave_the_reserve_to_orders(self):
+        limiter = RequestRateLimiter(weight_per_minute=6000, query_reserve=0.2) # 100 weight per second, 1200 reserved
+        limiter.observe_response(200, {'X-MBX-USED-WEIGHT-1M': '4800'})
+        self.assertEqual(limiter.acquire(ENDPOINT_COSTS['order']), 0.0)
+        waited = limiter.acquire(ENDPOINT_COSTS['account'])
+        self.assertGreater(waited, 0.1)
+        self.assertLess(waited, 1.0)
+        self.assertEqual(limiter.stats()["server_used_weight"], 4800)
+
+    def test_identical_queries_in_flight_are_coalesced(self):
+        limiter = RequestRateLimiter()
+        release = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            release.wait(2)
+            return {"balances": []}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(limiter.call('account', fetch, ('account',))))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        self.assertTrue(wait_for(lambda: limiter.stats()["coalesced"] == 4))
+        release.set()
+        for thread in threads:
+            thread.join(timeout=2)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"balances": []}] * 5)
+        self.assertEqual(limiter.stats()["weight_spent"], 20)
+        # Nothing is in flight any more, so the next call is sent
+        limiter.call('account', fetch, ('account',))
+        self.assertEqual(len(calls), 2)
+
+    def test_throttle_response_pauses_every_call(self):
+        limiter = RequestRateLimiter()
+        limiter.observe_response(429, {'Retry-After': '0.2', 'X-MBX-USED-WEIGHT-1M': '6000'})
+        waited = limiter.acquire(ENDPOINT_COSTS['cancel_order'])
+        self.assertGreaterEqual(waited, 0.15)
+        limiter.observe_response(418, {'Retry-After': '0'})
+        stats = limiter.stats()
+        self.assertEqual((stats["throttled"], stats["banned"]), (1, 1))
+
+class TestTraderRateLimiting(unittest.TestCase):
+
+    def test_concurrent_balance_lookups_share_one_request(self):
+        client = MagicMock()
+        release = threading.Event()
+        client.get_asset_balance.side_effect = lambda asset: release.wait(2) and {"free": "5", "locked": "0"}
+        limiter = RequestRateLimiter()
+        trader = Trader(client=client, rate_limiter=limiter)
+        balances = []
+        threads = [threading.Thread(target=lambda: balances.append(trader.get_account_balance("USDT"))) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        self.assertTrue(wait_for(lambda: limiter.stats()["coalesced"] == 2))
+        release.set()
+        for thread in threads:
+            thread.join(timeout=2)
+        client.get_asset_balance.assert_called_once_with(asset="USDT")
+        self.assertEqual([balance.free for balance in balances], [Decimal("5")] * 3)
+
+    def test_server_usage_headers_and_throttling(self):
+        with FakeExchangeServer(btc_exchange(), weight_limit=30) as server:
+            limiter = RequestRateLimiter()
+            trader = Trader(client=server.client(), rate_limiter=limiter)
+            trader.place_market_order("BTCUSDT", "BUY", Decimal("1"))
+            self.assertEqual(limiter.stats()["server_used_weight"], 1)
+            self.assertEqual(limiter.orders.tokens, limiter.orders.capacity - 1)
+            trader.get_account_balance("USDT")
+            self.assertEqual(limiter.stats()["server_used_weight"], 21)
+            with self.assertRaises(BinanceAPIException) as raised:
+                trader.get_account_balance("USDT")
+            self.assertEqual(raised.exception.status_code, 429)
+            stats = limiter.stats()
+            self.assertEqual(stats["throttled"], 1)
+            self.assertEqual(stats["requests"], {"cancel": 0, "order": 1, "query": 2})
+            self.assertGreater(limiter._paused_until, time.monotonic())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+import numpy as np
+
+os.environ.setdefault("BINANCE_API_KEY", "test")
+os.environ.setdefault("BINANCE_API_SECRET", "test")
+
+from backtest.replay import FrameReplayer, SimulatedTrader, create_replay_agent, synthetic_kline_frames
+from data.data_handler import DataHandler
+from data.frame_recorder import FrameRecorder, read_frames
+from data.kline_store import KLINE_RECORD_DTYPE
+from models import TradeSignal
+from monitoring.latency import LatencyRecorder
+from stand_ins import random_walk_ohlcv, wait_for
+
+def random_walk_records(count: int) -> np.ndarray:
+    ohlcv = random_walk_ohlcv(count)
+    records = np.empty(count, dtype=KLINE_RECORD_DTYPE)
+    for name in KLINE_RECORD_DTYPE.names:
+        records[name] = getattr(ohlcv, name)
+    records['timestamp'] += 1700000000000 // 60000 * 60000
+    return records
+
+class TestFrameRecorder(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "frames.jsonl.gz")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip_and_append(self):
+        frames = [frame for _, frame in synthetic_kline_frames(random_walk_records(2), "BTCUSDT", "1m", updates_per_bar=1)]
+        with FrameRecorder(self.path) as recorder:
+            for frame in frames[:3]:
+                recorder.record(frame)
+        with FrameRecorder(self.path) as recorder: # Reopening appends a new gzip member
+            recorder.record(frames[3])
+        recorded = list(read_frames(self.path))
+        self.assertEqual([frame for _, frame in recorded], frames)
+        times = [received_ns for received_ns, _ in recorded]
+        self.assertEqual(times, sorted(times))
+
+    def test_unclosed_and_truncated_recordings_stay_readable(self):
+        frames = [frame for _, frame in synthetic_kline_frames(random_walk_records(10), "BTCUSDT", "1m", updates_per_bar=3)]
+        recorder = FrameRecorder(self.path, member_frames=10, flush_seconds=60)
+        for frame in frames[:25]:
+            recorder.record(frame)
+        self.assertTrue(wait_for(lambda: recorder.frames == 25))
+        # The process "died" with frames 20-24 in an open member: the closed members still read
+        self.assertEqual([frame for _, frame in read_frames(self.path)], frames[:20])
+        recorder.close()
+        with open(self.path, 'rb') as recording:
+            data = recording.read()
+        with open(self.path, 'wb') as recording:
+            recording.write(data[:-15]) # Cut into the last member, as a crash mid-write would
+        self.assertEqual([frame for _, frame in read_frames(self.path)], frames[:20])
+        with FrameRecorder(self.path) as recorder: # Appending after the crash leaves the torn member in the middle
+            for frame in frames[25:28]:
+                recorder.record(frame)
+        self.assertEqual([frame for _, frame in read_frames(self.path)], frames[:20] + frames[25:28])
+
+    def test_data_handler_records_every_raw_frame(self):
+        frames = [frame for _, frame in synthetic_kline_frames(random_walk_records(3), "BTCUSDT", "1m", updates_per_bar=2)]
+        callback = MagicMock()
+        with FrameRecorder(self.path) as recorder:
+            handler = DataHandler("BTCUSDT", "1m", callback, recorder=recorder)
+            for frame in frames:
+                handler._on_message(None, frame)
+        self.assertEqual(callback.call_count, 3)
+        self.assertEqual([frame for _, frame in read_frames(self.path)], frames) # Open-candle updates included
+
+class TestSimulatedTrader(unittest.TestCase):
+
+    def test_fills_move_balances(self):
+        trader = SimulatedTrader({"USDT": Decimal('1000')})
+        order = trader.place_market_order("BTCUSDT", "BUY", Decimal('0.5'), reference_price=Decimal('100'))
+        self.assertEqual(order["status"], "FILLED")
+        self.assertEqual(trader.get_account_balance("USDT").free, Decimal('950'))
+        self.assertEqual(trader.get_account_balance("BTC").free, Decimal('0.5'))
+        trader.place_market_order("BTCUSDT", "SELL", Decimal('0.5'), reference_price=Decimal('110'))
+        self.assertEqual(trader.get_account_balance("USDT").free, Decimal('1005'))
+        self.assertEqual(len(trader.fills), 2)
+
+    def test_rejects_orders_beyond_balance(self):
+        trader = SimulatedTrader({"USDT": Decimal('10')})
+        order = trader.place_market_order("BTCUSDT", "BUY", Decimal('1'), reference_price=Decimal('100'))
+        self.assertEqual(order["status"], "REJECTED")
+        self.assertEqual(trader.get_account_balance("USDT").free, Decimal('10'))
+        with self.assertRaises(ValueError):
+            trader.place_market_order("BTCUSDT", "BUY", Decimal('1'))
+
+class TestFrameReplayer(unittest.TestCase):
+
+    def test_replays_through_agent_pipeline(self):
+        records = random_walk_records(300)
+        frames = synthetic_kline_frames(records, "BTCUSDT", "1m", updates_per_bar=3)
+        agent = create_replay_agent("BTCUSDT", "1m", Decimal('10000'), latency=LatencyRecorder())
+        result = FrameReplayer(agent).run(frames)
+        self.assertEqual((result.frames, result.bars), (1200, 300))
+        self.assertGreater(result.bars_per_second, 0)
+        self.assertEqual({stage.stage for stage in result.stages} & {"decode", "strategy"}, {"decode", "strategy"})
+        self.assertNotIn("exchange_to_receive", {stage.stage for stage in result.stages})
+        self.assertAlmostEqual(agent.technical_analyzer.buffer.close[-1], records['close'][-1], places=8)
+        self.assertEqual(result.orders, len(agent.trader.fills))
+        self.assertIn("bars/s", result.report()[0])
+
+    def test_orders_are_placed_on_simulated_trader(self):
+        frames = synthetic_kline_frames(random_walk_records(2), "BTCUSDT", "1m")
+        agent = create_replay_agent("BTCUSDT", "1m", Decimal('10000'))
+        agent.strategy = MagicMock()
+        agent.strategy.generate_signal.side_effect = [
+            TradeSignal(action='enter', stop_loss=Decimal('90')), TradeSignal(action='exit')]
+        replayer = FrameReplayer(agent)
+        replayer.run(frames[:1]) # The executor is drained between runs, so the entry has filled
+        self.assertTrue(agent.in_position)
+        result = replayer.run(frames[1:])
+        self.assertEqual(result.orders, 1)
+        self.assertEqual([fill["side"] for fill in agent.trader.fills], ["BUY", "SELL"])
+        self.assertFalse(agent.in_position)
+        self.assertEqual(agent.trader.get_account_balance("BTC").free, Decimal('0'))
+
+    def test_paces_frames_by_recorded_time(self):
+        frames = [(index * 50_000_000, frame) for index, (_, frame) in
+                  enumerate(synthetic_kline_frames(random_walk_records(3), "BTCUSDT", "1m"))]
+        result = FrameReplayer(create_replay_agent("BTCUSDT", "1m", Decimal('10000'))).run(frames, speed=1.0)
+        self.assertGreaterEqual(result.elapsed_seconds, 0.1)
+        self.assertEqual(result.bars, 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,7 @@
 import unittest
 from unittest.mock import MagicMock
 from decimal import Decimal
-from analysis.strategy import TradingStrategy
+from analysis.strategy import StrategyParameters, TradingStrategy
 from models import OCHLVData, TradeSignal
 
 class TestTradingStrategy(unittest.TestCase):
@@ -51,5 +51,56 @@ class TestTradingStrategy(unittest.TestCase):
         signal = self.strategy.generate_signal(self.sample_ochlv_data)
         self.assertIsNone(signal)
 
+    def test_custom_parameters(self):
+        parameters = StrategyParameters(rsi_length=7, rsi_oversold=40, macd_fast=8, macd_slow=21, macd_signal=5,
+                                        stop_loss_multiplier=0.98, take_profit_multiplier=1.05)
+        strategy = TradingStrategy(self.mock_technical_analyzer, parameters)
+        self.mock_technical_analyzer.calculate_rsi.return_value = 35 # Oversold only under the custom threshold
+        self.mock_technical_analyzer.calculate_macd.return_value = (0.5, 0.1, 0.05)
+        signal = strategy.generate_signal(self.sample_ochlv_data)
+        self.assertEqual(signal.action, 'enter')
+        self.assertEqual(signal.stop_loss, self.sample_ochlv_data.close * Decimal('0.98'))
+        self.assertEqual(signal.take_profit, self.sample_ochlv_data.close * Decimal('1.05'))
+        self.mock_technical_analyzer.calculate_rsi.assert_called_with(7)
+        self.mock_technical_analyzer.calculate_macd.assert_called_with(8, 21, 5)
+
+    def test_atr_stop_levels(self):
+        strategy = TradingStrategy(self.mock_technical_analyzer, StrategyParameters(stop_mode='atr', atr_length=10))
+        self.mock_technical_analyzer.calculate_rsi.return_value = 25
+        self.mock_technical_analyzer.calculate_macd.return_value = (0.5, 0.1, 0.05)
+        self.mock_technical_analyzer.calculate_atr.return_value = 1.5
+        signal = strategy.generate_signal(self.sample_ochlv_data)
+        self.assertEqual(signal.stop_loss, Decimal('99.0')) # 102 - 2 ATR
+        self.assertEqual(signal.take_profit, Decimal('106.5')) # 102 + 3 ATR
+        self.mock_technical_analyzer.calculate_atr.assert_called_with(10)
+        self.mock_technical_analyzer.calculate_atr.return_value = None # Not warmed up yet: no entry
+        self.assertIsNone(strategy.generate_signal(self.sample_ochlv_data))
+
+    def test_keltner_stop_levels(self):
+        strategy = TradingStrategy(self.mock_technical_analyzer, StrategyParameters(stop_mode='keltner', keltner_length=15))
+        self.mock_technical_analyzer.calculate_rsi.return_value = 25
+        self.mock_technical_analyzer.calculate_macd.return_value = (0.5, 0.1, 0.05)
+        self.mock_technical_analyzer.calculate_atr.return_value = 1.0
+        self.mock_technical_analyzer.calculate_ema.return_value = 101.0
+        signal = strategy.generate_signal(self.sample_ochlv_data)
+        self.assertEqual((signal.stop_loss, signal.take_profit), (Decimal('99.0'), Decimal('104.0'))) # Around the EMA
+        self.mock_technical_analyzer.calculate_ema.assert_called_with(15)
+        self.mock_technical_analyzer.calculate_ema.return_value = 98.0 # Close above the channel: falls back to ATR levels
+        signal = strategy.generate_signal(self.sample_ochlv_data)
+        self.assertEqual((signal.stop_loss, signal.take_profit), (Decimal('100.0'), Decimal('105.0')))
+        self.mock_technical_analyzer.calculate_ema.return_value = 103.95 # Close just above the lower band at 101.95
+        signal = strategy.generate_signal(self.sample_ochlv_data)
+        self.assertEqual((signal.stop_loss, signal.take_profit), (Decimal('100.0'), Decimal('106.95'))) # Stop kept 2 ATR away
+
+    def test_invalid_parameters(self):
+        with self.assertRaises(ValueError):
+            StrategyParameters(rsi_oversold=70, rsi_overbought=30)
+        with self.assertRaises(ValueError):
+            StrategyParameters(macd_fast=26, macd_slow=12)
+        with self.assertRaises(ValueError):
+            StrategyParameters(stop_loss_multiplier=Decimal('1.01'))
+        with self.assertRaises(ValueError):
+            StrategyParameters(stop_mode='trailing')
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,89 @@
+import unittest
+from decimal import Decimal
+
+from analysis.strategy import StrategyParameters, TradingStrategy
+from analysis.strategy_registry import (EmaCrossStrategy, IndicatorSpec, RsiMacdStrategy, Strategy, StrategyGroup,
+                                        available_strategies, create_strategy, ema, register_strategy, rsi)
+from analysis.technical_analyzer import TechnicalAnalyzer
+from models import TradeSignal
+from stand_ins import make_bar, random_closes
+
+class FixedSignal(Strategy):
+    """Returns the same signal on every bar."""
+
+    def __init__(self, signal: TradeSignal | None, label: str):
+        super().__init__(label)
+        self.signal = signal
+
+    def evaluate(self, ochlv_data, values):
+        return self.signal
+
+class TestStrategyRegistry(unittest.TestCase):
+
+    def test_create_registered_strategies(self):
+        self.assertIn("rsi_macd", available_strategies())
+        strategy = create_strategy("ema_cross", fast=5, slow=10)
+        self.assertIsInstance(strategy, EmaCrossStrategy)
+        self.assertEqual(strategy.indicators, (ema(5), ema(10)))
+        self.assertEqual(str(strategy.indicators[0]), "ema(5)")
+        with self.assertRaises(ValueError):
+            create_strategy("does_not_exist")
+
+    def test_duplicate_registration_is_rejected(self):
+        with self.assertRaises(ValueError):
+            register_strategy("rsi_macd")(Strategy)
+
+    def test_rsi_macd_plugin_matches_trading_strategy(self):
+        parameters = StrategyParameters(rsi_oversold=45, rsi_overbought=55)
+        reference = TradingStrategy(TechnicalAnalyzer(), parameters)
+        group = StrategyGroup(TechnicalAnalyzer(), [RsiMacdStrategy(parameters)])
+        signal_count = 0
+        for step, close in enumerate(random_closes(300)):
+            bar = make_bar(step, close)
+            expected = reference.generate_signal(bar)
+            self.assertEqual(group.generate_signals(bar), {"rsi_macd": expected} if expected else {})
+            signal_count += expected is not None
+        self.assertGreater(signal_count, 0)
+
+    def test_shared_indicators_are_computed_once(self):
+        analyzer = TechnicalAnalyzer()
+        strategies = [RsiMacdStrategy(label=f"rsi_macd_{index}") for index in range(6)] + \
+                     [EmaCrossStrategy(20, 50, label=f"ema_cross_{index}") for index in range(6)]
+        group = StrategyGroup(analyzer, strategies)
+        self.assertEqual(group.indicators, (rsi(14), IndicatorSpec("macd", (12, 26, 9)), ema(20), ema(50)))
+        for step, close in enumerate(random_closes(120)):
+            group.generate_signals(make_bar(step, close))
+        self.assertEqual(len(analyzer._indicators), 4)
+
+    def test_strategies_must_implement_evaluate(self):
+        with self.assertRaises(TypeError):
+            Strategy()
+
+    def test_group_picks_the_signal_for_the_position(self):
+        enter_a = TradeSignal(action='enter', stop_loss=Decimal('99'))
+        enter_b = TradeSignal(action='enter', stop_loss=Decimal('98'))
+        group = StrategyGroup(TechnicalAnalyzer(), [FixedSignal(None, "quiet"), FixedSignal(enter_a, "a"),
+                                                    FixedSignal(TradeSignal(action='exit'), "exits"),
+                                                    FixedSignal(enter_b, "b")])
+        self.assertEqual(group.generate_signal(make_bar(0, 100), in_position=False), enter_a) # First entry in group order
+        self.assertEqual(group.generate_signal(make_bar(1, 100), in_position=True).action, 'exit')
+        self.assertIsNone(StrategyGroup(TechnicalAnalyzer(), [FixedSignal(enter_a, "a")])
+                          .generate_signal(make_bar(0, 100), in_position=True))
+
+    def test_labels_must_be_unique(self):
+        with self.assertRaises(ValueError):
+            StrategyGroup(TechnicalAnalyzer(), [RsiMacdStrategy(), RsiMacdStrategy()])
+
+    def test_ema_cross_signals_on_crossings_only(self):
+        strategy = EmaCrossStrategy(2, 4)
+        group = StrategyGroup(TechnicalAnalyzer(), [strategy])
+        closes = [10, 10, 10, 10, 9, 8, 7, 9, 12, 13, 14, 10, 6]
+        actions = [signal.action for step, close in enumerate(closes)
+                   for signal in group.generate_signals(make_bar(step, close)).values()]
+        self.assertEqual(actions, ['enter', 'exit'])
+        enter = TradeSignal(action='enter', stop_loss=Decimal('9.9'), take_profit=Decimal('10.2'))
+        strategy._fast_above = False
+        self.assertEqual(strategy.evaluate(make_bar(0, 10), {ema(2): 2.0, ema(4): 1.0}), enter)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from trading.rate_limiter import RequestRateLimiter
+from trading.symbol_info_manager import SymbolInfoManager, split_symbol
+
+def symbol_entry(symbol: str, base: str, quote: str = "USDT", step: str = "0.00001000", status: str = "TRADING") -> dict:
+    return {
+        "symbol": symbol, "status": status, "baseAsset": base, "quoteAsset": quote,
+        "filters": [
+            {"filterType": "PRICE_FILTER", "tickSize": "0.01000000"},
+            {"filterType": "LOT_SIZE", "minQty": step, "stepSize": step},
+            {"filterType": "NOTIONAL", "minNotional": "5.00000000"},
+        ],
+    }
+
+def response(status_code: int = 200, symbols=(), etag=None) -> MagicMock:
+    mock = MagicMock(status_code=status_code, headers={"ETag": etag} if etag else {})
+    mock.json.return_value = {"symbols": list(symbols)}
+    return mock
+
+class TestSymbolInfoManager(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.directory, "exchange_info.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    @patch("trading.symbol_info_manager.requests.get")
+    def test_full_fetch_writes_cache_that_loads_without_network(self, mock_get):
+        mock_get.return_value = response(symbols=[symbol_entry("BTCUSDT", "BTC"), symbol_entry("ETHUSDT", "ETH", step="0.0001")], etag='"v1"')
+        manager = SymbolInfoManager(cache_path=self.cache_path)
+        manager.fetch_exchange_info()
+        self.assertEqual(mock_get.call_args.kwargs["timeout"], 10)
+
+        mock_get.reset_mock()
+        reloaded = SymbolInfoManager(cache_path=self.cache_path)
+        info = reloaded.get_symbol_info("ethusdt")
+        mock_get.assert_not_called()
+        self.assertEqual(info.global_symbol, "FX-ETH/USDT")
+        self.assertEqual(info.order_size_incremental, Decimal("0.0001"))
+        self.assertEqual(info.min_order_size_in_value, Decimal("5"))
+        self.assertTrue(info.is_live)
+        self.assertEqual(reloaded.get_quantizer("BTCUSDT").format_quantity(Decimal("0.123456")), "0.12345")
+        self.assertEqual(reloaded.snapshot.etag, '"v1"')
+        self.assertFalse(reloaded.is_stale)
+
+    @patch("trading.symbol_info_manager.requests.get")
+    def test_not_modified_keeps_snapshot_and_renews_it(self, mock_get):
+        mock_get.return_value = response(symbols=[symbol_entry("BTCUSDT", "BTC")], etag='"v1"')
+        manager = SymbolInfoManager(cache_path=self.cache_path, ttl_seconds=60)
+        manager.fetch_exchange_info()
+        before = manager.snapshot
+        manager.snapshot.fetched_at = time.time() - 120
+        self.assertTrue(manager.is_stale)
+
+        mock_get.return_value = response(status_code=304)
+        manager.refresh_if_stale()
+        self.assertEqual(mock_get.call_args.kwargs["headers"], {"If-None-Match": '"v1"'})
+        self.assertIs(manager.symbols_info, before.symbols_info)
+        self.assertFalse(manager.is_stale)
+
+    @patch("trading.symbol_info_manager.requests.get")
+    def test_targeted_fetch_merges_into_snapshot(self, mock_get):
+        mock_get.return_value = response(symbols=[symbol_entry("BTCUSDT", "BTC")], etag='"v1"')
+        manager = SymbolInfoManager()
+        manager.fetch_exchange_info()
+
+        mock_get.return_value = response(symbols=[symbol_entry("ETHUSDT", "ETH")])
+        manager.ensure_symbols(["ethusdt", "BTCUSDT"])
+        self.assertEqual(mock_get.call_args.kwargs["params"], {"symbols": '["ETHUSDT"]'})
+        self.assertIsNone(mock_get.call_args.kwargs["headers"])
+        self.assertEqual(set(manager.quantizers), {"BTCUSDT", "ETHUSDT"})
+
+        mock_get.reset_mock()
+        manager.ensure_symbols(["ETHUSDT"])
+        mock_get.assert_not_called()
+
+    @patch("trading.symbol_info_manager.requests.get")
+    def test_failed_refresh_keeps_previous_snapshot(self, mock_get):
+        mock_get.return_value = response(symbols=[symbol_entry("BTCUSDT", "BTC")])
+        manager = SymbolInfoManager()
+        manager.fetch_exchange_info()
+
+        mock_get.side_effect = requests.exceptions.Timeout("timed out")
+        self.assertEqual(manager.fetch_exchange_info(), [])
+        self.assertIn("BTCUSDT", manager.symbols_info)
+
+    @patch("trading.symbol_info_manager.requests.get")
+    def test_fetches_spend_rate_limiter_weight(self, mock_get):
+        mock_get.return_value = response(symbols=[symbol_entry("BTCUSDT", "BTC")])
+        mock_get.return_value.headers["X-MBX-USED-WEIGHT-1M"] = "500"
+        rate_limiter = RequestRateLimiter(weight_per_minute=6000)
+        SymbolInfoManager(rate_limiter=rate_limiter).fetch_exchange_info()
+        stats = rate_limiter.stats()
+        self.assertEqual((stats["requests"]["query"], stats["weight_spent"]), (1, 20))
+        self.assertEqual(stats["server_used_weight"], 500)
+
+    def test_unreadable_cache_is_ignored(self):
+        with open(self.cache_path, "w") as cache_file:
+            cache_file.write("{not json")
+        manager = SymbolInfoManager(cache_path=self.cache_path)
+        self.assertEqual(manager.symbols_info, {})
+        self.assertTrue(manager.is_stale)
+
+    @patch("trading.symbol_info_manager.requests.get")
+    def test_auto_refresh_reloads_stale_snapshot(self, mock_get):
+        mock_get.return_value = response(symbols=[symbol_entry("BTCUSDT", "BTC")])
+        manager = SymbolInfoManager(ttl_seconds=0)
+        manager.start_auto_refresh(check_seconds=0.01)
+        deadline = time.time() + 2
+        while not manager.symbols_info and time.time() < deadline:
+            time.sleep(0.01)
+        manager.stop_auto_refresh()
+        self.assertIn("BTCUSDT", manager.symbols_info)
+
+    @patch("trading.symbol_info_manager.requests.get")
+    def test_secondary_indexes(self, mock_get):
+        mock_get.return_value = response(symbols=[
+            symbol_entry("BTCUSDT", "BTC"), symbol_entry("ETHUSDT", "ETH"), symbol_entry("ETHBTC", "ETH", quote="BTC"),
+            symbol_entry("USDTTRY", "USDT", quote="TRY"), symbol_entry("LUNAUSDT", "LUNA", status="BREAK"),
+        ])
+        manager = SymbolInfoManager()
+        manager.fetch_exchange_info()
+        self.assertEqual(manager.symbols_with_quote("usdt"), ["BTCUSDT", "ETHUSDT", "LUNAUSDT"])
+        self.assertEqual(manager.symbols_with_quote("USDT", live_only=True), ["BTCUSDT", "ETHUSDT"])
+        self.assertEqual(manager.symbols_with_base("ETH"), ["ETHUSDT", "ETHBTC"])
+        self.assertEqual(manager.symbols_with_base("DOGE"), [])
+        self.assertEqual(manager.get_by_global_symbol("FX-ETH/BTC").exchange_symbol, "ETHBTC")
+        self.assertNotIn("LUNAUSDT", manager.live_symbols())
+        self.assertEqual(manager.base_quote("usdttry"), ("USDT", "TRY"))
+        # Symbols outside the snapshot fall back to the known quote suffixes
+        self.assertEqual(manager.base_quote("SOLFDUSD"), ("SOL", "FDUSD"))
+
+    def test_split_symbol(self):
+        self.assertEqual(split_symbol("BTCUSDT"), ("BTC", "USDT"))
+        self.assertEqual(split_symbol("usdttry"), ("USDT", "TRY"))
+        self.assertEqual(split_symbol("ETHBTC"), ("ETH", "BTC"))
+        with self.assertRaises(ValueError):
+            split_symbol("USDT")
+
+if __name__ == '__main__':
+    unittest.main()
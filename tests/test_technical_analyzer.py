@@ -0,0 +1,233 @@
+import math
+import random
+import unittest
+from decimal import Decimal
+import pandas as pd
+from analysis.indicators import (StreamingATR, StreamingBollingerBands, StreamingEMA, StreamingKeltnerChannels,
+                                 StreamingMACD, StreamingRSI, StreamingSMA)
+from analysis.technical_analyzer import TechnicalAnalyzer
+from models import OCHLVData
+
+try:
+    import pandas_ta as ta # type: ignore
+except ImportError:
+    ta = None
+
+# Reference implementations mirroring the pandas_ta formulas, so the streaming
+# indicators can be checked even where pandas_ta itself is not installed.
+def reference_ema(close: pd.Series, length: int) -> pd.Series:
+    close = close.copy()
+    sma_nth = close.iloc[0:length].mean()
+    close.iloc[:length - 1] = float('nan')
+    close.iloc[length - 1] = sma_nth
+    return close.ewm(span=length, adjust=False).mean()
+
+def reference_rsi(close: pd.Series, length: int) -> pd.Series:
+    negative = close.diff(1)
+    positive = negative.copy()
+    positive[positive < 0] = 0
+    negative[negative > 0] = 0
+    positive_avg = positive.ewm(alpha=1 / length, min_periods=length).mean()
+    negative_avg = negative.ewm(alpha=1 / length, min_periods=length).mean()
+    return 100 * positive_avg / (positive_avg + negative_avg.abs())
+
+def reference_macd(close: pd.Series, fast: int, slow: int, signal: int):
+    macd = reference_ema(close, fast) - reference_ema(close, slow)
+    signal_line = reference_ema(macd.loc[macd.first_valid_index():], signal)
+    return macd, macd - signal_line, signal_line
+
+def reference_atr(high: pd.Series, low: pd.Series, close: pd.Series, length: int) -> pd.Series:
+    # Wilder's ATR as TA-Lib computes it: no true range for the first bar, SMA seed
+    prev_close = close.shift(1)
+    true_range = pd.concat([high, prev_close], axis=1).max(axis=1, skipna=False) - \
+        pd.concat([low, prev_close], axis=1).min(axis=1, skipna=False)
+    atr = [float('nan')] * len(close)
+    for index in range(length, len(close)):
+        if index == length:
+            atr[index] = true_range.iloc[1:length + 1].mean()
+        else:
+            atr[index] = (atr[index - 1] * (length - 1) + true_range.iloc[index]) / length
+    return pd.Series(atr)
+
+def random_walk(count: int, seed: int = 7) -> list[float]:
+    rng = random.Random(seed)
+    price = 100.0
+    closes = []
+    for _ in range(count):
+        price *= 1 + rng.gauss(0, 0.01)
+        closes.append(price)
+    return closes
+
+def make_bar(timestamp: int, close: float) -> OCHLVData:
+    price = Decimal(str(round(close, 8)))
+    return OCHLVData(timestamp=timestamp, open=price, high=price, low=price, close=price, volume=Decimal('1'))
+
+class TestStreamingIndicators(unittest.TestCase):
+
+    def setUp(self):
+        self.closes = random_walk(150)
+        self.series = pd.Series(self.closes)
+
+    def assert_matches(self, streamed, reference):
+        for streamed_value, reference_value in zip(streamed, reference):
+            if reference_value is None or math.isnan(reference_value):
+                self.assertIsNone(streamed_value)
+            else:
+                self.assertAlmostEqual(streamed_value, reference_value, places=8)
+
+    def test_sma_matches_rolling_mean(self):
+        sma = StreamingSMA(20)
+        streamed = [sma.update(close) for close in self.closes]
+        self.assert_matches(streamed, self.series.rolling(20).mean())
+
+    def test_ema_matches_reference(self):
+        ema = StreamingEMA(20)
+        streamed = [ema.update(close) for close in self.closes]
+        self.assert_matches(streamed, reference_ema(self.series, 20))
+
+    def test_rsi_matches_reference(self):
+        rsi = StreamingRSI(14)
+        streamed = [rsi.update(close) for close in self.closes]
+        self.assert_matches(streamed, reference_rsi(self.series, 14))
+
+    def test_macd_matches_reference(self):
+        macd = StreamingMACD(12, 26, 9)
+        streamed = [macd.update(close) for close in self.closes]
+        reference_line, reference_histogram, reference_signal = reference_macd(self.series, 12, 26, 9)
+        self.assert_matches([value[0] for value in streamed], reference_line)
+        self.assert_matches([value[1] for value in streamed], reference_histogram.reindex(self.series.index))
+        self.assert_matches([value[2] for value in streamed], reference_signal.reindex(self.series.index))
+
+    def test_rsi_flat_prices_has_no_value(self):
+        rsi = StreamingRSI(3)
+        for _ in range(5):
+            value = rsi.update(100.0)
+        self.assertIsNone(value)
+
+    def test_invalid_lengths_raise(self):
+        with self.assertRaises(ValueError):
+            StreamingSMA(0)
+        with self.assertRaises(ValueError):
+            StreamingMACD(26, 12, 9)
+
+class TestVolatilityIndicators(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(11)
+        self.close = pd.Series([30000 * (1 + 0.01 * math.sin(index / 7)) + rng.gauss(0, 20) for index in range(150)])
+        self.high = self.close + [abs(rng.gauss(0, 15)) for _ in range(150)]
+        self.low = self.close - [abs(rng.gauss(0, 15)) for _ in range(150)]
+
+    def bars(self):
+        return zip(self.high.tolist(), self.low.tolist(), self.close.tolist())
+
+    def test_atr_matches_wilder_reference(self):
+        atr = StreamingATR(14)
+        streamed = [atr.update(high, low, close) for high, low, close in self.bars()]
+        reference = reference_atr(self.high, self.low, self.close, 14)
+        self.assertIsNone(streamed[13])
+        for index in (14, 15, 80, 149):
+            self.assertAlmostEqual(streamed[index], reference.iloc[index], places=6)
+
+    def test_bollinger_bands_match_rolling_std(self):
+        bands = StreamingBollingerBands(20, 2.0)
+        streamed = [bands.update(close) for close in self.close.tolist()]
+        middle = self.close.rolling(20).mean()
+        deviation = self.close.rolling(20).std(ddof=0)
+        self.assertEqual(streamed[18], (None, None, None))
+        for index in (19, 57, 149):
+            lower, mid, upper = streamed[index]
+            self.assertAlmostEqual(mid, middle.iloc[index], places=6)
+            self.assertAlmostEqual(upper - mid, 2 * deviation.iloc[index], places=6)
+            self.assertAlmostEqual(mid - lower, 2 * deviation.iloc[index], places=6)
+
+    def test_keltner_channels_are_ema_plus_atr(self):
+        channels = StreamingKeltnerChannels(20, 1.5, 10)
+        for high, low, close in self.bars():
+            lower, middle, upper = channels.update(high, low, close)
+        atr = reference_atr(self.high, self.low, self.close, 10).iloc[-1]
+        self.assertAlmostEqual(middle, reference_ema(self.close, 20).iloc[-1], places=6)
+        self.assertAlmostEqual(upper, middle + 1.5 * atr, places=6)
+        self.assertAlmostEqual(lower, middle - 1.5 * atr, places=6)
+
+    def test_analyzer_updates_and_late_warms_bar_indicators(self):
+        analyzer, late = TechnicalAnalyzer(), TechnicalAnalyzer()
+        self.assertIsNone(analyzer.calculate_atr())
+        for index, (high, low, close) in enumerate(self.bars()):
+            bar = OCHLVData(timestamp=index * 60000, open=Decimal(repr(close)), high=Decimal(repr(high)),
+                            low=Decimal(repr(low)), close=Decimal(repr(close)), volume=Decimal('1'))
+            analyzer.add_ohlcv_data(bar)
+            late.add_ohlcv_data(bar)
+            if index == 30:
+                analyzer.calculate_atr(14) # Streamed from here on
+        reference = reference_atr(self.high, self.low, self.close, 14).iloc[-1]
+        self.assertAlmostEqual(analyzer.calculate_atr(14), reference, places=6)
+        self.assertAlmostEqual(late.calculate_atr(14), reference, places=6) # Warmed from the retained window
+        lower, middle, upper = analyzer.calculate_bollinger_bands()
+        self.assertLess(lower, middle)
+        self.assertEqual(analyzer.calculate_keltner_channels(20, 2.0, 10)[1], analyzer.calculate_ema(20))
+
+class TestTechnicalAnalyzer(unittest.TestCase):
+
+    def setUp(self):
+        self.analyzer = TechnicalAnalyzer()
+        self.closes = random_walk(120)
+        self.series = pd.Series([float(make_bar(0, close).close) for close in self.closes])
+
+    def feed(self, count: int):
+        for index in range(count):
+            self.analyzer.add_ohlcv_data(make_bar(index * 60000, self.closes[index]))
+
+    def test_insufficient_data_returns_none(self):
+        self.feed(5)
+        self.assertIsNone(self.analyzer.calculate_rsi())
+        self.assertEqual(self.analyzer.calculate_macd(), (None, None, None))
+        self.assertIsNone(self.analyzer.calculate_sma())
+        self.assertIsNone(self.analyzer.calculate_ema())
+
+    def test_indicators_match_reference_after_streaming(self):
+        # Request indicators early so they are updated bar by bar afterwards
+        self.feed(40)
+        self.analyzer.calculate_rsi()
+        self.analyzer.calculate_macd()
+        self.analyzer.calculate_sma()
+        self.analyzer.calculate_ema()
+        for index in range(40, len(self.closes)):
+            self.analyzer.add_ohlcv_data(make_bar(index * 60000, self.closes[index]))
+
+        macd, macdh, macds = self.analyzer.calculate_macd()
+        reference_line, reference_histogram, reference_signal = reference_macd(self.series, 12, 26, 9)
+        self.assertAlmostEqual(self.analyzer.calculate_rsi(), reference_rsi(self.series, 14).iloc[-1], places=8)
+        self.assertAlmostEqual(macd, reference_line.iloc[-1], places=8)
+        self.assertAlmostEqual(macdh, reference_histogram.iloc[-1], places=8)
+        self.assertAlmostEqual(macds, reference_signal.iloc[-1], places=8)
+        self.assertAlmostEqual(self.analyzer.calculate_sma(), self.series.rolling(20).mean().iloc[-1], places=8)
+        self.assertAlmostEqual(self.analyzer.calculate_ema(), reference_ema(self.series, 20).iloc[-1], places=8)
+
+    def test_late_indicator_request_warms_from_window(self):
+        self.feed(len(self.closes))
+        self.assertAlmostEqual(self.analyzer.calculate_ema(10), reference_ema(self.series, 10).iloc[-1], places=8)
+
+    def test_macd_signal_not_ready(self):
+        self.feed(30)
+        macd, macdh, macds = self.analyzer.calculate_macd()
+        self.assertIsNotNone(macd)
+        self.assertIsNone(macdh)
+        self.assertIsNone(macds)
+
+    def test_configurable_window_and_dataframe_view(self):
+        analyzer = TechnicalAnalyzer(window=50)
+        for index, close in enumerate(self.closes):
+            analyzer.add_ohlcv_data(make_bar(index * 60000, close))
+        self.assertEqual(len(analyzer.data), 50)
+        self.assertEqual(analyzer.data.index[-1], (len(self.closes) - 1) * 60000)
+        self.assertEqual(analyzer.get_latest_data()["close"], make_bar(0, self.closes[-1]).close)
+
+    @unittest.skipIf(ta is None, "pandas_ta is not installed")
+    def test_matches_pandas_ta(self):
+        self.feed(len(self.closes))
+        self.assertAlmostEqual(self.analyzer.calculate_rsi(), ta.rsi(self.series, length=14).iloc[-1], places=6)
+        self.assertAlmostEqual(self.analyzer.calculate_ema(), ta.ema(self.series, length=20).iloc[-1], places=6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import unittest
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+os.environ.setdefault("BINANCE_API_KEY", "test")
+os.environ.setdefault("BINANCE_API_SECRET", "test")
+
+from trading.trader import BalanceCache, Trader
+from stand_ins import UserDataStreamServer, wait_for
+
+ACCOUNT_SNAPSHOT = {
+    "updateTime": 1000,
+    "balances": [
+        {"asset": "USDT", "free": "1000.00", "locked": "0.00"},
+        {"asset": "BTC", "free": "0.10", "locked": "0.00"},
+    ],
+}
+
+def account_position(update_time: int, asset: str, free: str, locked: str = "0.00") -> dict:
+    return {"e": "outboundAccountPosition", "E": update_time, "u": update_time,
+            "B": [{"a": asset, "f": free, "l": locked}]}
+
+class TestBalanceCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = BalanceCache()
+
+    def test_unseeded_cache_has_no_balances(self):
+        self.assertIsNone(self.cache.get("USDT"))
+
+    def test_seed_and_missing_asset(self):
+        self.cache.seed(ACCOUNT_SNAPSHOT)
+        self.assertEqual(self.cache.get("USDT").free, Decimal("1000.00"))
+        self.assertEqual(self.cache.get("ETH").free, Decimal("0"))
+
+    def test_account_position_updates_balance(self):
+        self.cache.seed(ACCOUNT_SNAPSHOT)
+        self.cache.apply_event(account_position(2000, "USDT", "900.00", "100.00"))
+        balance = self.cache.get("USDT")
+        self.assertEqual((balance.free, balance.locked), (Decimal("900.00"), Decimal("100.00")))
+
+    def test_stale_updates_are_ignored(self):
+        self.cache.apply_event(account_position(2000, "USDT", "900.00"))
+        self.cache.seed(ACCOUNT_SNAPSHOT) # Older snapshot must not roll the balance back
+        self.assertEqual(self.cache.get("USDT").free, Decimal("900.00"))
+        self.assertEqual(self.cache.get("BTC").free, Decimal("0.10"))
+
+class TestTraderBalanceTracking(unittest.TestCase):
+
+    def setUp(self):
+        self.client = MagicMock()
+        self.client.stream_get_listen_key.return_value = "listen-key-1"
+        self.client.get_account.return_value = ACCOUNT_SNAPSHOT
+        self.client.get_asset_balance.return_value = {"asset": "USDT", "free": "5.00", "locked": "0.00"}
+        self.trader = Trader(client=self.client)
+
+    def test_rest_balance_without_tracking(self):
+        self.assertEqual(self.trader.get_account_balance("USDT").free, Decimal("5.00"))
+        self.client.get_asset_balance.assert_called_once_with(asset="USDT")
+
+    def test_stream_updates_cached_balances(self):
+        with UserDataStreamServer() as server:
+            self.trader.start_balance_tracking(stream_url=server.url)
+            try:
+                self.assertTrue(server.client_connected.wait(timeout=3))
+                self.assertEqual(server.paths, ["/ws/listen-key-1"])
+                self.assertEqual(self.trader.get_account_balance("USDT").free, Decimal("1000.00"))
+
+                server.push(account_position(5000, "USDT", "750.00", "250.00"))
+                self.assertTrue(wait_for(lambda: self.trader.get_account_balance("USDT").free == Decimal("750.00")))
+                self.client.get_asset_balance.assert_not_called()
+            finally:
+                self.trader.stop_balance_tracking()
+        self.assertIsNone(self.trader.balance_cache)
+
+    def test_reconciliation_reseeds_from_snapshot(self):
+        self.trader.balance_cache = BalanceCache()
+        self.client.get_account.return_value = {"updateTime": 9000, "balances": [{"asset": "USDT", "free": "1.00", "locked": "0"}]}
+        self.trader.reconcile_balances()
+        self.assertEqual(self.trader.get_account_balance("USDT").free, Decimal("1.00"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+import os
+import unittest
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+os.environ.setdefault("BINANCE_API_KEY", "test")
+os.environ.setdefault("BINANCE_API_SECRET", "test")
+
+from agents.trading_agent import TradingAgent
+from analysis.strategy_registry import Strategy
+from models import AccountBalance, OCHLVData, TradeSignal
+from trading.order_executor import OrderEvent
+from trading.trader import Trader
+from stand_ins import execution_report, oco_response
+
+FILLED = {"status": "FILLED", "origQty": "1", "executedQty": "1"}
+
+def make_bar(close: str) -> OCHLVData:
+    price = Decimal(close)
+    return OCHLVData(timestamp=1700000000000, open=price, high=price, low=price, close=price, volume=Decimal('1'))
+
+class TestTradingAgent(unittest.TestCase):
+
+    def setUp(self):
+        self.trader = MagicMock()
+        self.trader.symbol_info_manager = None
+        self.trader.get_account_balance.return_value = AccountBalance(asset="USDT", free=Decimal('1000'), locked=Decimal('0'))
+        self.trader.place_market_order.return_value = {"orderId": 1, "status": "FILLED"}
+        self.agent = TradingAgent("BTCUSDT", "1m", Decimal('10000'), trader=self.trader)
+        self.agent.strategy = MagicMock()
+        self.agent.order_executor = MagicMock()
+        self.agent.order_executor.submit.return_value = True
+
+    def submitted_request(self):
+        return self.agent.order_executor.submit.call_args[0][0]
+
+    def test_enter_signal_is_queued_without_rest_calls(self):
+        self.agent.strategy.generate_signal.return_value = TradeSignal(action='enter', stop_loss=Decimal('99'))
+        self.agent._process_ochlv_data(make_bar('100'))
+        self.trader.get_account_balance.assert_not_called()
+        self.trader.place_market_order.assert_not_called()
+        request = self.submitted_request()
+        self.assertEqual((request.symbol, request.side), ("BTCUSDT", "BUY"))
+        self.assertTrue(self.agent.order_pending)
+        # Sizing runs later on the worker; capped by the 1000 USDT balance
+        self.assertEqual(request.size_order(), Decimal('10'))
+
+    def test_no_new_order_while_one_is_pending(self):
+        self.agent.strategy.generate_signal.return_value = TradeSignal(action='enter', stop_loss=Decimal('99'))
+        self.agent._process_ochlv_data(make_bar('100'))
+        self.agent._process_ochlv_data(make_bar('100'))
+        self.agent.order_executor.submit.assert_called_once()
+
+    def test_fill_events_update_position(self):
+        self.agent.strategy.generate_signal.return_value = TradeSignal(action='enter', stop_loss=Decimal('99'))
+        self.agent._process_ochlv_data(make_bar('100'))
+        self.agent._on_order_event(OrderEvent(self.submitted_request(), 'FILLED', order=FILLED))
+        self.assertTrue(self.agent.in_position)
+        self.assertFalse(self.agent.order_pending)
+
+        self.agent.strategy.generate_signal.return_value = TradeSignal(action='exit')
+        self.agent._process_ochlv_data(make_bar('105'))
+        exit_request = self.submitted_request()
+        self.assertEqual(exit_request.side, 'SELL')
+        self.agent._on_order_event(OrderEvent(exit_request, 'FILLED', order=FILLED))
+        self.assertFalse(self.agent.in_position)
+
+    def test_part_filled_exit_keeps_position(self):
+        self.agent.in_position = True
+        self.agent.strategy.generate_signal.return_value = TradeSignal(action='exit')
+        self.agent._process_ochlv_data(make_bar('105'))
+        expired = {"status": "EXPIRED", "origQty": "1", "executedQty": "0.4"}
+        self.agent._on_order_event(OrderEvent(self.submitted_request(), 'EXPIRED', order=expired))
+        self.assertTrue(self.agent.in_position) # The next exit signal sells the rest
+        self.assertFalse(self.agent.order_pending)
+
+    def test_order_pending_is_cleared_when_handling_fails(self):
+        self.agent.strategy.generate_signal.return_value = TradeSignal(action='enter', stop_loss=Decimal('99'))
+        self.agent._process_ochlv_data(make_bar('100'))
+        malformed = {"status": "FILLED", "origQty": "1", "executedQty": "not a number"}
+        with self.assertRaises(ArithmeticError):
+            self.agent._on_order_event(OrderEvent(self.submitted_request(), 'FILLED', order=malformed))
+        self.assertFalse(self.agent.order_pending)
+
+    def test_strategy_group_replaces_the_default_strategy(self):
+        entering = MagicMock(spec=Strategy, label="entering", indicators=())
+        entering.evaluate.return_value = TradeSignal(action='enter', stop_loss=Decimal('98'))
+        exiting = MagicMock(spec=Strategy, label="exiting", indicators=())
+        exiting.evaluate.return_value = TradeSignal(action='exit')
+        agent = TradingAgent("BTCUSDT", "1m", Decimal('10000'), trader=self.trader, strategies=[exiting, entering])
+        agent.order_executor = MagicMock()
+        agent.order_executor.submit.return_value = True
+        agent._process_ochlv_data(make_bar('100')) # Flat: the exit is skipped for the entry
+        request = agent.order_executor.submit.call_args[0][0]
+        self.assertEqual(request.side, 'BUY')
+        self.assertEqual(agent._entry_levels[0], Decimal('98'))
+        agent._on_order_event(OrderEvent(request, 'FILLED', order=FILLED))
+        agent._process_ochlv_data(make_bar('101'))
+        self.assertEqual(agent.order_executor.submit.call_args[0][0].side, 'SELL')
+        self.assertEqual(entering.evaluate.call_count, 2) # Every strategy sees every bar
+
+    def test_failed_order_keeps_flat_position(self):
+        self.agent.strategy.generate_signal.return_value = TradeSignal(action='enter', stop_loss=None)
+        self.agent._process_ochlv_data(make_bar('100'))
+        request = self.submitted_request()
+        with self.assertRaises(ValueError):
+            request.size_order()
+        self.agent._on_order_event(OrderEvent(request, 'FAILED', error=ValueError("no stop")))
+        self.assertFalse(self.agent.in_position)
+        self.assertFalse(self.agent.order_pending)
+
+    def test_exit_sells_base_asset_from_exchange_info(self):
+        # USDTTRY sells USDT; stripping "USDT" from the symbol would give "TRY"
+        self.trader.symbol_info_manager = MagicMock()
+        self.trader.symbol_info_manager.base_quote.return_value = ("USDT", "TRY")
+        self.agent.symbol = "USDTTRY"
+        self.agent._size_exit()
+        self.trader.get_account_balance.assert_called_once_with("USDT")
+
+class TestTradingAgentBrackets(unittest.TestCase):
+
+    def setUp(self):
+        self.client = MagicMock()
+        self.client.get_asset_balance.return_value = {"asset": "USDT", "free": "1000", "locked": "0"}
+        self.client.create_oco_order.return_value = oco_response(7, 10, 11, "0.49")
+        self.trader = Trader(client=self.client)
+        self.agent = TradingAgent("BTCUSDT", "1m", Decimal('10000'), trader=self.trader, use_brackets=True)
+        self.agent.strategy = MagicMock()
+        self.agent.order_executor = MagicMock()
+        self.agent.order_executor.submit.return_value = True
+
+    def enter(self):
+        self.agent.strategy.generate_signal.return_value = TradeSignal(action='enter', stop_loss=Decimal('98'),
+                                                                       take_profit=Decimal('103'))
+        self.agent._process_ochlv_data(make_bar('100'))
+        request = self.agent.order_executor.submit.call_args[0][0]
+        # 0.01 BTC of the fill went to commission
+        order = {"symbol": "BTCUSDT", "orderId": 1, "status": "FILLED", "origQty": "0.5", "executedQty": "0.5",
+                 "fills": [{"commission": "0.01", "commissionAsset": "BTC"}]}
+        self.agent._on_order_event(OrderEvent(request, 'FILLED', order=order))
+
+    def test_bracket_is_placed_after_entry_fill(self):
+        self.enter()
+        self.client.create_oco_order.assert_called_once()
+        kwargs = self.client.create_oco_order.call_args.kwargs
+        self.assertEqual((kwargs["quantity"], kwargs["abovePrice"], kwargs["belowStopPrice"], kwargs["belowPrice"]),
+                         (0.49, "103.00000000", "98.00000000", "97.80400000"))
+        self.assertTrue(self.agent.in_position)
+        self.assertEqual(self.agent.bracket.order_list_id, 7)
+
+    def test_exchange_exit_flattens_position(self):
+        self.enter()
+        self.trader._on_user_event(execution_report(10, "FILLED", "0.49", "47.9", time=2000, order_type="STOP_LOSS_LIMIT", list_id=7))
+        self.assertTrue(self.agent.in_position)
+        self.trader._on_user_event(execution_report(11, "EXPIRED", time=2000, order_type="LIMIT_MAKER", list_id=7))
+        self.assertFalse(self.agent.in_position)
+        self.assertIsNone(self.agent.bracket)
+
+    def test_exit_signal_cancels_bracket_first(self):
+        self.enter()
+        self.client.v3_delete_order_list.return_value = oco_response(7, 10, 11, "0.49", status="CANCELED")
+        self.agent.strategy.generate_signal.return_value = TradeSignal(action='exit')
+        self.agent._process_ochlv_data(make_bar('101'))
+        request = self.agent.order_executor.submit.call_args[0][0]
+        self.assertEqual(request.size_order(), Decimal('0.49'))
+        self.client.v3_delete_order_list.assert_called_once_with(symbol="BTCUSDT", orderListId=7)
+        self.client.get_asset_balance.assert_not_called() # The size comes from the cancel response
+        self.assertIsNone(self.agent.bracket)
+        self.assertTrue(self.agent.in_position) # Until the market sell fills
+
+    def test_rejected_bracket_leaves_exits_to_signals(self):
+        self.client.create_oco_order.side_effect = RuntimeError("Order would immediately trigger")
+        self.enter()
+        self.assertTrue(self.agent.in_position)
+        self.assertIsNone(self.agent.bracket)
+
+if __name__ == '__main__':
+    unittest.main()
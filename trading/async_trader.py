@@ -0,0 +1,90 @@
+from binance import AsyncClient # type: ignore
+from config.settings import settings
+from models import AccountBalance, OrderInfo
+from decimal import Decimal
+
+class AsyncTrader:
+    """asyncio counterpart of Trader built on python-binance's AsyncClient.
+
+    Use ``await AsyncTrader.create()`` to open the client and ``await close()``
+    to release its HTTP session.
+    """
+
+    def __init__(self, client: AsyncClient):
+        self.client = client
+
+    @classmethod
+    async def create(cls) -> "AsyncTrader":
+        client = await AsyncClient.create(settings.BINANCE_API_KEY, settings.BINANCE_API_SECRET, testnet=True)
+        return cls(client)
+
+    async def close(self):
+        await self.client.close_connection()
+
+    async def get_account_balance(self, asset: str) -> AccountBalance:
+        account_info = await self.client.get_asset_balance(asset=asset)
+        return AccountBalance(
+            asset=asset,
+            free=Decimal(account_info['free']),
+            locked=Decimal(account_info['locked'])
+        )
+
+    async def get_open_orders(self, symbol: str | None = None) -> list[OrderInfo]:
+        open_orders = await self.client.get_open_orders(symbol=symbol)
+        return [OrderInfo(
+            symbol=order['symbol'],
+            orderId=order['orderId'],
+            price=Decimal(order['price']),
+            origQty=Decimal(order['origQty']),
+            executedQty=Decimal(order['executedQty']),
+            status=order['status'],
+            side=order['side'],
+            type=order['type']
+        ) for order in open_orders]
+
+    async def place_market_order(self, symbol: str, side: str, quantity: Decimal) -> dict:
+        """
+        Places a market order.
+        side: 'BUY' or 'SELL'
+        """
+        return await self.client.order_market(
+            symbol=symbol,
+            side=side,
+            quantity=float(quantity) # Binance API expects float for quantity
+        )
+
+    async def place_limit_order(self, symbol: str, side: str, quantity: Decimal, price: Decimal) -> dict:
+        """
+        Places a limit order.
+        side: 'BUY' or 'SELL'
+        """
+        return await self.client.order_limit(
+            symbol=symbol,
+            side=side,
+            quantity=float(quantity),
+            price=f"{price:.8f}"
+        )
+
+    async def place_stop_loss_limit_order(self, symbol: str, side: str, quantity: Decimal, price: Decimal, stop_price: Decimal) -> dict:
+        """
+        Places a stop loss limit order.
+        side: 'BUY' or 'SELL'
+        """
+        return await self.client.create_order(
+            symbol=symbol,
+            side=side,
+            type='STOP_LOSS_LIMIT',
+            timeInForce='GTC',
+            quantity=float(quantity),
+            price=f"{price:.8f}",
+            stopPrice=f"{stop_price:.8f}"
+        )
+
+    async def cancel_order(self, symbol: str, order_id: int) -> dict:
+        """
+        Cancels an open order.
+        """
+        return await self.client.cancel_order(
+            symbol=symbol,
+            orderId=order_id
+        )
@@ -0,0 +1,145 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Callable, Deque, Dict, List, Optional
+from monitoring.latency import LatencyRecorder
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class OrderRequest:
+    """A market order waiting to be placed by an OrderExecutor worker.
+
+    Either ``quantity`` is known up front or ``size_order`` is called on the
+    worker thread to compute it, so any REST lookups needed for sizing (such
+    as balances) also stay off the feed thread.
+    """
+    symbol: str
+    side: str  # 'BUY' or 'SELL'
+    quantity: Optional[Decimal] = None
+    size_order: Optional[Callable[[], Decimal]] = None
+    reference_price: Optional[Decimal] = None  # Expected fill price, for the min-notional check
+    submitted_at: float = field(default_factory=time.perf_counter)
+    received_ns: Optional[int] = None  # perf_counter_ns() when the triggering kline arrived, for tick-to-order latency
+
+@dataclass
+class OrderEvent:
+    """Outcome of an OrderRequest, delivered to the executor's event callback."""
+    request: OrderRequest
+    status: str  # Exchange order status, or 'SKIPPED' / 'FAILED' when nothing was placed
+    quantity: Optional[Decimal] = None
+    order: Optional[dict] = None
+    error: Optional[Exception] = None
+    queue_seconds: float = 0.0  # Time spent waiting for a worker
+    placement_seconds: float = 0.0  # Time spent sizing and placing the order over REST
+
+    @property
+    def filled_quantity(self) -> Decimal:
+        # ACK-type responses carry no quantities; such an order counts as not (yet) filled
+        return Decimal(self.order.get('executedQty', '0')) if self.order is not None else Decimal('0')
+
+    @property
+    def is_filled(self) -> bool:
+        # Reason: the status alone misleads; a NEW market order has not traded yet,
+        # while an EXPIRED one may have filled part of its quantity first
+        return self.filled_quantity > 0
+
+    @property
+    def is_partially_filled(self) -> bool:
+        return self.is_filled and self.filled_quantity < Decimal(self.order.get('origQty', '0'))
+
+class OrderExecutor:
+    """Places orders on a pool of worker threads fed by a bounded queue.
+
+    ``submit`` never blocks, so the websocket callback that generates signals
+    is never held up by exchange latency. All workers share the Trader's
+    python-binance client, whose ``requests.Session`` keeps HTTP connections
+    alive between orders.
+    """
+
+    def __init__(self, trader, on_event: Callable[[OrderEvent], None], workers: int = 2,
+                 max_pending: int = 100, latency_window: int = 1000, latency: Optional[LatencyRecorder] = None):
+        self.trader = trader
+        self.on_event = on_event
+        self.workers = workers
+        self.requests: "queue.Queue[Optional[OrderRequest]]" = queue.Queue(maxsize=max_pending)
+        self.placement_latencies: Deque[float] = deque(maxlen=latency_window)
+        self.threads: List[threading.Thread] = []
+        self.latency = latency # Stage histograms when set
+
+    def start(self):
+        self.threads = [threading.Thread(target=self._run_worker, name=f"order-worker-{index}", daemon=True)
+                        for index in range(self.workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        for _ in self.threads:
+            self.requests.put(None) # One shutdown marker per worker
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+    def submit(self, request: OrderRequest) -> bool:
+        """Queues an order without blocking; returns False if the queue is full."""
+        try:
+            self.requests.put_nowait(request)
+            return True
+        except queue.Full:
+            logger.error(f"Order queue full, dropping {request.side} order for {request.symbol}")
+            return False
+
+    def _run_worker(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                break
+            try:
+                self.on_event(self._execute(request))
+            except Exception as e:
+                logger.error(f"Error handling order event for {request.symbol}: {e}")
+
+    def _execute(self, request: OrderRequest) -> OrderEvent:
+        latency = self.latency
+        started = time.perf_counter()
+        queue_seconds = started - request.submitted_at
+        try:
+            if latency is not None:
+                latency.record('order_queue', int(queue_seconds * 1e9))
+                sizing_started = time.perf_counter_ns()
+            quantity = request.quantity if request.quantity is not None else request.size_order()
+            if latency is not None:
+                placing_started = latency.record_since('sizing', sizing_started)
+            if quantity <= 0:
+                return OrderEvent(request, 'SKIPPED', quantity=quantity, queue_seconds=queue_seconds,
+                                  placement_seconds=time.perf_counter() - started)
+            if request.reference_price is not None:
+                order = self.trader.place_market_order(symbol=request.symbol, side=request.side, quantity=quantity,
+                                                       reference_price=request.reference_price)
+            else:
+                order = self.trader.place_market_order(symbol=request.symbol, side=request.side, quantity=quantity)
+        except Exception as e:
+            return OrderEvent(request, 'FAILED', error=e, queue_seconds=queue_seconds,
+                              placement_seconds=time.perf_counter() - started)
+        if latency is not None:
+            acknowledged = latency.record_since('placement', placing_started)
+            if request.received_ns is not None:
+                latency.record('tick_to_order', acknowledged - request.received_ns)
+        placement_seconds = time.perf_counter() - started
+        self.placement_latencies.append(placement_seconds)
+        return OrderEvent(request, order.get('status', 'NEW'), quantity=quantity, order=order,
+                          queue_seconds=queue_seconds, placement_seconds=placement_seconds)
+
+    def latency_summary(self) -> Dict[str, float]:
+        """Placement latency percentiles in milliseconds over the recent window."""
+        latencies = sorted(self.placement_latencies)
+        if not latencies:
+            return {}
+        def percentile(fraction: float) -> float:
+            return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000
+        return {"count": len(latencies), "p50_ms": percentile(0.50), "p99_ms": percentile(0.99),
+                "max_ms": latencies[-1] * 1000}
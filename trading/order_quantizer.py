@@ -0,0 +1,102 @@
+"""Rounds order quantities and prices onto a symbol's exchange filters.
+
+Binance rejects orders whose quantity is not a multiple of the LOT_SIZE step,
+whose price is not a multiple of the PRICE_FILTER tick, or whose notional is
+below MIN_NOTIONAL/NOTIONAL. ``SymbolQuantizer`` is built once per symbol and
+keeps those filters as scaled integers, so each quantization is an integer
+floor-division instead of Decimal arithmetic on every order.
+"""
+from decimal import ROUND_CEILING, Decimal
+from typing import Optional, Union
+from models import SymbolInfo
+
+Number = Union[Decimal, float, int, str]
+
+# Added before truncating scaled floats so values like 0.57 (0.56999...) land on their step
+_FLOAT_EPSILON = 1e-9
+
+class OrderFilterError(ValueError):
+    """The order cannot satisfy the symbol's exchange filters."""
+
+def _decimal_places(value: Decimal) -> int:
+    exponent = value.normalize().as_tuple().exponent
+    return max(0, -exponent) if isinstance(exponent, int) else 0
+
+def _to_units(value: Number, scale: int, factor: int) -> int:
+    """``value * 10**scale`` truncated toward zero."""
+    if isinstance(value, float):
+        return int(value * factor + _FLOAT_EPSILON)
+    if not isinstance(value, Decimal):
+        value = Decimal(value)
+    return int(value.scaleb(scale))
+
+def _format_units(units: int, scale: int) -> str:
+    if scale == 0:
+        return str(units)
+    sign = '-' if units < 0 else ''
+    whole, fraction = divmod(abs(units), 10 ** scale)
+    return f"{sign}{whole}.{fraction:0{scale}d}"
+
+class SymbolQuantizer:
+    __slots__ = ('symbol', 'step_size', 'tick_size', 'min_qty', 'min_notional',
+                 '_qty_scale', '_qty_factor', '_step_units', '_min_qty_units',
+                 '_price_scale', '_price_factor', '_tick_units', '_min_notional_units')
+
+    def __init__(self, symbol: str, step_size: Decimal, tick_size: Decimal,
+                 min_qty: Decimal = Decimal('0'), min_notional: Decimal = Decimal('0')):
+        self.symbol = symbol
+        self.step_size = step_size
+        self.tick_size = tick_size
+        self.min_qty = min_qty
+        self.min_notional = min_notional
+        self._qty_scale = max(_decimal_places(step_size), _decimal_places(min_qty))
+        self._qty_factor = 10 ** self._qty_scale
+        # A zero step or tick means the filter is absent: keep the full scale
+        self._step_units = max(1, int(step_size.scaleb(self._qty_scale)))
+        self._min_qty_units = int(min_qty.scaleb(self._qty_scale))
+        self._price_scale = _decimal_places(tick_size)
+        self._price_factor = 10 ** self._price_scale
+        self._tick_units = max(1, int(tick_size.scaleb(self._price_scale)))
+        # Notional of quantity units times price units carries both scales
+        self._min_notional_units = int(min_notional.scaleb(self._qty_scale + self._price_scale).to_integral_value(rounding=ROUND_CEILING))
+
+    @classmethod
+    def from_symbol_info(cls, info: SymbolInfo) -> "SymbolQuantizer":
+        return cls(info.exchange_symbol, info.order_size_incremental, info.tick_size,
+                   info.min_order_size, info.min_order_size_in_value)
+
+    def quantity_units(self, quantity: Number) -> int:
+        """Quantity rounded down to the step, in units of 10**-scale."""
+        units = _to_units(quantity, self._qty_scale, self._qty_factor)
+        return units - units % self._step_units
+
+    def price_units(self, price: Number) -> int:
+        units = _to_units(price, self._price_scale, self._price_factor)
+        return units - units % self._tick_units
+
+    def quantize_quantity(self, quantity: Number) -> Decimal:
+        return Decimal(self.quantity_units(quantity)).scaleb(-self._qty_scale)
+
+    def quantize_price(self, price: Number) -> Decimal:
+        return Decimal(self.price_units(price)).scaleb(-self._price_scale)
+
+    def format_quantity(self, quantity: Number) -> str:
+        """Rounded-down quantity as the plain decimal string the API expects."""
+        return _format_units(self.quantity_units(quantity), self._qty_scale)
+
+    def format_price(self, price: Number) -> str:
+        return _format_units(self.price_units(price), self._price_scale)
+
+    def check(self, quantity: Number, price: Optional[Number] = None) -> Decimal:
+        """Rounds ``quantity`` down and validates it against min quantity and min notional.
+
+        ``price`` is the limit price, or a reference price for market orders;
+        without it the notional check is skipped. Returns the rounded quantity.
+        """
+        units = self.quantity_units(quantity)
+        if units <= 0 or units < self._min_qty_units:
+            raise OrderFilterError(f"{self.symbol} quantity {quantity} is below the minimum of {self.min_qty} after rounding to {self.step_size}.")
+        if price is not None and self._min_notional_units:
+            if units * self.price_units(price) < self._min_notional_units:
+                raise OrderFilterError(f"{self.symbol} order notional {quantity} x {price} is below the minimum of {self.min_notional}.")
+        return Decimal(units).scaleb(-self._qty_scale)
@@ -0,0 +1,223 @@
+"""In-memory order lifecycle tracking, fed by REST responses and execution reports.
+
+Every order placed through ``Trader`` is registered from its REST response
+and then advanced by the user-data stream's ``executionReport`` events.
+The two sources race: a market order's REST response may say FILLED before
+the stream's NEW report arrives. Updates therefore only move an order along
+the exchange's lifecycle::
+
+    NEW -> PARTIALLY_FILLED -> FILLED
+      \\          |      \\
+       +-> PENDING_CANCEL -> CANCELED / EXPIRED / EXPIRED_IN_MATCH
+
+Reports that would move an order backwards are dropped. So are reports older
+than the last applied one or with a smaller cumulative fill, and any report
+for an order that has reached a terminal status.
+
+OCO order lists are tracked as ``Bracket``s. A bracket closes once both of
+its legs are terminal. Its ``exit_reason`` comes from the leg that filled:
+'stop_loss' or 'take_profit', or None when the list was canceled unfilled.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {'FILLED', 'CANCELED', 'REJECTED', 'EXPIRED', 'EXPIRED_IN_MATCH'}
+
+# Statuses each live status may move to
+_TRANSITIONS = {
+    'PENDING_NEW': {'NEW', 'PARTIALLY_FILLED', 'PENDING_CANCEL'} | TERMINAL_STATUSES,
+    'NEW': {'PARTIALLY_FILLED', 'PENDING_CANCEL'} | TERMINAL_STATUSES,
+    'PARTIALLY_FILLED': {'PARTIALLY_FILLED', 'PENDING_CANCEL', 'FILLED', 'CANCELED', 'EXPIRED', 'EXPIRED_IN_MATCH'},
+    'PENDING_CANCEL': {'PARTIALLY_FILLED', 'FILLED', 'CANCELED', 'EXPIRED', 'EXPIRED_IN_MATCH'},
+}
+
+STOP_ORDER_TYPES = {'STOP_LOSS', 'STOP_LOSS_LIMIT'}
+
+@dataclass
+class OrderState:
+    symbol: str
+    order_id: int
+    side: str
+    type: str
+    status: str
+    orig_qty: Decimal = Decimal('0')
+    executed_qty: Decimal = Decimal('0')
+    quote_qty: Decimal = Decimal('0')  # Cumulative quote amount of the fills
+    price: Decimal = Decimal('0')
+    stop_price: Decimal = Decimal('0')
+    order_list_id: int = -1
+    update_time: int = 0
+    history: List[str] = field(default_factory=list)  # Every status the order has been in, oldest first
+
+    @property
+    def is_terminal(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    @property
+    def average_price(self) -> Optional[Decimal]:
+        return self.quote_qty / self.executed_qty if self.executed_qty > 0 else None
+
+@dataclass
+class Bracket:
+    """An OCO stop-loss/take-profit pair protecting one position."""
+    symbol: str
+    order_list_id: int
+    quantity: Decimal
+    order_ids: Tuple[int, ...]
+    status: str = 'ACTIVE'  # 'ACTIVE' or 'CLOSED'
+    exit_reason: Optional[str] = None  # 'stop_loss' or 'take_profit' once a leg has filled
+    filled_qty: Decimal = Decimal('0')
+    exit_price: Optional[Decimal] = None
+
+    @property
+    def is_active(self) -> bool:
+        return self.status == 'ACTIVE'
+
+class OrderTracker:
+    """Thread-safe store of ``OrderState``s and ``Bracket``s.
+
+    REST responses arrive on order worker threads and stream events on the
+    websocket thread. Listeners added with ``add_bracket_listener`` are
+    called once per bracket when it closes, outside the tracker's lock.
+    Terminal orders are kept for the last ``retain_closed`` of them.
+    """
+
+    def __init__(self, retain_closed: int = 1000):
+        self._lock = threading.Lock()
+        self.orders: Dict[int, OrderState] = {}
+        self.brackets: Dict[int, Bracket] = {}  # orderListId -> bracket
+        self._closed: "OrderedDict[int, None]" = OrderedDict()
+        self.retain_closed = retain_closed
+        self._bracket_listeners: List[Callable[[Bracket], None]] = []
+
+    def add_bracket_listener(self, callback: Callable[[Bracket], None]):
+        self._bracket_listeners.append(callback)
+
+    def get(self, order_id: int) -> Optional[OrderState]:
+        with self._lock:
+            return self.orders.get(order_id)
+
+    def open_orders(self, symbol: Optional[str] = None) -> List[OrderState]:
+        with self._lock:
+            return [order for order in self.orders.values()
+                    if not order.is_terminal and (symbol is None or order.symbol == symbol)]
+
+    def apply_response(self, response: dict):
+        """Records a REST order response (new order, cancel or order query)."""
+        if 'orderReports' in response:
+            self.apply_order_list(response)
+            return
+        self._apply(int(response['orderId']), {
+            'symbol': response['symbol'],
+            'side': response.get('side', ''),
+            'type': response.get('type', ''),
+            'status': response.get('status', 'NEW'),
+            'orig_qty': response.get('origQty', '0'),
+            'executed_qty': response.get('executedQty', '0'),
+            'quote_qty': response.get('cummulativeQuoteQty', '0'),
+            'price': response.get('price', '0'),
+            'stop_price': response.get('stopPrice', '0'),
+            'order_list_id': response.get('orderListId', -1),
+        }, response.get('transactTime', response.get('updateTime', 0)))
+
+    def apply_order_list(self, response: dict) -> Bracket:
+        """Records an OCO placement or cancel response; returns its bracket."""
+        list_id = int(response['orderListId'])
+        with self._lock:
+            bracket = self.brackets.get(list_id)
+            if bracket is None:
+                reports = response.get('orderReports', [])
+                quantity = Decimal(reports[0]['origQty']) if reports else Decimal('0')
+                bracket = Bracket(response['symbol'], list_id, quantity,
+                                  tuple(int(order['orderId']) for order in response['orders']))
+                self.brackets[list_id] = bracket
+        for report in response.get('orderReports', []):
+            self.apply_response({**report, 'orderListId': list_id})
+        return bracket
+
+    def apply_event(self, event: dict):
+        """Applies a user-data stream event; other event types are ignored."""
+        if event.get('e') != 'executionReport':
+            return
+        self._apply(int(event['i']), {
+            'symbol': event['s'],
+            'side': event.get('S', ''),
+            'type': event.get('o', ''),
+            'status': event['X'],
+            'orig_qty': event.get('q', '0'),
+            'executed_qty': event.get('z', '0'),
+            'quote_qty': event.get('Z', '0'),
+            'price': event.get('p', '0'),
+            'stop_price': event.get('P', '0'),
+            'order_list_id': event.get('g', -1),
+        }, event.get('T', 0))
+
+    def _apply(self, order_id: int, fields: dict, update_time: int):
+        with self._lock:
+            order = self.orders.get(order_id)
+            status = fields['status']
+            executed_qty = Decimal(fields['executed_qty'])
+            if order is None:
+                order = OrderState(fields['symbol'], order_id, fields['side'], fields['type'], status,
+                                   Decimal(fields['orig_qty']), executed_qty, Decimal(fields['quote_qty']),
+                                   Decimal(fields['price']), Decimal(fields['stop_price']),
+                                   int(fields['order_list_id']), update_time, [status])
+                self.orders[order_id] = order
+            else:
+                if order.is_terminal or update_time < order.update_time or executed_qty < order.executed_qty:
+                    return
+                if status != order.status and status not in _TRANSITIONS.get(order.status, ()):
+                    logger.debug(f"Ignoring {order.status} -> {status} for order {order_id}")
+                    return
+                if status != order.status:
+                    order.history.append(status)
+                order.status = status
+                order.executed_qty = executed_qty
+                order.quote_qty = Decimal(fields['quote_qty'])
+                order.update_time = update_time
+                # Acks and reports can omit these
+                order.side = order.side or fields['side']
+                order.type = order.type or fields['type']
+                if order.order_list_id < 0:
+                    order.order_list_id = int(fields['order_list_id'])
+            closed_bracket = None
+            if order.is_terminal:
+                self._closed[order_id] = None
+                self._evict_closed()
+                closed_bracket = self._resolve_bracket(order.order_list_id)
+        if closed_bracket is not None:
+            for listener in self._bracket_listeners:
+                try:
+                    listener(closed_bracket)
+                except Exception as e:
+                    logger.error(f"Error in bracket listener for {closed_bracket.symbol}: {e}")
+
+    def _resolve_bracket(self, list_id: int) -> Optional[Bracket]:
+        bracket = self.brackets.get(list_id)
+        if bracket is None or not bracket.is_active:
+            return None
+        legs = [self.orders.get(order_id) for order_id in bracket.order_ids]
+        if any(leg is None or not leg.is_terminal for leg in legs):
+            return None
+        bracket.status = 'CLOSED'
+        filled = [leg for leg in legs if leg.executed_qty > 0]
+        if filled:
+            leg = max(filled, key=lambda leg: leg.executed_qty)
+            bracket.exit_reason = 'stop_loss' if leg.type in STOP_ORDER_TYPES else 'take_profit'
+            bracket.filled_qty = sum((leg.executed_qty for leg in filled), Decimal('0'))
+            bracket.exit_price = sum((leg.quote_qty for leg in filled), Decimal('0')) / bracket.filled_qty
+        return bracket
+
+    def _evict_closed(self):
+        while len(self._closed) > self.retain_closed:
+            order_id, _ = self._closed.popitem(last=False)
+            order = self.orders.pop(order_id, None)
+            if order is not None and order.order_list_id in self.brackets and \
+                    not self.brackets[order.order_list_id].is_active:
+                self.brackets.pop(order.order_list_id)
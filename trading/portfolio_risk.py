@@ -0,0 +1,239 @@
+"""Portfolio-level limits on top of RiskManager's per-trade sizing.
+
+``PortfolioRiskManager`` tracks the open position and last mark of every
+symbol it trades and gates new orders against:
+
+* gross exposure: the sum of absolute position notionals,
+* net exposure: the signed sum of position notionals,
+* concentration: the notional held in any one base asset, summed over every
+  symbol that trades it (BTCUSDT and BTCFDUSD both count towards BTC),
+* correlation-adjusted risk: the standard deviation of the portfolio's
+  per-interval return, ``sqrt(wᵀ Σ w)`` for notionals ``w`` and the rolling
+  covariance ``Σ`` of the symbols' interval log returns.
+
+All limits are fractions of account equity. Positions and marks live in
+float arrays with one slot per symbol. Running totals are adjusted
+incrementally on every fill and mark update, including ``Σw``, so a
+pre-trade check touches a fixed handful of scalars regardless of how many
+symbols are tracked. The covariance is a rolling window kept as running sums
+of returns and their outer products. Each closed interval adds its return
+vector and retires the oldest one in O(n²), and the sums are rebuilt exactly
+once per window to shed floating-point drift.
+"""
+from dataclasses import dataclass
+from decimal import Decimal
+from math import sqrt
+from typing import Dict, Iterable, Mapping, Optional, Tuple, Union
+import numpy as np
+from trading.risk_manager import RiskManager
+from trading.symbol_info_manager import split_symbol
+
+Number = Union[Decimal, float, int]
+
+@dataclass
+class PortfolioLimits:
+    """Caps as fractions of account equity; None leaves a dimension unchecked."""
+    max_gross_exposure: Optional[float] = 1.0
+    max_net_exposure: Optional[float] = 1.0
+    max_asset_concentration: Optional[float] = 0.25
+    max_portfolio_volatility: Optional[float] = None  # Std. dev. of the per-interval portfolio return
+
+class PortfolioRiskManager(RiskManager):
+    """RiskManager for many concurrent positions with exposure, concentration and covariance limits.
+
+    Feed it every closed bar through ``update_prices`` and every fill through
+    ``on_fill``. ``calculate_position_size`` keeps the per-trade risk sizing
+    and, given a symbol, shrinks the size to what the portfolio limits allow.
+    """
+
+    def __init__(self, account_balance: Decimal, symbols: Iterable[str], limits: Optional[PortfolioLimits] = None,
+                 risk_per_trade_percentage: Decimal = Decimal('0.10'), window: int = 200,
+                 assets: Optional[Mapping[str, Tuple[str, str]]] = None):
+        super().__init__(account_balance, risk_per_trade_percentage)
+        self.limits = limits or PortfolioLimits()
+        self.symbols = [symbol.upper() for symbol in symbols]
+        self.rows: Dict[str, int] = {symbol: row for row, symbol in enumerate(self.symbols)}
+        base_assets = [(assets[symbol] if assets is not None else split_symbol(symbol))[0] for symbol in self.symbols]
+        self.assets = list(dict.fromkeys(base_assets))
+        self._asset_of = np.array([self.assets.index(asset) for asset in base_assets], dtype=np.int64)
+        size = len(self.symbols)
+        self.quantity = np.zeros(size)
+        self.marks = np.zeros(size) # Last price seen per symbol; 0 until the first one
+        self._notional = np.zeros(size)
+        self._asset_exposure = np.zeros(len(self.assets))
+        self._gross = 0.0
+        self._net = 0.0
+        # Rolling covariance of interval log returns
+        self.window = window
+        self._returns = np.zeros((window, size)) # Ring buffer of return rows
+        self._return_sum = np.zeros(size)
+        self._return_products = np.zeros((size, size))
+        self._return_count = 0
+        self.covariance = np.zeros((size, size))
+        self._covariance_notional = np.zeros(size) # Σw, kept current for O(1) marginal variance
+        self._variance = 0.0 # wᵀΣw
+        self._interval_marks = np.zeros(size) # Marks when the last return row was committed
+        self._interval_time: Optional[int] = None
+        self._equity = float(account_balance)
+
+    def update_account_balance(self, new_balance: Decimal):
+        super().update_account_balance(new_balance)
+        self._equity = float(new_balance)
+
+    def _move_notional(self, row: int, notional: float):
+        change = notional - self._notional[row]
+        if change == 0.0:
+            return
+        self._gross += abs(notional) - abs(self._notional[row])
+        self._net += change
+        self._asset_exposure[self._asset_of[row]] += change
+        # wᵀΣw after w_row += change, using Σw from before the move
+        self._variance += 2.0 * change * self._covariance_notional[row] + change * change * self.covariance[row, row]
+        self._covariance_notional += change * self.covariance[:, row]
+        self._notional[row] = notional
+
+    def update_prices(self, prices: Mapping[str, Number], timestamp: int):
+        """Marks positions to the closes of bars opened at ``timestamp``.
+
+        Bars of one interval may arrive in several calls. The first call for a
+        later interval commits the previous interval's return vector to the
+        covariance window, with a zero return for symbols that had no bar.
+        """
+        if self._interval_time is not None and timestamp > self._interval_time:
+            self._commit_returns()
+        if self._interval_time is None or timestamp > self._interval_time:
+            self._interval_time = timestamp
+        for symbol, price in prices.items():
+            row = self.rows[symbol.upper()]
+            self.marks[row] = float(price)
+            self._move_notional(row, self.quantity[row] * self.marks[row])
+
+    def _commit_returns(self):
+        started = self._interval_marks > 0
+        returns = np.zeros(len(self.symbols))
+        returns[started] = np.log(self.marks[started] / self._interval_marks[started])
+        self._interval_marks = self.marks.copy()
+        if not started.any():
+            return # The first interval only sets the reference marks
+        slot = self._return_count % self.window
+        retired = self._returns[slot]
+        self._return_sum += returns - retired
+        self._return_products += np.outer(returns, returns) - np.outer(retired, retired)
+        self._returns[slot] = returns
+        self._return_count += 1
+        if slot == self.window - 1:
+            # Reason: add-and-subtract updates accumulate rounding error; rebuild exactly once per window
+            self._return_sum = self._returns.sum(axis=0)
+            self._return_products = self._returns.T @ self._returns
+        count = min(self._return_count, self.window)
+        if count < 2:
+            return
+        mean = self._return_sum / count
+        self.covariance = (self._return_products - count * np.outer(mean, mean)) / (count - 1)
+        self._covariance_notional = self.covariance @ self._notional
+        self._variance = float(self._notional @ self._covariance_notional)
+
+    def on_fill(self, symbol: str, side: str, quantity: Number, price: Number):
+        """Applies an executed fill; ``side`` is 'BUY' or 'SELL'."""
+        row = self.rows[symbol.upper()]
+        signed = float(quantity) if side == 'BUY' else -float(quantity)
+        self.set_position(symbol, self.quantity[row] + signed, price)
+
+    def set_position(self, symbol: str, quantity: Number, price: Number):
+        """Replaces the tracked position, e.g. after reconciling with account balances."""
+        row = self.rows[symbol.upper()]
+        self.quantity[row] = float(quantity)
+        self.marks[row] = float(price)
+        self._move_notional(row, self.quantity[row] * self.marks[row])
+
+    def _allowed_change(self, row: int) -> Tuple[float, float]:
+        """Interval of notional changes on ``row`` that keep every limit satisfied (may be empty)."""
+        limits = self.limits
+        equity = self._equity
+        current = float(self._notional[row])
+        low, high = -np.inf, np.inf
+        if limits.max_gross_exposure is not None:
+            room = limits.max_gross_exposure * equity - (self._gross - abs(current))
+            low, high = max(low, -room - current), min(high, room - current)
+        if limits.max_net_exposure is not None:
+            cap = limits.max_net_exposure * equity
+            low, high = max(low, -cap - self._net), min(high, cap - self._net)
+        if limits.max_asset_concentration is not None:
+            cap = limits.max_asset_concentration * equity
+            exposure = float(self._asset_exposure[self._asset_of[row]])
+            low, high = max(low, -cap - exposure), min(high, cap - exposure)
+        if limits.max_portfolio_volatility is not None:
+            # variance + 2·Δ·(Σw)_row + Δ²·Σ_row,row <= cap²
+            cap = (limits.max_portfolio_volatility * equity) ** 2
+            own = float(self.covariance[row, row])
+            cross = float(self._covariance_notional[row])
+            if own > 0.0:
+                discriminant = cross * cross - own * (self._variance - cap)
+                if discriminant < 0.0:
+                    return 0.0, -1.0
+                root = sqrt(discriminant)
+                low, high = max(low, (-cross - root) / own), min(high, (-cross + root) / own)
+            elif self._variance > cap:
+                return 0.0, -1.0
+        return low, high
+
+    def check_order(self, symbol: str, side: str, quantity: Number, price: Optional[Number] = None) -> Optional[str]:
+        """None when the order fits the limits, otherwise the reason it does not.
+
+        Orders that only shrink an existing position are always allowed.
+        ``price`` defaults to the symbol's last mark.
+        """
+        row = self.rows[symbol.upper()]
+        price = float(price) if price is not None else float(self.marks[row])
+        change = float(quantity) * price * (1.0 if side == 'BUY' else -1.0)
+        current = float(self._notional[row])
+        if current * change < 0.0 and abs(change) <= abs(current):
+            return None
+        low, high = self._allowed_change(row)
+        if low <= change <= high:
+            return None
+        return self._violated_limit(row, change)
+
+    def _violated_limit(self, row: int, change: float) -> str:
+        limits = self.limits
+        equity = self._equity
+        current = float(self._notional[row])
+        if limits.max_gross_exposure is not None and \
+                self._gross - abs(current) + abs(current + change) > limits.max_gross_exposure * equity:
+            return "gross exposure"
+        if limits.max_net_exposure is not None and abs(self._net + change) > limits.max_net_exposure * equity:
+            return "net exposure"
+        if limits.max_asset_concentration is not None and \
+                abs(self._asset_exposure[self._asset_of[row]] + change) > limits.max_asset_concentration * equity:
+            return f"{self.assets[self._asset_of[row]]} concentration"
+        return "portfolio volatility"
+
+    def max_order_quantity(self, symbol: str, side: str, price: Optional[Number] = None) -> float:
+        """Largest quantity of ``side`` on ``symbol`` the limits allow at ``price``; 0 when none."""
+        row = self.rows[symbol.upper()]
+        price = float(price) if price is not None else float(self.marks[row])
+        if price <= 0.0:
+            return 0.0
+        low, high = self._allowed_change(row)
+        if low > high:
+            return 0.0
+        notional = high if side == 'BUY' else -low
+        return max(0.0, notional / price)
+
+    def calculate_position_size(self, entry_price: Decimal, stop_loss_price: Decimal,
+                                symbol: Optional[str] = None) -> Decimal:
+        position_size = super().calculate_position_size(entry_price, stop_loss_price)
+        if symbol is None:
+            return position_size
+        allowed = Decimal(repr(self.max_order_quantity(symbol, 'BUY', entry_price)))
+        return min(position_size, allowed)
+
+    def exposure(self) -> dict:
+        """Current exposure figures, as fractions of equity."""
+        equity = self._equity
+        return {
+            "gross": self._gross / equity,
+            "net": self._net / equity,
+            "assets": {asset: float(value) / equity for asset, value in zip(self.assets, self._asset_exposure) if value},
+            "volatility": sqrt(max(self._variance, 0.0)) / equity,
+        }
@@ -0,0 +1,218 @@
+"""Client-side budget for Binance's request-weight and order-rate limits.
+
+Binance spot allows a request weight per minute per IP (every endpoint has a
+weight) and a number of new orders per 10 seconds per account. Going over
+either answers 429, and ignoring 429s escalates to 418 IP bans.
+``RequestRateLimiter`` keeps a token bucket for each limit and makes every
+REST call wait for its tokens first:
+
+* Callers queue by priority, so cancels go before new orders and both go
+  before balance or open-order queries. Queries also leave a reserve of the
+  weight bucket untouched, so a burst of them cannot starve an order.
+* Identical queries already in flight are coalesced: later callers wait for
+  the running request and share its result instead of spending weight.
+* The ``X-MBX-USED-WEIGHT-1M`` and ``X-MBX-ORDER-COUNT-10S`` headers of every
+  response pull the buckets down to what the server reports, which covers
+  other processes sharing the IP. A 429 or 418 pauses all calls for its
+  ``Retry-After``.
+
+``stats()`` reports what was spent, waited for and saved.
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CANCEL_PRIORITY = 0
+ORDER_PRIORITY = 1
+QUERY_PRIORITY = 2
+PRIORITY_NAMES = {CANCEL_PRIORITY: 'cancel', ORDER_PRIORITY: 'order', QUERY_PRIORITY: 'query'}
+
+@dataclass(frozen=True)
+class EndpointCost:
+    weight: int
+    orders: int  # Counted against the order-rate limit
+    priority: int
+
+# Spot API weights of the endpoints Trader calls
+ENDPOINT_COSTS: Dict[str, EndpointCost] = {
+    'order': EndpointCost(1, 1, ORDER_PRIORITY),  # POST /api/v3/order
+    'order_list': EndpointCost(1, 2, ORDER_PRIORITY),  # POST /api/v3/orderList/oco
+    'cancel_order': EndpointCost(1, 0, CANCEL_PRIORITY),  # DELETE /api/v3/order
+    'cancel_order_list': EndpointCost(1, 0, CANCEL_PRIORITY),  # DELETE /api/v3/orderList
+    'account': EndpointCost(20, 0, QUERY_PRIORITY),  # GET /api/v3/account
+    'open_orders': EndpointCost(6, 0, QUERY_PRIORITY),  # GET /api/v3/openOrders?symbol=...
+    'open_orders_all': EndpointCost(80, 0, QUERY_PRIORITY),  # GET /api/v3/openOrders
+    'exchange_info': EndpointCost(20, 0, QUERY_PRIORITY),  # GET /api/v3/exchangeInfo
+}
+
+class TokenBucket:
+    """``capacity`` tokens refilled evenly over ``period_seconds``."""
+
+    def __init__(self, capacity: float, period_seconds: float, now: float):
+        self.capacity = capacity
+        self.rate = capacity / period_seconds
+        self.tokens = capacity
+        self.updated = now
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def seconds_until(self, amount: float, floor: float = 0.0) -> float:
+        """Time until ``amount`` can be taken without dropping below ``floor``; 0 if it can be now."""
+        missing = amount + floor - self.tokens
+        return max(0.0, missing / self.rate)
+
+    def limit_to(self, remaining: float):
+        self.tokens = min(self.tokens, remaining)
+
+class RequestRateLimiter:
+    """Priority-ordered token buckets for request weight and new orders.
+
+    Thread-safe; order workers, the reconcile thread and callers of
+    ``get_account_balance`` all go through one instance.
+    """
+
+    def __init__(self, weight_per_minute: int = 6000, orders_per_10s: int = 100, query_reserve: float = 0.2,
+                 clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        now = clock()
+        self.weight = TokenBucket(weight_per_minute, 60.0, now)
+        self.orders = TokenBucket(orders_per_10s, 10.0, now)
+        self.query_reserve = query_reserve * weight_per_minute # Weight queries must leave for orders and cancels
+        self._condition = threading.Condition()
+        self._waiting: List[Tuple[int, int]] = [] # (priority, arrival) heap of callers waiting for tokens
+        self._arrivals = itertools.count()
+        self._paused_until = 0.0
+        self._in_flight: Dict[Hashable, Future] = {}
+        # Stats
+        self._requests = {name: 0 for name in PRIORITY_NAMES.values()}
+        self._weight_spent = 0
+        self._orders_sent = 0
+        self._waits = 0
+        self._wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._coalesced = 0
+        self._throttled = 0
+        self._banned = 0
+        self._server_used_weight: Optional[int] = None
+
+    def call(self, endpoint: str, request: Callable[[], Any], coalesce_key: Optional[Hashable] = None) -> Any:
+        """Runs ``request`` once ``endpoint``'s tokens are available.
+
+        With ``coalesce_key``, a caller arriving while a request with the same
+        key is running waits for it and gets its result (or its exception).
+        """
+        if coalesce_key is None:
+            self.acquire(ENDPOINT_COSTS[endpoint])
+            return request()
+        with self._condition:
+            future = self._in_flight.get(coalesce_key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[coalesce_key] = Future()
+            else:
+                self._coalesced += 1
+        if not leader:
+            return future.result()
+        try:
+            self.acquire(ENDPOINT_COSTS[endpoint])
+            result = request()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._condition:
+                del self._in_flight[coalesce_key]
+
+    def acquire(self, cost: EndpointCost) -> float:
+        """Blocks until ``cost`` fits the buckets and no higher-priority caller is waiting; returns the wait."""
+        started = self.clock()
+        blocked = False
+        with self._condition:
+            ticket = (cost.priority, next(self._arrivals))
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    now = self.clock()
+                    if self._waiting[0] == ticket:
+                        delay = self._delay(cost, now)
+                        if delay <= 0.0:
+                            break
+                    else:
+                        delay = None # Woken when the callers ahead are through
+                    blocked = True
+                    self._condition.wait(delay)
+                self.weight.tokens -= cost.weight
+                self.orders.tokens -= cost.orders
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._condition.notify_all()
+            waited = self.clock() - started if blocked else 0.0
+            self._requests[PRIORITY_NAMES[cost.priority]] += 1
+            self._weight_spent += cost.weight
+            self._orders_sent += cost.orders
+            if blocked:
+                self._waits += 1
+                self._wait_seconds += waited
+                self._max_wait_seconds = max(self._max_wait_seconds, waited)
+        return waited
+
+    def _delay(self, cost: EndpointCost, now: float) -> float:
+        self.weight.refill(now)
+        self.orders.refill(now)
+        floor = self.query_reserve if cost.priority == QUERY_PRIORITY else 0.0
+        return max(self._paused_until - now, self.weight.seconds_until(cost.weight, floor),
+                   self.orders.seconds_until(cost.orders))
+
+    def observe_response(self, status_code: int, headers) -> None:
+        """Syncs the buckets with a response's usage headers and honours 429/418 back-offs."""
+        used_weight = headers.get('X-MBX-USED-WEIGHT-1M')
+        order_count = headers.get('X-MBX-ORDER-COUNT-10S')
+        with self._condition:
+            now = self.clock()
+            if used_weight is not None:
+                self._server_used_weight = int(used_weight)
+                self.weight.refill(now)
+                self.weight.limit_to(self.weight.capacity - int(used_weight))
+            if order_count is not None:
+                self.orders.refill(now)
+                self.orders.limit_to(self.orders.capacity - int(order_count))
+            if status_code in (429, 418):
+                retry_after = float(headers.get('Retry-After') or 60)
+                self._paused_until = max(self._paused_until, now + retry_after)
+                if status_code == 429:
+                    self._throttled += 1
+                else:
+                    self._banned += 1
+                logger.warning(f"Binance answered {status_code}, pausing REST calls for {retry_after:.0f} s")
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            self.weight.refill(self.clock())
+            return {
+                "requests": dict(self._requests),
+                "weight_spent": self._weight_spent,
+                "orders_sent": self._orders_sent,
+                "available_weight": self.weight.tokens,
+                "server_used_weight": self._server_used_weight,
+                "waits": self._waits,
+                "wait_seconds": self._wait_seconds,
+                "max_wait_seconds": self._max_wait_seconds,
+                "coalesced": self._coalesced,
+                "throttled": self._throttled,
+                "banned": self._banned,
+                "queued": len(self._waiting),
+            }
@@ -1,72 +1,295 @@
+import json
+import logging
+import os
+import threading
+import time
 import requests
-from typing import List, Dict, Optional
+from dataclasses import dataclass, field, replace
+from typing import FrozenSet, List, Dict, Iterable, Optional, Tuple
 from decimal import Decimal
 from models import SymbolInfo
+from trading.order_quantizer import SymbolQuantizer
+from trading.rate_limiter import RequestRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Fields kept per symbol in the on-disk cache, in this order
+_CACHE_FIELDS = ('exchange_symbol', 'price_ccy', 'price_quote_ccy', 'is_live',
+                 'order_size_incremental', 'min_order_size', 'min_order_size_in_value', 'tick_size')
+CACHE_FORMAT_VERSION = 1
+# Quote assets tried, longest first, when a symbol is not in the snapshot
+KNOWN_QUOTE_ASSETS = ('FDUSD', 'USDT', 'USDC', 'TUSD', 'BUSD', 'EUR', 'TRY', 'BTC', 'ETH', 'BNB')
+
+def split_symbol(exchange_symbol: str) -> Tuple[str, str]:
+    """(base, quote) guessed from a known quote-asset suffix, e.g. USDTTRY -> (USDT, TRY)."""
+    exchange_symbol = exchange_symbol.upper()
+    for quote in KNOWN_QUOTE_ASSETS:
+        if exchange_symbol.endswith(quote) and len(exchange_symbol) > len(quote):
+            return exchange_symbol[:-len(quote)], quote
+    raise ValueError(f"Cannot split {exchange_symbol} into base and quote assets without exchange info.")
+
+def parse_symbol(symbol_data: dict) -> SymbolInfo:
+    """Builds SymbolInfo from one entry of the exchangeInfo ``symbols`` list."""
+    # Extract filters for min_qty, step_size, min_notional, tick_size
+    min_order_size = Decimal('0')
+    order_size_incremental = Decimal('0')
+    min_order_size_in_value = Decimal('0')
+    tick_size = Decimal('0')
+
+    for f in symbol_data.get('filters', []):
+        if f['filterType'] == 'LOT_SIZE':
+            min_order_size = Decimal(f.get('minQty', '0'))
+            order_size_incremental = Decimal(f.get('stepSize', '0'))
+        elif f['filterType'] in ('MIN_NOTIONAL', 'NOTIONAL'): # NOTIONAL replaced MIN_NOTIONAL on spot
+            min_order_size_in_value = Decimal(f.get('minNotional', '0'))
+        elif f['filterType'] == 'PRICE_FILTER':
+            tick_size = Decimal(f.get('tickSize', '0'))
+
+    return _symbol_info(
+        exchange_symbol=symbol_data['symbol'],
+        base_asset=symbol_data['baseAsset'],
+        quote_asset=symbol_data['quoteAsset'],
+        is_live=symbol_data.get('status') == 'TRADING',
+        order_size_incremental=order_size_incremental,
+        min_order_size=min_order_size,
+        min_order_size_in_value=min_order_size_in_value,
+        tick_size=tick_size,
+    )
+
+def _symbol_info(exchange_symbol: str, base_asset: str, quote_asset: str, is_live: bool,
+                 order_size_incremental: Decimal, min_order_size: Decimal,
+                 min_order_size_in_value: Decimal, tick_size: Decimal) -> SymbolInfo:
+    return SymbolInfo(
+        exchange="BINANCE_SPOT", # Assuming Binance Spot for this project
+        # Construct global_symbol (example: FX-ETH/USDT for ETHUSDT)
+        # This is a simplification and might need more complex logic for other exchanges/types
+        global_symbol=f"FX-{base_asset}/{quote_asset}",
+        price_ccy=base_asset,
+        price_quote_ccy=quote_asset,
+        exchange_symbol=exchange_symbol,
+        size_ccy=base_asset, # For spot, size_ccy is typically baseAsset
+        size_multiplier=Decimal('1'), # For spot, 1 contract value is 1
+        market_type="SPOT", # Default for spot API
+        is_live=is_live,
+        order_size_incremental=order_size_incremental,
+        min_order_size=min_order_size,
+        min_order_size_in_value=min_order_size_in_value,
+        tick_size=tick_size,
+        expiry_datetime=None, # Not applicable for spot
+        update_datetime=None # Binance exchangeInfo doesn't provide this per symbol
+    )
+
+@dataclass
+class ExchangeInfoSnapshot:
+    """Immutable-by-convention view of the exchange's symbols.
+
+    A refresh builds a new snapshot and swaps it in with one assignment, so
+    readers on other threads always see a consistent set of symbols,
+    quantizers and lookup indexes.
+    """
+    symbols_info: Dict[str, SymbolInfo] = field(default_factory=dict)
+    quantizers: Dict[str, SymbolQuantizer] = field(default_factory=dict)
+    fetched_at: float = 0.0  # time.time() of the last full download or revalidation
+    etag: Optional[str] = None
+    # Secondary indexes, built once per snapshot; symbol tuples keep exchange order
+    by_base: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+    by_quote: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+    by_global_symbol: Dict[str, SymbolInfo] = field(default_factory=dict)
+    live: FrozenSet[str] = frozenset()
+
+    @classmethod
+    def build(cls, symbols: Iterable[SymbolInfo], fetched_at: float, etag: Optional[str] = None) -> "ExchangeInfoSnapshot":
+        symbols_info = {s.exchange_symbol: s for s in symbols}
+        quantizers = {name: SymbolQuantizer.from_symbol_info(s) for name, s in symbols_info.items()}
+        by_base: Dict[str, List[str]] = {}
+        by_quote: Dict[str, List[str]] = {}
+        for name, info in symbols_info.items():
+            by_base.setdefault(info.price_ccy, []).append(name)
+            by_quote.setdefault(info.price_quote_ccy, []).append(name)
+        return cls(
+            symbols_info, quantizers, fetched_at, etag,
+            by_base={asset: tuple(names) for asset, names in by_base.items()},
+            by_quote={asset: tuple(names) for asset, names in by_quote.items()},
+            by_global_symbol={info.global_symbol: info for info in symbols_info.values()},
+            live=frozenset(name for name, info in symbols_info.items() if info.is_live),
+        )
 
 class SymbolInfoManager:
-    def __init__(self, base_url: str = "https://testnet.binance.vision"):
+    """Exchange symbol metadata with an on-disk cache and background refresh.
+
+    With ``cache_path`` set, the last snapshot is loaded from disk at startup
+    without touching the network and every full download is written back.
+    ``start_auto_refresh`` revalidates the snapshot once it is older than
+    ``ttl_seconds``. With ``rate_limiter`` set, every download waits for its
+    request weight and reports the server's usage headers back to it.
+    """
+
+    def __init__(self, base_url: str = "https://testnet.binance.vision", cache_path: Optional[str] = None,
+                 ttl_seconds: float = 3600, timeout: float = 10, rate_limiter: Optional[RequestRateLimiter] = None):
         self.base_url = base_url
         self.exchange_info_endpoint = "/api/v3/exchangeInfo"
-        self.symbols_info: Dict[str, SymbolInfo] = {} # Cache for symbol info
+        self.cache_path = cache_path
+        self.ttl_seconds = ttl_seconds
+        self.timeout = timeout # seconds, per request
+        self.rate_limiter = rate_limiter # Shared with the Trader so exchangeInfo weight counts against its budget
+        self.snapshot = ExchangeInfoSnapshot()
+        self._fetch_lock = threading.Lock() # One download at a time; readers never wait on it
+        self._stop_refreshing = threading.Event()
+        self._refresh_thread: Optional[threading.Thread] = None
+        if cache_path is not None:
+            self.load_cache()
 
-    def fetch_exchange_info(self) -> List[SymbolInfo]:
-        url = f"{self.base_url}{self.exchange_info_endpoint}"
+    @property
+    def symbols_info(self) -> Dict[str, SymbolInfo]:
+        return self.snapshot.symbols_info
+
+    @property
+    def quantizers(self) -> Dict[str, SymbolQuantizer]:
+        return self.snapshot.quantizers
+
+    @property
+    def is_stale(self) -> bool:
+        return time.time() - self.snapshot.fetched_at >= self.ttl_seconds
+
+    def load_cache(self) -> bool:
+        """Replaces the snapshot with the on-disk cache; returns False if there is none."""
         try:
-            response = requests.get(url)
-            response.raise_for_status() # Raise an exception for HTTP errors
-            data = response.json()
-            
-            parsed_symbols = []
-            for symbol_data in data.get("symbols", []):
-                # Extract filters for min_qty, step_size, min_notional, tick_size
-                min_order_size = Decimal('0')
-                order_size_incremental = Decimal('0')
-                min_order_size_in_value = Decimal('0')
-                tick_size = Decimal('0')
-
-                for f in symbol_data.get('filters', []):
-                    if f['filterType'] == 'LOT_SIZE':
-                        min_order_size = Decimal(f.get('minQty', '0'))
-                        order_size_incremental = Decimal(f.get('stepSize', '0'))
-                    elif f['filterType'] == 'MIN_NOTIONAL':
-                        min_order_size_in_value = Decimal(f.get('minNotional', '0'))
-                    elif f['filterType'] == 'PRICE_FILTER':
-                        tick_size = Decimal(f.get('tickSize', '0'))
-
-                # Determine market_type
-                market_type = "SPOT" # Default for spot API
-
-                # Determine is_live
-                is_live = symbol_data.get('status') == 'TRADING'
-
-                # Construct global_symbol (example: FX-ETH/USDT for ETHUSDT)
-                # This is a simplification and might need more complex logic for other exchanges/types
-                global_symbol = f"FX-{symbol_data['baseAsset']}/{symbol_data['quoteAsset']}"
-
-                parsed_symbols.append(SymbolInfo(
-                    exchange="BINANCE_SPOT", # Assuming Binance Spot for this project
-                    global_symbol=global_symbol,
-                    price_ccy=symbol_data['baseAsset'],
-                    price_quote_ccy=symbol_data['quoteAsset'],
-                    exchange_symbol=symbol_data['symbol'],
-                    size_ccy=symbol_data['baseAsset'], # For spot, size_ccy is typically baseAsset
-                    size_multiplier=Decimal('1'), # For spot, 1 contract value is 1
-                    market_type=market_type,
-                    is_live=is_live,
-                    order_size_incremental=order_size_incremental,
-                    min_order_size=min_order_size,
-                    min_order_size_in_value=min_order_size_in_value,
-                    tick_size=tick_size,
-                    expiry_datetime=None, # Not applicable for spot
-                    update_datetime=None # Binance exchangeInfo doesn't provide this per symbol
-                ))
-            self.symbols_info = {s.exchange_symbol: s for s in parsed_symbols}
+            with open(self.cache_path) as cache_file:
+                cached = json.load(cache_file)
+            if cached.get('version') != CACHE_FORMAT_VERSION:
+                return False
+            symbols = [
+                _symbol_info(symbol, base, quote, bool(is_live), Decimal(step), Decimal(min_qty), Decimal(min_notional), Decimal(tick))
+                for symbol, base, quote, is_live, step, min_qty, min_notional, tick in cached['symbols']
+            ]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            if not isinstance(e, FileNotFoundError):
+                logger.warning(f"Ignoring unreadable exchange info cache {self.cache_path}: {e}")
+            return False
+        self.snapshot = ExchangeInfoSnapshot.build(symbols, cached.get('fetched_at', 0.0), cached.get('etag'))
+        return True
+
+    def _save_cache(self, snapshot: ExchangeInfoSnapshot):
+        cached = {
+            'version': CACHE_FORMAT_VERSION,
+            'fetched_at': snapshot.fetched_at,
+            'etag': snapshot.etag,
+            'symbols': [[str(getattr(s, name)) if isinstance(getattr(s, name), Decimal) else getattr(s, name)
+                         for name in _CACHE_FIELDS] for s in snapshot.symbols_info.values()],
+        }
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary_path = f"{self.cache_path}.tmp"
+        with open(temporary_path, 'w') as cache_file:
+            json.dump(cached, cache_file, separators=(',', ':'))
+        # Reason: a reader (or a crash) must never see a half-written cache
+        os.replace(temporary_path, self.cache_path)
+
+    def fetch_exchange_info(self, symbols: Optional[List[str]] = None) -> List[SymbolInfo]:
+        """Downloads exchange info, or only ``symbols`` when given, and swaps in a new snapshot.
+
+        A targeted fetch is merged into the current snapshot. A full fetch
+        sends the cached ETag and keeps the snapshot if the server answers
+        304 Not Modified. Returns the symbols received (empty on errors).
+        """
+        url = f"{self.base_url}{self.exchange_info_endpoint}"
+        params = {'symbols': json.dumps([s.upper() for s in symbols], separators=(',', ':'))} if symbols else None
+        headers = {'If-None-Match': self.snapshot.etag} if self.snapshot.etag and not symbols else None
+        with self._fetch_lock:
+            try:
+                response = self._get(url, params, headers)
+                if response.status_code == 304:
+                    self.snapshot = replace(self.snapshot, fetched_at=time.time())
+                    if self.cache_path is not None:
+                        self._save_cache(self.snapshot)
+                    return list(self.snapshot.symbols_info.values())
+                response.raise_for_status() # Raise an exception for HTTP errors
+                data = response.json()
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Error fetching exchange info: {e}")
+                return []
+
+            parsed_symbols = [parse_symbol(symbol_data) for symbol_data in data.get("symbols", [])]
+            if symbols:
+                merged = dict(self.snapshot.symbols_info)
+                merged.update((s.exchange_symbol, s) for s in parsed_symbols)
+                self.snapshot = ExchangeInfoSnapshot.build(merged.values(), self.snapshot.fetched_at, self.snapshot.etag)
+            else:
+                self.snapshot = ExchangeInfoSnapshot.build(parsed_symbols, time.time(), response.headers.get('ETag'))
+                if self.cache_path is not None:
+                    self._save_cache(self.snapshot)
             return parsed_symbols
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching exchange info: {e}")
-            return []
+
+    def _get(self, url: str, params: Optional[dict], headers: Optional[dict]) -> requests.Response:
+        rate_limiter = self.rate_limiter
+        if rate_limiter is None:
+            return requests.get(url, params=params, headers=headers, timeout=self.timeout)
+        response = rate_limiter.call('exchange_info', lambda: requests.get(url, params=params, headers=headers,
+                                                                           timeout=self.timeout))
+        rate_limiter.observe_response(response.status_code, response.headers)
+        return response
+
+    def ensure_symbols(self, symbols: List[str]):
+        """Fetches only the given symbols that are missing from the snapshot."""
+        missing = [s.upper() for s in symbols if s.upper() not in self.symbols_info]
+        if missing:
+            self.fetch_exchange_info(missing)
+
+    def refresh_if_stale(self):
+        if self.is_stale:
+            self.fetch_exchange_info()
+
+    def _refresh_periodically(self, check_seconds: float):
+        while not self._stop_refreshing.wait(check_seconds):
+            try:
+                self.refresh_if_stale()
+            except Exception as e:
+                logger.error(f"Error refreshing exchange info: {e}")
+
+    def start_auto_refresh(self, check_seconds: float = 60):
+        """Refreshes the snapshot in the background whenever it outlives the TTL."""
+        self._stop_refreshing.clear()
+        self._refresh_thread = threading.Thread(target=self._refresh_periodically, args=(check_seconds,), daemon=True)
+        self._refresh_thread.start()
+
+    def stop_auto_refresh(self):
+        self._stop_refreshing.set()
+        if self._refresh_thread:
+            self._refresh_thread.join()
+            self._refresh_thread = None
 
     def get_symbol_info(self, exchange_symbol: str) -> Optional[SymbolInfo]:
         if not self.symbols_info:
             self.fetch_exchange_info() # Fetch if not already cached
-        return self.symbols_info.get(exchange_symbol.upper())
\ No newline at end of file
+        return self.symbols_info.get(exchange_symbol.upper())
+
+    def get_quantizer(self, exchange_symbol: str) -> Optional[SymbolQuantizer]:
+        if not self.quantizers:
+            self.fetch_exchange_info() # Fetch if not already cached
+        return self.quantizers.get(exchange_symbol.upper())
+
+    def get_by_global_symbol(self, global_symbol: str) -> Optional[SymbolInfo]:
+        return self.snapshot.by_global_symbol.get(global_symbol)
+
+    def symbols_with_base(self, asset: str, live_only: bool = False) -> List[str]:
+        """Exchange symbols whose base asset is ``asset``, e.g. BTC -> BTCUSDT, BTCEUR."""
+        snapshot = self.snapshot # One snapshot for both lookups
+        names = snapshot.by_base.get(asset.upper(), ())
+        return [n for n in names if n in snapshot.live] if live_only else list(names)
+
+    def symbols_with_quote(self, asset: str, live_only: bool = False) -> List[str]:
+        """Exchange symbols quoted in ``asset``; ``live_only`` keeps those currently trading."""
+        snapshot = self.snapshot
+        names = snapshot.by_quote.get(asset.upper(), ())
+        return [n for n in names if n in snapshot.live] if live_only else list(names)
+
+    def live_symbols(self) -> FrozenSet[str]:
+        return self.snapshot.live
+
+    def base_quote(self, exchange_symbol: str) -> Tuple[str, str]:
+        """(base, quote) assets from exchange info, falling back to ``split_symbol``."""
+        info = self.symbols_info.get(exchange_symbol.upper())
+        if info is None:
+            return split_symbol(exchange_symbol)
+        return info.price_ccy, info.price_quote_ccy
@@ -1,14 +1,148 @@
 from binance.client import Client # type: ignore
 from config.settings import settings
+from data.user_data_stream import BINANCE_TESTNET_USER_STREAM_URL, UserDataStream
 from models import AccountBalance, OrderInfo
+from trading.order_quantizer import SymbolQuantizer
+from trading.order_tracker import Bracket, OrderTracker
+from trading.rate_limiter import RequestRateLimiter
+from trading.symbol_info_manager import SymbolInfoManager
 from decimal import Decimal
+from typing import Any, Callable, Hashable
+import requests
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+class BalanceCache:
+    """Local copy of account balances and order states.
+
+    Seeded from an account snapshot (``Client.get_account``) and kept current
+    from user-data stream events, so sizing decisions read balances without a
+    REST round trip. Updates carry the exchange's account update time and
+    older ones are ignored, which keeps stream events and reconciliation
+    snapshots from overwriting each other out of order.
+    """
 
-class Trader:
     def __init__(self):
-        self.client = Client(settings.BINANCE_API_KEY, settings.BINANCE_API_SECRET, testnet=True)
+        self._lock = threading.Lock()
+        self._balances: dict[str, AccountBalance] = {}
+        self._update_times: dict[str, int] = {}
+        self.is_seeded = False
+
+    def _set_balance(self, asset: str, free: str, locked: str, update_time: int):
+        if update_time < self._update_times.get(asset, -1):
+            return
+        self._balances[asset] = AccountBalance(asset=asset, free=Decimal(free), locked=Decimal(locked))
+        self._update_times[asset] = update_time
+
+    def seed(self, account: dict):
+        update_time = account.get('updateTime', 0)
+        with self._lock:
+            for balance in account.get('balances', []):
+                self._set_balance(balance['asset'], balance['free'], balance['locked'], update_time)
+            self.is_seeded = True
+
+    def apply_event(self, event: dict):
+        # Order state from execution reports is kept by the Trader's OrderTracker
+        if event.get('e') != 'outboundAccountPosition':
+            return
+        with self._lock:
+            for balance in event['B']:
+                self._set_balance(balance['a'], balance['f'], balance['l'], event['u'])
+
+    def get(self, asset: str) -> AccountBalance | None:
+        with self._lock:
+            balance = self._balances.get(asset)
+            if balance is None and self.is_seeded:
+                # Reason: the snapshot lists every asset the account holds, so a
+                # missing asset in a seeded cache is a zero balance.
+                return AccountBalance(asset=asset, free=Decimal('0'), locked=Decimal('0'))
+            return balance
+
+class Trader:
+    def __init__(self, client: Client | None = None, symbol_info_manager: SymbolInfoManager | None = None,
+                 rate_limiter: RequestRateLimiter | None = None):
+        # The python-binance client keeps one requests.Session, so HTTP
+        # connections are reused across calls (and across order workers)
+        if client is None:
+            client = Client(settings.BINANCE_API_KEY, settings.BINANCE_API_SECRET, testnet=True)
+            # The live client gets exchange filters and rate limiting by default; injected clients opt in
+            rate_limiter = rate_limiter or RequestRateLimiter()
+            symbol_info_manager = symbol_info_manager or SymbolInfoManager(rate_limiter=rate_limiter)
+        self.client = client
+        # Rounds quantities and prices onto exchange filters before orders are sent
+        self.symbol_info_manager = symbol_info_manager
+        # Spaces REST calls under Binance's weight and order-rate limits, orders first
+        self.rate_limiter = rate_limiter
+        if symbol_info_manager is not None and symbol_info_manager.rate_limiter is None:
+            # exchangeInfo downloads come out of the same per-IP weight as orders
+            symbol_info_manager.rate_limiter = rate_limiter
+        session = getattr(client, 'session', None)
+        if rate_limiter is not None and isinstance(session, requests.Session):
+            # Every response, including 429/418s raised as exceptions, reports the server-side usage
+            session.hooks['response'].append(
+                lambda response, *args, **kwargs: rate_limiter.observe_response(response.status_code, response.headers))
+        self.balance_cache: BalanceCache | None = None
+        # Lifecycle of every order placed here, advanced by execution reports while balance tracking runs
+        self.order_tracker = OrderTracker()
+        self.user_data_stream: UserDataStream | None = None
+        self._stop_reconciling = threading.Event()
+        self._reconcile_thread: threading.Thread | None = None
+
+    def start_balance_tracking(self, stream_url: str = BINANCE_TESTNET_USER_STREAM_URL, reconcile_seconds: float = 300):
+        """Serves balances from a local cache fed by the user-data stream.
+
+        The cache is seeded from one account snapshot, updated from stream
+        events, and re-seeded every ``reconcile_seconds`` to repair anything
+        missed while the stream was down.
+        """
+        self.balance_cache = BalanceCache()
+        self.user_data_stream = UserDataStream(self.client, self._on_user_event, base_url=stream_url)
+        self.user_data_stream.start()
+        self.reconcile_balances()
+        self._stop_reconciling.clear()
+        self._reconcile_thread = threading.Thread(target=self._reconcile_periodically, args=(reconcile_seconds,), daemon=True)
+        self._reconcile_thread.start()
+
+    def stop_balance_tracking(self):
+        self._stop_reconciling.set()
+        if self.user_data_stream:
+            self.user_data_stream.stop()
+        if self._reconcile_thread:
+            self._reconcile_thread.join()
+        self.balance_cache = None
+
+    def _on_user_event(self, event: dict):
+        balance_cache = self.balance_cache
+        if balance_cache is not None:
+            balance_cache.apply_event(event)
+        self.order_tracker.apply_event(event)
+
+    def _request(self, endpoint: str, request: Callable[[], Any], coalesce_key: Hashable | None = None) -> Any:
+        """Sends a REST call through the rate limiter, if there is one; see ``rate_limiter.ENDPOINT_COSTS``."""
+        if self.rate_limiter is None:
+            return request()
+        return self.rate_limiter.call(endpoint, request, coalesce_key)
+
+    def reconcile_balances(self):
+        if self.balance_cache is not None:
+            self.balance_cache.seed(self._request('account', self.client.get_account, coalesce_key=('account',)))
+
+    def _reconcile_periodically(self, interval: float):
+        while not self._stop_reconciling.wait(interval):
+            try:
+                self.reconcile_balances()
+            except Exception as e:
+                logger.error(f"Error reconciling balances: {e}")
 
     def get_account_balance(self, asset: str) -> AccountBalance:
-        account_info = self.client.get_asset_balance(asset=asset) # type: ignore
+        if self.balance_cache is not None:
+            cached = self.balance_cache.get(asset)
+            if cached is not None:
+                return cached
+        account_info = self._request('account', lambda: self.client.get_asset_balance(asset=asset), # type: ignore
+                                     coalesce_key=('balance', asset))
         return AccountBalance(
             asset=asset,
             free=Decimal(account_info['free']),
@@ -16,7 +150,9 @@ class Trader:
         )
 
     def get_open_orders(self, symbol: str | None = None) -> list[OrderInfo]:
-        open_orders = self.client.get_open_orders(symbol=symbol)
+        open_orders = self._request('open_orders' if symbol else 'open_orders_all',
+                                    lambda: self.client.get_open_orders(symbol=symbol),
+                                    coalesce_key=('open_orders', symbol))
         orders = []
         for order in open_orders:
             orders.append(OrderInfo(
@@ -31,16 +167,37 @@ class Trader:
             ))
         return orders
 
-    def place_market_order(self, symbol: str, side: str, quantity: Decimal) -> dict:
+    def _quantizer(self, symbol: str) -> SymbolQuantizer | None:
+        if self.symbol_info_manager is None:
+            return None
+        return self.symbol_info_manager.get_quantizer(symbol)
+
+    def _format_quantity(self, symbol: str, quantity: Decimal, price: Decimal | None) -> str | float:
+        # Raises OrderFilterError instead of sending an order the exchange would reject
+        quantizer = self._quantizer(symbol)
+        if quantizer is None:
+            return float(quantity) # Binance API expects float for quantity
+        return f"{quantizer.check(quantity, price):f}"
+
+    def _format_price(self, symbol: str, price: Decimal) -> str:
+        quantizer = self._quantizer(symbol)
+        if quantizer is None:
+            return f"{price:.8f}" # Ensure proper precision for price
+        return quantizer.format_price(price)
+
+    def place_market_order(self, symbol: str, side: str, quantity: Decimal, reference_price: Decimal | None = None) -> dict:
         """
         Places a market order.
         side: 'BUY' or 'SELL'
+        reference_price: expected fill price, used for the min-notional check
         """
-        order = self.client.order_market(
+        formatted_quantity = self._format_quantity(symbol, quantity, reference_price)
+        order = self._request('order', lambda: self.client.order_market(
             symbol=symbol,
             side=side,
-            quantity=float(quantity) # Binance API expects float for quantity
-        )
+            quantity=formatted_quantity
+        ))
+        self.order_tracker.apply_response(order)
         return order
 
     def place_limit_order(self, symbol: str, side: str, quantity: Decimal, price: Decimal) -> dict:
@@ -48,12 +205,14 @@ class Trader:
         Places a limit order.
         side: 'BUY' or 'SELL'
         """
-        order = self.client.order_limit(
+        params = dict(
             symbol=symbol,
             side=side,
-            quantity=float(quantity),
-            price=f"{price:.8f}" # Ensure proper precision for price
+            quantity=self._format_quantity(symbol, quantity, price),
+            price=self._format_price(symbol, price)
         )
+        order = self._request('order', lambda: self.client.order_limit(**params))
+        self.order_tracker.apply_response(order)
         return order
 
     def place_stop_loss_limit_order(self, symbol: str, side: str, quantity: Decimal, price: Decimal, stop_price: Decimal) -> dict:
@@ -61,21 +220,60 @@ class Trader:
         Places a stop loss limit order.
         side: 'BUY' or 'SELL'
         """
-        order = self.client.order_stop_loss_limit(
+        # python-binance has no order_stop_loss_limit helper
+        params = dict(
             symbol=symbol,
             side=side,
-            quantity=float(quantity),
-            price=f"{price:.8f}",
-            stopPrice=f"{stop_price:.8f}"
+            type='STOP_LOSS_LIMIT',
+            timeInForce='GTC',
+            quantity=self._format_quantity(symbol, quantity, price),
+            price=self._format_price(symbol, price),
+            stopPrice=self._format_price(symbol, stop_price)
         )
+        order = self._request('order', lambda: self.client.create_order(**params))
+        self.order_tracker.apply_response(order)
         return order
 
+    def place_oco_bracket(self, symbol: str, quantity: Decimal, take_profit: Decimal, stop_price: Decimal,
+                          stop_limit_price: Decimal | None = None) -> Bracket:
+        """
+        Protects a long position with one SELL OCO order list: a LIMIT_MAKER
+        take-profit above the market and a STOP_LOSS_LIMIT below it. The
+        exchange places both atomically and cancels one when the other fills.
+        stop_limit_price: limit of the stop leg once triggered, defaults to stop_price
+        """
+        stop_limit_price = stop_limit_price if stop_limit_price is not None else stop_price
+        params = dict(
+            symbol=symbol,
+            side='SELL',
+            # The stop leg fills lowest, so it is the one the min-notional check must pass at
+            quantity=self._format_quantity(symbol, quantity, stop_limit_price),
+            aboveType='LIMIT_MAKER',
+            abovePrice=self._format_price(symbol, take_profit),
+            belowType='STOP_LOSS_LIMIT',
+            belowStopPrice=self._format_price(symbol, stop_price),
+            belowPrice=self._format_price(symbol, stop_limit_price),
+            belowTimeInForce='GTC'
+        )
+        response = self._request('order_list', lambda: self.client.create_oco_order(**params))
+        return self.order_tracker.apply_order_list(response)
+
+    def cancel_bracket(self, bracket: Bracket) -> dict:
+        """
+        Cancels both legs of an OCO bracket.
+        """
+        result = self._request('cancel_order_list', lambda: self.client.v3_delete_order_list(
+            symbol=bracket.symbol, orderListId=bracket.order_list_id))
+        self.order_tracker.apply_order_list(result)
+        return result
+
     def cancel_order(self, symbol: str, order_id: int) -> dict:
         """
         Cancels an open order.
         """
-        result = self.client.cancel_order(
+        result = self._request('cancel_order', lambda: self.client.cancel_order(
             symbol=symbol,
             orderId=order_id
-        )
-        return result
\ No newline at end of file
+        ))
+        self.order_tracker.apply_response(result)
+        return result